@@ -0,0 +1,27 @@
+from pydantic_settings import BaseSettings
+
+class Settings(BaseSettings):
+    # App settings
+    app_name: str = "PPT Generator AI Service"
+    debug: bool = True
+    
+    # Redis settings
+    redis_url: str = "redis://localhost:6379"
+    
+    # Model settings
+    structured_model: str = "deepseek-r1"   # reasoning / outlines
+    json_model: str = "qwen2.5"             # JSON slide output
+    
+    # Response cache settings
+    response_cache_ttl: int = 7 * 24 * 3600  # 1 week
+    
+    # Pub/Sub channels
+    channel_presentation_events: str = "presentation.events"
+    channel_task_updates: str = "task.updates"
+    
+    class Config:
+        env_file = ".env"
+        case_sensitive = False
+        extra = "ignore"  # .env may be the shared docker-compose one
+
+settings = Settings()
@@ -0,0 +1,97 @@
+from datetime import datetime
+from typing import AsyncIterator, List, Optional
+import redis.asyncio as redis
+import json
+import logging
+import time
+
+from ..core.config import settings
+from ..models.backends import ModelBackend
+from ..utils.json_stream import IncrementalSlideParser, StreamState
+
+logger = logging.getLogger(__name__)
+
+
+class SlideStreamGenerator:
+    """
+    Streams a deck from the JSON model and publishes each slide as soon as
+    its object closes, so the renderer can start on slide 1 while the rest
+    of the deck is still being generated.
+    """
+
+    def __init__(
+        self,
+        backend: ModelBackend,
+        redis_client: redis.Redis,
+        channels: Optional[List[str]] = None
+    ):
+        self.backend = backend
+        self.redis = redis_client
+        self.channels = channels or [settings.channel_task_updates, settings.channel_presentation_events]
+
+    async def _publish(self, event: dict):
+        message = json.dumps(event, default=str)
+        for channel in self.channels:
+            await self.redis.publish(channel, message)
+
+    async def stream_slides(
+        self,
+        prompt: str,
+        params: Optional[dict] = None,
+        parser: Optional[IncrementalSlideParser] = None
+    ) -> AsyncIterator[dict]:
+        """Yield slide dicts as the model produces them"""
+        parser = parser or IncrementalSlideParser()
+        async for fragment in self.backend.stream(prompt, params):
+            for slide in parser.feed(fragment):
+                yield slide
+            if parser.state.complete:
+                break
+        parser.close()
+
+    async def generate(
+        self,
+        prompt: str,
+        task_id: str,
+        presentation_id: Optional[str] = None,
+        params: Optional[dict] = None
+    ) -> StreamState:
+        """Generate a deck, publishing slide_generated events as slides complete"""
+        parser = IncrementalSlideParser()
+        started = time.perf_counter()
+        base_event = {"task_id": task_id, "presentation_id": presentation_id}
+
+        try:
+            async for slide in self.stream_slides(prompt, params, parser):
+                slide_index = parser.state.slides_emitted - 1
+                await self._publish({
+                    **base_event,
+                    "event": "slide_generated",
+                    "slide_index": slide_index,
+                    "slide": slide,
+                    "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+                    "timestamp": datetime.utcnow().isoformat()
+                })
+        except Exception as e:
+            logger.error(f"Slide generation failed for task {task_id}: {e}")
+            parser.close()
+            await self._publish({
+                **base_event,
+                "event": "slides_failed",
+                "slides_generated": parser.state.slides_emitted,
+                "error": str(e),
+                "timestamp": datetime.utcnow().isoformat()
+            })
+            raise
+
+        state = parser.state
+        await self._publish({
+            **base_event,
+            "event": "slides_completed" if state.complete and not state.errors else "slides_incomplete",
+            "slides_generated": state.slides_emitted,
+            "truncated": state.truncated,
+            "errors": [{"index": e.index, "message": e.message} for e in state.errors],
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+            "timestamp": datetime.utcnow().isoformat()
+        })
+        return state
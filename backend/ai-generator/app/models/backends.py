@@ -0,0 +1,87 @@
+from abc import ABC, abstractmethod
+from typing import AsyncIterator, Callable, List, Optional, Union
+import asyncio
+
+
+class ModelBackendError(Exception):
+    """Raised when a model backend call fails"""
+
+
+class ModelBackend(ABC):
+    """A model that can stream text for a prompt"""
+
+    name: str = "model"
+    max_batch_size: int = 1  # prompts per backend call; >1 if the server batches natively
+
+    @abstractmethod
+    def stream(self, prompt: str, params: Optional[dict] = None) -> AsyncIterator[str]:
+        """Yield generated text fragments as they arrive"""
+
+    async def generate(self, prompt: str, params: Optional[dict] = None) -> str:
+        """Generate the full response"""
+        parts = []
+        async for fragment in self.stream(prompt, params):
+            parts.append(fragment)
+        return "".join(parts)
+
+    async def generate_batch(self, prompts: List[str], params: Optional[dict] = None) -> List[str]:
+        """Generate responses for several prompts that share sampling parameters"""
+        return list(await asyncio.gather(*[self.generate(prompt, params) for prompt in prompts]))
+
+
+class FakeModelBackend(ModelBackend):
+    """
+    Local stand-in for DeepSeek/Qwen used by tests and benchmarks.
+
+    Streams a canned response in fixed-size fragments with an optional
+    per-fragment delay. `truncate_at` cuts the output off mid-stream, like a
+    model hitting max_tokens or a dropped connection; `fail_after` raises
+    after that many characters.
+
+    `generate_batch` models a batching inference server: one call costs
+    `call_latency` plus `per_item_latency` for each prompt in the batch.
+    """
+
+    def __init__(
+        self,
+        response: Union[str, Callable[[str], str]],
+        chunk_size: int = 8,
+        delay: float = 0.0,
+        truncate_at: Optional[int] = None,
+        fail_after: Optional[int] = None,
+        name: str = "fake",
+        max_batch_size: int = 32,
+        call_latency: float = 0.0,
+        per_item_latency: float = 0.0
+    ):
+        self.response = response
+        self.chunk_size = chunk_size
+        self.delay = delay
+        self.truncate_at = truncate_at
+        self.fail_after = fail_after
+        self.name = name
+        self.max_batch_size = max_batch_size
+        self.call_latency = call_latency
+        self.per_item_latency = per_item_latency
+        self.calls = 0
+        self.batch_calls = 0
+
+    async def stream(self, prompt: str, params: Optional[dict] = None) -> AsyncIterator[str]:
+        self.calls += 1
+        text = self.response(prompt) if callable(self.response) else self.response
+        if self.truncate_at is not None:
+            text = text[:self.truncate_at]
+
+        for start in range(0, len(text), self.chunk_size):
+            if self.fail_after is not None and start >= self.fail_after:
+                raise ModelBackendError(f"{self.name} stream failed after {start} characters")
+            if self.delay:
+                await asyncio.sleep(self.delay)
+            yield text[start:start + self.chunk_size]
+
+    async def generate_batch(self, prompts: List[str], params: Optional[dict] = None) -> List[str]:
+        self.batch_calls += 1
+        if len(prompts) > self.max_batch_size:
+            raise ModelBackendError(f"Batch of {len(prompts)} exceeds {self.name} limit of {self.max_batch_size}")
+        await asyncio.sleep(self.call_latency + self.per_item_latency * len(prompts))
+        return [self.response(prompt) if callable(self.response) else self.response for prompt in prompts]
@@ -0,0 +1,295 @@
+"""
+Prompt/response cache for model calls.
+
+Responses are stored compressed in Redis under a canonical hash of
+(model, normalized prompt, sampling parameters, input chunk hashes).
+Identical in-flight requests share one model call: within a process via
+a shared future, and across processes via a short Redis lock that other
+callers wait on instead of calling the model themselves.
+"""
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Union
+import redis.asyncio as redis
+import asyncio
+import hashlib
+import json
+import logging
+import re
+import time
+import unicodedata
+import uuid
+import zlib
+
+from ..core.config import settings
+
+logger = logging.getLogger(__name__)
+
+KEY_VERSION = 1
+
+# Parameters that change model output; anything else (timeouts, stream flags...) is ignored
+SAMPLING_PARAMS = (
+    "temperature", "top_p", "top_k", "min_p", "max_tokens", "seed", "stop",
+    "presence_penalty", "frequency_penalty", "repetition_penalty", "response_format"
+)
+
+_INLINE_WHITESPACE = re.compile(r"[ \t\f\v]+")
+_TRAILING_WHITESPACE = re.compile(r"[ \t]+\n")
+_BLANK_LINES = re.compile(r"\n{3,}")
+
+Prompt = Union[str, Iterable[dict]]
+
+
+def normalize_text(text: str) -> str:
+    """Normalize whitespace and Unicode form so cosmetic prompt edits still hit"""
+    text = unicodedata.normalize("NFC", text).replace("\r\n", "\n")
+    text = _INLINE_WHITESPACE.sub(" ", text)
+    text = _TRAILING_WHITESPACE.sub("\n", text)
+    text = _BLANK_LINES.sub("\n\n", text)
+    return text.strip()
+
+
+def normalize_prompt(prompt: Prompt) -> Any:
+    if isinstance(prompt, str):
+        return normalize_text(prompt)
+    return [
+        {"role": message.get("role", "user"), "content": normalize_text(message.get("content", ""))}
+        for message in prompt
+    ]
+
+
+def hash_chunk(text: str) -> str:
+    """Content hash for an input chunk, for use in `chunk_hashes`"""
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+def is_deterministic(params: dict) -> bool:
+    """
+    Greedy decoding, or sampling with a fixed seed, is safe to cache.
+
+    Temperature must be set explicitly: backends sample when it is left
+    out (Ollama defaults to 0.8).
+    """
+    return params.get("temperature") == 0 or params.get("seed") is not None
+
+
+class ResponseCache:
+    """
+    Redis-backed model response cache with single-flight.
+
+    `redis_client` must be created with decode_responses=False, since
+    values are stored as compressed bytes.
+    """
+
+    def __init__(
+        self,
+        redis_client: redis.Redis,
+        ttl: int = 7 * 24 * 3600,
+        prefix: str = "ai:response:",
+        compress_level: int = 6,
+        lock_timeout: float = 180.0,
+        poll_interval: float = 0.25
+    ):
+        self.redis = redis_client
+        self.ttl = ttl
+        self.prefix = prefix
+        self.compress_level = compress_level
+        self.lock_timeout = lock_timeout
+        self.poll_interval = poll_interval
+        self._in_flight: Dict[str, asyncio.Future] = {}
+
+        # Metrics
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self.coalesced = 0
+        self.remote_waits = 0
+        self.errors = 0
+        self.bytes_stored = 0
+        self.bytes_uncompressed = 0
+        self.model_seconds_saved = 0.0
+
+    @classmethod
+    def from_settings(cls, redis_client: redis.Redis) -> "ResponseCache":
+        return cls(redis_client, ttl=settings.response_cache_ttl)
+
+    def make_key(
+        self,
+        model: str,
+        prompt: Prompt,
+        params: Optional[dict] = None,
+        chunk_hashes: Iterable[str] = ()
+    ) -> str:
+        """Canonical cache key for a model call"""
+        params = params or {}
+        canonical = {
+            "v": KEY_VERSION,
+            "model": model,
+            "prompt": normalize_prompt(prompt),
+            "params": {name: params[name] for name in SAMPLING_PARAMS if params.get(name) is not None},
+            "chunks": list(chunk_hashes)
+        }
+        encoded = json.dumps(canonical, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+        return self.prefix + hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+    def _encode(self, value: Any, model_seconds: float) -> bytes:
+        raw = json.dumps({"value": value, "model_seconds": model_seconds}, separators=(",", ":")).encode("utf-8")
+        compressed = zlib.compress(raw, self.compress_level)
+        self.bytes_uncompressed += len(raw)
+        self.bytes_stored += len(compressed)
+        return compressed
+
+    @staticmethod
+    def _decode(data: bytes) -> dict:
+        return json.loads(zlib.decompress(data))
+
+    async def _lookup(self, key: str) -> Optional[dict]:
+        try:
+            data = await self.redis.get(key)
+            return self._decode(data) if data is not None else None
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"Response cache read failed for {key}: {e}")
+            return None
+
+    async def _store(self, key: str, value: Any, model_seconds: float):
+        try:
+            await self.redis.set(key, self._encode(value, model_seconds), ex=self.ttl)
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"Response cache write failed for {key}: {e}")
+
+    async def get_or_generate(
+        self,
+        model: str,
+        prompt: Prompt,
+        generate: Callable[[], Awaitable[Any]],
+        params: Optional[dict] = None,
+        chunk_hashes: Iterable[str] = (),
+        cache: Optional[bool] = None
+    ) -> Any:
+        """
+        Return a cached response or call `generate()` once for all identical callers.
+
+        `cache=None` caches only deterministic calls; pass True to force
+        caching of sampled output, or False to always call the model.
+        """
+        params = params or {}
+        use_cache = is_deterministic(params) if cache is None else cache
+        if not use_cache:
+            self.bypassed += 1
+            return await generate()
+
+        key = self.make_key(model, prompt, params, chunk_hashes)
+
+        # Join an identical call already running in this process
+        in_flight = self._in_flight.get(key)
+        if in_flight is not None:
+            self.coalesced += 1
+            try:
+                return await asyncio.shield(in_flight)
+            except asyncio.CancelledError:
+                # The leader was cancelled (e.g. its client went away); take over unless we were too
+                if asyncio.current_task().cancelling() or not in_flight.cancelled():
+                    raise
+                return await self.get_or_generate(model, prompt, generate, params, chunk_hashes, cache)
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            result = await self._resolve(key, generate)
+            future.set_result(result)
+            return result
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark the exception retrieved if nobody else was waiting
+            future.exception()
+            raise
+        finally:
+            del self._in_flight[key]
+
+    async def _resolve(self, key: str, generate: Callable[[], Awaitable[Any]]) -> Any:
+        cached = await self._lookup(key)
+        if cached is not None:
+            self.hits += 1
+            self.model_seconds_saved += cached.get("model_seconds", 0.0)
+            return cached["value"]
+
+        # Cross-process single-flight: one caller holds the lock, the others poll for its result
+        lock_key = f"{key}:lock"
+        token = uuid.uuid4().hex
+        acquired = await self._try_lock(lock_key, token)
+        if not acquired:
+            self.remote_waits += 1
+            deadline = time.monotonic() + self.lock_timeout
+            while time.monotonic() < deadline:
+                await asyncio.sleep(self.poll_interval)
+                cached = await self._lookup(key)
+                if cached is not None:
+                    self.hits += 1
+                    self.model_seconds_saved += cached.get("model_seconds", 0.0)
+                    return cached["value"]
+                acquired = await self._try_lock(lock_key, token)
+                if acquired:
+                    break
+
+        self.misses += 1
+        try:
+            started = time.perf_counter()
+            result = await generate()
+            await self._store(key, result, time.perf_counter() - started)
+            return result
+        finally:
+            if acquired:
+                await self._release_lock(lock_key, token)
+
+    async def _try_lock(self, lock_key: str, token: str) -> bool:
+        try:
+            return bool(await self.redis.set(lock_key, token, nx=True, px=int(self.lock_timeout * 1000)))
+        except Exception as e:
+            # Without Redis we can still serve the call, just without cross-process dedupe
+            self.errors += 1
+            logger.warning(f"Response cache lock failed for {lock_key}: {e}")
+            return True
+
+    async def _release_lock(self, lock_key: str, token: str):
+        try:
+            # Only delete the lock if it's still ours
+            await self.redis.eval(
+                "if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('del', KEYS[1]) end return 0",
+                1, lock_key, token
+            )
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"Response cache unlock failed for {lock_key}: {e}")
+
+    async def invalidate(self, key: str):
+        await self.redis.delete(key)
+
+    async def eviction_stats(self) -> dict:
+        """Redis-side memory and eviction counters (the instance runs allkeys-lru)"""
+        stats = await self.redis.info("stats")
+        memory = await self.redis.info("memory")
+        return {
+            "evicted_keys": stats.get("evicted_keys", 0),
+            "expired_keys": stats.get("expired_keys", 0),
+            "used_memory": memory.get("used_memory", 0),
+            "maxmemory": memory.get("maxmemory", 0),
+            "maxmemory_policy": memory.get("maxmemory_policy")
+        }
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "bypassed": self.bypassed,
+            "coalesced": self.coalesced,
+            "remote_waits": self.remote_waits,
+            "errors": self.errors,
+            "in_flight": len(self._in_flight),
+            "compression_ratio": round(self.bytes_uncompressed / self.bytes_stored, 2) if self.bytes_stored else 0.0,
+            "model_seconds_saved": round(self.model_seconds_saved, 3)
+        }
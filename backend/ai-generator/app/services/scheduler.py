@@ -0,0 +1,285 @@
+"""
+Request batching and concurrency scheduler for model backends.
+
+Small model calls (outlines, per-slide bullets, chart datasets, image
+suggestions) are queued per model, gathered over a short window into
+batches of requests with identical sampling parameters, and dispatched
+under a per-model concurrency limit and tokens-per-minute budget.
+Interactive requests are always dispatched ahead of batch requests.
+"""
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import Dict, List, Optional
+import asyncio
+import heapq
+import itertools
+import json
+import logging
+import time
+
+from ..models.backends import ModelBackend
+from .response_cache import ResponseCache
+
+logger = logging.getLogger(__name__)
+
+
+class Priority(IntEnum):
+    INTERACTIVE = 0
+    BATCH = 1
+
+
+class SchedulerClosed(Exception):
+    """Raised for requests submitted to, or still queued in, a stopped scheduler"""
+
+
+@dataclass
+class ModelLimits:
+    max_concurrency: int = 4             # backend calls in flight
+    tokens_per_minute: Optional[int] = None
+    max_batch_size: Optional[int] = None  # defaults to the backend's own limit
+    batch_window: float = 0.01           # seconds to wait for compatible requests
+
+
+@dataclass(order=True)
+class _Request:
+    priority: int
+    seq: int
+    prompt: str = field(compare=False)
+    params: dict = field(compare=False)
+    batch_key: str = field(compare=False)
+    tokens: int = field(compare=False)
+    future: asyncio.Future = field(compare=False)
+    enqueued_at: float = field(compare=False)
+
+
+def estimate_request_tokens(prompt: str, params: dict) -> int:
+    """Prompt tokens (~4 bytes each) plus the completion budget"""
+    return (len(prompt.encode("utf-8")) + 3) // 4 + int(params.get("max_tokens", 256))
+
+
+class _TokenBucket:
+    def __init__(self, tokens_per_minute: int):
+        self.capacity = tokens_per_minute
+        self.tokens = float(tokens_per_minute)
+        self.rate = tokens_per_minute / 60.0
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, amount: int):
+        # A single batch larger than the whole budget waits for a full bucket
+        amount = min(amount, self.capacity)
+        while True:
+            self._refill()
+            if self.tokens >= amount:
+                self.tokens -= amount
+                return
+            await asyncio.sleep((amount - self.tokens) / self.rate)
+
+
+class _ModelQueue:
+    def __init__(self, backend: ModelBackend, limits: ModelLimits):
+        self.backend = backend
+        self.limits = limits
+        self.max_batch_size = max(1, limits.max_batch_size or backend.max_batch_size)
+        self.heap: List[_Request] = []
+        self.ready = asyncio.Event()
+        self.slots = asyncio.Semaphore(limits.max_concurrency)
+        self.bucket = _TokenBucket(limits.tokens_per_minute) if limits.tokens_per_minute else None
+        self.dispatcher: Optional[asyncio.Task] = None
+        self.running: set = set()
+
+        # Metrics
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.batches = 0
+        self.batched_requests = 0
+        self.queue_wait_by_priority: Dict[int, List[float]] = {p: [0.0, 0] for p in Priority}
+
+    def take_batch(self) -> List[_Request]:
+        """Pop the highest-priority request plus compatible ones, in priority order"""
+        while self.heap and self.heap[0].future.done():
+            heapq.heappop(self.heap)  # cancelled while queued
+        if not self.heap:
+            return []
+
+        head = heapq.heappop(self.heap)
+        batch = [head]
+        if self.max_batch_size > 1 and self.heap:
+            remaining = []
+            for request in sorted(self.heap):
+                if request.future.done():
+                    continue
+                if len(batch) < self.max_batch_size and request.batch_key == head.batch_key:
+                    batch.append(request)
+                else:
+                    remaining.append(request)
+            heapq.heapify(remaining)
+            self.heap = remaining
+        return batch
+
+
+class BatchScheduler:
+    """
+    Per-model batching, concurrency and TPM scheduling in front of ModelBackends.
+
+    With a response_cache, deterministic calls are answered from the cache
+    and identical calls share one backend call before they are queued.
+    """
+
+    def __init__(
+        self,
+        backends: Dict[str, ModelBackend],
+        limits: Optional[Dict[str, ModelLimits]] = None,
+        response_cache: Optional[ResponseCache] = None
+    ):
+        self.response_cache = response_cache
+        limits = limits or {}
+        self._queues = {
+            model: _ModelQueue(backend, limits.get(model, ModelLimits()))
+            for model, backend in backends.items()
+        }
+        self._seq = itertools.count()
+        self._closed = False
+
+    def start(self):
+        for model, queue in self._queues.items():
+            if queue.dispatcher is None:
+                queue.dispatcher = asyncio.create_task(self._dispatch(model, queue))
+
+    async def stop(self):
+        """Stop dispatching; waits for in-flight backend calls and fails queued requests"""
+        self._closed = True
+        for queue in self._queues.values():
+            if queue.dispatcher is not None:
+                queue.dispatcher.cancel()
+                try:
+                    await queue.dispatcher
+                except asyncio.CancelledError:
+                    pass
+                queue.dispatcher = None
+            if queue.running:
+                await asyncio.gather(*queue.running, return_exceptions=True)
+            for request in queue.heap:
+                if not request.future.done():
+                    request.future.set_exception(SchedulerClosed("Scheduler stopped"))
+            queue.heap = []
+
+    async def submit(
+        self,
+        model: str,
+        prompt: str,
+        params: Optional[dict] = None,
+        priority: Priority = Priority.INTERACTIVE,
+        cache: Optional[bool] = None
+    ) -> str:
+        """
+        Queue a prompt and wait for its response.
+
+        `cache` is passed to ResponseCache.get_or_generate: None caches only
+        deterministic calls.
+        """
+        if self.response_cache is None:
+            return await self._enqueue(model, prompt, params, priority)
+        return await self.response_cache.get_or_generate(
+            model, prompt, lambda: self._enqueue(model, prompt, params, priority), params, cache=cache
+        )
+
+    async def _enqueue(self, model: str, prompt: str, params: Optional[dict], priority: Priority) -> str:
+        if self._closed:
+            raise SchedulerClosed("Scheduler stopped")
+        queue = self._queues.get(model)
+        if queue is None:
+            raise KeyError(f"No backend registered for model {model}")
+        if queue.dispatcher is None:
+            self.start()
+
+        params = params or {}
+        request = _Request(
+            priority=int(priority),
+            seq=next(self._seq),
+            prompt=prompt,
+            params=params,
+            batch_key=json.dumps(params, sort_keys=True, default=str),
+            tokens=estimate_request_tokens(prompt, params),
+            future=asyncio.get_running_loop().create_future(),
+            enqueued_at=time.monotonic()
+        )
+        heapq.heappush(queue.heap, request)
+        queue.submitted += 1
+        queue.ready.set()
+        return await request.future
+
+    async def _dispatch(self, model: str, queue: _ModelQueue):
+        while True:
+            await queue.ready.wait()
+
+            # Give compatible requests a moment to arrive, unless a full batch is already waiting
+            if queue.limits.batch_window and len(queue.heap) < queue.max_batch_size:
+                await asyncio.sleep(queue.limits.batch_window)
+
+            await queue.slots.acquire()
+            batch = queue.take_batch()
+            if not queue.heap:
+                queue.ready.clear()
+            if not batch:
+                queue.slots.release()
+                continue
+
+            if queue.bucket is not None:
+                await queue.bucket.acquire(sum(request.tokens for request in batch))
+
+            task = asyncio.create_task(self._run_batch(model, queue, batch))
+            queue.running.add(task)
+            task.add_done_callback(queue.running.discard)
+
+    async def _run_batch(self, model: str, queue: _ModelQueue, batch: List[_Request]):
+        started = time.monotonic()
+        for request in batch:
+            wait = started - request.enqueued_at
+            totals = queue.queue_wait_by_priority[request.priority]
+            totals[0] += wait
+            totals[1] += 1
+        queue.batches += 1
+        queue.batched_requests += len(batch)
+
+        try:
+            responses = await queue.backend.generate_batch(
+                [request.prompt for request in batch], batch[0].params
+            )
+            if len(responses) != len(batch):
+                raise RuntimeError(f"{model} returned {len(responses)} responses for {len(batch)} prompts")
+            for request, response in zip(batch, responses):
+                if not request.future.done():
+                    request.future.set_result(response)
+            queue.completed += len(batch)
+        except Exception as e:
+            logger.error(f"Batch of {len(batch)} for {model} failed: {e}")
+            queue.failed += len(batch)
+            for request in batch:
+                if not request.future.done():
+                    request.future.set_exception(e)
+        finally:
+            queue.slots.release()
+
+    def stats(self) -> dict:
+        result = {}
+        for model, queue in self._queues.items():
+            result[model] = {
+                "queued": len(queue.heap),
+                "in_flight_batches": len(queue.running),
+                "submitted": queue.submitted,
+                "completed": queue.completed,
+                "failed": queue.failed,
+                "batches": queue.batches,
+                "avg_batch_size": round(queue.batched_requests / queue.batches, 2) if queue.batches else 0.0,
+                "avg_queue_wait_ms": {
+                    Priority(priority).name.lower(): round(total / count * 1000, 2) if count else 0.0
+                    for priority, (total, count) in queue.queue_wait_by_priority.items()
+                }
+            }
+        return result
@@ -0,0 +1,161 @@
+"""
+Incremental JSON parser for streamed slide decks.
+
+Model output is fed in arbitrary text fragments. Each element of the deck's
+`slides` array (or of a top-level array) is emitted as soon as its closing
+brace arrives, so downstream work can start on slide 1 while later slides
+are still being generated. Only the slide currently being received is
+buffered.
+"""
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+import json
+import re
+
+_TRAILING_COMMA = re.compile(r",\s*([}\]])")
+
+
+@dataclass
+class ParseError:
+    index: int
+    message: str
+    fragment: str
+
+
+@dataclass
+class _Container:
+    kind: str                   # "{" or "["
+    key: Optional[str] = None   # key this container is the value of
+    expecting_key: bool = True  # objects only
+
+
+@dataclass
+class StreamState:
+    slides_emitted: int = 0
+    errors: List[ParseError] = field(default_factory=list)
+    truncated: bool = False
+    complete: bool = False
+
+
+class IncrementalSlideParser:
+    """Feed text with `feed()`; collect completed slide dicts from its return value"""
+
+    def __init__(self, array_key: str = "slides"):
+        self.array_key = array_key
+        self.state = StreamState()
+        self._stack: List[_Container] = []
+        self._in_string = False
+        self._escape = False
+        self._string_chars: List[str] = []
+        self._last_string: Optional[str] = None
+        self._started = False
+        self._thinking = False
+        self._preamble = ""
+        self._slide_buffer: Optional[List[str]] = None
+        self._slide_depth = 0
+
+    def _in_slides_array(self) -> bool:
+        if not self._stack or self._stack[-1].kind != "[":
+            return False
+        array = self._stack[-1]
+        # A bare top-level array is treated as the slide list
+        return array.key == self.array_key or len(self._stack) == 1
+
+    def feed(self, text: str) -> List[dict]:
+        """Consume a fragment of model output; return slides completed by it"""
+        completed = []
+        for char in text:
+            if self.state.complete:
+                break
+
+            if not self._started:
+                # Skip preambles, <think> blocks and ``` fences before the JSON value
+                self._preamble = (self._preamble + char)[-8:]
+                if self._thinking:
+                    if self._preamble.endswith("</think>"):
+                        self._thinking = False
+                    continue
+                if self._preamble.endswith("<think>"):
+                    self._thinking = True
+                    continue
+                if char not in "{[":
+                    continue
+                self._started = True
+
+            if self._slide_buffer is not None:
+                self._slide_buffer.append(char)
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    self._last_string = "".join(self._string_chars)
+                    self._string_chars = []
+                elif len(self._string_chars) < 256:
+                    # Only keys are needed; long string values aren't kept here
+                    self._string_chars.append(char)
+                continue
+
+            if char == '"':
+                self._in_string = True
+            elif char == ":":
+                if self._stack and self._stack[-1].kind == "{":
+                    self._stack[-1].expecting_key = False
+            elif char == ",":
+                if self._stack and self._stack[-1].kind == "{":
+                    self._stack[-1].expecting_key = True
+            elif char in "{[":
+                key = None
+                if self._stack and self._stack[-1].kind == "{":
+                    key = self._last_string
+                if char == "{" and self._slide_buffer is None and self._in_slides_array():
+                    self._slide_buffer = [char]
+                    self._slide_depth = len(self._stack) + 1
+                self._stack.append(_Container(char, key))
+            elif char in "}]":
+                if not self._stack:
+                    continue
+                self._stack.pop()
+                if self._slide_buffer is not None and char == "}" and len(self._stack) == self._slide_depth - 1:
+                    slide = self._finish_slide("".join(self._slide_buffer))
+                    self._slide_buffer = None
+                    if slide is not None:
+                        completed.append(slide)
+                if not self._stack:
+                    self.state.complete = True
+        return completed
+
+    def _finish_slide(self, fragment: str) -> Optional[dict]:
+        index = self.state.slides_emitted + len(self.state.errors)
+        for candidate in (fragment, _TRAILING_COMMA.sub(r"\1", fragment)):
+            try:
+                slide = json.loads(candidate)
+            except ValueError:
+                continue
+            if isinstance(slide, dict):
+                self.state.slides_emitted += 1
+                return slide
+        self.state.errors.append(ParseError(index, "Malformed slide object", fragment[:500]))
+        return None
+
+    def close(self) -> StreamState:
+        """Mark the end of the stream; reports whether output was cut off"""
+        if not self.state.complete:
+            self.state.truncated = True
+            if self._slide_buffer is not None:
+                index = self.state.slides_emitted + len(self.state.errors)
+                self.state.errors.append(
+                    ParseError(index, "Truncated slide object", "".join(self._slide_buffer)[:500])
+                )
+                self._slide_buffer = None
+        return self.state
+
+
+def parse_slides(text: str, array_key: str = "slides") -> Tuple[List[dict], StreamState]:
+    """Parse a complete response in one go; returns (slides, state)"""
+    parser = IncrementalSlideParser(array_key)
+    slides = parser.feed(text)
+    return slides, parser.close()
@@ -0,0 +1,60 @@
+from dataclasses import dataclass, field
+from typing import List
+
+
+@dataclass
+class PageResult:
+    """Text extracted from one page (PDF) or section (DOCX/TXT)"""
+    index: int
+    text: str
+    extract_seconds: float
+    queue_seconds: float = 0.0
+    source: str = "text"  # text, ocr or ocr_cache
+
+    @property
+    def char_count(self) -> int:
+        return len(self.text)
+
+
+@dataclass
+class ExtractionStats:
+    """Per-job timing and memory statistics"""
+    file_path: str
+    file_type: str
+    total_pages: int = 0
+    pages_yielded: int = 0
+    total_chars: int = 0
+    wall_seconds: float = 0.0
+    peak_buffered_bytes: int = 0
+    ocr_pages: int = 0
+    ocr_cache_hits: int = 0
+    ocr_seconds: float = 0.0
+    ocr_seconds_saved: float = 0.0
+    page_seconds: List[float] = field(default_factory=list)
+
+    def summary(self) -> dict:
+        timings = sorted(self.page_seconds)
+
+        def pct(p: float) -> float:
+            if not timings:
+                return 0.0
+            return round(timings[min(len(timings) - 1, int(len(timings) * p))] * 1000, 2)
+
+        cpu_seconds = sum(timings)
+        return {
+            "file_type": self.file_type,
+            "total_pages": self.total_pages,
+            "pages_yielded": self.pages_yielded,
+            "total_chars": self.total_chars,
+            "wall_seconds": round(self.wall_seconds, 3),
+            "extract_seconds": round(cpu_seconds, 3),
+            "parallel_speedup": round(cpu_seconds / self.wall_seconds, 2) if self.wall_seconds else 0.0,
+            "page_ms_p50": pct(0.50),
+            "page_ms_p95": pct(0.95),
+            "page_ms_max": pct(1.0),
+            "peak_buffered_bytes": self.peak_buffered_bytes,
+            "ocr_pages": self.ocr_pages,
+            "ocr_cache_hits": self.ocr_cache_hits,
+            "ocr_seconds": round(self.ocr_seconds, 3),
+            "ocr_seconds_saved": round(self.ocr_seconds_saved, 3)
+        }
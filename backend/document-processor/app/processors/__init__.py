@@ -0,0 +1,8 @@
+from .engine import (
+    ExtractionEngine,
+    ExtractionError,
+    ExtractionJob,
+    ExtractionMemoryLimitExceeded,
+    SUPPORTED_TYPES
+)
+from .ocr import OcrCache, OcrStage
@@ -0,0 +1,210 @@
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from typing import Dict, Iterator, Optional, Tuple
+import multiprocessing
+import logging
+import os
+import time
+
+from ..models.extraction import ExtractionStats, PageResult
+from .ocr import OcrStage, ocr_pdf_pages
+from . import extractors
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_TYPES = (".pdf", ".docx", ".txt")
+
+
+class ExtractionError(Exception):
+    """Raised when a document cannot be extracted"""
+
+
+class ExtractionMemoryLimitExceeded(ExtractionError):
+    """Raised when a single page does not fit in the job's memory ceiling"""
+
+
+class ExtractionEngine:
+    """
+    Parallel page-level document extraction.
+
+    PDF pages are extracted in batches across a process pool and yielded in
+    page order as soon as the next page is available. At most
+    `max_in_flight` batches are outstanding per job, and no new batches are
+    submitted while completed-but-unconsumed text exceeds `max_buffer_bytes`.
+
+    With an `OcrStage`, pages whose text layer is empty are sent back to the
+    pool for rasterization and OCR before they are yielded.
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        pages_per_task: int = 4,
+        max_in_flight: Optional[int] = None,
+        max_buffer_bytes: int = 64 * 1024 * 1024,
+        ocr: Optional[OcrStage] = None
+    ):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.pages_per_task = max(1, pages_per_task)
+        self.max_in_flight = max_in_flight or self.max_workers * 2
+        self.max_buffer_bytes = max_buffer_bytes
+        self.ocr = ocr
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def start(self):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+            logger.info(f"Extraction engine started with {self.max_workers} workers")
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
+
+    def extract(self, file_path: str) -> "ExtractionJob":
+        """Start an extraction job; iterate the result to receive pages in order"""
+        file_type = os.path.splitext(file_path)[1].lower()
+        if file_type not in SUPPORTED_TYPES:
+            raise ExtractionError(f"Unsupported document type: {file_type}")
+        if not os.path.exists(file_path):
+            raise ExtractionError(f"File not found: {file_path}")
+        self.start()
+        return ExtractionJob(self, file_path, file_type)
+
+
+class ExtractionJob:
+    """A single document extraction; a one-shot iterator of PageResult"""
+
+    def __init__(self, engine: ExtractionEngine, file_path: str, file_type: str):
+        self.engine = engine
+        self.file_path = file_path
+        self.file_type = file_type
+        self.stats = ExtractionStats(file_path=file_path, file_type=file_type)
+        self._iterator: Optional[Iterator[PageResult]] = None
+
+    def __iter__(self) -> Iterator[PageResult]:
+        if self._iterator is None:
+            self._iterator = self._run()
+        return self._iterator
+
+    def _record(self, page: PageResult) -> PageResult:
+        self.stats.pages_yielded += 1
+        self.stats.total_chars += page.char_count
+        self.stats.page_seconds.append(page.extract_seconds)
+        return page
+
+    def _run(self) -> Iterator[PageResult]:
+        started = time.perf_counter()
+        try:
+            if self.file_type == ".pdf":
+                yield from self._run_pdf()
+            elif self.file_type == ".docx":
+                yield from self._run_docx()
+            else:
+                yield from self._run_text()
+        finally:
+            self.stats.wall_seconds = time.perf_counter() - started
+            logger.info(f"Extraction finished for {self.file_path}: {self.stats.summary()}")
+
+    def _run_pdf(self) -> Iterator[PageResult]:
+        executor = self.engine._executor
+        total = executor.submit(extractors.pdf_page_count, self.file_path).result()
+        self.stats.total_pages = total
+        batch = self.engine.pages_per_task
+
+        next_start = 0        # next page to submit
+        next_index = 0        # next page to yield
+        buffered: Dict[int, PageResult] = {}
+        buffered_bytes = 0
+        in_flight: Dict[Future, Tuple[str, float]] = {}
+        ocr = self.engine.ocr
+
+        def buffer_page(page: PageResult):
+            nonlocal buffered_bytes
+            size = len(page.text.encode("utf-8"))
+            if size > self.engine.max_buffer_bytes:
+                raise ExtractionMemoryLimitExceeded(
+                    f"Page {page.index} of {self.file_path} is {size} bytes, "
+                    f"over the {self.engine.max_buffer_bytes} byte job limit"
+                )
+            buffered[page.index] = page
+            buffered_bytes += size
+
+        try:
+            while next_index < total:
+                # Fill the window unless the reassembly buffer is over its ceiling
+                while (
+                    next_start < total
+                    and len(in_flight) < self.engine.max_in_flight
+                    and (buffered_bytes < self.engine.max_buffer_bytes or not buffered)
+                ):
+                    end = min(next_start + batch, total)
+                    future = executor.submit(extractors.extract_pdf_pages, self.file_path, next_start, end)
+                    in_flight[future] = ("text", time.perf_counter())
+                    next_start = end
+
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    kind, submitted_at = in_flight.pop(future)
+                    units = future.result()
+                    batch_seconds = sum(unit[2] for unit in units)
+                    queue_seconds = max(0.0, time.perf_counter() - submitted_at - batch_seconds)
+
+                    if kind == "ocr":
+                        for index, text, seconds, cache_hit, seconds_saved in units:
+                            self.stats.ocr_pages += 1
+                            if cache_hit:
+                                self.stats.ocr_cache_hits += 1
+                                self.stats.ocr_seconds_saved += seconds_saved
+                            else:
+                                self.stats.ocr_seconds += seconds
+                            source = "ocr_cache" if cache_hit else "ocr"
+                            buffer_page(PageResult(index, text, seconds, queue_seconds, source))
+                        continue
+
+                    scanned = []
+                    for index, text, seconds in units:
+                        if ocr is not None and ocr.needs_ocr(text):
+                            scanned.append(index)
+                        else:
+                            buffer_page(PageResult(index, text, seconds, queue_seconds))
+                    if scanned:
+                        future = executor.submit(ocr_pdf_pages, self.file_path, scanned, ocr)
+                        in_flight[future] = ("ocr", time.perf_counter())
+                self.stats.peak_buffered_bytes = max(self.stats.peak_buffered_bytes, buffered_bytes)
+
+                # Ordered reassembly
+                while next_index in buffered:
+                    page = buffered.pop(next_index)
+                    buffered_bytes -= len(page.text.encode("utf-8"))
+                    next_index += 1
+                    yield self._record(page)
+        finally:
+            for future in in_flight:
+                future.cancel()
+
+    def _run_docx(self) -> Iterator[PageResult]:
+        units = self.engine._executor.submit(extractors.extract_docx_sections, self.file_path).result()
+        self.stats.total_pages = len(units)
+        while units:
+            # Release sections as they are consumed
+            index, text, seconds = units.pop(0)
+            yield self._record(PageResult(index, text, seconds))
+
+    def _run_text(self) -> Iterator[PageResult]:
+        # Plain text is I/O bound; streaming it in-process keeps memory at one section
+        started = time.perf_counter()
+        for index, text in enumerate(extractors.iter_text_sections(self.file_path)):
+            elapsed = time.perf_counter() - started
+            self.stats.total_pages = index + 1
+            yield self._record(PageResult(index, text, elapsed))
+            started = time.perf_counter()
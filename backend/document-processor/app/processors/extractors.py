@@ -0,0 +1,83 @@
+"""
+Format-specific text extraction.
+
+Functions that run inside pool workers are module-level so they can be
+pickled; each worker keeps its own small cache of open readers so that a
+job's page ranges don't reparse the document's cross-reference table.
+"""
+from functools import lru_cache
+from typing import Iterator, List, Tuple
+import os
+import time
+
+from PyPDF2 import PdfReader
+import docx
+
+# (index, text, seconds spent extracting)
+UnitResult = Tuple[int, str, float]
+
+
+@lru_cache(maxsize=8)
+def _open_pdf(path: str, mtime: float) -> PdfReader:
+    return PdfReader(path)
+
+def get_pdf_reader(path: str) -> PdfReader:
+    """Per-process cached reader; reopened if the file changes"""
+    return _open_pdf(path, os.path.getmtime(path))
+
+def pdf_page_count(path: str) -> int:
+    return len(get_pdf_reader(path).pages)
+
+def extract_pdf_pages(path: str, start: int, end: int) -> List[UnitResult]:
+    """Extract the text layer of pages [start, end)"""
+    reader = get_pdf_reader(path)
+    results = []
+    for index in range(start, end):
+        started = time.perf_counter()
+        text = reader.pages[index].extract_text() or ""
+        results.append((index, text, time.perf_counter() - started))
+    return results
+
+
+def _is_heading(paragraph) -> bool:
+    style_name = paragraph.style.name if paragraph.style is not None else ""
+    return style_name.startswith("Heading") or style_name == "Title"
+
+def extract_docx_sections(path: str) -> List[UnitResult]:
+    """Split a DOCX into heading-delimited sections (one XML parse per document)"""
+    started = time.perf_counter()
+    document = docx.Document(path)
+    sections, current = [], []
+    for paragraph in document.paragraphs:
+        if _is_heading(paragraph) and current:
+            sections.append("\n".join(current))
+            current = []
+        if paragraph.text.strip():
+            current.append(paragraph.text)
+    if current:
+        sections.append("\n".join(current))
+
+    per_section = (time.perf_counter() - started) / max(len(sections), 1)
+    return [(index, text, per_section) for index, text in enumerate(sections)]
+
+
+def iter_text_sections(path: str, target_chars: int = 64 * 1024, encoding: str = "utf-8") -> Iterator[str]:
+    """
+    Stream a plain-text file as sections of roughly `target_chars`,
+    split on blank lines where possible. Memory is bounded by one section.
+    """
+    buffer: List[str] = []
+    size = 0
+    with open(path, "r", encoding=encoding, errors="replace") as handle:
+        for line in handle:
+            buffer.append(line)
+            size += len(line)
+            if size >= target_chars and not line.strip():
+                yield "".join(buffer)
+                buffer, size = [], 0
+            elif size >= target_chars * 2:
+                # No paragraph break in sight; cut at the line boundary
+                yield "".join(buffer)
+                buffer, size = [], 0
+    if buffer:
+        yield "".join(buffer)
@@ -0,0 +1,180 @@
+"""
+OCR stage for scanned PDF pages.
+
+Pages without a usable text layer are rasterized and OCRed in pool
+workers. Results are cached on disk keyed by a hash of the normalized page
+image, so repeated letterheads, boilerplate appendices and standard legal
+pages are only OCRed once.
+"""
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+import hashlib
+import logging
+import os
+import sqlite3
+import time
+
+from pdf2image import convert_from_path
+from PIL import ImageOps
+import pytesseract
+
+logger = logging.getLogger(__name__)
+
+# (index, text, seconds spent, cache hit, OCR seconds saved by the cache)
+OcrResult = Tuple[int, str, float, bool, float]
+
+
+class OcrCache:
+    """
+    Size-bounded on-disk OCR result store (SQLite, safe across pool workers).
+
+    Entries are evicted least-recently-used first once the total stored
+    text exceeds `max_bytes`.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 512 * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS ocr_results (
+                    key TEXT PRIMARY KEY,
+                    text TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    ocr_seconds REAL NOT NULL,
+                    hits INTEGER NOT NULL DEFAULT 0,
+                    last_access REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_ocr_results_last_access ON ocr_results(last_access)")
+            conn.execute("CREATE TABLE IF NOT EXISTS ocr_meta (id INTEGER PRIMARY KEY CHECK (id = 1), total_bytes INTEGER NOT NULL)")
+            conn.execute("INSERT OR IGNORE INTO ocr_meta (id, total_bytes) VALUES (1, 0)")
+            self._conn = conn
+        return self._conn
+
+    def get(self, key: str) -> Optional[Tuple[str, float]]:
+        """Return (text, original OCR seconds) for a cached page"""
+        conn = self._connect()
+        row = conn.execute("SELECT text, ocr_seconds FROM ocr_results WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        conn.execute(
+            "UPDATE ocr_results SET hits = hits + 1, last_access = ? WHERE key = ?",
+            (time.time(), key)
+        )
+        return row[0], row[1]
+
+    def put(self, key: str, text: str, ocr_seconds: float):
+        conn = self._connect()
+        size = len(text.encode("utf-8")) + len(key)
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            previous = conn.execute("SELECT size FROM ocr_results WHERE key = ?", (key,)).fetchone()
+            conn.execute(
+                "INSERT OR REPLACE INTO ocr_results (key, text, size, ocr_seconds, last_access) VALUES (?, ?, ?, ?, ?)",
+                (key, text, size, ocr_seconds, time.time())
+            )
+            delta = size - (previous[0] if previous else 0)
+            conn.execute("UPDATE ocr_meta SET total_bytes = total_bytes + ? WHERE id = 1", (delta,))
+            self._evict(conn)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _evict(self, conn: sqlite3.Connection):
+        total = conn.execute("SELECT total_bytes FROM ocr_meta WHERE id = 1").fetchone()[0]
+        while total > self.max_bytes:
+            rows = conn.execute(
+                "SELECT key, size FROM ocr_results ORDER BY last_access LIMIT 64"
+            ).fetchall()
+            if not rows:
+                break
+            for key, size in rows:
+                conn.execute("DELETE FROM ocr_results WHERE key = ?", (key,))
+                total -= size
+                if total <= self.max_bytes:
+                    break
+        conn.execute("UPDATE ocr_meta SET total_bytes = ? WHERE id = 1", (max(total, 0),))
+
+    def stats(self) -> dict:
+        conn = self._connect()
+        entries, hits = conn.execute("SELECT COUNT(*), COALESCE(SUM(hits), 0) FROM ocr_results").fetchone()
+        total = conn.execute("SELECT total_bytes FROM ocr_meta WHERE id = 1").fetchone()[0]
+        return {"entries": entries, "hits": hits, "total_bytes": total, "max_bytes": self.max_bytes}
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+@dataclass
+class OcrStage:
+    """OCR configuration passed to the extraction engine"""
+    cache_path: str = "./cache/ocr.sqlite3"
+    cache_max_bytes: int = 512 * 1024 * 1024
+    dpi: int = 300
+    lang: str = "eng"
+    tesseract_config: str = ""
+    min_text_chars: int = 16  # pages with less extracted text than this are OCRed
+
+    def needs_ocr(self, text: str) -> bool:
+        return len(text.strip()) < self.min_text_chars
+
+
+def normalized_page_key(image, lang: str, config: str) -> str:
+    """
+    Hash a page image after normalizing away differences that don't change
+    OCR output: colour, and the blank margin around the content.
+    """
+    gray = ImageOps.grayscale(image)
+    bbox = ImageOps.invert(gray).getbbox()
+    if bbox:
+        gray = gray.crop(bbox)
+    digest = hashlib.sha256()
+    digest.update(f"{lang}|{config}|{gray.width}x{gray.height}|".encode())
+    digest.update(gray.tobytes())
+    return digest.hexdigest()
+
+
+# Per-process cache handle, opened lazily in each pool worker
+_worker_caches = {}
+
+def _get_worker_cache(cache_path: str, max_bytes: int) -> OcrCache:
+    cache = _worker_caches.get(cache_path)
+    if cache is None:
+        cache = _worker_caches[cache_path] = OcrCache(cache_path, max_bytes)
+    return cache
+
+def ocr_pdf_pages(path: str, page_indices: List[int], stage: OcrStage) -> List[OcrResult]:
+    """Rasterize and OCR the given pages of a PDF, consulting the page-image cache"""
+    # One tesseract thread per worker; the pool provides the parallelism
+    os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+    cache = _get_worker_cache(stage.cache_path, stage.cache_max_bytes)
+
+    results = []
+    for index in page_indices:
+        started = time.perf_counter()
+        image = convert_from_path(path, dpi=stage.dpi, first_page=index + 1, last_page=index + 1)[0]
+        key = normalized_page_key(image, stage.lang, stage.tesseract_config)
+
+        cached = cache.get(key)
+        if cached is not None:
+            text, ocr_seconds = cached
+            results.append((index, text, time.perf_counter() - started, True, ocr_seconds))
+            continue
+
+        ocr_started = time.perf_counter()
+        text = pytesseract.image_to_string(image, lang=stage.lang, config=stage.tesseract_config)
+        ocr_seconds = time.perf_counter() - ocr_started
+        cache.put(key, text, ocr_seconds)
+        results.append((index, text, time.perf_counter() - started, False, 0.0))
+    return results
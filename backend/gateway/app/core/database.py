@@ -1,33 +1,162 @@
-from sqlalchemy import create_engine, MetaData
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import Engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
-import asyncpg
-from .config import settings
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from typing import Dict, Optional
 import logging
+import re
+import time
+
+from .config import settings
+from .metrics import LatencyHistogram
 
 logger = logging.getLogger(__name__)
 
-# Create sync engine for alembic migrations
-engine = create_engine(settings.database_url)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-# Create async engine for FastAPI
-async_engine = create_async_engine(
-    settings.database_url.replace("postgresql://", "postgresql+asyncpg://"),
-    echo=settings.debug,
-    future=True
-)
+class QueryMetrics:
+    """
+    Per-statement latency and pool wait histograms, fed by engine events.
+
+    Statements are keyed by their SQL with whitespace collapsed, so every
+    execution of one text() query lands in the same histogram. Past
+    max_statements distinct statements, the rest are counted under "other".
+    """
+
+    def __init__(self, max_statements: int = 200, slow_query_ms: float = 500.0):
+        self.max_statements = max_statements
+        self.slow_query_ms = slow_query_ms
+        self.statements: Dict[str, LatencyHistogram] = {}
+        self.pool_wait = LatencyHistogram()
+
+        # Metrics
+        self.queries = 0
+        self.errors = 0
+        self.slow_queries = 0
+
+    def install(self, engine: Engine):
+        """Hook the events of a sync engine (an AsyncEngine's .sync_engine)"""
+        event.listen(engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", self._after_cursor_execute)
+        event.listen(engine, "handle_error", self._handle_error)
+
+    @staticmethod
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["query_started"].pop()
+        self.observe_query(statement, time.perf_counter() - started)
+
+    def _handle_error(self, context):
+        self.errors += 1
+        started = context.connection.info.get("query_started") if context.connection is not None else None
+        if started:
+            started.pop()
+
+    @staticmethod
+    def statement_key(statement: str) -> str:
+        return re.sub(r"\s+", " ", statement).strip()[:200]
+
+    def observe_query(self, statement: str, seconds: float):
+        self.queries += 1
+        key = self.statement_key(statement)
+        histogram = self.statements.get(key)
+        if histogram is None:
+            if len(self.statements) >= self.max_statements:
+                key = "other"
+                histogram = self.statements.get(key)
+            if histogram is None:
+                histogram = self.statements[key] = LatencyHistogram()
+        histogram.observe(seconds)
+        if seconds * 1000 >= self.slow_query_ms:
+            self.slow_queries += 1
+            logger.warning(f"Slow query ({seconds * 1000:.0f} ms): {key}")
+
+    def stats(self, top: int = 10) -> dict:
+        # The statements costing the most time overall, which are the ones worth looking at
+        busiest = sorted(self.statements.items(), key=lambda item: item[1].sum, reverse=True)[:top]
+        return {
+            "queries": self.queries,
+            "errors": self.errors,
+            "slow_queries": self.slow_queries,
+            "distinct_statements": len(self.statements),
+            "pool_wait": self.pool_wait.stats(),
+            "statements": {key: histogram.stats() for key, histogram in busiest}
+        }
+
+
+query_metrics = QueryMetrics(slow_query_ms=settings.db_slow_query_ms)
+
 
-AsyncSessionLocal = sessionmaker(
-    async_engine, class_=AsyncSession, expire_on_commit=False
-)
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """The asyncio queue pool, timing how long each checkout waits for (or opens) a connection"""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            query_metrics.pool_wait.observe(time.perf_counter() - started)
+
+
+# Engines are created on first use: web workers never build the sync engine,
+# and importing this module doesn't touch the database settings
+_async_engine: Optional[AsyncEngine] = None
+_sync_engine: Optional[Engine] = None
+
+AsyncSessionLocal = sessionmaker(class_=AsyncSession, expire_on_commit=False)
 
 Base = declarative_base()
 
+
+def get_async_engine() -> AsyncEngine:
+    """The async engine for FastAPI, configured from the db_* settings"""
+    global _async_engine
+    if _async_engine is None:
+        _async_engine = create_async_engine(
+            settings.database_url.replace("postgresql://", "postgresql+asyncpg://"),
+            echo=settings.db_echo,
+            poolclass=TimedQueuePool,
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+            pool_timeout=settings.db_pool_timeout,
+            pool_recycle=settings.db_pool_recycle,
+            pool_pre_ping=settings.db_pool_pre_ping,
+            # Prepared statements cached per connection, so hot queries are parsed and planned once
+            connect_args={"prepared_statement_cache_size": settings.db_statement_cache_size}
+        )
+        query_metrics.install(_async_engine.sync_engine)
+        AsyncSessionLocal.configure(bind=_async_engine)
+    return _async_engine
+
+
+def get_sync_engine() -> Engine:
+    """Sync engine for alembic migrations and scripts"""
+    global _sync_engine
+    if _sync_engine is None:
+        _sync_engine = create_engine(settings.database_url, echo=settings.db_echo, pool_pre_ping=True)
+    return _sync_engine
+
+
+def __getattr__(name: str):
+    # The old module-level names, built on first access
+    if name == "async_engine":
+        return get_async_engine()
+    if name == "engine":
+        return get_sync_engine()
+    if name == "SessionLocal":
+        global SessionLocal
+        SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=get_sync_engine())
+        return SessionLocal
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 # Database dependency
 async def get_db() -> AsyncSession:
     """Get async database session"""
+    get_async_engine()
     async with AsyncSessionLocal() as session:
         try:
             yield session
@@ -35,17 +164,22 @@ async def get_db() -> AsyncSession:
             await session.close()
 
 async def init_db():
-    """Initialize database connection and check health"""
+    """Create the engine and check the database through its pool"""
     try:
-        # Test database connection
-        conn = await asyncpg.connect(settings.database_url)
-        await conn.execute("SELECT 1")
-        await conn.close()
+        async with get_async_engine().connect() as conn:
+            await conn.execute(text("SELECT 1"))
         logger.info("✅ Database connection test passed")
-        
+
         # In production, you might want to run migrations here
         # For now, we assume tables exist from Docker initialization
-        
+
     except Exception as e:
         logger.error(f"❌ Database initialization failed: {e}")
         raise
+
+async def close_db():
+    """Close every pooled connection"""
+    global _async_engine
+    if _async_engine is not None:
+        await _async_engine.dispose()
+        _async_engine = None
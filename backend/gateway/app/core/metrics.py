@@ -0,0 +1,156 @@
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Mapping, Sequence, Tuple
+
+# Upper bounds in seconds, from sub-millisecond cache hits to requests that are timing out
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+
+
+class LatencyHistogram:
+    """
+    Fixed-bucket latency histogram.
+
+    Observing is a bisect and two additions, so it can sit on every query or
+    request. Percentiles are read from the buckets and are only as precise
+    as the bucket bounds allow; the last bucket is open-ended.
+    """
+
+    __slots__ = ("bounds", "counts", "count", "sum", "max")
+
+    def __init__(self, bounds: Sequence[float] = DEFAULT_BUCKETS):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float):
+        self.counts[bisect_left(self.bounds, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def quantile(self, q: float) -> float:
+        """Estimate of the q-th quantile, interpolated within its bucket as Prometheus does"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                if index == len(self.bounds):
+                    return self.max
+                lower = self.bounds[index - 1] if index else 0.0
+                upper = min(self.bounds[index], self.max)
+                return lower + (upper - lower) * max(0.0, rank - seen) / count
+            seen += count
+        return self.max
+
+    def cumulative(self) -> List[Tuple[float, int]]:
+        """(upper bound, observations at or below it) pairs, ending with +inf"""
+        pairs = []
+        seen = 0
+        for bound, count in zip(self.bounds + (float("inf"),), self.counts):
+            seen += count
+            pairs.append((bound, seen))
+        return pairs
+
+    def stats(self) -> dict:
+        return {
+            "count": self.count,
+            "mean_ms": round(self.sum / self.count * 1000, 3) if self.count else 0.0,
+            "p50_ms": round(self.quantile(0.5) * 1000, 3),
+            "p95_ms": round(self.quantile(0.95) * 1000, 3),
+            "p99_ms": round(self.quantile(0.99) * 1000, 3),
+            "max_ms": round(self.max * 1000, 3)
+        }
+
+
+# Methods outside this set are counted as "OTHER", so clients can't create label values at will
+HTTP_METHODS = frozenset({"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"})
+
+
+class RequestMetrics:
+    """
+    Per-route request latency and response counts, plus requests in flight.
+
+    Routes are labelled by their path template ("/api/presentations/{presentation_id}"),
+    never by the raw path, so the number of series is bounded by the routes
+    the application declares.
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.in_flight = 0
+        self.durations: Dict[Tuple[str, str], LatencyHistogram] = {}
+        self.responses: Dict[Tuple[str, str, int], int] = {}
+
+    def observe(self, method: str, route: str, status: int, seconds: float):
+        if method not in HTTP_METHODS:
+            method = "OTHER"
+        key = (method, route)
+        histogram = self.durations.get(key)
+        if histogram is None:
+            histogram = self.durations[key] = LatencyHistogram(self.buckets)
+        histogram.observe(seconds)
+        key = (method, route, status)
+        self.responses[key] = self.responses.get(key, 0) + 1
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": self.in_flight,
+            "routes": {f"{method} {route}": histogram.stats() for (method, route), histogram in self.durations.items()}
+        }
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class PrometheusText:
+    """Builds a Prometheus text exposition (format 0.0.4), one metric family at a time"""
+
+    content_type = "text/plain; version=0.0.4"
+
+    def __init__(self):
+        self.lines: List[str] = []
+
+    def _family(self, name: str, kind: str, help: str):
+        self.lines.append(f"# HELP {name} {help}")
+        self.lines.append(f"# TYPE {name} {kind}")
+
+    def _sample(self, name: str, labels: Mapping[str, object], value: float):
+        if labels:
+            rendered = ",".join(f'{key}="{_escape(label)}"' for key, label in labels.items())
+            self.lines.append(f"{name}{{{rendered}}} {_number(value)}")
+        else:
+            self.lines.append(f"{name} {_number(value)}")
+
+    def gauge(self, name: str, help: str, samples: Iterable[Tuple[Mapping[str, object], float]]):
+        self._family(name, "gauge", help)
+        for labels, value in samples:
+            self._sample(name, labels, value)
+
+    def counter(self, name: str, help: str, samples: Iterable[Tuple[Mapping[str, object], float]]):
+        self._family(name, "counter", help)
+        for labels, value in samples:
+            self._sample(name, labels, value)
+
+    def histogram(self, name: str, help: str, samples: Iterable[Tuple[Mapping[str, object], LatencyHistogram]]):
+        self._family(name, "histogram", help)
+        for labels, histogram in samples:
+            for bound, count in histogram.cumulative():
+                self._sample(f"{name}_bucket", {**labels, "le": _number(bound)}, count)
+            self._sample(f"{name}_sum", labels, histogram.sum)
+            self._sample(f"{name}_count", labels, histogram.count)
+
+    def render(self) -> str:
+        return "\n".join(self.lines) + "\n"
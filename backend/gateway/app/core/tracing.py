@@ -0,0 +1,82 @@
+from contextvars import ContextVar
+from typing import Optional
+import logging
+import os
+import re
+
+import httpx
+
+# W3C Trace Context: version-trace_id-parent_id-flags, lowercase hex
+TRACEPARENT = re.compile(rb"([0-9a-f]{2})-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})")
+# Client-supplied request IDs are echoed in headers and logs: printable ASCII without spaces only
+REQUEST_ID = re.compile(rb"[\x21-\x7e]{1,128}")
+INVALID_TRACE_ID = "0" * 32
+
+
+class TraceContext:
+    """
+    Identifiers of the request being handled.
+
+    trace_id is shared by every service a request passes through; span_id
+    identifies the gateway's part of it and becomes the parent of the calls
+    the gateway makes. request_id is the client's X-Request-ID when it sent
+    one, and the trace ID otherwise.
+    """
+
+    __slots__ = ("request_id", "trace_id", "span_id", "flags")
+
+    def __init__(self, request_id: str, trace_id: str, span_id: str, flags: str = "01"):
+        self.request_id = request_id
+        self.trace_id = trace_id
+        self.span_id = span_id
+        self.flags = flags
+
+    @classmethod
+    def from_headers(cls, request_id: Optional[bytes], traceparent: Optional[bytes]) -> "TraceContext":
+        """Continue the caller's trace when it sent a valid traceparent, or start a new one"""
+        ids = os.urandom(24).hex()
+        trace_id, span_id, flags = ids[:32], ids[32:], "01"
+        match = TRACEPARENT.fullmatch(traceparent) if traceparent else None
+        if match is not None and match[1] != b"ff" and match[2] != INVALID_TRACE_ID.encode():
+            trace_id, flags = match[2].decode(), match[4].decode()
+        if request_id and REQUEST_ID.fullmatch(request_id):
+            return cls(request_id.decode(), trace_id, span_id, flags)
+        return cls(trace_id, trace_id, span_id, flags)
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-{self.flags}"
+
+
+_current: ContextVar[Optional[TraceContext]] = ContextVar("trace_context", default=None)
+
+
+def current_trace() -> Optional[TraceContext]:
+    """The trace of the request this task is handling, or None outside a request"""
+    return _current.get()
+
+
+def set_trace(trace: TraceContext):
+    """Make `trace` current; returns the token to pass to reset_trace"""
+    return _current.set(trace)
+
+
+def reset_trace(token):
+    _current.reset(token)
+
+
+async def inject_trace_headers(request: httpx.Request):
+    """httpx request hook: carry the current request's IDs to the service being called"""
+    trace = _current.get()
+    if trace is not None:
+        request.headers["X-Request-ID"] = trace.request_id
+        request.headers["traceparent"] = trace.traceparent
+
+
+class RequestIDLogFilter(logging.Filter):
+    """Adds the current request's ID to log records as %(request_id)s ("-" outside a request)"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        trace = _current.get()
+        record.request_id = trace.request_id if trace is not None else "-"
+        return True
@@ -1,22 +1,34 @@
 from fastapi import FastAPI, HTTPException, Depends, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from contextlib import asynccontextmanager
+from sqlalchemy.exc import TimeoutError as SQLAlchemyTimeoutError
 import redis.asyncio as redis
 import httpx
 import logging
+import os
 import time
-from .routers import auth
+from .routers import auth, batches, presentations, proxy, tasks, upload
 from .core.config import settings
-from .core.database import init_db
-# from .middleware.request_id import RequestIDMiddleware
-# from .middleware.logging import LoggingMiddleware
+from .core.database import close_db, init_db, query_metrics
+from .core.metrics import PrometheusText, RequestMetrics
+from .core.tracing import RequestIDLogFilter, inject_trace_headers
+from .services.batch import STAGES as BATCH_STAGES, BatchScheduler
+from .services.password_hasher import PasswordHasher
+from .services.proxy import ServiceConfig, ServiceProxies
+from .services.registry import ServiceRegistry
+from .services.task_events import TaskEventHub
+from .services.user_cache import UserCache
+from .middleware.rate_limit import RateLimiter, RateLimitMiddleware
+from .middleware.request_id import RequestIDMiddleware
 
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+    format="%(asctime)s - %(name)s - %(levelname)s - [%(request_id)s] %(message)s"
 )
+for handler in logging.getLogger().handlers:
+    handler.addFilter(RequestIDLogFilter())
 logger = logging.getLogger(__name__)
 
 @asynccontextmanager
@@ -29,6 +41,8 @@ async def lifespan(app: FastAPI):
     await init_db()
     logger.info("✅ Database initialized")
     
+    os.makedirs(os.path.join(settings.upload_directory, "tmp"), exist_ok=True)
+    
     # Initialize Redis connection
     app.redis = redis.from_url(settings.redis_url, decode_responses=True)
     try:
@@ -38,28 +52,117 @@ async def lifespan(app: FastAPI):
         logger.error(f"❌ Redis connection failed: {e}")
         raise
     
+    # Initialize two-tier user cache
+    app.user_cache = UserCache(
+        app.redis,
+        channel=settings.channel_cache_invalidation,
+        max_entries=settings.user_cache_max_entries,
+        local_ttl=settings.user_cache_local_ttl,
+        redis_ttl=settings.user_cache_redis_ttl,
+        token_max_entries=settings.token_cache_max_entries
+    )
+    app.user_cache.start()
+    logger.info("✅ User cache initialized")
+    
+    # One Redis subscription per process, fanned out to every task event stream
+    app.task_events = TaskEventHub(
+        app.redis,
+        channels=[settings.channel_task_updates, settings.channel_user_notifications],
+        max_clients=settings.task_events_max_clients,
+        queue_size=settings.task_events_queue_size,
+        max_tasks_per_client=settings.task_events_max_tasks_per_client
+    )
+    app.task_events.start()
+    logger.info("✅ Task event hub initialized")
+    
     # Initialize HTTP client for service communication
     app.http_client = httpx.AsyncClient(
         timeout=httpx.Timeout(30.0),
-        limits=httpx.Limits(max_keepalive_connections=20, max_connections=100)
+        limits=httpx.Limits(max_keepalive_connections=20, max_connections=100),
+        event_hooks={"request": [inject_trace_headers]}
     )
     logger.info("✅ HTTP client initialized")
     
-    # Initialize service registry
+    # Initialize password hashing pool
+    app.password_hasher = PasswordHasher(
+        rounds=settings.bcrypt_rounds,
+        executor=settings.password_hash_executor,
+        max_workers=settings.password_hash_workers,
+        max_pending=settings.password_hash_max_pending
+    )
+    app.password_hasher.start()
+    logger.info("✅ Password hasher initialized")
+    
+    # Initialize service registry; each *_url setting may list several replicas
     services = {
         "document_processor": settings.document_processor_url,
         "ai_generator": settings.ai_generator_url,
         "presentation_renderer": settings.presentation_renderer_url
     }
-    app.services = services
-    logger.info(f"✅ Service registry: {list(services.keys())}")
+    app.registry = ServiceRegistry(
+        {name: [url.strip() for url in urls.split(",") if url.strip()] for name, urls in services.items()},
+        app.http_client,
+        balancer=settings.load_balancer,
+        probe_interval=settings.service_probe_interval,
+        probe_timeout=settings.service_probe_timeout,
+        probe_fall=settings.service_probe_fall,
+        ewma_alpha=settings.latency_ewma_alpha,
+        failure_threshold=settings.circuit_failure_threshold,
+        open_seconds=settings.circuit_open_seconds,
+        half_open_max_calls=settings.circuit_half_open_max_calls
+    )
+    app.registry.start()
+    logger.info(f"✅ Service registry: {app.registry.names()}")
+    
+    # Initialize per-service proxies, each with its own pool and retry budget
+    app.proxies = ServiceProxies(
+        (
+            ServiceConfig(
+                name=name,
+                max_connections=getattr(settings, f"{name}_max_connections"),
+                max_keepalive_connections=getattr(settings, f"{name}_max_connections") // 2,
+                connect_timeout=settings.proxy_connect_timeout,
+                read_timeout=getattr(settings, f"{name}_read_timeout"),
+                write_timeout=settings.proxy_write_timeout,
+                pool_timeout=settings.proxy_pool_timeout,
+                max_retries=settings.proxy_max_retries,
+                retry_budget_ratio=settings.proxy_retry_budget_ratio,
+                retry_budget_min=settings.proxy_retry_budget_min,
+                retry_budget_window=settings.proxy_retry_budget_window
+            )
+            for name in app.registry.names()
+        ),
+        app.registry
+    )
+    logger.info("✅ Service proxies initialized")
+    
+    # Initialize the batch scheduler; per-stage limits are shared by all batches
+    app.batch_scheduler = BatchScheduler(
+        app.proxies,
+        app.redis,
+        concurrency={stage: getattr(settings, f"batch_{stage}_concurrency") for stage in BATCH_STAGES},
+        paths={stage: getattr(settings, f"batch_{stage}_path") for stage in BATCH_STAGES},
+        output_directory=os.path.join(settings.upload_directory, "presentations"),
+        max_active=settings.batch_max_active,
+        state_ttl=settings.batch_state_ttl,
+        progress_interval=settings.batch_progress_interval,
+        channel=settings.channel_task_updates
+    )
+    logger.info("✅ Batch scheduler initialized")
     
     yield
     
     # Shutdown
     logger.info("🔄 Shutting down API Gateway...")
+    await app.batch_scheduler.stop()
+    await app.user_cache.stop()
+    await app.task_events.stop()
+    await app.registry.stop()
     await app.redis.close()
+    await close_db()
     await app.http_client.aclose()
+    await app.proxies.aclose()
+    app.password_hasher.shutdown()
     logger.info("✅ Cleanup completed")
 
 # Create FastAPI application
@@ -72,9 +175,11 @@ app = FastAPI(
     redoc_url="/redoc"
 )
 
-# Add middleware
-# app.add_middleware(RequestIDMiddleware)
-# app.add_middleware(LoggingMiddleware)
+# Add middleware (the last added runs first)
+app.rate_limiter = RateLimiter.from_settings()
+app.add_middleware(RateLimitMiddleware, limiter=app.rate_limiter)
+app.request_metrics = RequestMetrics()
+app.add_middleware(RequestIDMiddleware, metrics=app.request_metrics)
 
 # Configure CORS
 app.add_middleware(
@@ -88,9 +193,11 @@ app.add_middleware(
 
 # Include routers
 app.include_router(auth.router, prefix="/api/auth", tags=["Authentication"])
-# app.include_router(presentations.router, prefix="/api/presentations", tags=["Presentations"])
-# app.include_router(tasks.router, prefix="/api/tasks", tags=["Task Management"])
-# app.include_router(upload.router, prefix="/api/upload", tags=["File Upload"])
+app.include_router(presentations.router, prefix="/api/presentations", tags=["Presentations"])
+app.include_router(tasks.router, prefix="/api/tasks", tags=["Task Management"])
+app.include_router(upload.router, prefix="/api/upload", tags=["File Upload"])
+app.include_router(proxy.router, prefix="/api/services", tags=["Service Proxy"])
+app.include_router(batches.router, prefix="/api/batches", tags=["Batch Generation"])
 
 # Health check endpoints
 @app.get("/health")
@@ -121,21 +228,78 @@ async def detailed_health_check(request: Request):
         health_status["dependencies"]["redis"] = f"unhealthy: {str(e)}"
         health_status["status"] = "degraded"
     
-    # Check downstream services
-    for service_name, service_url in request.app.services.items():
-        try:
-            response = await request.app.http_client.get(f"{service_url}/health", timeout=5.0)
-            if response.status_code == 200:
-                health_status["dependencies"][service_name] = "healthy"
-            else:
-                health_status["dependencies"][service_name] = f"unhealthy: HTTP {response.status_code}"
-                health_status["status"] = "degraded"
-        except Exception as e:
-            health_status["dependencies"][service_name] = f"unhealthy: {str(e)}"
+    # Downstream services, from the registry's background probes
+    services = request.app.registry.health()
+    for service_name, service_health in services.items():
+        health_status["dependencies"][service_name] = service_health["status"]
+        if service_health["status"] != "healthy":
             health_status["status"] = "degraded"
+    health_status["services"] = services
+    
+    health_status["password_hasher"] = request.app.password_hasher.stats()
+    health_status["user_cache"] = request.app.user_cache.stats()
+    health_status["proxies"] = request.app.proxies.stats()
+    health_status["rate_limiter"] = request.app.rate_limiter.stats()
+    health_status["task_events"] = request.app.task_events.stats()
+    health_status["batches"] = request.app.batch_scheduler.stats()
+    health_status["database"] = query_metrics.stats()
+    health_status["requests"] = request.app.request_metrics.stats()
     
     return health_status
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics(request: Request):
+    """Prometheus metrics for this worker process"""
+    requests = request.app.request_metrics
+    proxies = [(name, request.app.proxies[name]) for name in request.app.proxies.names()]
+    text = PrometheusText()
+    
+    text.gauge("http_requests_in_flight", "Requests being handled", [({}, requests.in_flight)])
+    text.histogram(
+        "http_request_duration_seconds", "Request latency by route",
+        (({"method": method, "route": route}, histogram) for (method, route), histogram in requests.durations.items())
+    )
+    text.counter(
+        "http_responses_total", "Responses by route and status",
+        (
+            ({"method": method, "route": route, "status": status}, count)
+            for (method, route, status), count in requests.responses.items()
+        )
+    )
+    
+    text.histogram(
+        "downstream_request_duration_seconds", "Time until a service sends response headers, per attempt",
+        (({"service": name}, proxy.latency) for name, proxy in proxies)
+    )
+    text.gauge(
+        "downstream_requests_in_flight", "Requests awaiting a service's response headers",
+        (({"service": name}, proxy.in_flight) for name, proxy in proxies)
+    )
+    for metric, help, attribute in (
+        ("downstream_requests_total", "Requests proxied to a service", "requests"),
+        ("downstream_retries_total", "Failed attempts that were retried", "retries"),
+        ("downstream_failures_total", "Requests that failed after any retries", "failures"),
+        ("downstream_rejected_total", "Requests refused without being sent", "rejected")
+    ):
+        text.counter(metric, help, (({"service": name}, getattr(proxy, attribute)) for name, proxy in proxies))
+    
+    text.histogram("db_pool_wait_seconds", "Wait for a pooled database connection", [({}, query_metrics.pool_wait)])
+    text.counter("db_queries_total", "Statements executed", [({}, query_metrics.queries)])
+    text.counter("db_query_errors_total", "Statements that raised", [({}, query_metrics.errors)])
+    text.counter("db_slow_queries_total", "Statements slower than db_slow_query_ms", [({}, query_metrics.slow_queries)])
+
+    batches = request.app.batch_scheduler
+    text.gauge("batches_active", "Batches running", [({}, batches.active)])
+    text.histogram(
+        "batch_task_duration_seconds", "Batch task time in a stage, from taking a slot to its result",
+        (({"stage": stage}, histogram) for stage, histogram in batches.durations.items())
+    )
+    text.gauge("batch_tasks_in_flight", "Batch tasks holding a stage slot", (({"stage": stage}, count) for stage, count in batches.in_flight.items()))
+    text.counter("batch_tasks_requested_total", "Batch tasks before identical ones were merged", [({}, batches.nodes_requested)])
+    text.counter("batch_tasks_scheduled_total", "Batch tasks actually run", [({}, batches.nodes_scheduled)])
+    text.counter("batch_tasks_failed_total", "Batch tasks that failed, including through a failed upstream task", [({}, batches.nodes_failed)])
+    return Response(content=text.render(), media_type=PrometheusText.content_type)
+
 @app.get("/")
 async def root():
     """Root endpoint with API information"""
@@ -144,23 +308,39 @@ async def root():
         "version": "1.0.0",
         "docs": "/docs",
         "health": "/health",
+        "metrics": "/metrics",
         "services": {
             "authentication": "/api/auth",
-            # "presentations": "/api/presentations", 
-            # "tasks": "/api/tasks",
-            # "upload": "/api/upload"
+            "upload": "/api/upload",
+            "services": "/api/services/{service}/{path}",
+            "tasks": "/api/tasks/ws, /api/tasks/events",
+            "presentations": "/api/presentations",
+            "batches": "/api/batches",
         }
     }
 
+# Every pooled database connection stayed busy for db_pool_timeout
+@app.exception_handler(SQLAlchemyTimeoutError)
+async def database_busy_handler(request: Request, exc: SQLAlchemyTimeoutError):
+    logger.warning(f"Database pool exhausted: {exc}")
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Database is busy, please retry"},
+        headers={"Retry-After": "1"}
+    )
+
 # Global exception handler
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
     logger.error(f"Global exception: {exc}")
+    request_id = getattr(request.state, "request_id", None)
+    # Sent from outside RequestIDMiddleware, so the header is added here
     return JSONResponse(
         status_code=500,
         content={
             "error": "Internal Server Error",
             "message": "An unexpected error occurred",
-            "request_id": getattr(request.state, "request_id", None)
-        }
+            "request_id": request_id
+        },
+        headers={"X-Request-ID": request_id} if request_id else None
     )
\ No newline at end of file
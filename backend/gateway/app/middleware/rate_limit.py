@@ -0,0 +1,322 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+import json
+import logging
+import math
+import time
+
+from jose import JWTError, jwt
+
+from ..core.config import settings
+
+logger = logging.getLogger(__name__)
+
+PERIODS = {"second": 1.0, "minute": 60.0, "hour": 3600.0, "day": 86400.0}
+
+# GCRA over every key at once: the request is admitted only if all keys admit it,
+# and only then are their theoretical arrival times (TATs) advanced. The clock
+# is Redis' own, so gateway workers with skewed clocks still agree.
+# KEYS: limit keys; ARGV: per key, emission interval and burst tolerance (microseconds)
+GCRA_SCRIPT = """
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000000 + tonumber(time[2])
+local new_tats = {}
+local remaining = -1
+for i, key in ipairs(KEYS) do
+    local interval = tonumber(ARGV[2 * i - 1])
+    local tolerance = tonumber(ARGV[2 * i])
+    local tat = tonumber(redis.call('GET', key) or now)
+    if tat < now then
+        tat = now
+    end
+    local new_tat = tat + interval
+    local allow_at = new_tat - tolerance
+    if allow_at > now then
+        return {0, math.ceil((allow_at - now) / 1000), i, 0}
+    end
+    new_tats[i] = new_tat
+    local left = math.floor((tolerance - (new_tat - now)) / interval)
+    if remaining < 0 or left < remaining then
+        remaining = left
+    end
+end
+for i, key in ipairs(KEYS) do
+    redis.call('SET', key, string.format('%.0f', new_tats[i]), 'PX', math.ceil((new_tats[i] - now) / 1000) + 1)
+end
+return {1, 0, 0, remaining}
+"""
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    count: int
+    period: float  # seconds
+
+    @classmethod
+    def parse(cls, spec: str) -> "RateLimit":
+        """'120/minute' -> RateLimit(120, 60.0)"""
+        count, _, unit = spec.partition("/")
+        unit = unit.strip().lower().rstrip("s")
+        if unit not in PERIODS:
+            raise ValueError(f"Unknown rate limit period in {spec!r}")
+        return cls(int(count), PERIODS[unit])
+
+    @property
+    def interval(self) -> float:
+        return self.period / self.count
+
+    def __str__(self):
+        return f"{self.count};w={int(self.period)}"
+
+
+@dataclass
+class Decision:
+    allowed: bool
+    limit: RateLimit
+    remaining: int = 0
+    retry_after: float = 0.0
+    local: bool = False  # decided without Redis
+
+
+class LocalBucket:
+    """Per-worker token bucket with the same rate as the shared limit"""
+
+    __slots__ = ("tokens", "updated", "blocked_until")
+
+    def __init__(self, capacity: float, now: float):
+        self.tokens = capacity
+        self.updated = now
+        self.blocked_until = 0.0
+
+
+class RateLimiter:
+    """
+    Distributed GCRA rate limiter in Redis behind a per-worker pre-filter.
+
+    The pre-filter only ever rejects clients that are over the limit for
+    certain. One worker having seen more than the limit means the cluster
+    has too, and a denial from Redis holds until its retry-after. Everything
+    else takes one Redis round trip for all of the request's keys. If Redis
+    is unreachable the limiter fails open and only the local buckets apply.
+    """
+
+    def __init__(
+        self,
+        limits: Dict[str, RateLimit],
+        ip_limit: RateLimit,
+        max_local_keys: int = 10000
+    ):
+        self.limits = limits
+        self.ip_limit = ip_limit
+        self.max_local_keys = max_local_keys
+        self._local: "OrderedDict[str, LocalBucket]" = OrderedDict()
+        self._scripts = {}
+        self._error_logged_at = 0.0
+
+        # Metrics
+        self.allowed = 0
+        self.rejected_local = 0
+        self.rejected_redis = 0
+        self.redis_calls = 0
+        self.redis_errors = 0
+
+    @classmethod
+    def from_settings(cls) -> "RateLimiter":
+        return cls(
+            limits={
+                "default": RateLimit.parse(settings.rate_limit_default),
+                "generate": RateLimit.parse(settings.rate_limit_generate),
+                "upload": RateLimit.parse(settings.rate_limit_upload)
+            },
+            ip_limit=RateLimit.parse(settings.rate_limit_ip),
+            max_local_keys=settings.rate_limit_local_max_keys
+        )
+
+    def keys_for(self, route_class: str, user_id: Optional[str], client_ip: str) -> List[Tuple[str, RateLimit]]:
+        limit = self.limits[route_class]
+        subject = f"u:{user_id}" if user_id else f"ip:{client_ip}"
+        keys = [(f"rl:{route_class}:{subject}", limit)]
+        if user_id or route_class != "default":
+            # Every request also counts against its address, whoever is logged in
+            keys.append((f"rl:ip:{client_ip}", self.ip_limit))
+        return keys
+
+    # Local pre-filter
+
+    def _bucket(self, key: str, limit: RateLimit, now: float) -> LocalBucket:
+        bucket = self._local.get(key)
+        if bucket is None:
+            bucket = self._local[key] = LocalBucket(limit.count, now)
+            if len(self._local) > self.max_local_keys:
+                self._local.popitem(last=False)
+        else:
+            self._local.move_to_end(key)
+            bucket.tokens = min(limit.count, bucket.tokens + (now - bucket.updated) / limit.interval)
+            bucket.updated = now
+        return bucket
+
+    def _check_local(self, keys: List[Tuple[str, RateLimit]], now: float) -> Optional[Decision]:
+        buckets = []
+        for key, limit in keys:
+            bucket = self._bucket(key, limit, now)
+            if bucket.blocked_until > now:
+                return Decision(False, limit, retry_after=bucket.blocked_until - now, local=True)
+            if bucket.tokens < 1:
+                return Decision(False, limit, retry_after=(1 - bucket.tokens) * limit.interval, local=True)
+            buckets.append(bucket)
+        for bucket in buckets:
+            bucket.tokens -= 1
+        return None
+
+    def _refund_local(self, keys: List[Tuple[str, RateLimit]]):
+        for key, limit in keys:
+            bucket = self._local.get(key)
+            if bucket is not None:
+                bucket.tokens = min(limit.count, bucket.tokens + 1)
+
+    # Shared limit
+
+    def _script(self, redis_client):
+        script = self._scripts.get(id(redis_client))
+        if script is None:
+            script = self._scripts[id(redis_client)] = redis_client.register_script(GCRA_SCRIPT)
+        return script
+
+    async def check(self, redis_client, keys: List[Tuple[str, RateLimit]]) -> Decision:
+        now = time.monotonic()
+        decision = self._check_local(keys, now)
+        if decision is not None:
+            self.rejected_local += 1
+            return decision
+
+        args = []
+        for _, limit in keys:
+            interval = max(1, int(limit.interval * 1e6))
+            args += [interval, interval * limit.count]
+        try:
+            self.redis_calls += 1
+            allowed, retry_after_ms, index, remaining = await self._script(redis_client)(
+                keys=[key for key, _ in keys], args=args
+            )
+        except Exception as e:
+            # Fail open: a Redis outage shouldn't take the API down with it
+            self.redis_errors += 1
+            if now - self._error_logged_at > 10:
+                self._error_logged_at = now
+                logger.warning(f"Rate limiter Redis check failed, failing open: {e}")
+            self.allowed += 1
+            return Decision(True, keys[0][1], remaining=0)
+
+        if not allowed:
+            self.rejected_redis += 1
+            self._refund_local(keys)
+            key, limit = keys[int(index) - 1]
+            retry_after = int(retry_after_ms) / 1000
+            # Remember the verdict so retries before then never reach Redis
+            self._bucket(key, limit, now).blocked_until = now + retry_after
+            return Decision(False, limit, retry_after=retry_after)
+
+        self.allowed += 1
+        return Decision(True, keys[0][1], remaining=int(remaining))
+
+    def stats(self) -> dict:
+        return {
+            "allowed": self.allowed,
+            "rejected_local": self.rejected_local,
+            "rejected_redis": self.rejected_redis,
+            "redis_calls": self.redis_calls,
+            "redis_errors": self.redis_errors,
+            "local_keys": len(self._local)
+        }
+
+
+class RateLimitMiddleware:
+    """ASGI middleware applying RateLimiter to every HTTP request"""
+
+    def __init__(self, app, limiter: Optional[RateLimiter] = None):
+        self.app = app
+        self.limiter = limiter or RateLimiter.from_settings()
+        self.route_classes = sorted(
+            ((prefix, route_class) for route_class, prefixes in (
+                ("generate", settings.rate_limit_generate_paths),
+                ("upload", settings.rate_limit_upload_paths)
+            ) for prefix in prefixes),
+            key=lambda item: -len(item[0])
+        )
+        self.exempt_paths = frozenset(settings.rate_limit_exempt_paths)
+
+    def _route_class(self, path: str) -> str:
+        for prefix, route_class in self.route_classes:
+            if path.startswith(prefix):
+                return route_class
+        return "default"
+
+    def _client_ip(self, scope, headers: Dict[bytes, bytes]) -> str:
+        if settings.rate_limit_trust_forwarded and b"x-forwarded-for" in headers:
+            return headers[b"x-forwarded-for"].decode("latin-1").split(",")[0].strip()
+        client = scope.get("client")
+        return client[0] if client else "unknown"
+
+    def _user_id(self, app, headers: Dict[bytes, bytes]) -> Optional[str]:
+        authorization = headers.get(b"authorization", b"").decode("latin-1")
+        scheme, _, token = authorization.partition(" ")
+        if scheme.lower() != "bearer" or not token:
+            return None
+        # Tokens this worker already verified skip the signature check
+        user_cache = getattr(app, "user_cache", None)
+        user_id = user_cache.get_token_subject(token) if user_cache is not None else None
+        if user_id is not None:
+            return user_id
+        try:
+            payload = jwt.decode(token, settings.jwt_secret_key, algorithms=[settings.jwt_algorithm])
+        except JWTError:
+            # Unverified claims could aim a limit at someone else; count by address instead
+            return None
+        return payload.get("sub")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.rate_limit_enabled or scope["path"] in self.exempt_paths:
+            await self.app(scope, receive, send)
+            return
+
+        app = scope["app"]
+        headers = dict(scope["headers"])
+        keys = self.limiter.keys_for(
+            self._route_class(scope["path"]),
+            self._user_id(app, headers),
+            self._client_ip(scope, headers)
+        )
+        decision = await self.limiter.check(app.redis, keys)
+
+        if not decision.allowed:
+            retry_after = max(1, math.ceil(decision.retry_after))
+            body = json.dumps({
+                "error": "Too Many Requests",
+                "message": f"Rate limit exceeded, retry in {retry_after}s",
+                "retry_after": retry_after
+            }).encode()
+            await send({
+                "type": "http.response.start",
+                "status": 429,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                    (b"retry-after", str(retry_after).encode()),
+                    (b"ratelimit-policy", str(decision.limit).encode())
+                ]
+            })
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        limit_headers = [
+            (b"ratelimit-limit", str(decision.limit.count).encode()),
+            (b"ratelimit-remaining", str(decision.remaining).encode())
+        ]
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + limit_headers
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
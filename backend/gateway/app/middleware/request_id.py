@@ -0,0 +1,74 @@
+import time
+from typing import Optional
+
+from ..core.metrics import RequestMetrics
+from ..core.tracing import TraceContext, reset_trace, set_trace
+
+
+class RequestIDMiddleware:
+    """
+    ASGI middleware giving every request an ID and timing it.
+
+    The request's TraceContext is current for the whole request, so log
+    records and calls to other services carry its IDs; request.state.request_id
+    holds the ID and responses return it as X-Request-ID. HTTP requests are
+    timed per route into RequestMetrics. WebSocket connections get IDs but
+    are not timed, since they live as long as the client keeps them open.
+
+    Written against raw ASGI: BaseHTTPMiddleware would add a task and a
+    memory stream to every request.
+    """
+
+    def __init__(self, app, metrics: Optional[RequestMetrics] = None):
+        self.app = app
+        self.metrics = metrics or RequestMetrics()
+
+    async def __call__(self, scope, receive, send):
+        scope_type = scope["type"]
+        if scope_type != "http" and scope_type != "websocket":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = traceparent = None
+        for name, value in scope["headers"]:
+            if name == b"x-request-id":
+                request_id = value
+            elif name == b"traceparent":
+                traceparent = value
+        trace = TraceContext.from_headers(request_id, traceparent)
+        scope.setdefault("state", {})["request_id"] = trace.request_id
+        token = set_trace(trace)
+
+        if scope_type == "websocket":
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                reset_trace(token)
+            return
+
+        header = (b"x-request-id", trace.request_id.encode())
+        status = 500
+
+        async def send_with_id(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message["headers"] = [*message.get("headers", ()), header]
+            await send(message)
+
+        metrics = self.metrics
+        metrics.in_flight += 1
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            elapsed = time.perf_counter() - started
+            metrics.in_flight -= 1
+            reset_trace(token)
+            # The router leaves the matched route in the scope; its template is the label
+            route = scope.get("route")
+            if route is not None:
+                label = route.path
+            else:
+                label = "unmatched" if status == 404 else "other"
+            metrics.observe(scope["method"], label, status, elapsed)
@@ -3,7 +3,6 @@ from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
 from datetime import datetime, timedelta
-from passlib.context import CryptContext
 from jose import JWTError, jwt
 from pydantic import BaseModel, EmailStr
 import redis.asyncio as redis
@@ -12,10 +11,26 @@ from typing import Optional
 
 from ..core.config import settings
 from ..core.database import get_db
+from ..services.password_hasher import PasswordHasherBusy
 
 router = APIRouter()
 security = HTTPBearer()
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+# Built once, so each request reuses the compiled statement and the
+# connection's cached prepared statement instead of re-parsing the SQL
+USER_BY_ID = text(
+    "SELECT id, email, username, first_name, last_name, is_active FROM users.users WHERE id = :user_id"
+)
+USER_BY_EMAIL = text(
+    "SELECT id, email, username, password_hash, first_name, last_name, is_active FROM users.users WHERE email = :email"
+)
+USER_EXISTS = text("SELECT id FROM users.users WHERE email = :email OR username = :username")
+INSERT_USER = text("""
+    INSERT INTO users.users (email, username, password_hash, first_name, last_name)
+    VALUES (:email, :username, :password_hash, :first_name, :last_name)
+    RETURNING id, email, username, first_name, last_name, is_active, created_at
+""")
+UPDATE_PASSWORD_HASH = text("UPDATE users.users SET password_hash = :password_hash WHERE id = :user_id")
 
 # Pydantic models
 class UserCreate(BaseModel):
@@ -45,11 +60,26 @@ class UserResponse(BaseModel):
     created_at: datetime
 
 # Helper functions
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+def _hasher_busy_exception() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Authentication service is busy, please retry",
+        headers={"Retry-After": "1"},
+    )
+
+async def verify_password(request: Request, plain_password: str, hashed_password: str):
+    """Verify a password in the hashing pool; returns (valid, new_hash_or_None)"""
+    try:
+        return await request.app.password_hasher.verify_and_update(plain_password, hashed_password)
+    except PasswordHasherBusy:
+        raise _hasher_busy_exception()
 
-def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+async def get_password_hash(request: Request, password: str) -> str:
+    """Hash a password in the hashing pool"""
+    try:
+        return await request.app.password_hasher.hash(password)
+    except PasswordHasherBusy:
+        raise _hasher_busy_exception()
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
@@ -62,6 +92,20 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, settings.jwt_secret_key, algorithm=settings.jwt_algorithm)
     return encoded_jwt
 
+def token_subject(user_cache, token: str) -> Optional[str]:
+    """User id of a valid token, or None; tokens this worker already validated skip the signature check"""
+    user_id = user_cache.get_token_subject(token)
+    if user_id is not None:
+        return user_id
+    try:
+        payload = jwt.decode(token, settings.jwt_secret_key, algorithms=[settings.jwt_algorithm])
+    except JWTError:
+        return None
+    user_id = payload.get("sub")
+    if user_id is not None:
+        user_cache.remember_token(token, user_id, payload.get("exp"))
+    return user_id
+
 async def get_current_user(
     request: Request,
     credentials: HTTPAuthorizationCredentials = Depends(security),
@@ -74,28 +118,19 @@ async def get_current_user(
         headers={"WWW-Authenticate": "Bearer"},
     )
     
-    try:
-        payload = jwt.decode(
-            credentials.credentials, 
-            settings.jwt_secret_key, 
-            algorithms=[settings.jwt_algorithm]
-        )
-        user_id: str = payload.get("sub")
-        if user_id is None:
-            raise credentials_exception
-    except JWTError:
+    user_cache = request.app.user_cache
+    
+    user_id = token_subject(user_cache, credentials.credentials)
+    if user_id is None:
         raise credentials_exception
     
-    # Check cache first
-    cached_user = await request.app.redis.get(f"user:{user_id}")
+    # Check cache first (in-process, then Redis)
+    cached_user = await user_cache.get_user(user_id)
     if cached_user:
-        return json.loads(cached_user)
+        return cached_user
     
     # Query database
-    result = await db.execute(
-        text("SELECT id, email, username, first_name, last_name, is_active FROM users.users WHERE id = :user_id"),
-        {"user_id": user_id}
-    )
+    result = await db.execute(USER_BY_ID, {"user_id": user_id})
     user = result.fetchone()
     
     if user is None:
@@ -103,14 +138,8 @@ async def get_current_user(
     
     user_dict = dict(user._mapping)
     
-    # Cache user for 15 minutes
-    await request.app.redis.setex(
-        f"user:{user_id}",
-        900,  # 15 minutes
-        json.dumps(user_dict, default=str)
-    )
-    
-    return user_dict
+    # Cache user in both tiers
+    return await user_cache.set_user(user_id, user_dict)
 
 # Routes
 @router.post("/register", response_model=UserResponse)
@@ -122,10 +151,7 @@ async def register_user(
     """Register a new user"""
     
     # Check if user already exists
-    result = await db.execute(
-        text("SELECT id FROM users.users WHERE email = :email OR username = :username"),
-        {"email": user_data.email, "username": user_data.username}
-    )
+    result = await db.execute(USER_EXISTS, {"email": user_data.email, "username": user_data.username})
     existing_user = result.fetchone()
     
     if existing_user:
@@ -135,15 +161,11 @@ async def register_user(
         )
     
     # Hash password
-    hashed_password = get_password_hash(user_data.password)
+    hashed_password = await get_password_hash(request, user_data.password)
     
     # Create user
     result = await db.execute(
-        text("""
-            INSERT INTO users.users (email, username, password_hash, first_name, last_name)
-            VALUES (:email, :username, :password_hash, :first_name, :last_name)
-            RETURNING id, email, username, first_name, last_name, is_active, created_at
-        """),
+        INSERT_USER,
         {
             "email": user_data.email,
             "username": user_data.username,
@@ -178,13 +200,16 @@ async def login_user(
     """Authenticate user and return JWT token"""
     
     # Get user from database
-    result = await db.execute(
-        text("SELECT id, email, username, password_hash, first_name, last_name, is_active FROM users.users WHERE email = :email"),
-        {"email": user_credentials.email}
-    )
+    result = await db.execute(USER_BY_EMAIL, {"email": user_credentials.email})
     user = result.fetchone()
     
-    if not user or not verify_password(user_credentials.password, user.password_hash):
+    password_valid, new_password_hash = False, None
+    if user:
+        password_valid, new_password_hash = await verify_password(
+            request, user_credentials.password, user.password_hash
+        )
+    
+    if not password_valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -197,6 +222,12 @@ async def login_user(
             detail="User account is inactive"
         )
     
+    # Transparently upgrade the stored hash when the cost factor has changed
+    if new_password_hash:
+        await db.execute(UPDATE_PASSWORD_HASH, {"password_hash": new_password_hash, "user_id": user.id})
+        await db.commit()
+        await request.app.user_cache.invalidate_user(str(user.id))
+    
     # Create access token
     access_token_expires = timedelta(minutes=settings.jwt_expire_minutes)
     access_token = create_access_token(
@@ -242,8 +273,8 @@ async def logout_user(
     """Logout user (invalidate session)"""
     user_id = current_user["id"]
     
-    # Remove user from cache
-    await request.app.redis.delete(f"user:{user_id}")
+    # Remove user from cache on every gateway worker
+    await request.app.user_cache.invalidate_user(str(user_id))
     await request.app.redis.delete(f"session:{user_id}")
     
     return {"message": "Successfully logged out"}
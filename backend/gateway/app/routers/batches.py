@@ -0,0 +1,119 @@
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, Field
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import text
+from typing import List, Optional
+import logging
+import uuid
+
+from ..core.config import settings
+from ..core.database import get_db
+from ..services.batch import BatchSchedulerBusy, plan_batch
+from .auth import get_current_user
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+OWNED_FILES = text("""
+    SELECT id, file_hash, file_path, mime_type FROM files.uploaded_files
+    WHERE id = ANY(CAST(:file_ids AS uuid[])) AND user_id = CAST(:user_id AS uuid)
+""")
+
+# Models
+class BatchRequest(BaseModel):
+    file_ids: List[uuid.UUID] = Field(..., min_length=1)
+    themes: List[str] = Field(["professional"], min_length=1)
+    slide_count: int = Field(10, ge=1, le=100)
+    instructions: Optional[str] = Field(None, max_length=4000)
+
+async def _owned_state(request: Request, batch_id: uuid.UUID, user_id: str) -> dict:
+    state = await request.app.batch_scheduler.state(str(batch_id))
+    if state is None or state["user_id"] != user_id:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Batch not found")
+    return state
+
+# Routes
+@router.post("", status_code=status.HTTP_202_ACCEPTED)
+async def create_batch(
+    batch_request: BatchRequest,
+    request: Request,
+    current_user: dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Generate a presentation for every uploaded file in every theme.
+
+    Each document is processed and summarized once, however many themes
+    it is rendered in, and so is content uploaded more than once. Answers
+    at once with the batch's initial state; follow it at GET /api/batches/{id}
+    or through batch_progress events on /api/tasks/ws and /api/tasks/events.
+    """
+    if len(batch_request.file_ids) > settings.batch_max_documents:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.batch_max_documents} files per batch"
+        )
+    if len(batch_request.themes) > settings.batch_max_themes:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.batch_max_themes} themes per batch"
+        )
+
+    user_id = str(current_user["id"])
+    file_ids = [str(file_id) for file_id in batch_request.file_ids]
+    result = await db.execute(OWNED_FILES, {"file_ids": list(set(file_ids)), "user_id": user_id})
+    files = {str(row.id): row for row in result}
+    missing = [file_id for file_id in file_ids if file_id not in files]
+    if missing:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Files not found: {', '.join(missing)}")
+
+    documents = [
+        {
+            "file_id": file_id,
+            "file_hash": files[file_id].file_hash,
+            "file_path": files[file_id].file_path,
+            "mime_type": files[file_id].mime_type
+        }
+        for file_id in file_ids
+    ]
+    plan = plan_batch(documents, batch_request.themes, batch_request.slide_count, batch_request.instructions)
+    try:
+        batch = await request.app.batch_scheduler.submit(user_id, plan)
+    except BatchSchedulerBusy:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many batches running, please retry",
+            headers={"Retry-After": "5"}
+        )
+    logger.info(f"Batch {batch.id}: {len(plan.outputs)} outputs as {len(plan.nodes)} of {plan.requested} tasks")
+    return JSONResponse(
+        status_code=status.HTTP_202_ACCEPTED,
+        content=batch.snapshot(),
+        headers={"Location": f"/api/batches/{batch.id}"}
+    )
+
+@router.get("/{batch_id}")
+async def get_batch(
+    batch_id: uuid.UUID,
+    request: Request,
+    current_user: dict = Depends(get_current_user)
+):
+    """A batch's progress per stage and the status of each output"""
+    return await _owned_state(request, batch_id, str(current_user["id"]))
+
+@router.delete("/{batch_id}")
+async def cancel_batch(
+    batch_id: uuid.UUID,
+    request: Request,
+    current_user: dict = Depends(get_current_user)
+):
+    """Cancel a running batch; outputs already rendered are kept"""
+    state = await _owned_state(request, batch_id, str(current_user["id"]))
+    batch = await request.app.batch_scheduler.cancel(str(batch_id))
+    if batch is not None:
+        return batch.snapshot()
+    if state["status"] != "running":
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=f"Batch already {state['status']}")
+    # Batches run in the gateway process that accepted them
+    raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Batch is running on another gateway instance")
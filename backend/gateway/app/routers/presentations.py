@@ -0,0 +1,212 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import text
+from datetime import datetime
+from typing import Optional, Tuple
+import base64
+import hashlib
+import json
+import logging
+import uuid
+
+from ..core.config import settings
+from ..core.database import get_db
+from .auth import get_current_user
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+# List views never read content or slides: both are large JSONB, and selecting them
+# would detoast every row on the page
+LIST_COLUMNS = """
+    id, title, LEFT(description, 300) AS description, theme, slide_count, status, created_at, updated_at
+"""
+
+# Keyset pagination, newest first, served by idx_presentations_user_created
+FIRST_PAGE = text(f"""
+    SELECT {LIST_COLUMNS} FROM presentations.presentations
+    WHERE user_id = CAST(:user_id AS uuid)
+    ORDER BY created_at DESC, id DESC
+    LIMIT :limit
+""")
+NEXT_PAGE = text(f"""
+    SELECT {LIST_COLUMNS} FROM presentations.presentations
+    WHERE user_id = CAST(:user_id AS uuid)
+      AND (created_at, id) < (CAST(:created_at AS timestamptz), CAST(:id AS uuid))
+    ORDER BY created_at DESC, id DESC
+    LIMIT :limit
+""")
+
+# The expression matches idx_presentations_search_trgm, so ILIKE uses the trigram index
+SEARCH_TEXT = "(COALESCE(title, '') || ' ' || COALESCE(description, ''))"
+SEARCH_FIRST_PAGE = text(f"""
+    SELECT {LIST_COLUMNS} FROM presentations.presentations
+    WHERE user_id = CAST(:user_id AS uuid) AND {SEARCH_TEXT} ILIKE :pattern
+    ORDER BY created_at DESC, id DESC
+    LIMIT :limit
+""")
+SEARCH_NEXT_PAGE = text(f"""
+    SELECT {LIST_COLUMNS} FROM presentations.presentations
+    WHERE user_id = CAST(:user_id AS uuid) AND {SEARCH_TEXT} ILIKE :pattern
+      AND (created_at, id) < (CAST(:created_at AS timestamptz), CAST(:id AS uuid))
+    ORDER BY created_at DESC, id DESC
+    LIMIT :limit
+""")
+
+PRESENTATION_BY_ID = text("""
+    SELECT id, title, description, content, slides, theme, slide_count, status, original_file_path,
+           export_formats, metadata, created_at, updated_at
+    FROM presentations.presentations
+    WHERE id = CAST(:id AS uuid) AND user_id = CAST(:user_id AS uuid)
+""")
+DELETE_PRESENTATION = text("""
+    DELETE FROM presentations.presentations
+    WHERE id = CAST(:id AS uuid) AND user_id = CAST(:user_id AS uuid)
+    RETURNING id
+""")
+
+# Helper functions
+def encode_cursor(created_at: datetime, presentation_id) -> str:
+    raw = json.dumps([created_at.isoformat(), str(presentation_id)]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    try:
+        created_at, presentation_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return datetime.fromisoformat(created_at), str(uuid.UUID(presentation_id))
+    except (ValueError, TypeError, AttributeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+def _summary(row) -> dict:
+    return {
+        "id": str(row.id),
+        "title": row.title,
+        "description": row.description,
+        "theme": row.theme,
+        "slide_count": row.slide_count,
+        "status": row.status,
+        "created_at": row.created_at.isoformat() if row.created_at else None,
+        "updated_at": row.updated_at.isoformat() if row.updated_at else None
+    }
+
+async def _page(db: AsyncSession, first, following, params: dict, limit: int, cursor: Optional[str]) -> str:
+    """One page as a JSON body, fetching a row past the limit to know whether another page follows"""
+    params = {**params, "limit": limit + 1}
+    if cursor:
+        created_at, presentation_id = decode_cursor(cursor)
+        result = await db.execute(following, {**params, "created_at": created_at, "id": presentation_id})
+    else:
+        result = await db.execute(first, params)
+    rows = result.fetchall()
+    next_cursor = encode_cursor(rows[limit - 1].created_at, rows[limit - 1].id) if len(rows) > limit else None
+    return json.dumps({"items": [_summary(row) for row in rows[:limit]], "next_cursor": next_cursor})
+
+def _etag(body: str) -> str:
+    return '"' + hashlib.sha256(body.encode()).hexdigest()[:32] + '"'
+
+def _json_response(request: Request, body: str, etag: str) -> Response:
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag in {tag.strip().removeprefix("W/") for tag in request.headers.get("if-none-match", "").split(",")}:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+def _first_page_key(user_id: str) -> str:
+    return f"presentations:first_page:{user_id}"
+
+async def invalidate_presentation_list(redis_client, user_id: str):
+    """Drop a user's cached first pages; call after creating, changing or deleting their presentations"""
+    await redis_client.delete(_first_page_key(user_id))
+
+# Routes
+@router.get("")
+async def list_presentations(
+    request: Request,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None),
+    current_user: dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    The user's presentations, newest first, without content or slides.
+
+    Pass the returned next_cursor back as ?cursor= for the following page.
+    The first page is cached in Redis for presentations_first_page_ttl
+    seconds and carries an ETag, so a client polling its dashboard with
+    If-None-Match gets a 304 without touching the database.
+    """
+    user_id = str(current_user["id"])
+    if cursor:
+        body = await _page(db, FIRST_PAGE, NEXT_PAGE, {"user_id": user_id}, limit, cursor)
+        return _json_response(request, body, _etag(body))
+
+    redis_client = request.app.redis
+    key, field = _first_page_key(user_id), str(limit)
+    try:
+        etag, body = await redis_client.hmget(key, f"{field}:etag", f"{field}:body")
+    except Exception as e:
+        logger.warning(f"Presentation list cache read failed: {e}")
+        etag = body = None
+    if etag and body:
+        return _json_response(request, body, etag)
+
+    body = await _page(db, FIRST_PAGE, NEXT_PAGE, {"user_id": user_id}, limit, None)
+    etag = _etag(body)
+    try:
+        async with redis_client.pipeline(transaction=False) as pipe:
+            pipe.hset(key, mapping={f"{field}:etag": etag, f"{field}:body": body})
+            pipe.expire(key, settings.presentations_first_page_ttl)
+            await pipe.execute()
+    except Exception as e:
+        logger.warning(f"Presentation list cache write failed: {e}")
+    return _json_response(request, body, etag)
+
+@router.get("/search")
+async def search_presentations(
+    request: Request,
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None),
+    current_user: dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    The user's presentations whose title or description contains q (case-insensitive), newest first.
+
+    Queries of three or more characters use the trigram index; shorter
+    ones fall back to scanning the user's own presentations.
+    """
+    escaped = q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    body = await _page(
+        db, SEARCH_FIRST_PAGE, SEARCH_NEXT_PAGE,
+        {"user_id": str(current_user["id"]), "pattern": f"%{escaped}%"}, limit, cursor
+    )
+    return _json_response(request, body, _etag(body))
+
+@router.get("/{presentation_id}")
+async def get_presentation(
+    presentation_id: uuid.UUID,
+    current_user: dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """One presentation in full, including content and slides"""
+    result = await db.execute(PRESENTATION_BY_ID, {"id": str(presentation_id), "user_id": str(current_user["id"])})
+    presentation = result.fetchone()
+    if presentation is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Presentation not found")
+    return dict(presentation._mapping)
+
+@router.delete("/{presentation_id}")
+async def delete_presentation(
+    presentation_id: uuid.UUID,
+    request: Request,
+    current_user: dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Delete one of the user's presentations"""
+    user_id = str(current_user["id"])
+    result = await db.execute(DELETE_PRESENTATION, {"id": str(presentation_id), "user_id": user_id})
+    if result.fetchone() is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Presentation not found")
+    await db.commit()
+    await invalidate_presentation_list(request.app.redis, user_id)
+    return {"message": "Presentation deleted"}
@@ -0,0 +1,70 @@
+from fastapi import APIRouter, Depends, HTTPException, status, Request
+from starlette.background import BackgroundTask
+from starlette.responses import StreamingResponse
+
+from ..services.proxy import HOP_BY_HOP_HEADERS, ServiceUnavailable, forwardable_headers
+from .auth import get_current_user
+
+router = APIRouter()
+
+PROXY_METHODS = ["GET", "POST", "PUT", "PATCH", "DELETE", "HEAD", "OPTIONS"]
+# Set by the gateway on every proxied request, replacing anything the client sent
+GATEWAY_HEADERS = ("x-user-id", "x-forwarded-for", "x-forwarded-host", "x-forwarded-proto")
+
+# Helper functions
+def _has_body(request: Request) -> bool:
+    content_length = request.headers.get("content-length")
+    return (content_length is not None and content_length != "0") or "transfer-encoding" in request.headers
+
+def _upstream_headers(request: Request, user_id: str) -> dict:
+    # Services trust these to identify the caller, so the client's own never pass through
+    headers = forwardable_headers(request.headers.items(), drop=GATEWAY_HEADERS)
+    client_host = request.client.host if request.client else None
+    if client_host:
+        forwarded_for = request.headers.get("x-forwarded-for")
+        headers["x-forwarded-for"] = f"{forwarded_for}, {client_host}" if forwarded_for else client_host
+    headers["x-forwarded-proto"] = request.url.scheme
+    headers["x-forwarded-host"] = request.headers.get("host", "")
+    headers["x-user-id"] = user_id
+    return headers
+
+def _unavailable_exception(e: ServiceUnavailable) -> HTTPException:
+    headers = {"Retry-After": str(max(1, round(e.retry_after)))} if e.retry_after is not None else None
+    return HTTPException(status_code=e.status_code, detail=f"Service {e.service} unavailable: {e.reason}", headers=headers)
+
+# Routes
+@router.api_route("/{service}/{path:path}", methods=PROXY_METHODS)
+async def proxy_request(
+    service: str,
+    path: str,
+    request: Request,
+    current_user: dict = Depends(get_current_user)
+):
+    """Forward a request to a downstream service, streaming both bodies"""
+    name = service.replace("-", "_")
+    if name not in request.app.proxies:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Unknown service: {service}")
+    proxy = request.app.proxies[name]
+
+    try:
+        upstream = await proxy.send(
+            request.method,
+            "/" + path,
+            headers=_upstream_headers(request, str(current_user["id"])),
+            params=request.query_params.multi_items(),
+            body=request.stream() if _has_body(request) else None
+        )
+    except ServiceUnavailable as e:
+        raise _unavailable_exception(e)
+
+    # Raw bytes pass through untouched, so Content-Encoding and Content-Length stay valid
+    response = StreamingResponse(
+        upstream.aiter_raw(),
+        status_code=upstream.status_code,
+        background=BackgroundTask(upstream.aclose)
+    )
+    response.raw_headers = [
+        (key, value) for key, value in upstream.headers.raw
+        if key.decode("latin-1").lower() not in HOP_BY_HOP_HEADERS
+    ]
+    return response
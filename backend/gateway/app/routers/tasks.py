@@ -0,0 +1,177 @@
+from fastapi import APIRouter, HTTPException, Query, Request, WebSocket, WebSocketDisconnect, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import text
+from starlette.background import BackgroundTask
+from typing import Iterable, List, Optional
+import asyncio
+import json
+import logging
+import uuid
+
+from ..core.config import settings
+from ..core.database import AsyncSessionLocal
+from ..services.task_events import TaskEventsBusy
+from .auth import token_subject
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+
+def _valid_task_ids(values: Iterable) -> List[str]:
+    """Canonical forms of the values that are UUIDs; anything else can't name a task"""
+    task_ids = []
+    for value in values:
+        try:
+            task_ids.append(str(uuid.UUID(str(value))))
+        except ValueError:
+            continue
+    return task_ids
+
+
+async def owned_tasks(user_id: str, task_ids: List[str]) -> List[str]:
+    """The subset of task_ids that belong to user_id"""
+    task_ids = _valid_task_ids(task_ids)
+    if not task_ids:
+        return []
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            text("""
+                SELECT id FROM tasks.processing_tasks
+                WHERE id = ANY(CAST(:task_ids AS uuid[])) AND user_id = CAST(:user_id AS uuid)
+            """),
+            {"task_ids": task_ids, "user_id": user_id}
+        )
+        return [str(row.id) for row in result]
+
+
+def _token(authorization: Optional[str], token: Optional[str]) -> Optional[str]:
+    # Browsers can't set headers on EventSource or WebSocket requests, hence ?token=
+    if authorization:
+        scheme, _, credentials = authorization.partition(" ")
+        if scheme.lower() == "bearer" and credentials:
+            return credentials
+    return token
+
+
+@router.websocket("/ws")
+async def task_events_websocket(
+    websocket: WebSocket,
+    token: Optional[str] = Query(None),
+    task_id: List[uuid.UUID] = Query([])
+):
+    """
+    Real-time task events over a WebSocket.
+
+    Receives events for the user's own notifications and for the tasks
+    given as ?task_id= or added later with {"subscribe": [ids]}. Tasks are
+    dropped with {"unsubscribe": [ids]}.
+    """
+    app = websocket.app
+    user_id = token_subject(app.user_cache, _token(websocket.headers.get("authorization"), token) or "")
+    if user_id is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    hub = app.task_events
+    try:
+        subscriber = hub.subscribe(user_id)
+    except TaskEventsBusy:
+        await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER)
+        return
+
+    try:
+        await websocket.accept()
+        hub.follow(subscriber, await owned_tasks(user_id, [str(task) for task in task_id[:hub.max_tasks_per_client]]))
+
+        async def send():
+            while True:
+                payload = await subscriber.get()
+                if payload is None:
+                    return
+                await websocket.send_text(payload)
+
+        async def receive():
+            while True:
+                try:
+                    command = json.loads(await websocket.receive_text())
+                except ValueError:
+                    continue
+                if not isinstance(command, dict):
+                    continue
+                if command.get("subscribe") and isinstance(command["subscribe"], list):
+                    requested = _valid_task_ids(command["subscribe"])[:hub.max_tasks_per_client]
+                    added = hub.follow(subscriber, await owned_tasks(user_id, requested))
+                    await websocket.send_text(json.dumps({"event": "subscribed", "task_ids": added}))
+                if command.get("unsubscribe") and isinstance(command["unsubscribe"], list):
+                    hub.unfollow(subscriber, _valid_task_ids(command["unsubscribe"]))
+
+        sender = asyncio.create_task(send())
+        receiver = asyncio.create_task(receive())
+        done, pending = await asyncio.wait({sender, receiver}, return_when=asyncio.FIRST_COMPLETED)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        for task in done:
+            error = task.exception()
+            if error is not None and not isinstance(error, WebSocketDisconnect):
+                # Usually the client going away mid-send, which the server reports in its own words
+                logger.debug(f"Task event stream for user {user_id} ended: {error}")
+        if subscriber.close_reason == "slow consumer" and receiver not in done:
+            await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER, reason="slow consumer")
+    except WebSocketDisconnect:
+        pass
+    finally:
+        hub.unsubscribe(subscriber)
+
+
+@router.get("/events")
+async def task_events_stream(
+    request: Request,
+    token: Optional[str] = Query(None),
+    task_id: List[uuid.UUID] = Query([])
+):
+    """Real-time task events as server-sent events; the same events as /ws, read-only"""
+    app = request.app
+    user_id = token_subject(app.user_cache, _token(request.headers.get("authorization"), token) or "")
+    if user_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"}
+        )
+
+    hub = app.task_events
+    try:
+        subscriber = hub.subscribe(user_id)
+    except TaskEventsBusy:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Too many event streams")
+    try:
+        hub.follow(subscriber, await owned_tasks(user_id, [str(task) for task in task_id[:hub.max_tasks_per_client]]))
+    except BaseException:
+        hub.unsubscribe(subscriber)
+        raise
+
+    async def events():
+        yield "retry: 3000\n\n"
+        while True:
+            try:
+                payload = await asyncio.wait_for(subscriber.get(), timeout=settings.task_events_keepalive)
+            except asyncio.TimeoutError:
+                # Comments keep proxies from closing an idle stream
+                yield ": keepalive\n\n"
+                continue
+            if payload is None:
+                return
+            yield f"data: {payload}\n\n"
+
+    async def release():
+        hub.unsubscribe(subscriber)
+
+    # The response runs its background task however the stream ends, including a
+    # client that disconnects before events() ever starts, whose finally would never run
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=BackgroundTask(release)
+    )
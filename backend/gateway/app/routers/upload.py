@@ -0,0 +1,224 @@
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Query
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import text
+from datetime import datetime
+from pydantic import BaseModel
+from typing import Optional
+import hashlib
+import json
+import mimetypes
+import os
+import uuid
+
+from ..core.config import settings
+from ..core.database import get_db
+from .auth import get_current_user
+
+router = APIRouter()
+
+# upload_status values of a file that has been through document processing
+PROCESSED_STATUSES = ("processed", "completed")
+# ...and of one being processed right now
+IN_PROGRESS_STATUSES = ("processing",)
+
+# Pydantic models
+class UploadResponse(BaseModel):
+    file_id: str
+    original_filename: str
+    file_size: int
+    file_hash: str
+    mime_type: Optional[str]
+    upload_status: str
+    duplicate: bool
+
+class FileTooLarge(Exception):
+    pass
+
+# Helper functions
+def content_addressed_path(file_hash: str, extension: str) -> str:
+    """Storage path for a file: <upload_directory>/ab/cd/<sha256><ext>"""
+    return os.path.join(settings.upload_directory, file_hash[:2], file_hash[2:4], f"{file_hash}{extension}")
+
+def _write_chunks(handle, chunks: list):
+    for chunk in chunks:
+        handle.write(chunk)
+
+def _commit_file(temp_path: str, final_path: str):
+    """Move a finished upload into content-addressed storage (no-op if already stored)"""
+    os.makedirs(os.path.dirname(final_path), exist_ok=True)
+    if os.path.exists(final_path):
+        os.remove(temp_path)
+    else:
+        os.replace(temp_path, final_path)
+
+async def stream_to_disk(request: Request, temp_path: str, max_size: int):
+    """Stream the request body to disk, hashing as bytes arrive; returns (size, sha256)"""
+    hasher = hashlib.sha256()
+    size = 0
+    pending, pending_size = [], 0
+
+    handle = await run_in_threadpool(open, temp_path, "wb")
+    try:
+        async for chunk in request.stream():
+            if not chunk:
+                continue
+            size += len(chunk)
+            if size > max_size:
+                raise FileTooLarge()
+            hasher.update(chunk)
+
+            # Batch small network chunks into larger disk writes
+            pending.append(chunk)
+            pending_size += len(chunk)
+            if pending_size >= settings.upload_write_buffer_size:
+                await run_in_threadpool(_write_chunks, handle, pending)
+                pending, pending_size = [], 0
+
+        if pending:
+            await run_in_threadpool(_write_chunks, handle, pending)
+    finally:
+        await run_in_threadpool(handle.close)
+
+    return size, hasher.hexdigest()
+
+# Routes
+@router.post("/", response_model=UploadResponse)
+async def upload_file(
+    request: Request,
+    filename: str = Query(..., min_length=1, max_length=500),
+    current_user: dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Upload a document as the raw request body.
+
+    The body is streamed to disk and hashed on the fly. Files are stored by
+    content hash; re-uploading a known file reuses the existing processing
+    results instead of queueing the document again.
+    """
+    original_filename = os.path.basename(filename)
+    extension = os.path.splitext(original_filename)[1].lower()
+    if extension not in settings.allowed_file_types:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail=f"File type {extension or '(none)'} is not allowed"
+        )
+
+    too_large_exception = HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"File exceeds maximum size of {settings.max_file_size} bytes"
+    )
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > settings.max_file_size:
+        raise too_large_exception
+
+    temp_dir = os.path.join(settings.upload_directory, "tmp")
+    temp_path = os.path.join(temp_dir, f"{uuid.uuid4().hex}.part")
+    await run_in_threadpool(os.makedirs, temp_dir, exist_ok=True)
+
+    try:
+        file_size, file_hash = await stream_to_disk(request, temp_path, settings.max_file_size)
+    except FileTooLarge:
+        await run_in_threadpool(os.remove, temp_path)
+        raise too_large_exception
+    except BaseException:
+        # Client disconnects and cancellations must not leave partial files behind
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+    if file_size == 0:
+        await run_in_threadpool(os.remove, temp_path)
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Empty file")
+
+    file_path = content_addressed_path(file_hash, extension)
+    await run_in_threadpool(_commit_file, temp_path, file_path)
+
+    mime_type = request.headers.get("content-type")
+    if not mime_type or mime_type == "application/octet-stream":
+        mime_type = mimetypes.guess_type(original_filename)[0] or mime_type
+    user_id = str(current_user["id"])
+
+    # Dedupe through idx_files_file_hash, preferring the user's own copy, then a processed one
+    result = await db.execute(
+        text("""
+            SELECT id, user_id, upload_status FROM files.uploaded_files
+            WHERE file_hash = :file_hash
+            ORDER BY (user_id = :user_id) DESC, (upload_status = ANY(:processed)) DESC, created_at
+            LIMIT 1
+        """),
+        {"file_hash": file_hash, "user_id": user_id, "processed": list(PROCESSED_STATUSES)}
+    )
+    existing = result.fetchone()
+    duplicate = existing is not None
+
+    # The user's own copy is returned while it is processed or being processed
+    own = duplicate and str(existing.user_id) == user_id
+    if own and existing.upload_status in PROCESSED_STATUSES + IN_PROGRESS_STATUSES:
+        return UploadResponse(
+            file_id=str(existing.id),
+            original_filename=original_filename,
+            file_size=file_size,
+            file_hash=file_hash,
+            mime_type=mime_type,
+            upload_status=existing.upload_status,
+            duplicate=True
+        )
+
+    # Another user's copy that was already processed is reused as is. Anything
+    # else (failed, or never picked up) is processed again for this upload
+    reused = duplicate and not own and existing.upload_status in PROCESSED_STATUSES
+    upload_status = existing.upload_status if reused else "uploaded"
+    if own:
+        # Retry the user's failed or stalled copy rather than answer with it forever
+        await db.execute(
+            text("UPDATE files.uploaded_files SET upload_status = :upload_status WHERE id = :id"),
+            {"upload_status": upload_status, "id": existing.id}
+        )
+        file_id = str(existing.id)
+    else:
+        result = await db.execute(
+            text("""
+                INSERT INTO files.uploaded_files
+                    (original_filename, stored_filename, file_path, file_size, mime_type, file_hash, upload_status, user_id)
+                VALUES (:original_filename, :stored_filename, :file_path, :file_size, :mime_type, :file_hash, :upload_status, :user_id)
+                RETURNING id
+            """),
+            {
+                "original_filename": original_filename,
+                "stored_filename": os.path.basename(file_path),
+                "file_path": file_path,
+                "file_size": file_size,
+                "mime_type": mime_type,
+                "file_hash": file_hash,
+                "upload_status": upload_status,
+                "user_id": user_id
+            }
+        )
+        file_id = str(result.fetchone().id)
+    await db.commit()
+
+    if not reused:
+        await request.app.redis.publish(
+            settings.channel_presentation_events,
+            json.dumps({
+                "event": "file_uploaded",
+                "file_id": file_id,
+                "user_id": user_id,
+                "file_path": file_path,
+                "file_hash": file_hash,
+                "mime_type": mime_type,
+                "timestamp": datetime.utcnow().isoformat()
+            })
+        )
+
+    return UploadResponse(
+        file_id=file_id,
+        original_filename=original_filename,
+        file_size=file_size,
+        file_hash=file_hash,
+        mime_type=mime_type,
+        upload_status=upload_status,
+        duplicate=duplicate
+    )
@@ -0,0 +1,539 @@
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+import uuid
+
+from sqlalchemy import text
+
+from ..core.database import get_async_engine
+from ..core.metrics import LatencyHistogram
+from .proxy import ServiceProxies
+
+logger = logging.getLogger(__name__)
+
+# Stages in pipeline order; the names are tasks.processing_tasks.task_type values
+DOCUMENT_PROCESSING = "document_processing"
+AI_GENERATION = "ai_generation"
+PRESENTATION_RENDERING = "presentation_rendering"
+STAGES = (DOCUMENT_PROCESSING, AI_GENERATION, PRESENTATION_RENDERING)
+STAGE_SERVICES = {
+    DOCUMENT_PROCESSING: "document_processor",
+    AI_GENERATION: "ai_generator",
+    PRESENTATION_RENDERING: "presentation_renderer"
+}
+
+TASK_STATUSES = ("pending", "processing", "completed", "failed", "cancelled")
+TERMINAL_STATUSES = frozenset({"completed", "failed", "cancelled"})
+
+CREATE_TASKS = text("""
+    INSERT INTO tasks.processing_tasks (id, task_type, status, input_data, user_id)
+    SELECT id, task_type, 'pending', input_data, CAST(:user_id AS uuid)
+    FROM unnest(CAST(:ids AS uuid[]), CAST(:task_types AS varchar[]), CAST(:inputs AS jsonb[]))
+        AS t(id, task_type, input_data)
+""")
+START_TASK = text("""
+    UPDATE tasks.processing_tasks SET status = 'processing', started_at = NOW()
+    WHERE id = CAST(:id AS uuid)
+""")
+FINISH_TASK = text("""
+    UPDATE tasks.processing_tasks
+    SET status = :status, progress = :progress, result_data = CAST(:result_data AS jsonb),
+        error_message = :error_message, completed_at = NOW()
+    WHERE id = CAST(:id AS uuid)
+""")
+CANCEL_TASKS = text("""
+    UPDATE tasks.processing_tasks SET status = 'cancelled', completed_at = NOW()
+    WHERE id = ANY(CAST(:ids AS uuid[])) AND status IN ('pending', 'processing')
+""")
+
+
+class BatchSchedulerBusy(Exception):
+    """Raised when max_active batches are already running and a new one is not admitted"""
+
+
+class StageFailed(Exception):
+    """Raised when a service answers a stage's request with an error"""
+
+
+@dataclass(eq=False)
+class BatchNode:
+    """One task in a batch's DAG, shared by every output whose inputs hash to its key"""
+    key: str
+    stage: str
+    input: Dict[str, Any]
+    depends_on: List["BatchNode"]
+    task_id: str = field(default_factory=lambda: str(uuid.uuid4()))
+    status: str = "pending"
+    result: Any = field(default=None, repr=False)
+    error: Optional[str] = None
+    dependents: int = 0  # nodes still waiting to read this node's result
+    task: Optional[asyncio.Task] = field(default=None, repr=False)
+
+
+@dataclass
+class BatchOutput:
+    file_id: str
+    theme: str
+    node: BatchNode
+
+
+@dataclass
+class BatchPlan:
+    nodes: Dict[str, BatchNode]  # by key, upstream nodes first
+    outputs: List[BatchOutput]
+    requested: int = 0           # nodes before identical ones were merged
+
+
+def node_key(stage: str, inputs: Dict[str, Any], depends_on: Iterable[BatchNode]) -> str:
+    """Hash of a stage, its own inputs and its upstream keys: equal keys mean equal work"""
+    raw = json.dumps([stage, inputs, [node.key for node in depends_on]], sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def plan_batch(
+    documents: List[Dict[str, Any]],
+    themes: List[str],
+    slide_count: int,
+    instructions: Optional[str] = None,
+    merge: bool = True
+) -> BatchPlan:
+    """
+    Expand documents x themes into a DAG of processing, generation and rendering nodes.
+
+    `documents` are uploaded_files rows as dicts (file_id, file_hash,
+    file_path, mime_type). A document is processed and summarized once
+    however many themes it is rendered in, and documents with the same
+    content share both, since their nodes hash to the same keys. With
+    merge=False every output gets its own chain, which is what running the
+    outputs one by one would cost.
+    """
+    plan = BatchPlan(nodes={}, outputs=[])
+
+    def add(stage: str, key_inputs: dict, inputs: dict, depends_on: tuple) -> BatchNode:
+        plan.requested += 1
+        key = node_key(stage, key_inputs, depends_on)
+        node = plan.nodes.get(key)
+        if node is None:
+            node = plan.nodes[key] = BatchNode(key, stage, inputs, list(depends_on))
+            for upstream in depends_on:
+                upstream.dependents += 1
+        return node
+
+    for document in documents:
+        for theme in themes:
+            distinct = {} if merge else {"output": len(plan.outputs)}
+            processed = add(
+                DOCUMENT_PROCESSING,
+                {"content": document.get("file_hash") or document["file_id"], **distinct},
+                {key: document.get(key) for key in ("file_id", "file_hash", "file_path", "mime_type")},
+                ()
+            )
+            generation = {"slide_count": slide_count, "instructions": instructions}
+            generated = add(AI_GENERATION, {**generation, **distinct}, generation, (processed,))
+            rendered = add(PRESENTATION_RENDERING, {"theme": theme, **distinct}, {"theme": theme}, (generated,))
+            plan.outputs.append(BatchOutput(document["file_id"], theme, rendered))
+    return plan
+
+
+class Batch:
+    def __init__(self, batch_id: str, user_id: str, plan: BatchPlan):
+        self.id = batch_id
+        self.user_id = user_id
+        self.plan = plan
+        self.status = "running"
+        self.cancelled = False
+        self.created_at = datetime.now(timezone.utc)
+        self.completed_at: Optional[datetime] = None
+        self.supervisor: Optional[asyncio.Task] = None
+        self.last_flush = 0.0
+
+    def finish(self):
+        self.completed_at = datetime.now(timezone.utc)
+        completed = sum(1 for output in self.plan.outputs if output.node.status == "completed")
+        if self.cancelled:
+            self.status = "cancelled"
+        elif completed == len(self.plan.outputs):
+            self.status = "completed"
+        else:
+            self.status = "failed" if completed == 0 else "partial"
+
+    def snapshot(self) -> dict:
+        nodes = self.plan.nodes.values()
+        stages = {stage: dict.fromkeys(("total",) + TASK_STATUSES, 0) for stage in STAGES}
+        for node in nodes:
+            stages[node.stage]["total"] += 1
+            stages[node.stage][node.status] += 1
+        done = sum(1 for node in nodes if node.status in TERMINAL_STATUSES)
+        outputs = []
+        for output in self.plan.outputs:
+            entry = {"file_id": output.file_id, "theme": output.theme, "task_id": output.node.task_id, "status": output.node.status}
+            if output.node.error:
+                entry["error"] = output.node.error
+            outputs.append(entry)
+        return {
+            "batch_id": self.id,
+            "user_id": self.user_id,
+            "status": self.status,
+            "progress": int(100 * done / len(self.plan.nodes)) if self.plan.nodes else 100,
+            "created_at": self.created_at.isoformat(),
+            "completed_at": self.completed_at.isoformat() if self.completed_at else None,
+            "tasks": {
+                "requested": self.plan.requested,
+                "scheduled": len(self.plan.nodes),
+                "merged": self.plan.requested - len(self.plan.nodes)
+            },
+            "stages": stages,
+            "outputs": outputs
+        }
+
+
+class TaskStore:
+    """Keeps a batch's nodes as tasks.processing_tasks rows"""
+
+    async def create(self, batch: Batch):
+        nodes = list(batch.plan.nodes.values())
+        inputs = [
+            json.dumps({
+                "batch_id": batch.id,
+                "key": node.key,
+                "depends_on": [upstream.task_id for upstream in node.depends_on],
+                **node.input
+            })
+            for node in nodes
+        ]
+        async with get_async_engine().begin() as conn:
+            await conn.execute(CREATE_TASKS, {
+                "user_id": batch.user_id,
+                "ids": [node.task_id for node in nodes],
+                "task_types": [node.stage for node in nodes],
+                "inputs": inputs
+            })
+
+    async def started(self, node: BatchNode):
+        async with get_async_engine().begin() as conn:
+            await conn.execute(START_TASK, {"id": node.task_id})
+
+    async def finished(self, node: BatchNode):
+        async with get_async_engine().begin() as conn:
+            await conn.execute(FINISH_TASK, {
+                "id": node.task_id,
+                "status": node.status,
+                "progress": 100 if node.status == "completed" else 0,
+                "result_data": json.dumps(node.result) if node.result is not None else None,
+                "error_message": node.error
+            })
+
+    async def cancel(self, nodes: List[BatchNode]):
+        async with get_async_engine().begin() as conn:
+            await conn.execute(CANCEL_TASKS, {"ids": [node.task_id for node in nodes]})
+
+
+class BatchScheduler:
+    """
+    Runs batch DAGs against the downstream services, with a concurrency limit per stage.
+
+    Every node of a batch is a task that waits for its upstream nodes and
+    then for a slot in its stage, so independent nodes run concurrently and
+    each stage starts as soon as its own inputs are ready rather than
+    after the whole previous stage. The slots are shared by all batches in
+    the process. A failed node fails its dependents and nothing else.
+
+    Results move between stages in memory and are dropped once every
+    dependent has read them; rendered decks are written under
+    output_directory. Progress goes to Redis (`batch:{id}`, for
+    state_ttl seconds) at most every progress_interval seconds and on
+    completion, each time with a batch_progress event on `channel`.
+    Batches run in the gateway process that accepted them and are
+    cancelled when it stops.
+    """
+
+    def __init__(
+        self,
+        proxies: ServiceProxies,
+        redis_client,
+        store: Optional[TaskStore] = None,
+        concurrency: Optional[Dict[str, int]] = None,
+        paths: Optional[Dict[str, str]] = None,
+        output_directory: str = "./uploads/presentations",
+        max_active: int = 20,
+        state_ttl: int = 86400,
+        progress_interval: float = 0.5,
+        channel: str = "task.updates"
+    ):
+        self.proxies = proxies
+        self.redis = redis_client
+        self.store = store or TaskStore()
+        concurrency = concurrency or {}
+        self.concurrency = {stage: concurrency.get(stage, 4) for stage in STAGES}
+        self.paths = {
+            DOCUMENT_PROCESSING: "/process",
+            AI_GENERATION: "/generate",
+            PRESENTATION_RENDERING: "/render",
+            **(paths or {})
+        }
+        self.output_directory = output_directory
+        self.max_active = max_active
+        self.state_ttl = state_ttl
+        self.progress_interval = progress_interval
+        self.channel = channel
+        self._slots = {stage: asyncio.Semaphore(limit) for stage, limit in self.concurrency.items()}
+        self._batches: Dict[str, Batch] = {}
+
+        # Metrics
+        self.durations = {stage: LatencyHistogram() for stage in STAGES}
+        self.in_flight = dict.fromkeys(STAGES, 0)
+        self.batches_submitted = 0
+        self.batches_rejected = 0
+        self.nodes_requested = 0
+        self.nodes_scheduled = 0
+        self.nodes_completed = 0
+        self.nodes_failed = 0
+
+    @staticmethod
+    def state_key(batch_id: str) -> str:
+        return f"batch:{batch_id}"
+
+    # Batches
+
+    async def submit(self, user_id: str, plan: BatchPlan) -> Batch:
+        """Start running a plan; raises BatchSchedulerBusy when max_active batches are running"""
+        if len(self._batches) >= self.max_active:
+            self.batches_rejected += 1
+            raise BatchSchedulerBusy()
+
+        batch = Batch(str(uuid.uuid4()), user_id, plan)
+        self._batches[batch.id] = batch  # counted against max_active while its rows are written
+        try:
+            await self.store.create(batch)
+        except BaseException:
+            del self._batches[batch.id]
+            raise
+
+        self.batches_submitted += 1
+        self.nodes_requested += plan.requested
+        self.nodes_scheduled += len(plan.nodes)
+        for node in plan.nodes.values():
+            node.task = asyncio.create_task(self._run_node(batch, node))
+        batch.supervisor = asyncio.create_task(self._supervise(batch))
+        await self._flush(batch)
+        return batch
+
+    @property
+    def active(self) -> int:
+        return len(self._batches)
+
+    def get(self, batch_id: str) -> Optional[Batch]:
+        """A batch running in this process"""
+        return self._batches.get(batch_id)
+
+    async def state(self, batch_id: str) -> Optional[dict]:
+        """A batch's latest state, from this process or from Redis"""
+        batch = self._batches.get(batch_id)
+        if batch is not None:
+            return batch.snapshot()
+        raw = await self.redis.get(self.state_key(batch_id))
+        return json.loads(raw) if raw else None
+
+    async def cancel(self, batch_id: str) -> Optional[Batch]:
+        """Cancel a running batch; its finished outputs are kept"""
+        batch = self._batches.get(batch_id)
+        if batch is None:
+            return None
+        batch.cancelled = True
+        unfinished = [node for node in batch.plan.nodes.values() if node.status not in TERMINAL_STATUSES]
+        for node in unfinished:
+            node.task.cancel()
+        if unfinished:
+            await asyncio.wait([node.task for node in unfinished])
+            for node in unfinished:
+                node.status = "cancelled"
+            try:
+                await self.store.cancel(unfinished)
+            except Exception as e:
+                logger.error(f"Marking tasks of batch {batch.id} cancelled failed: {e}")
+        await batch.supervisor
+        return batch
+
+    async def stop(self):
+        for batch_id in list(self._batches):
+            await self.cancel(batch_id)
+
+    async def _supervise(self, batch: Batch):
+        await asyncio.wait([node.task for node in batch.plan.nodes.values()])
+        batch.finish()
+        del self._batches[batch.id]
+        await self._flush(batch)
+        logger.info(f"Batch {batch.id} {batch.status}: {len(batch.plan.outputs)} outputs, {len(batch.plan.nodes)} tasks")
+
+    # Nodes
+
+    async def _run_node(self, batch: Batch, node: BatchNode):
+        try:
+            if node.depends_on:
+                await asyncio.wait([upstream.task for upstream in node.depends_on])
+                failed = next((upstream for upstream in node.depends_on if upstream.status != "completed"), None)
+                if failed is not None:
+                    await self._settle(batch, node, "failed", error=f"{failed.stage} task {failed.task_id} {failed.status}")
+                    return
+
+            async with self._slots[node.stage]:
+                node.status = "processing"
+                self.in_flight[node.stage] += 1
+                started = time.perf_counter()
+                try:
+                    await self.store.started(node)
+                    result = await self._execute(batch, node)
+                except asyncio.CancelledError:
+                    node.status = "cancelled"
+                    raise
+                except Exception as e:
+                    logger.warning(f"Batch {batch.id}: {node.stage} task {node.task_id} failed: {e}")
+                    error = f"{e.__class__.__name__}: {e}"
+                else:
+                    error = None
+                finally:
+                    self.in_flight[node.stage] -= 1
+                    self.durations[node.stage].observe(time.perf_counter() - started)
+
+            if error is None:
+                await self._settle(batch, node, "completed", result=result)
+            else:
+                await self._settle(batch, node, "failed", error=error)
+        finally:
+            # Upstream results are only kept until every dependent has used them
+            for upstream in node.depends_on:
+                upstream.dependents -= 1
+                if upstream.dependents == 0:
+                    upstream.result = None
+
+    async def _settle(self, batch: Batch, node: BatchNode, status: str, result: Any = None, error: Optional[str] = None):
+        node.status = status
+        node.result = result
+        node.error = error
+        if status == "completed":
+            self.nodes_completed += 1
+        else:
+            self.nodes_failed += 1
+        try:
+            await self.store.finished(node)
+        except Exception as e:
+            logger.error(f"Recording {node.stage} task {node.task_id} as {status} failed: {e}")
+        if time.monotonic() - batch.last_flush >= self.progress_interval:
+            await self._flush(batch)
+
+    async def _execute(self, batch: Batch, node: BatchNode) -> Any:
+        upstream = node.depends_on[0].result if node.depends_on else None
+        if node.stage == AI_GENERATION:
+            payload = {**node.input, "document": upstream}
+        elif node.stage == PRESENTATION_RENDERING:
+            payload = {**node.input, "deck": upstream}
+        else:
+            payload = node.input
+        body = json.dumps(payload).encode()
+
+        async def content():
+            yield body
+
+        service = STAGE_SERVICES[node.stage]
+        response = await self.proxies[service].send(
+            "POST",
+            self.paths[node.stage],
+            headers={"Content-Type": "application/json", "X-User-ID": batch.user_id, "X-Batch-ID": batch.id},
+            body=content()
+        )
+        try:
+            if response.status_code >= 400:
+                await response.aread()
+                raise StageFailed(f"{service} answered {response.status_code}: {response.text[:200]}")
+            if node.stage == PRESENTATION_RENDERING:
+                return await self._save_render(batch, node, response)
+            return json.loads(await response.aread())
+        finally:
+            await response.aclose()
+
+    async def _save_render(self, batch: Batch, node: BatchNode, response) -> dict:
+        """
+        Stream a rendered deck to <output_directory>/<batch id>/<task id>.pptx.
+
+        Not by node key: generation samples, so another batch with the same
+        key, possibly another user's, renders a different deck.
+        """
+        loop = asyncio.get_running_loop()
+        final_path = os.path.join(self.output_directory, batch.id, f"{node.task_id}.pptx")
+        temp_path = os.path.join(self.output_directory, "tmp", f"{uuid.uuid4().hex}.part")
+        await loop.run_in_executor(None, _make_directories, final_path, temp_path)
+
+        handle = await loop.run_in_executor(None, open, temp_path, "wb")
+        size = 0
+        try:
+            pending, pending_size = [], 0
+            async for chunk in response.aiter_bytes():
+                size += len(chunk)
+                pending.append(chunk)
+                pending_size += len(chunk)
+                # Batch network chunks into larger disk writes
+                if pending_size >= 1024 * 1024:
+                    await loop.run_in_executor(None, _write_chunks, handle, pending)
+                    pending, pending_size = [], 0
+            if pending:
+                await loop.run_in_executor(None, _write_chunks, handle, pending)
+        except BaseException:
+            await loop.run_in_executor(None, handle.close)
+            await loop.run_in_executor(None, os.remove, temp_path)
+            raise
+        await loop.run_in_executor(None, handle.close)
+        await loop.run_in_executor(None, os.replace, temp_path, final_path)
+        return {"file_path": final_path, "size": size, "content_type": response.headers.get("content-type")}
+
+    # Progress
+
+    async def _flush(self, batch: Batch):
+        batch.last_flush = time.monotonic()
+        state = batch.snapshot()
+        event = {
+            "event": "batch_progress",
+            "batch_id": batch.id,
+            "user_id": batch.user_id,
+            "status": state["status"],
+            "progress": state["progress"],
+            "timestamp": datetime.now(timezone.utc).isoformat()
+        }
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                pipe.setex(self.state_key(batch.id), self.state_ttl, json.dumps(state))
+                pipe.publish(self.channel, json.dumps(event))
+                await pipe.execute()
+        except Exception as e:
+            logger.warning(f"Publishing progress of batch {batch.id} failed: {e}")
+
+    def stats(self) -> dict:
+        return {
+            "active_batches": self.active,
+            "max_active": self.max_active,
+            "batches_submitted": self.batches_submitted,
+            "batches_rejected": self.batches_rejected,
+            "tasks_requested": self.nodes_requested,
+            "tasks_scheduled": self.nodes_scheduled,
+            "tasks_merged": self.nodes_requested - self.nodes_scheduled,
+            "tasks_completed": self.nodes_completed,
+            "tasks_failed": self.nodes_failed,
+            "concurrency": self.concurrency,
+            "in_flight": dict(self.in_flight),
+            "durations": {stage: histogram.stats() for stage, histogram in self.durations.items()}
+        }
+
+
+def _make_directories(*paths: str):
+    for path in paths:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+
+def _write_chunks(handle, chunks: list):
+    for chunk in chunks:
+        handle.write(chunk)
@@ -0,0 +1,148 @@
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
+from typing import Optional, Tuple
+from passlib.context import CryptContext
+import multiprocessing
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when the hashing queue is full and a request is not admitted"""
+
+
+# Worker-side helpers. These live at module level so they can be pickled
+# into a ProcessPoolExecutor; each worker builds its own CryptContext.
+@lru_cache(maxsize=None)
+def _get_context(rounds: int) -> CryptContext:
+    return CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=rounds)
+
+def _timed_call(fn, *args):
+    started_at = time.monotonic()
+    return started_at, fn(*args)
+
+def _hash(password: str, rounds: int) -> str:
+    return _get_context(rounds).hash(password)
+
+def _verify_and_update(password: str, hashed_password: str, rounds: int) -> Tuple[bool, Optional[str]]:
+    return _get_context(rounds).verify_and_update(password, hashed_password)
+
+
+class PasswordHasher:
+    """Runs bcrypt hashing off the event loop in a bounded worker pool"""
+
+    def __init__(
+        self,
+        rounds: int = 12,
+        executor: str = "thread",
+        max_workers: int = 4,
+        max_pending: int = 64
+    ):
+        if executor not in ("thread", "process"):
+            raise ValueError(f"Unknown password hash executor: {executor}")
+
+        self.rounds = rounds
+        self.executor_type = executor
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._executor: Optional[Executor] = None
+
+        # Metrics
+        self._pending = 0
+        self._peak_pending = 0
+        self._completed = 0
+        self._rejected = 0
+        self._failed = 0
+        self._queue_wait_total = 0.0
+        self._run_time_total = 0.0
+        self._run_time_max = 0.0
+
+    def start(self):
+        """Create the worker pool"""
+        if self._executor is not None:
+            return
+
+        if self.executor_type == "process":
+            # Spawn instead of fork: the gateway process already owns sockets and an event loop
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        else:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix="password-hasher"
+            )
+        logger.info(
+            f"Password hasher started: {self.executor_type} pool, "
+            f"{self.max_workers} workers, {self.max_pending} max pending, rounds={self.rounds}"
+        )
+
+    def shutdown(self):
+        """Stop the worker pool"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    async def _submit(self, fn, *args):
+        if self._executor is None:
+            self.start()
+
+        if self._pending >= self.max_pending:
+            self._rejected += 1
+            raise PasswordHasherBusy(f"{self._pending} password hash operations already pending")
+
+        self._pending += 1
+        self._peak_pending = max(self._peak_pending, self._pending)
+        submitted_at = time.monotonic()
+        try:
+            loop = asyncio.get_running_loop()
+            started_at, result = await loop.run_in_executor(self._executor, _timed_call, fn, *args)
+        except Exception:
+            self._failed += 1
+            raise
+        finally:
+            self._pending -= 1
+
+        finished_at = time.monotonic()
+        run_time = finished_at - started_at
+        self._completed += 1
+        self._queue_wait_total += max(0.0, started_at - submitted_at)
+        self._run_time_total += run_time
+        self._run_time_max = max(self._run_time_max, run_time)
+        return result
+
+    async def hash(self, password: str) -> str:
+        """Hash a password with the configured cost factor"""
+        return await self._submit(_hash, password, self.rounds)
+
+    async def verify_and_update(self, password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """Verify a password; also return a new hash if the stored one uses outdated settings"""
+        return await self._submit(_verify_and_update, password, hashed_password, self.rounds)
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        """Verify a password against a stored hash"""
+        valid, _ = await self.verify_and_update(password, hashed_password)
+        return valid
+
+    def stats(self) -> dict:
+        """Pool and queue-depth metrics"""
+        completed = self._completed or 1
+        return {
+            "executor": self.executor_type,
+            "workers": self.max_workers,
+            "rounds": self.rounds,
+            "max_pending": self.max_pending,
+            "pending": self._pending,
+            "queue_depth": max(0, self._pending - self.max_workers),
+            "peak_pending": self._peak_pending,
+            "completed": self._completed,
+            "rejected": self._rejected,
+            "failed": self._failed,
+            "avg_queue_wait_ms": round(self._queue_wait_total / completed * 1000, 2),
+            "avg_run_ms": round(self._run_time_total / completed * 1000, 2),
+            "max_run_ms": round(self._run_time_max * 1000, 2)
+        }
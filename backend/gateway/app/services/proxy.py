@@ -0,0 +1,322 @@
+from dataclasses import dataclass
+from typing import AsyncIterator, Dict, Iterable, List, Optional
+import asyncio
+import logging
+import random
+import time
+
+import httpx
+
+from ..core.metrics import LatencyHistogram
+from ..core.tracing import inject_trace_headers
+from .registry import Replica, ServiceRegistry
+
+logger = logging.getLogger(__name__)
+
+# Connection-scoped headers that must not be forwarded (RFC 9110 section 7.6.1)
+HOP_BY_HOP_HEADERS = frozenset({
+    "connection", "keep-alive", "proxy-authenticate", "proxy-authorization",
+    "proxy-connection", "te", "trailer", "transfer-encoding", "upgrade", "host"
+})
+
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+RETRYABLE_STATUS = frozenset({502, 503, 504})
+
+
+class ServiceUnavailable(Exception):
+    """Raised when a request cannot be sent to a downstream service"""
+
+    def __init__(self, service: str, reason: str, status_code: int = 503, retry_after: Optional[float] = None):
+        super().__init__(f"{service}: {reason}")
+        self.service = service
+        self.reason = reason
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+@dataclass
+class ServiceConfig:
+    name: str
+    max_connections: int = 20
+    max_keepalive_connections: int = 10
+    connect_timeout: float = 3.0
+    read_timeout: float = 60.0
+    write_timeout: float = 30.0
+    pool_timeout: float = 1.0          # wait for a free connection before failing fast
+    max_retries: int = 2
+    retry_budget_ratio: float = 0.2    # retries allowed per request sent
+    retry_budget_min: float = 10.0     # retries always allowed per retry_budget_window
+    retry_budget_window: float = 10.0
+
+
+class RetryBudget:
+    """
+    Caps retries at a fraction of recent requests, plus a small fixed allowance.
+
+    Without a budget every client retries into an overloaded service and
+    multiplies its load exactly when it can least absorb it.
+    """
+
+    def __init__(self, ratio: float, min_retries: float, window: float):
+        self.ratio = ratio
+        self.min_retries = min_retries
+        self.window = window
+        self._window_start = time.monotonic()
+        self._requests = 0
+        self._retries = 0
+        self.exhausted = 0
+
+    def _roll(self):
+        now = time.monotonic()
+        if now - self._window_start >= self.window:
+            self._window_start = now
+            self._requests = 0
+            self._retries = 0
+
+    def record_request(self):
+        self._roll()
+        self._requests += 1
+
+    def try_withdraw(self) -> bool:
+        self._roll()
+        if self._retries >= self.min_retries + self.ratio * self._requests:
+            self.exhausted += 1
+            return False
+        self._retries += 1
+        return True
+
+
+class _TrackedBody:
+    """Wraps a streamed request body to tell whether sending it has begun"""
+
+    def __init__(self, body: AsyncIterator[bytes]):
+        self._body = body
+        self.started = False
+
+    async def __aiter__(self):
+        self.started = True
+        async for chunk in self._body:
+            yield chunk
+
+
+def forwardable_headers(headers: Iterable, drop: Iterable[str] = ()) -> Dict[str, str]:
+    """
+    End-to-end headers keyed by lowercase name, without hop-by-hop headers or `drop`.
+
+    Lowercase keys let callers replace a header by assigning its lowercase
+    name; a differently cased key would be sent alongside the client's.
+    """
+    excluded = HOP_BY_HOP_HEADERS.union(name.lower() for name in drop)
+    forwarded = {}
+    for key, value in headers:
+        key = key.lower()
+        if key not in excluded:
+            forwarded[key] = value
+    return forwarded
+
+
+class _ReleasingStream(httpx.AsyncByteStream):
+    """Response body stream that reports when it is closed, to count outstanding requests"""
+
+    def __init__(self, stream: httpx.AsyncByteStream, on_close):
+        self._stream = stream
+        self._on_close = on_close
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self):
+        try:
+            await self._stream.aclose()
+        finally:
+            if self._on_close is not None:
+                self._on_close()
+                self._on_close = None
+
+
+class ServiceProxy:
+    """
+    Forwards requests to one downstream service without buffering bodies.
+
+    Each service gets its own connection pool, timeouts and retry budget,
+    shared by its replicas; the registry picks a replica per attempt and
+    keeps a circuit breaker per replica. A slow service exhausts only its
+    own pool: requests beyond it fail fast after `pool_timeout` instead of
+    queueing behind every call to every other service.
+    """
+
+    def __init__(self, config: ServiceConfig, registry: ServiceRegistry):
+        self.config = config
+        self.name = config.name
+        self.registry = registry
+        self.retry_budget = RetryBudget(config.retry_budget_ratio, config.retry_budget_min, config.retry_budget_window)
+        self.client = httpx.AsyncClient(
+            timeout=httpx.Timeout(
+                connect=config.connect_timeout,
+                read=config.read_timeout,
+                write=config.write_timeout,
+                pool=config.pool_timeout
+            ),
+            limits=httpx.Limits(
+                max_connections=config.max_connections,
+                max_keepalive_connections=config.max_keepalive_connections
+            ),
+            event_hooks={"request": [inject_trace_headers]}
+        )
+
+        # Metrics
+        self.latency = LatencyHistogram()  # per attempt, until response headers arrive
+        self.in_flight = 0
+        self.requests = 0
+        self.retries = 0
+        self.failures = 0
+        self.rejected = 0
+
+    async def aclose(self):
+        await self.client.aclose()
+
+    def _pick(self, tried: List[Replica]) -> Replica:
+        # Prefer a replica not tried yet; fall back to any that can take the call
+        replica = self.registry.pick(self.name, exclude=tried) or self.registry.pick(self.name)
+        if replica is None or not replica.breaker.allow():
+            self.rejected += 1
+            retry_after = min((r.breaker.retry_after() for r in self.registry.replicas(self.name)), default=1.0)
+            raise ServiceUnavailable(self.name, "no available replicas", 503, retry_after)
+        return replica
+
+    async def send(
+        self,
+        method: str,
+        path: str,
+        headers: Optional[Dict[str, str]] = None,
+        params=None,
+        body: Optional[AsyncIterator[bytes]] = None
+    ) -> httpx.Response:
+        """
+        Send a request and return the response with its body still unread.
+
+        The caller must close the response (response.aclose()). A streamed
+        body is retried only if sending it had not begun; other requests
+        are retried on gateway errors only when the method is idempotent.
+        Retries go to another replica when there is one.
+        """
+        tracked = _TrackedBody(body) if body is not None else None
+        tried: List[Replica] = []
+        attempt = 0
+        self.requests += 1
+        self.retry_budget.record_request()
+
+        while True:
+            replica = self._pick(tried)
+            tried.append(replica)
+            breaker = replica.breaker
+
+            request = self.client.build_request(
+                method, replica.url + path, headers=headers, params=params, content=tracked
+            )
+            self.in_flight += 1
+            replica.outstanding += 1
+            replica.requests += 1
+            held = False
+            started = time.perf_counter()
+            try:
+                response = await self.client.send(request, stream=True)
+            except httpx.PoolTimeout:
+                # Our own pool is saturated; that says nothing about the replica's health
+                breaker.release()
+                self.rejected += 1
+                raise ServiceUnavailable(self.name, "too many concurrent requests", 503, 1.0)
+            except asyncio.CancelledError:
+                breaker.release()
+                raise
+            except (httpx.ConnectError, httpx.ConnectTimeout) as e:
+                error = ServiceUnavailable(self.name, f"connection failed: {e.__class__.__name__}", 502)
+                retryable = tracked is None or not tracked.started
+            except httpx.TimeoutException as e:
+                error = ServiceUnavailable(self.name, f"timed out: {e.__class__.__name__}", 504)
+                retryable = False
+                # A slow replica's EWMA should reflect the wait, so the balancer moves away from it
+                elapsed = time.perf_counter() - started
+                replica.observe(elapsed)
+                self.latency.observe(elapsed)
+            except httpx.HTTPError as e:
+                error = ServiceUnavailable(self.name, f"request failed: {e.__class__.__name__}", 502)
+                retryable = False
+            else:
+                elapsed = time.perf_counter() - started
+                replica.observe(elapsed)
+                self.latency.observe(elapsed)
+                if response.status_code not in RETRYABLE_STATUS:
+                    breaker.record_success()
+                    error = None
+                elif tracked is not None or method not in IDEMPOTENT_METHODS or not self._may_retry(attempt):
+                    breaker.record_failure()
+                    replica.errors += 1
+                    error = None
+                else:
+                    breaker.record_failure()
+                    replica.errors += 1
+                    await response.aclose()
+                    error, retryable, response = None, True, None
+
+                if response is not None:
+                    # The replica stays busy until the caller has read or dropped the body
+                    response.stream = _ReleasingStream(response.stream, lambda: self._done(replica))
+                    held = True
+                    return response
+            finally:
+                self.in_flight -= 1
+                if not held:
+                    replica.outstanding -= 1
+
+            if error is not None:
+                breaker.record_failure()
+                replica.errors += 1
+                if not (retryable and self._may_retry(attempt)):
+                    self.failures += 1
+                    raise error
+            attempt += 1
+            self.retries += 1
+            # Exponential backoff with full jitter
+            await asyncio.sleep(random.uniform(0, 0.05 * 2 ** attempt))
+
+    def _done(self, replica: Replica):
+        replica.outstanding -= 1
+
+    def _may_retry(self, attempt: int) -> bool:
+        return attempt < self.config.max_retries and self.retry_budget.try_withdraw()
+
+    def stats(self) -> dict:
+        return {
+            "max_connections": self.config.max_connections,
+            "in_flight": self.in_flight,
+            "requests": self.requests,
+            "retries": self.retries,
+            "retry_budget_exhausted": self.retry_budget.exhausted,
+            "failures": self.failures,
+            "rejected": self.rejected,
+            "latency": self.latency.stats()
+        }
+
+
+class ServiceProxies:
+    """The gateway's ServiceProxy per downstream service"""
+
+    def __init__(self, configs: Iterable[ServiceConfig], registry: ServiceRegistry):
+        self._proxies = {config.name: ServiceProxy(config, registry) for config in configs}
+
+    def __getitem__(self, name: str) -> ServiceProxy:
+        return self._proxies[name]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._proxies
+
+    def names(self):
+        return list(self._proxies)
+
+    async def aclose(self):
+        await asyncio.gather(*(proxy.aclose() for proxy in self._proxies.values()))
+
+    def stats(self) -> dict:
+        return {name: proxy.stats() for name, proxy in self._proxies.items()}
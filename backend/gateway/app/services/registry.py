@@ -0,0 +1,271 @@
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional
+import asyncio
+import logging
+import random
+import time
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+BALANCERS = ("least_outstanding", "ewma")
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker: closed -> open -> half-open -> closed"""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int, open_seconds: float, half_open_max_calls: int = 1):
+        self.failure_threshold = failure_threshold
+        self.open_seconds = open_seconds
+        self.half_open_max_calls = half_open_max_calls
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._half_open_calls = 0
+        self.times_opened = 0
+
+    def retry_after(self) -> float:
+        return max(0.0, self._opened_at + self.open_seconds - time.monotonic())
+
+    def available(self) -> bool:
+        """Whether allow() would admit a call now, without claiming a half-open slot"""
+        if self.state == self.OPEN:
+            return self.retry_after() <= 0
+        if self.state == self.HALF_OPEN:
+            return self._half_open_calls < self.half_open_max_calls
+        return True
+
+    def allow(self) -> bool:
+        """Whether a call may go through now; half-open admits a few trial calls"""
+        if self.state == self.OPEN:
+            if self.retry_after() > 0:
+                return False
+            self.state = self.HALF_OPEN
+            self._half_open_calls = 0
+        if self.state == self.HALF_OPEN:
+            if self._half_open_calls >= self.half_open_max_calls:
+                return False
+            self._half_open_calls += 1
+        return True
+
+    def release(self):
+        """A call that ended without telling anything about the service's health"""
+        if self.state == self.HALF_OPEN and self._half_open_calls > 0:
+            self._half_open_calls -= 1
+
+    def record_success(self):
+        self._failures = 0
+        self.state = self.CLOSED
+
+    def record_failure(self):
+        self._failures += 1
+        if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                self.times_opened += 1
+            self.state = self.OPEN
+            self._opened_at = time.monotonic()
+
+    def stats(self) -> dict:
+        return {
+            "state": self.state,
+            "consecutive_failures": self._failures,
+            "times_opened": self.times_opened,
+            "retry_after": round(self.retry_after(), 2) if self.state == self.OPEN else 0
+        }
+
+
+@dataclass(eq=False)
+class Replica:
+    service: str
+    url: str
+    breaker: CircuitBreaker
+    healthy: bool = True             # optimistic until the first probe says otherwise
+    status: str = "unknown"
+    last_probe: Optional[float] = None
+    probe_failures: int = 0
+    probe_ms: Optional[float] = None
+    latency_ewma: Optional[float] = None  # seconds to response headers
+    outstanding: int = 0
+    requests: int = 0
+    errors: int = 0
+    _alpha: float = field(default=0.3, repr=False)
+
+    def available(self) -> bool:
+        return self.healthy and self.breaker.available()
+
+    def observe(self, seconds: float):
+        if self.latency_ewma is None:
+            self.latency_ewma = seconds
+        else:
+            self.latency_ewma += self._alpha * (seconds - self.latency_ewma)
+
+    def snapshot(self) -> dict:
+        return {
+            "url": self.url,
+            "status": self.status,
+            "healthy": self.healthy,
+            "circuit": self.breaker.state,
+            "outstanding": self.outstanding,
+            "latency_ewma_ms": round(self.latency_ewma * 1000, 2) if self.latency_ewma is not None else None,
+            "probe_ms": round(self.probe_ms, 2) if self.probe_ms is not None else None,
+            "last_probe_age": round(time.monotonic() - self.last_probe, 2) if self.last_probe else None,
+            "requests": self.requests,
+            "errors": self.errors
+        }
+
+
+class ServiceRegistry:
+    """
+    Replicas per downstream service, with health kept current by a background prober.
+
+    Requests pick a replica by power of two choices. Each pick samples two
+    available replicas and keeps the one with fewer outstanding requests
+    ("least_outstanding"), or the lower latency EWMA weighted by outstanding
+    requests ("ewma"). Health answers come from the last probe, never from
+    a fresh round trip.
+    """
+
+    def __init__(
+        self,
+        services: Dict[str, Iterable[str]],
+        client: httpx.AsyncClient,
+        balancer: str = "ewma",
+        probe_interval: float = 5.0,
+        probe_timeout: float = 2.0,
+        probe_fall: int = 2,
+        ewma_alpha: float = 0.3,
+        failure_threshold: int = 5,
+        open_seconds: float = 10.0,
+        half_open_max_calls: int = 1
+    ):
+        if balancer not in BALANCERS:
+            raise ValueError(f"Unknown load balancer: {balancer}")
+
+        self.client = client
+        self.balancer = balancer
+        self.probe_interval = probe_interval
+        self.probe_timeout = probe_timeout
+        self.probe_fall = probe_fall
+        self._replicas: Dict[str, List[Replica]] = {
+            name: [
+                Replica(
+                    service=name,
+                    url=url.rstrip("/"),
+                    breaker=CircuitBreaker(failure_threshold, open_seconds, half_open_max_calls),
+                    _alpha=ewma_alpha
+                )
+                for url in urls
+            ]
+            for name, urls in services.items()
+        }
+        self._task: Optional[asyncio.Task] = None
+        self.probe_rounds = 0
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._replicas
+
+    def names(self) -> List[str]:
+        return list(self._replicas)
+
+    def replicas(self, name: str) -> List[Replica]:
+        return self._replicas[name]
+
+    def _score(self, replica: Replica) -> float:
+        if self.balancer == "least_outstanding":
+            return replica.outstanding
+        # Unmeasured replicas score as fast so they get traffic and a measurement
+        return (replica.latency_ewma or 0.0) * (replica.outstanding + 1)
+
+    def pick(self, name: str, exclude: Iterable[Replica] = ()) -> Optional[Replica]:
+        """A replica for the next request, or None if none can take it"""
+        replicas = self._replicas[name]
+        candidates = [replica for replica in replicas if replica.available() and replica not in exclude]
+        if not candidates:
+            # Probes can lag; rather than fail outright, try replicas whose circuit still admits calls
+            candidates = [replica for replica in replicas if replica.breaker.available() and replica not in exclude]
+        if not candidates:
+            return None
+        if len(candidates) == 1:
+            return candidates[0]
+        first, second = random.sample(candidates, 2)
+        return first if self._score(first) <= self._score(second) else second
+
+    # Probing
+
+    async def _probe(self, replica: Replica):
+        started = time.perf_counter()
+        try:
+            response = await self.client.get(f"{replica.url}/health", timeout=self.probe_timeout)
+            ok = response.status_code == 200
+            status = "healthy" if ok else f"unhealthy: HTTP {response.status_code}"
+        except Exception as e:
+            ok = False
+            status = f"unhealthy: {e.__class__.__name__}"
+
+        replica.last_probe = time.monotonic()
+        replica.status = status
+        if ok:
+            replica.probe_ms = (time.perf_counter() - started) * 1000
+            replica.probe_failures = 0
+            if not replica.healthy:
+                logger.info(f"{replica.service} replica {replica.url} is healthy again")
+            replica.healthy = True
+            if replica.latency_ewma is None:
+                replica.latency_ewma = replica.probe_ms / 1000
+        else:
+            replica.probe_failures += 1
+            if replica.healthy and replica.probe_failures >= self.probe_fall:
+                logger.warning(f"{replica.service} replica {replica.url} marked {status}")
+                replica.healthy = False
+
+    async def probe_all(self):
+        """Probe every replica of every service concurrently"""
+        await asyncio.gather(*(
+            self._probe(replica) for replicas in self._replicas.values() for replica in replicas
+        ))
+        self.probe_rounds += 1
+
+    async def _probe_loop(self):
+        while True:
+            try:
+                await self.probe_all()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Service probe round failed: {e}")
+            await asyncio.sleep(self.probe_interval)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._probe_loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def health(self) -> Dict[str, dict]:
+        """Per-service health from the cached probe state"""
+        result = {}
+        for name, replicas in self._replicas.items():
+            probed = [replica for replica in replicas if replica.last_probe is not None]
+            healthy = sum(1 for replica in probed if replica.healthy)
+            if not probed:
+                status = "unknown"
+            else:
+                status = "healthy" if healthy == len(replicas) else "degraded" if healthy else "unhealthy"
+            result[name] = {
+                "status": status,
+                "healthy_replicas": healthy,
+                "replicas": [replica.snapshot() for replica in replicas]
+            }
+        return result
@@ -0,0 +1,282 @@
+from collections import deque
+from typing import Deque, Dict, Iterable, List, Optional, Set
+import asyncio
+import json
+import logging
+
+import redis.asyncio as redis
+
+logger = logging.getLogger(__name__)
+
+# Events where only the latest per task matters; the rest are delivered in order or not at all
+COALESCED_EVENTS = frozenset({"task_progress", "progress", "batch_progress"})
+
+
+class TaskEventsBusy(Exception):
+    """Raised when the process already serves max_clients event streams"""
+
+
+class Subscriber:
+    """
+    One WebSocket or SSE client: the tasks it follows and a bounded send queue.
+
+    A slow client never holds up the others. A progress event replaces the
+    one still queued for the same task. When the queue is full, the oldest
+    queued progress event is dropped. If there is none, and the new event
+    must be delivered, the client is closed so it can reconnect and resync.
+    """
+
+    __slots__ = (
+        "user_id", "task_ids", "max_queue", "_queue", "_latest", "_ready",
+        "closed", "close_reason", "delivered", "coalesced", "dropped"
+    )
+
+    def __init__(self, user_id: str, max_queue: int):
+        self.user_id = user_id
+        self.task_ids: Set[str] = set()
+        self.max_queue = max_queue
+        self._queue: Deque[list] = deque()          # [coalesce key or None, payload]
+        self._latest: Dict[str, list] = {}          # coalesce key -> its queued entry
+        self._ready = asyncio.Event()
+        self.closed = False
+        self.close_reason: Optional[str] = None
+        self.delivered = 0
+        self.coalesced = 0
+        self.dropped = 0
+
+    def offer(self, payload: str, coalesce_key: Optional[str] = None):
+        if self.closed:
+            return
+        if coalesce_key is not None:
+            entry = self._latest.get(coalesce_key)
+            if entry is not None:
+                entry[1] = payload
+                self.coalesced += 1
+                return
+        if len(self._queue) >= self.max_queue and not self._drop_progress():
+            if coalesce_key is not None:
+                self.dropped += 1
+                return
+            self.close("slow consumer")
+            return
+        entry = [coalesce_key, payload]
+        self._queue.append(entry)
+        if coalesce_key is not None:
+            self._latest[coalesce_key] = entry
+        self._ready.set()
+
+    def _drop_progress(self) -> bool:
+        for entry in self._queue:
+            if entry[0] is not None:
+                self._queue.remove(entry)
+                del self._latest[entry[0]]
+                self.dropped += 1
+                return True
+        return False
+
+    async def get(self) -> Optional[str]:
+        """Next payload to send, or None once the subscriber is closed"""
+        while not self._queue:
+            if self.closed:
+                return None
+            self._ready.clear()
+            await self._ready.wait()
+        key, payload = self._queue.popleft()
+        if key is not None:
+            del self._latest[key]
+        self.delivered += 1
+        return payload
+
+    def close(self, reason: str):
+        if not self.closed:
+            self.closed = True
+            self.close_reason = reason
+            self._queue.clear()
+            self._latest.clear()
+            self._ready.set()
+
+    def __len__(self) -> int:
+        return len(self._queue)
+
+
+class TaskEventHub:
+    """
+    Fans task and user events out to the event streams of this process.
+
+    One Redis subscription per process covers every connected client.
+    Messages are routed in memory by task id and user id. Payloads are
+    forwarded exactly as published, so an event is parsed once for routing
+    and never re-encoded per client.
+    """
+
+    def __init__(
+        self,
+        redis_client: redis.Redis,
+        channels: Iterable[str],
+        max_clients: int = 20000,
+        queue_size: int = 64,
+        max_tasks_per_client: int = 100
+    ):
+        self.redis = redis_client
+        self.channels = list(channels)
+        self.max_clients = max_clients
+        self.queue_size = queue_size
+        self.max_tasks_per_client = max_tasks_per_client
+        self._subscribers: Set[Subscriber] = set()
+        self._by_user: Dict[str, Set[Subscriber]] = {}
+        self._by_task: Dict[str, Set[Subscriber]] = {}
+        self._listener: Optional[asyncio.Task] = None
+
+        # Metrics
+        self.events_received = 0
+        self.events_routed = 0
+        self.malformed = 0
+        self.deliveries = 0
+        self.slow_disconnects = 0
+        self.resyncs = 0
+        self._coalesced = 0  # from subscribers that are gone
+        self._dropped = 0
+
+    # Subscribers
+
+    def subscribe(self, user_id: str, task_ids: Iterable[str] = ()) -> Subscriber:
+        if len(self._subscribers) >= self.max_clients:
+            raise TaskEventsBusy(f"{self.max_clients} event streams already open")
+        subscriber = Subscriber(str(user_id), self.queue_size)
+        self._subscribers.add(subscriber)
+        self._by_user.setdefault(subscriber.user_id, set()).add(subscriber)
+        self.follow(subscriber, task_ids)
+        return subscriber
+
+    def follow(self, subscriber: Subscriber, task_ids: Iterable[str]) -> List[str]:
+        """Add tasks to a subscriber; returns those actually added"""
+        added = []
+        for task_id in task_ids:
+            if len(subscriber.task_ids) >= self.max_tasks_per_client:
+                break
+            if task_id not in subscriber.task_ids:
+                subscriber.task_ids.add(task_id)
+                self._by_task.setdefault(task_id, set()).add(subscriber)
+                added.append(task_id)
+        return added
+
+    def unfollow(self, subscriber: Subscriber, task_ids: Iterable[str]):
+        for task_id in task_ids:
+            if task_id in subscriber.task_ids:
+                subscriber.task_ids.discard(task_id)
+                self._discard(self._by_task, task_id, subscriber)
+
+    def unsubscribe(self, subscriber: Subscriber):
+        if subscriber not in self._subscribers:
+            return
+        self._subscribers.discard(subscriber)
+        self._discard(self._by_user, subscriber.user_id, subscriber)
+        self.unfollow(subscriber, list(subscriber.task_ids))
+        if subscriber.close_reason == "slow consumer":
+            self.slow_disconnects += 1
+        self._coalesced += subscriber.coalesced
+        self._dropped += subscriber.dropped
+        subscriber.close("unsubscribed")
+
+    @staticmethod
+    def _discard(index: Dict[str, Set[Subscriber]], key: str, subscriber: Subscriber):
+        subscribers = index.get(key)
+        if subscribers is not None:
+            subscribers.discard(subscriber)
+            if not subscribers:
+                del index[key]
+
+    # Routing
+
+    def dispatch(self, payload: str):
+        """Deliver one published message to every subscriber following its task or user"""
+        self.events_received += 1
+        try:
+            event = json.loads(payload)
+            task_id = event.get("task_id")
+            user_id = event.get("user_id")
+        except (ValueError, AttributeError):
+            self.malformed += 1
+            return
+
+        targets = set()
+        if task_id is not None:
+            targets.update(self._by_task.get(str(task_id), ()))
+        if user_id is not None:
+            targets.update(self._by_user.get(str(user_id), ()))
+        if not targets:
+            return
+
+        self.events_routed += 1
+        coalesce_key = None
+        if event.get("event") in COALESCED_EVENTS:
+            coalesce_key = f"{event.get('event')}:{task_id if task_id is not None else event.get('batch_id')}"
+        for subscriber in targets:
+            subscriber.offer(payload, coalesce_key)
+        self.deliveries += len(targets)
+
+    def _resync(self):
+        """Tell every client it may have missed events while Redis was unreachable"""
+        self.resyncs += 1
+        payload = json.dumps({"event": "resync"})
+        for subscriber in self._subscribers:
+            subscriber.offer(payload)
+
+    # Listener
+
+    def start(self):
+        if self._listener is None:
+            self._listener = asyncio.create_task(self._listen())
+
+    async def stop(self):
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+        for subscriber in list(self._subscribers):
+            subscriber.close("shutdown")
+
+    async def _listen(self):
+        backoff = 0.5
+        connected_before = False
+        while True:
+            pubsub = self.redis.pubsub()
+            try:
+                await pubsub.subscribe(*self.channels)
+                backoff = 0.5
+                if connected_before:
+                    self._resync()
+                connected_before = True
+                async for message in pubsub.listen():
+                    if message["type"] == "message":
+                        self.dispatch(message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Task event listener failed: {e}")
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 30)
+            finally:
+                try:
+                    await pubsub.aclose()
+                except Exception:
+                    pass
+
+    def stats(self) -> dict:
+        return {
+            "clients": len(self._subscribers),
+            "users": len(self._by_user),
+            "tasks": len(self._by_task),
+            "queued": sum(len(subscriber) for subscriber in self._subscribers),
+            "events_received": self.events_received,
+            "events_routed": self.events_routed,
+            "malformed": self.malformed,
+            "deliveries": self.deliveries,
+            "coalesced": self._coalesced + sum(subscriber.coalesced for subscriber in self._subscribers),
+            "dropped": self._dropped + sum(subscriber.dropped for subscriber in self._subscribers),
+            "slow_disconnects": self.slow_disconnects,
+            "resyncs": self.resyncs
+        }
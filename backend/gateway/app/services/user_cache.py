@@ -0,0 +1,208 @@
+from collections import OrderedDict
+from typing import Any, Optional
+import redis.asyncio as redis
+import asyncio
+import json
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class LocalTTLCache:
+    """Bounded in-process LRU cache with per-entry expiry"""
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+
+        # Metrics
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            self.expirations += 1
+            self.misses += 1
+            return None
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0:
+            return
+
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def delete(self, key: str) -> bool:
+        return self._data.pop(key, None) is not None
+
+    def delete_where(self, predicate) -> int:
+        """Delete every entry whose value matches the predicate"""
+        keys = [key for key, (_, value) in self._data.items() if predicate(value)]
+        for key in keys:
+            del self._data[key]
+        return len(keys)
+
+    def clear(self):
+        self._data.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._data),
+            "max_entries": self.max_entries,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations
+        }
+
+
+class UserCache:
+    """
+    Two-tier cache for authenticated users.
+
+    Tier 1 is a per-process LRU of user records plus already-validated JWTs,
+    tier 2 is the shared Redis `user:{id}` key. Invalidations are broadcast
+    on a pub/sub channel so every gateway worker drops its local copy.
+    """
+
+    def __init__(
+        self,
+        redis_client: redis.Redis,
+        channel: str,
+        max_entries: int = 10000,
+        local_ttl: float = 60,
+        redis_ttl: int = 900,
+        token_max_entries: int = 10000
+    ):
+        self.redis = redis_client
+        self.channel = channel
+        self.redis_ttl = redis_ttl
+        self.users = LocalTTLCache(max_entries, local_ttl)
+        self.tokens = LocalTTLCache(token_max_entries, local_ttl)
+        self.redis_hits = 0
+        self.redis_misses = 0
+        self.invalidations_received = 0
+        self._listener: Optional[asyncio.Task] = None
+
+    # JWT tier
+    def get_token_subject(self, token: str) -> Optional[str]:
+        """Return the user id for a token that was already validated"""
+        return self.tokens.get(token)
+
+    def remember_token(self, token: str, user_id: str, exp: Optional[float] = None):
+        """Cache a validated token until it expires (or the local TTL, whichever is sooner)"""
+        ttl = None if exp is None else exp - time.time()
+        self.tokens.set(token, user_id, ttl)
+
+    # User tier
+    async def get_user(self, user_id: str) -> Optional[dict]:
+        """Look up a user locally, then in Redis"""
+        user = self.users.get(user_id)
+        if user is not None:
+            return dict(user)
+
+        cached_user = await self.redis.get(f"user:{user_id}")
+        if not cached_user:
+            self.redis_misses += 1
+            return None
+
+        self.redis_hits += 1
+        user = json.loads(cached_user)
+        self.users.set(user_id, user)
+        return dict(user)
+
+    async def set_user(self, user_id: str, user: dict) -> dict:
+        """Store a user in both tiers; returns the JSON-normalized record"""
+        serialized = json.dumps(user, default=str)
+        await self.redis.setex(f"user:{user_id}", self.redis_ttl, serialized)
+        normalized = json.loads(serialized)
+        self.users.set(user_id, normalized)
+        return dict(normalized)
+
+    def evict_local(self, user_id: str):
+        self.users.delete(user_id)
+        self.tokens.delete_where(lambda subject: subject == user_id)
+
+    async def invalidate_user(self, user_id: str):
+        """Drop a user from Redis and from the local tier of every gateway worker"""
+        self.evict_local(user_id)
+        await self.redis.delete(f"user:{user_id}")
+        await self.redis.publish(self.channel, json.dumps({"type": "user", "user_id": user_id}))
+
+    # Invalidation listener
+    def start(self):
+        if self._listener is None:
+            self._listener = asyncio.create_task(self._listen())
+
+    async def stop(self):
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+
+    async def _listen(self):
+        backoff = 0.5
+        while True:
+            pubsub = self.redis.pubsub()
+            try:
+                await pubsub.subscribe(self.channel)
+                backoff = 0.5
+                async for message in pubsub.listen():
+                    if message["type"] != "message":
+                        continue
+                    try:
+                        event = json.loads(message["data"])
+                    except ValueError:
+                        logger.warning(f"Ignoring malformed cache invalidation: {message['data']!r}")
+                        continue
+                    if event.get("type") == "user":
+                        self.invalidations_received += 1
+                        self.evict_local(str(event["user_id"]))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Invalidations may have been missed while disconnected
+                logger.error(f"Cache invalidation listener failed: {e}")
+                self.users.clear()
+                self.tokens.clear()
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 30)
+            finally:
+                try:
+                    await pubsub.aclose()
+                except Exception:
+                    pass
+
+    def stats(self) -> dict:
+        return {
+            "users": self.users.stats(),
+            "tokens": self.tokens.stats(),
+            "redis_hits": self.redis_hits,
+            "redis_misses": self.redis_misses,
+            "invalidations_received": self.invalidations_received
+        }
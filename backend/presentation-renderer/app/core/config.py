@@ -0,0 +1,44 @@
+from pydantic_settings import BaseSettings
+
+class Settings(BaseSettings):
+    # App settings
+    app_name: str = "PPT Generator Presentation Renderer"
+    debug: bool = True
+    
+    # Redis settings
+    redis_url: str = "redis://localhost:6379"
+    
+    # Template settings
+    templates_directory: str = "./themes"
+    default_theme: str = "professional"
+    template_reload_interval: float = 1.0  # seconds between file change checks
+    
+    # Chart settings
+    chart_workers: int = 0  # 0 = one per CPU
+    chart_format: str = "native"  # native chart XML or "png"
+    chart_max_points: int = 2000  # per chart, after downsampling
+    chart_cache_max_bytes: int = 128 * 1024 * 1024
+    
+    # Incremental re-render settings
+    incremental_max_decks: int = 32  # rendered decks kept in memory for slide edits
+    
+    # Export settings
+    export_workers: int = 4
+    export_max_pending: int = 32  # running + waiting exports before ExportBusy
+    export_chunk_size: int = 256 * 1024
+    export_queue_chunks: int = 8  # chunks buffered per streamed export
+    export_compress_level: int = 6
+    export_stall_timeout: float = 60.0  # seconds a stream may wait on its receiver
+    export_pdf_timeout: float = 120.0
+    soffice_path: str = "soffice"
+    
+    # Pub/Sub channels
+    channel_presentation_events: str = "presentation.events"
+    channel_task_updates: str = "task.updates"
+    
+    class Config:
+        env_file = ".env"
+        case_sensitive = False
+        extra = "ignore"  # .env may be the shared docker-compose one
+
+settings = Settings()
@@ -0,0 +1,3 @@
+from .media import FileImagePart, add_picture, image_info
+from .package import ChunkSink, ExportCancelled, write_package
+from .pool import PDF_MEDIA_TYPE, PPTX_MEDIA_TYPE, ExportBusy, ExportError, ExportPool, PptxStream
@@ -0,0 +1,99 @@
+"""
+Image parts that stay on disk.
+
+python-pptx copies every picture into an in-memory ImagePart, so an
+image-heavy deck holds all of its media for as long as the Presentation
+lives. FileImagePart keeps only the path and the image metadata python-pptx
+needs for placement; the streaming exporter copies the file straight into
+the package.
+"""
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional, Tuple
+import os
+
+from pptx.opc.constants import RELATIONSHIP_TYPE as RT
+from pptx.parts.image import Image, ImagePart
+
+
+@dataclass(frozen=True)
+class ImageInfo:
+    path: str
+    sha1: str
+    ext: str
+    content_type: str
+    size: int
+    px_size: Tuple[int, int]
+    dpi: Tuple[int, int]
+    filename: str
+
+
+@lru_cache(maxsize=1024)
+def _image_info(path: str, mtime_ns: int, size: int) -> ImageInfo:
+    # The file is read once here for its hash and header; the bytes are not kept
+    image = Image.from_file(path)
+    return ImageInfo(
+        path=path,
+        sha1=image.sha1,
+        ext=image.ext,
+        content_type=image.content_type,
+        size=size,
+        px_size=image.size,
+        dpi=image.dpi,
+        filename=image.filename
+    )
+
+
+def image_info(path: str) -> ImageInfo:
+    """Metadata of the image at `path`, cached until the file changes"""
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    return _image_info(path, stat.st_mtime_ns, stat.st_size)
+
+
+class FileImagePart(ImagePart):
+    """An ImagePart whose bytes are read from `path` only when needed"""
+
+    def __init__(self, partname, content_type, package, info: ImageInfo):
+        super().__init__(partname, content_type, package, None, info.filename)
+        self.info = info
+
+    @classmethod
+    def new(cls, package, info: ImageInfo) -> "FileImagePart":
+        return cls(package.next_image_partname(info.ext), info.content_type, package, info)
+
+    @property
+    def path(self) -> str:
+        return self.info.path
+
+    @property
+    def blob(self) -> bytes:
+        # Only plain python-pptx saves get here; the streaming exporter copies the file
+        with open(self.info.path, "rb") as f:
+            return f.read()
+
+    @property
+    def sha1(self) -> str:
+        return self.info.sha1
+
+    @property
+    def _dpi(self):
+        return self.info.dpi
+
+    @property
+    def _px_size(self):
+        return self.info.px_size
+
+
+def add_picture(slide, path: str, left: int, top: int, width: Optional[int] = None, height: Optional[int] = None):
+    """slide.shapes.add_picture, but the image part references `path` instead of holding its bytes"""
+    info = image_info(path)
+    package = slide.part.package
+    # Reuse an identical image already in the package, whether file-backed or not
+    image_part = package._image_parts._find_by_sha1(info.sha1) or FileImagePart.new(package, info)
+    rId = slide.part.relate_to(image_part, RT.IMAGE)
+
+    shapes = slide.shapes
+    pic = shapes._add_pic_from_image_part(image_part, rId, left, top, width, height)
+    shapes._recalculate_extents()
+    return shapes._shape_factory(pic)
@@ -0,0 +1,114 @@
+"""
+Streaming PPTX writer.
+
+Presentation.save() builds the whole zip through python-pptx's PackageWriter,
+and saving into a BytesIO to answer a request keeps a second copy of the deck
+next to the Presentation. write_package writes the same package part by part
+into any writable object: a file, or a ChunkSink feeding an HTTP response.
+Non-seekable targets get zip data descriptors instead of patched headers.
+"""
+from typing import Callable, Optional
+import shutil
+import time
+import zipfile
+
+from pptx.opc.constants import CONTENT_TYPE as CT
+from pptx.opc.oxml import serialize_part_xml
+from pptx.opc.packuri import CONTENT_TYPES_URI, PACKAGE_URI
+from pptx.opc.serialized import _ContentTypesItem
+
+from .media import FileImagePart
+
+# Payloads that are already compressed; deflating them again only costs CPU
+STORED_CONTENT_TYPES = frozenset({
+    CT.PNG,
+    CT.JPEG,
+    CT.GIF,
+    CT.SML_SHEET,
+    "image/jpg",
+    "video/mp4",
+    "audio/mpeg",
+})
+
+
+class ExportCancelled(Exception):
+    """Raised inside a writer when the receiving end of an export has gone away"""
+
+
+class ChunkSink:
+    """Write-only file object that hands out the zip stream in `chunk_size` pieces"""
+
+    def __init__(self, emit: Callable[[bytes], None], chunk_size: int):
+        self._emit = emit
+        self.chunk_size = chunk_size
+        self._buffer = bytearray()
+        self.bytes_written = 0
+
+    def write(self, data) -> int:
+        self._buffer += data
+        if len(self._buffer) >= self.chunk_size:
+            self._drain(self.chunk_size)
+        return len(data)
+
+    def _drain(self, minimum: int):
+        while len(self._buffer) >= minimum and self._buffer:
+            size = min(len(self._buffer), self.chunk_size)
+            chunk = bytes(self._buffer[:size])
+            del self._buffer[:size]
+            self.bytes_written += size
+            self._emit(chunk)
+
+    def flush(self):
+        # zipfile flushes after every member; only full chunks go out until close()
+        pass
+
+    def close(self):
+        self._drain(1)
+
+
+def _compress_type(content_type: str) -> int:
+    if content_type in STORED_CONTENT_TYPES or content_type.startswith(("video/", "audio/")):
+        return zipfile.ZIP_STORED
+    return zipfile.ZIP_DEFLATED
+
+
+def _member(name: str, date_time, compress_type: int, size: Optional[int] = None) -> zipfile.ZipInfo:
+    info = zipfile.ZipInfo(name.lstrip("/"), date_time)
+    info.compress_type = compress_type
+    info.external_attr = 0o600 << 16
+    if size is not None:
+        info.file_size = size
+    return info
+
+
+def write_package(prs, fileobj, compresslevel: int = 6, copy_buffer: int = 256 * 1024) -> int:
+    """
+    Write `prs` as a .pptx into `fileobj`, one part at a time; returns the number of parts.
+
+    File-backed images are copied from disk in `copy_buffer` pieces. Like
+    Presentation.save(), this reads the package while writing it, so the
+    presentation must not be modified until it returns.
+    """
+    package = prs.part.package
+    parts = tuple(package.iter_parts())
+    date_time = time.localtime()[:6]
+
+    with zipfile.ZipFile(fileobj, "w", zipfile.ZIP_DEFLATED, compresslevel=compresslevel) as zf:
+        def write_xml(partname: str, blob: bytes):
+            zf.writestr(_member(partname, date_time, zipfile.ZIP_DEFLATED), blob, compresslevel=compresslevel)
+
+        write_xml(CONTENT_TYPES_URI, serialize_part_xml(_ContentTypesItem.xml_for(parts)))
+        write_xml(PACKAGE_URI.rels_uri, package._rels.xml)
+
+        for part in parts:
+            compress_type = _compress_type(part.content_type)
+            if isinstance(part, FileImagePart):
+                member = _member(part.partname, date_time, compress_type, part.info.size)
+                with open(part.path, "rb") as src, zf.open(member, "w") as dest:
+                    shutil.copyfileobj(src, dest, copy_buffer)
+            else:
+                zf.writestr(_member(part.partname, date_time, compress_type), part.blob, compresslevel=compresslevel)
+            if part._rels:
+                write_xml(part.partname.rels_uri, part.rels.xml)
+
+    return len(parts)
@@ -0,0 +1,331 @@
+"""
+Bounded export pool.
+
+Exports run on a small thread pool. zlib and file copies release the GIL, and
+a Presentation cannot be handed to another process without pickling the
+whole deck. Streamed exports push chunks through a bounded queue. When a client
+reads slowly, the writer thread blocks instead of buffering the deck.
+Requests beyond `max_pending` are rejected with ExportBusy, not queued.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Optional
+import asyncio
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+from ..core.config import settings
+from .package import ChunkSink, ExportCancelled, write_package
+
+logger = logging.getLogger(__name__)
+
+PPTX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.presentationml.presentation"
+PDF_MEDIA_TYPE = "application/pdf"
+
+
+class ExportBusy(Exception):
+    """Raised when the export queue is full and a request is not admitted"""
+
+
+class ExportError(Exception):
+    """Raised when an export cannot be produced"""
+
+
+class _Producer:
+    """Worker-side half of a PptxStream; holds no reference back to the stream"""
+
+    done = object()
+
+    def __init__(self, loop, queue: asyncio.Queue, chunk_size: int):
+        self.loop = loop
+        self.queue = queue
+        self.sink = ChunkSink(self.put, chunk_size)
+        self.cancelled = threading.Event()
+
+    def put(self, item):
+        # Block the worker thread until the receiver makes room; a receiver that
+        # stops reading altogether releases the worker after the stall timeout
+        future = asyncio.run_coroutine_threadsafe(self.queue.put(item), self.loop)
+        deadline = time.monotonic() + settings.export_stall_timeout
+        while True:
+            if self.cancelled.is_set() or time.monotonic() > deadline:
+                future.cancel()
+                raise ExportCancelled("export stream closed by the receiver")
+            try:
+                return future.result(timeout=0.5)
+            except TimeoutError:
+                continue
+
+    def __call__(self, prs, compresslevel: int, copy_buffer: int):
+        try:
+            write_package(prs, self.sink, compresslevel, copy_buffer)
+            self.sink.close()
+        except ExportCancelled:
+            return
+        except Exception as e:
+            self.put(e)
+            return
+        self.put(self.done)
+
+
+class PptxStream:
+    """Async iterator over the chunks of one streamed PPTX export"""
+
+    def __init__(self, pool: "ExportPool", prs):
+        self.pool = pool
+        self.prs = prs
+        self.started = time.monotonic()
+        self._producer: Optional[_Producer] = None
+        self._closed = False
+
+    def _start(self):
+        loop = asyncio.get_running_loop()
+        self._producer = _Producer(loop, asyncio.Queue(maxsize=self.pool.queue_chunks), self.pool.chunk_size)
+        future = loop.run_in_executor(
+            self.pool._executor, self._producer, self.prs, self.pool.compresslevel, self.pool.chunk_size
+        )
+        # Failures travel through the queue; keep asyncio from reporting them twice
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+
+    def _finish(self, error: Optional[BaseException]):
+        if self._closed:
+            return
+        self._closed = True
+        nbytes = 0
+        if self._producer is not None:
+            self._producer.cancelled.set()
+            nbytes = self._producer.sink.bytes_written
+        self.pool._release(self.started, nbytes, error)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> bytes:
+        if self._closed:
+            raise StopAsyncIteration
+        if self._producer is None:
+            self._start()
+        try:
+            item = await self._producer.queue.get()
+        except BaseException as e:
+            self._finish(e)
+            raise
+        if item is _Producer.done:
+            self._finish(None)
+            raise StopAsyncIteration
+        if isinstance(item, BaseException):
+            self._finish(item)
+            raise ExportError(f"PPTX export failed: {item}") from item
+        return item
+
+    async def aclose(self):
+        self._finish(ExportCancelled("export stream closed"))
+
+    def __del__(self):
+        # A stream dropped without being read to the end still frees its slot and its worker
+        self._finish(ExportCancelled("export stream abandoned"))
+
+
+class ExportPool:
+    """Runs PPTX/PDF exports in a bounded worker pool with backpressure"""
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        max_pending: Optional[int] = None,
+        chunk_size: Optional[int] = None,
+        queue_chunks: Optional[int] = None,
+        compresslevel: Optional[int] = None
+    ):
+        self.max_workers = max_workers or settings.export_workers
+        self.max_pending = max_pending or settings.export_max_pending
+        self.chunk_size = chunk_size or settings.export_chunk_size
+        self.queue_chunks = queue_chunks or settings.export_queue_chunks
+        self.compresslevel = settings.export_compress_level if compresslevel is None else compresslevel
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pdf_slots: Optional[asyncio.Semaphore] = None
+
+        # Metrics
+        self._pending = 0
+        self._peak_pending = 0
+        self._completed = 0
+        self._rejected = 0
+        self._cancelled = 0
+        self._failed = 0
+        self._bytes = 0
+        self._run_time_total = 0.0
+
+    def start(self):
+        """Create the worker pool"""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="exporter")
+            logger.info(f"Export pool started: {self.max_workers} workers, {self.max_pending} max pending")
+
+    def shutdown(self):
+        """Stop the worker pool"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+
+    def _admit(self):
+        if self._executor is None:
+            self.start()
+        if self._pending >= self.max_pending:
+            self._rejected += 1
+            raise ExportBusy(f"{self._pending} exports already pending")
+        self._pending += 1
+        self._peak_pending = max(self._peak_pending, self._pending)
+
+    def _release(self, started: float, nbytes: int, error: Optional[BaseException] = None):
+        self._pending -= 1
+        if isinstance(error, (ExportCancelled, asyncio.CancelledError, GeneratorExit)):
+            self._cancelled += 1
+        elif error is not None:
+            self._failed += 1
+        else:
+            self._completed += 1
+            self._bytes += nbytes
+            self._run_time_total += time.monotonic() - started
+
+    async def _run(self, fn, *args):
+        self._admit()
+        started = time.monotonic()
+        try:
+            nbytes = await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+        except BaseException as e:
+            self._release(started, 0, e)
+            raise
+        self._release(started, nbytes)
+        return nbytes
+
+    # PPTX
+
+    def _write_file(self, prs, path: str) -> int:
+        # Write next to the target and rename, so readers never see a partial file
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                write_package(prs, f, self.compresslevel, self.chunk_size)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        return os.path.getsize(path)
+
+    async def export_pptx(self, prs, path: str) -> int:
+        """Write `prs` to `path`; returns the file size"""
+        return await self._run(self._write_file, prs, path)
+
+    def stream_pptx(self, prs) -> "PptxStream":
+        """
+        Stream `prs` as .pptx chunks, e.g. as a StreamingResponse body.
+
+        Admission happens here, so ExportBusy is raised before a response
+        is started. At most `queue_chunks` chunks are buffered.
+        """
+        self._admit()
+        return PptxStream(self, prs)
+
+    # PDF
+
+    async def _convert_pdf(self, prs, workdir: str) -> str:
+        pptx_path = os.path.join(workdir, "deck.pptx")
+        await asyncio.get_running_loop().run_in_executor(self._executor, self._write_file, prs, pptx_path)
+
+        if self._pdf_slots is None:
+            self._pdf_slots = asyncio.Semaphore(self.max_workers)
+        async with self._pdf_slots:
+            # Each conversion gets its own LibreOffice profile so conversions can run side by side
+            try:
+                process = await asyncio.create_subprocess_exec(
+                    settings.soffice_path,
+                    f"-env:UserInstallation=file://{workdir}/profile",
+                    "--headless", "--convert-to", "pdf", "--outdir", workdir, pptx_path,
+                    stdout=asyncio.subprocess.DEVNULL,
+                    stderr=asyncio.subprocess.PIPE
+                )
+            except FileNotFoundError:
+                raise ExportError(f"LibreOffice not found at {settings.soffice_path}; PDF export unavailable")
+            try:
+                _, stderr = await asyncio.wait_for(process.communicate(), settings.export_pdf_timeout)
+            except asyncio.TimeoutError:
+                process.kill()
+                await process.wait()
+                raise ExportError(f"PDF conversion timed out after {settings.export_pdf_timeout}s")
+
+        pdf_path = os.path.join(workdir, "deck.pdf")
+        if process.returncode != 0 or not os.path.exists(pdf_path):
+            raise ExportError(f"PDF conversion failed: {stderr.decode(errors='replace').strip()}")
+        return pdf_path
+
+    async def _run_pdf(self, prs, finish):
+        self._admit()
+        started = time.monotonic()
+        workdir = tempfile.mkdtemp(prefix="export-")
+        try:
+            pdf_path = await self._convert_pdf(prs, workdir)
+            result, nbytes = finish(pdf_path)
+        except BaseException as e:
+            self._release(started, 0, e)
+            raise
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+        self._release(started, nbytes)
+        return result
+
+    async def export_pdf(self, prs, path: str) -> int:
+        """Convert `prs` to PDF at `path` through headless LibreOffice; returns the file size"""
+        def finish(pdf_path: str):
+            shutil.move(pdf_path, path)
+            size = os.path.getsize(path)
+            return size, size
+        return await self._run_pdf(prs, finish)
+
+    async def stream_pdf(self, prs) -> AsyncIterator[bytes]:
+        """
+        Convert `prs` to PDF and return an iterator over its chunks.
+
+        Conversion errors are raised here, before a response is started. The
+        PDF is read back from an unlinked temporary file, never held whole.
+        """
+        def finish(pdf_path: str):
+            f = open(pdf_path, "rb")
+            return f, os.fstat(f.fileno()).st_size
+
+        f = await self._run_pdf(prs, finish)
+        return self._read_chunks(f)
+
+    async def _read_chunks(self, f) -> AsyncIterator[bytes]:
+        loop = asyncio.get_running_loop()
+        with f:
+            while True:
+                chunk = await loop.run_in_executor(self._executor, f.read, self.chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+
+    def stats(self) -> dict:
+        completed = self._completed or 1
+        return {
+            "workers": self.max_workers,
+            "max_pending": self.max_pending,
+            "pending": self._pending,
+            "peak_pending": self._peak_pending,
+            "completed": self._completed,
+            "rejected": self._rejected,
+            "cancelled": self._cancelled,
+            "failed": self._failed,
+            "bytes": self._bytes,
+            "avg_run_ms": round(self._run_time_total / completed * 1000, 2)
+        }
@@ -0,0 +1,9 @@
+from .charts import (
+    ChartOutput,
+    ChartRenderError,
+    ChartRenderer,
+    add_chart,
+    prepare_chart
+)
+from .deck import add_slide, chart_frame, render_deck
+from .incremental import IncrementalRenderer, RenderDiff, slide_hash
@@ -0,0 +1,546 @@
+"""
+Chart rendering on a process pool with dataset-hash memoization.
+
+Charts arrive as AI-generated dicts, e.g.
+    {"type": "bar", "title": "Revenue", "labels": ["Q1", "Q2"],
+     "series": [{"name": "2024", "values": [1.2, 3.4]}]}
+or the short form {"type": "bar", "data": [1, 2, 3]}; scatter series carry
+"x" and "y" arrays. Datasets are converted and downsampled with NumPy in the
+worker, then built either as native chart XML plus its embedded workbook
+("native") or rasterized with matplotlib ("png").
+
+Outputs are memoized by a hash of (chart type, dataset, theme, size, format)
+in a byte-bounded LRU, and identical charts requested while one is already
+rendering share that render.
+"""
+from collections import OrderedDict
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from io import BytesIO
+from typing import Dict, Iterable, List, Optional, Tuple
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import threading
+import time
+
+import numpy as np
+
+from ..core.config import settings
+from ..templates.registry import ThemeMaster
+
+logger = logging.getLogger(__name__)
+
+CHART_TYPES = ("bar", "column", "horizontal_bar", "line", "area", "pie", "doughnut", "scatter")
+LINE_TYPES = ("line", "area")
+MAX_PIE_SLICES = 12
+EMU_PER_INCH = 914400
+
+
+class ChartRenderError(Exception):
+    """Raised when a chart spec cannot be turned into a chart"""
+
+
+@dataclass(frozen=True)
+class ChartOutput:
+    key: str
+    format: str                  # "native" or "png"
+    chart_type: str
+    blob: bytes                  # chart part XML, or PNG bytes
+    workbook: Optional[bytes]    # embedded xlsx for native charts
+    points: int                  # data points after downsampling
+    source_points: int
+    render_seconds: float
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.blob) + len(self.workbook or b"")
+
+
+@dataclass
+class PreparedChart:
+    chart_type: str
+    title: Optional[str]
+    categories: List[str]
+    series: List[Tuple[str, np.ndarray]]
+    x: List[np.ndarray]          # scatter only, aligned with series
+    source_points: int
+
+    @property
+    def points(self) -> int:
+        return sum(len(values) for _, values in self.series)
+
+
+def normalize_type(chart: dict) -> str:
+    chart_type = str(chart.get("type") or chart.get("chart_type") or "bar").lower().replace("-", "_")
+    if chart_type not in CHART_TYPES:
+        raise ChartRenderError(f"Unsupported chart type: {chart_type}")
+    return chart_type
+
+
+def chart_key(chart: dict, theme_colors: dict, theme_fonts: dict, width: int, height: int, fmt: str) -> str:
+    """Hash of everything that affects the rendered output"""
+    payload = json.dumps(
+        [normalize_type(chart), chart, theme_colors, theme_fonts, int(width), int(height), fmt],
+        sort_keys=True, separators=(",", ":"), default=str
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _to_array(values) -> np.ndarray:
+    # float64 conversion maps None to NaN and numeric strings to numbers
+    try:
+        array = np.asarray(values if values is not None else [], dtype=np.float64)
+    except (TypeError, ValueError) as e:
+        raise ChartRenderError(f"Non-numeric chart values: {e}")
+    if array.ndim != 1:
+        raise ChartRenderError(f"Chart values must be a flat list, got shape {array.shape}")
+    return array
+
+
+def _fit(values: np.ndarray, length: int) -> np.ndarray:
+    """Truncate or NaN-pad a series to the category count"""
+    if len(values) >= length:
+        return values[:length]
+    return np.concatenate([values, np.full(length - len(values), np.nan)])
+
+
+def _minmax_indices(series: List[np.ndarray], max_points: int) -> np.ndarray:
+    """Indices keeping each bucket's min and max, so line shapes and spikes survive"""
+    n = len(series[0])
+    # Every kept index costs one point per series
+    buckets = max(1, max_points // (2 * len(series) ** 2))
+    size = -(-n // buckets)
+    keep = [np.array([0, n - 1])]
+    for values in series:
+        padded = np.full(buckets * size, np.nan)
+        padded[:n] = values
+        rows = padded.reshape(buckets, size)
+        lows = np.where(np.isnan(rows), np.inf, rows).argmin(axis=1)
+        highs = np.where(np.isnan(rows), -np.inf, rows).argmax(axis=1)
+        offsets = np.arange(buckets) * size
+        keep.extend([offsets + lows, offsets + highs])
+    indices = np.unique(np.concatenate(keep))
+    return indices[indices < n]
+
+
+def _bucket_means(values: np.ndarray, starts: np.ndarray) -> np.ndarray:
+    counts = np.diff(np.append(starts, len(values)))
+    valid = ~np.isnan(values)
+    sums = np.add.reduceat(np.where(valid, values, 0.0), starts)
+    present = np.add.reduceat(valid.astype(np.int64), starts)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(present > 0, sums / np.maximum(present, 1), np.nan)[:len(counts)]
+
+
+def prepare_chart(chart: dict, max_points: int = 2000) -> PreparedChart:
+    """Normalize a chart spec into NumPy series, downsampled to at most ~max_points per chart"""
+    chart_type = normalize_type(chart)
+    title = chart.get("title")
+
+    raw_series = chart.get("series")
+    if raw_series is None:
+        values = chart.get("values", chart.get("data"))
+        if values is None:
+            raise ChartRenderError("Chart has no data")
+        if values and isinstance(values[0], (list, tuple)) and chart_type == "scatter":
+            pairs = _to_array_2d(values)
+            raw_series = [{"name": chart.get("name", "Series 1"), "x": pairs[:, 0], "y": pairs[:, 1]}]
+        else:
+            raw_series = [{"name": chart.get("name", "Series 1"), "values": values}]
+    if isinstance(raw_series, dict):
+        raw_series = [{"name": name, "values": values} for name, values in raw_series.items()]
+    if not raw_series:
+        raise ChartRenderError("Chart has no series")
+
+    if chart_type == "scatter":
+        xs, series, source = [], [], 0
+        for n, item in enumerate(raw_series):
+            y = _to_array(item.get("y", item.get("values")))
+            x = _to_array(item["x"]) if item.get("x") is not None else np.arange(len(y), dtype=np.float64)
+            length = min(len(x), len(y))
+            source += length
+            x, y = x[:length], y[:length]
+            valid = ~(np.isnan(x) | np.isnan(y))
+            x, y = x[valid], y[valid]
+            per_series = max(1, max_points // len(raw_series))
+            if len(y) > per_series:
+                stride = np.linspace(0, len(y) - 1, per_series).astype(np.int64)
+                x, y = x[stride], y[stride]
+            xs.append(x)
+            series.append((str(item.get("name") or f"Series {n + 1}"), y))
+        return PreparedChart(chart_type, title, [], series, xs, source)
+
+    arrays = [_to_array(item.get("values", item.get("data"))) for item in raw_series]
+    labels = chart.get("labels") or chart.get("categories")
+    length = len(labels) if labels else max(len(values) for values in arrays)
+    arrays = [_fit(values, length) for values in arrays]
+    names = [str(item.get("name") or f"Series {n + 1}") for n, item in enumerate(raw_series)]
+    categories = np.asarray(labels[:length]).astype(str) if labels else np.arange(1, length + 1).astype(str)
+    source = length * len(arrays)
+
+    if chart_type in ("pie", "doughnut"):
+        # One series; keep the largest slices and fold the rest into "Other"
+        values = arrays[0]
+        if length > MAX_PIE_SLICES:
+            order = np.argsort(-np.nan_to_num(values, nan=-np.inf), kind="stable")
+            top = np.sort(order[:MAX_PIE_SLICES - 1])
+            other = np.nansum(values[order[MAX_PIE_SLICES - 1:]])
+            categories = np.append(categories[top], "Other")
+            values = np.append(values[top], other)
+        return PreparedChart(chart_type, title, categories.tolist(), [(names[0], values)], [], source)
+
+    if length * len(arrays) > max_points:
+        if chart_type in LINE_TYPES:
+            indices = _minmax_indices(arrays, max_points)
+            categories = categories[indices]
+            arrays = [values[indices] for values in arrays]
+        else:
+            # Bars can't show thousands of categories; average into buckets
+            buckets = max(1, max_points // len(arrays))
+            starts = np.unique(np.linspace(0, length, buckets, endpoint=False).astype(np.int64))
+            categories = categories[starts]
+            arrays = [_bucket_means(values, starts) for values in arrays]
+
+    return PreparedChart(chart_type, title, categories.tolist(), list(zip(names, arrays)), [], source)
+
+
+def _to_array_2d(values) -> np.ndarray:
+    try:
+        array = np.asarray(values, dtype=np.float64)
+    except (TypeError, ValueError) as e:
+        raise ChartRenderError(f"Non-numeric chart points: {e}")
+    if array.ndim != 2 or array.shape[1] < 2:
+        raise ChartRenderError("Scatter points must be [x, y] pairs")
+    return array
+
+
+def _optional(values: np.ndarray) -> list:
+    """NaN -> None, which python-pptx writes as an empty point"""
+    return np.where(np.isnan(values), None, values).tolist()
+
+
+def _native_chart(prepared: PreparedChart) -> Tuple[bytes, bytes]:
+    from pptx.chart.data import CategoryChartData, XyChartData
+    from pptx.enum.chart import XL_CHART_TYPE
+
+    xl_types = {
+        "bar": XL_CHART_TYPE.COLUMN_CLUSTERED,
+        "column": XL_CHART_TYPE.COLUMN_CLUSTERED,
+        "horizontal_bar": XL_CHART_TYPE.BAR_CLUSTERED,
+        "line": XL_CHART_TYPE.LINE,
+        "area": XL_CHART_TYPE.AREA,
+        "pie": XL_CHART_TYPE.PIE,
+        "doughnut": XL_CHART_TYPE.DOUGHNUT,
+        "scatter": XL_CHART_TYPE.XY_SCATTER
+    }
+    if prepared.chart_type == "scatter":
+        data = XyChartData()
+        for (name, y), x in zip(prepared.series, prepared.x):
+            series = data.add_series(name)
+            for x_value, y_value in zip(x.tolist(), y.tolist()):
+                series.add_data_point(x_value, y_value)
+    else:
+        data = CategoryChartData()
+        data.categories = prepared.categories
+        for name, values in prepared.series:
+            data.add_series(name, _optional(values))
+    xl_type = xl_types[prepared.chart_type]
+    return data.xml_bytes(xl_type), data.xlsx_blob
+
+
+def _has_font(family: str) -> bool:
+    from matplotlib import font_manager
+    try:
+        font_manager.findfont(family, fallback_to_default=False)
+        return True
+    except ValueError:
+        return False
+
+
+def _png_chart(prepared: PreparedChart, width: int, height: int, colors: dict, font: Optional[str], dpi: int) -> bytes:
+    try:
+        import matplotlib
+    except ImportError:
+        raise ChartRenderError("matplotlib is required for png charts")
+    matplotlib.use("Agg")
+    from matplotlib import pyplot as plt
+
+    palette = [f"#{colors[slot]}" for slot in ("accent1", "accent2", "accent3", "accent4", "accent5", "accent6") if slot in colors]
+    rc = {"axes.prop_cycle": matplotlib.cycler(color=palette)} if palette else {}
+    if font and _has_font(font):
+        rc["font.family"] = [font, "sans-serif"]
+    with matplotlib.rc_context(rc):
+        figure, axes = plt.subplots(figsize=(width / EMU_PER_INCH, height / EMU_PER_INCH), dpi=dpi)
+        try:
+            positions = np.arange(len(prepared.categories))
+            count = len(prepared.series)
+            if prepared.chart_type in ("pie", "doughnut"):
+                name, values = prepared.series[0]
+                wedge = {"width": 0.4} if prepared.chart_type == "doughnut" else None
+                axes.pie(np.nan_to_num(values), labels=prepared.categories, wedgeprops=wedge, colors=palette or None)
+                axes.set_aspect("equal")
+            elif prepared.chart_type == "scatter":
+                for (name, y), x in zip(prepared.series, prepared.x):
+                    axes.scatter(x, y, s=8, label=name)
+            elif prepared.chart_type in LINE_TYPES:
+                for name, values in prepared.series:
+                    if prepared.chart_type == "area":
+                        axes.fill_between(positions, np.nan_to_num(values), alpha=0.6, label=name)
+                    else:
+                        axes.plot(positions, values, label=name)
+            else:
+                bar_width = 0.8 / count
+                for n, (name, values) in enumerate(prepared.series):
+                    offsets = positions - 0.4 + bar_width * (n + 0.5)
+                    if prepared.chart_type == "horizontal_bar":
+                        axes.barh(offsets, values, height=bar_width, label=name)
+                    else:
+                        axes.bar(offsets, values, width=bar_width, label=name)
+
+            if prepared.categories and prepared.chart_type not in ("pie", "doughnut"):
+                # Label at most ~20 ticks however many categories there are
+                step = max(1, len(prepared.categories) // 20)
+                ticks = positions[::step]
+                labels = [prepared.categories[i] for i in ticks]
+                if prepared.chart_type == "horizontal_bar":
+                    axes.set_yticks(ticks, labels)
+                else:
+                    axes.set_xticks(ticks, labels, rotation=45 if len(ticks) > 8 else 0, ha="right" if len(ticks) > 8 else "center")
+            if prepared.title:
+                axes.set_title(prepared.title)
+            if count > 1:
+                axes.legend()
+            figure.tight_layout()
+
+            buffer = BytesIO()
+            figure.savefig(buffer, format="png")
+            return buffer.getvalue()
+        finally:
+            plt.close(figure)
+
+
+def render_chart(
+    key: str,
+    chart: dict,
+    fmt: str,
+    width: int,
+    height: int,
+    colors: dict,
+    font: Optional[str],
+    max_points: int,
+    dpi: int = 150
+) -> ChartOutput:
+    """Worker entry point: prepare the dataset and build one chart"""
+    started = time.perf_counter()
+    prepared = prepare_chart(chart, max_points)
+    if fmt == "native":
+        blob, workbook = _native_chart(prepared)
+    elif fmt == "png":
+        blob, workbook = _png_chart(prepared, width, height, colors, font, dpi), None
+    else:
+        raise ChartRenderError(f"Unsupported chart format: {fmt}")
+    return ChartOutput(
+        key=key,
+        format=fmt,
+        chart_type=prepared.chart_type,
+        blob=blob,
+        workbook=workbook,
+        points=prepared.points,
+        source_points=prepared.source_points,
+        render_seconds=time.perf_counter() - started
+    )
+
+
+class ChartOutputCache:
+    """Thread-safe LRU of rendered charts, bounded by total output bytes"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._entries: "OrderedDict[str, ChartOutput]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[ChartOutput]:
+        with self._lock:
+            output = self._entries.get(key)
+            if output is not None:
+                self._entries.move_to_end(key)
+            return output
+
+    def set(self, output: ChartOutput):
+        if output.nbytes > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(output.key, None)
+            if previous is not None:
+                self.total_bytes -= previous.nbytes
+            self._entries[output.key] = output
+            self.total_bytes += output.nbytes
+            while self.total_bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.total_bytes -= evicted.nbytes
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.total_bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class ChartRenderer:
+    """
+    Renders charts in parallel on a worker pool, memoizing outputs.
+
+    `submit()` returns a Future immediately: already completed for cached
+    charts, shared for a chart that is already rendering, otherwise backed by
+    a new pool task. Use executor="thread" where spawning processes isn't
+    possible; dataset preparation is NumPy-bound either way.
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        cache_max_bytes: Optional[int] = None,
+        max_points: Optional[int] = None,
+        fmt: Optional[str] = None,
+        executor: str = "process",
+        dpi: int = 150
+    ):
+        self.max_workers = max_workers or settings.chart_workers or os.cpu_count() or 1
+        self.max_points = max_points or settings.chart_max_points
+        self.fmt = fmt or settings.chart_format
+        self.executor_kind = executor
+        self.dpi = dpi
+        self.cache = ChartOutputCache(cache_max_bytes or settings.chart_cache_max_bytes)
+        self._executor: Optional[Executor] = None
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+        # Metrics
+        self.hits = 0
+        self.shared = 0
+        self.renders = 0
+        self.failures = 0
+        self.render_seconds = 0.0
+
+    def start(self):
+        if self._executor is None:
+            if self.executor_kind == "process":
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="chart")
+            logger.info(f"Chart renderer started with {self.max_workers} {self.executor_kind} workers")
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
+
+    def submit(
+        self,
+        chart: dict,
+        master: ThemeMaster,
+        width: int,
+        height: int,
+        fmt: Optional[str] = None
+    ) -> "Future[ChartOutput]":
+        fmt = fmt or self.fmt
+        colors, fonts = dict(master.colors), dict(master.fonts)
+        key = chart_key(chart, colors, fonts, width, height, fmt)
+
+        output = self.cache.get(key)
+        if output is not None:
+            self.hits += 1
+            future: Future = Future()
+            future.set_result(output)
+            return future
+
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is not None:
+                self.shared += 1
+                return future
+            self.start()
+            future = self._executor.submit(
+                render_chart, key, chart, fmt, int(width), int(height),
+                colors, fonts.get("minor"), self.max_points, self.dpi
+            )
+            self._inflight[key] = future
+        future.add_done_callback(lambda done: self._finished(key, done))
+        return future
+
+    def _finished(self, key: str, future: Future):
+        with self._lock:
+            self._inflight.pop(key, None)
+        if future.cancelled():
+            return
+        error = future.exception()
+        if error is not None:
+            self.failures += 1
+            logger.error(f"Chart render failed: {error}")
+            return
+        output = future.result()
+        self.renders += 1
+        self.render_seconds += output.render_seconds
+        self.cache.set(output)
+
+    def render_many(
+        self,
+        charts: Iterable[Tuple[dict, int, int]],
+        master: ThemeMaster,
+        fmt: Optional[str] = None
+    ) -> List[ChartOutput]:
+        """Render (chart, width, height) triples in parallel; results in input order"""
+        futures = [self.submit(chart, master, width, height, fmt) for chart, width, height in charts]
+        return [future.result() for future in futures]
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.max_workers,
+            "executor": self.executor_kind,
+            "cached_charts": len(self.cache),
+            "cache_bytes": self.cache.total_bytes,
+            "cache_evictions": self.cache.evictions,
+            "in_flight": len(self._inflight),
+            "hits": self.hits,
+            "shared": self.shared,
+            "renders": self.renders,
+            "failures": self.failures,
+            "avg_render_ms": round(self.render_seconds / self.renders * 1000, 2) if self.renders else 0.0
+        }
+
+
+def add_chart(slide, output: ChartOutput, left: int, top: int, width: int, height: int):
+    """Place a rendered chart on a slide"""
+    if output.format == "png":
+        return slide.shapes.add_picture(BytesIO(output.blob), left, top, width, height)
+
+    from pptx.opc.constants import CONTENT_TYPE as CT, RELATIONSHIP_TYPE as RT
+    from pptx.parts.chart import ChartPart
+
+    package = slide.part.package
+    chart_part = ChartPart.load(
+        package.next_partname(ChartPart.partname_template), CT.DML_CHART, package, output.blob
+    )
+    chart_part.chart_workbook.update_from_xlsx_blob(output.workbook)
+    rId = slide.part.relate_to(chart_part, RT.CHART)
+    graphic_frame = slide.shapes._add_chart_graphicFrame(rId, left, top, width, height)
+    slide.shapes._recalculate_extents()
+    return slide.shapes._shape_factory(graphic_frame)
@@ -0,0 +1,141 @@
+"""
+Deck renderer: turns generated slide dicts into a python-pptx Presentation.
+
+Slides use the shape produced by the AI generator:
+    {"title": str, "subtitle": str, "bullets": [str, ...], "notes": str,
+     "layout": str, "chart": {...}}
+"""
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+import logging
+
+from ..templates.registry import LayoutInfo, ThemeMaster, TemplateRegistry
+from .charts import ChartRenderer, ChartRenderError, add_chart
+
+logger = logging.getLogger(__name__)
+
+TITLE_LAYOUT = "Title Slide"
+CONTENT_LAYOUT = "Title and Content"
+TITLE_ONLY_LAYOUT = "Title Only"
+TWO_CONTENT_LAYOUT = "Two Content"
+
+CONTENT_TYPES = ("OBJECT", "BODY", "CHART")
+
+
+@dataclass(frozen=True)
+class ChartFrame:
+    left: int
+    top: int
+    width: int
+    height: int
+    placeholder_idx: Optional[int] = None  # placeholder the chart replaces
+
+
+def _layout_name(slide: dict, index: int) -> str:
+    if slide.get("layout"):
+        return slide["layout"]
+    if slide.get("chart"):
+        return TWO_CONTENT_LAYOUT if slide.get("bullets") else TITLE_ONLY_LAYOUT
+    if index == 0 and not slide.get("bullets"):
+        return TITLE_LAYOUT
+    return CONTENT_LAYOUT if slide.get("bullets") else TITLE_ONLY_LAYOUT
+
+
+def chart_frame(master: ThemeMaster, layout: LayoutInfo, has_text: bool) -> ChartFrame:
+    """Where a chart goes on a slide using `layout`"""
+    content = layout.placeholders_of(*CONTENT_TYPES)
+    # Bullets take the first content placeholder; the chart takes the last free one
+    free = content[1:] if has_text else content
+    if free and free[-1].width:
+        target = free[-1]
+        return ChartFrame(target.left, target.top, target.width, target.height, target.idx)
+
+    # No free placeholder: fill the area below the title
+    titles = layout.placeholders_of("TITLE", "CENTER_TITLE")
+    margin = master.slide_width // 20
+    if titles and titles[0].height:
+        title = titles[0]
+        top = title.top + title.height + margin // 2
+        return ChartFrame(title.left, top, title.width, max(margin, master.slide_height - top - margin))
+    return ChartFrame(margin, margin, master.slide_width - 2 * margin, master.slide_height - 2 * margin)
+
+
+def add_slide(prs, master: ThemeMaster, slide: dict, index: int):
+    """Append one slide to `prs`, filling the layout's title/body placeholders"""
+    layout_info = master.layout(_layout_name(slide, index), default=CONTENT_LAYOUT)
+    pptx_slide = master.add_slide(prs, layout_info)
+    placeholders = {shape.placeholder_format.idx: shape for shape in pptx_slide.placeholders}
+
+    title_idx = layout_info.placeholder_idx("TITLE", "CENTER_TITLE")
+    if title_idx in placeholders:
+        placeholders[title_idx].text_frame.text = str(slide.get("title", ""))
+
+    body_idx = layout_info.placeholder_idx("SUBTITLE", "BODY", "OBJECT")
+    if body_idx in placeholders:
+        body = placeholders[body_idx].text_frame
+        bullets = slide.get("bullets") or ([slide["subtitle"]] if slide.get("subtitle") else [])
+        for n, bullet in enumerate(bullets):
+            paragraph = body.paragraphs[0] if n == 0 else body.add_paragraph()
+            paragraph.text = str(bullet)
+
+    if slide.get("notes"):
+        master.notes_slide(prs, pptx_slide).notes_text_frame.text = str(slide["notes"])
+    return pptx_slide
+
+
+def place_chart(pptx_slide, frame: ChartFrame, output):
+    if frame.placeholder_idx is not None:
+        for shape in pptx_slide.placeholders:
+            if shape.placeholder_format.idx == frame.placeholder_idx:
+                shape._element.getparent().remove(shape._element)
+                break
+    return add_chart(pptx_slide, output, frame.left, frame.top, frame.width, frame.height)
+
+
+def submit_charts(
+    master: ThemeMaster,
+    slides: Iterable[Tuple[int, dict]],
+    charts: Optional[ChartRenderer]
+) -> Dict[int, Tuple[ChartFrame, Future]]:
+    """Submit the charts of (index, slide) pairs; keyed by slide index"""
+    pending: Dict[int, Tuple[ChartFrame, Future]] = {}
+    if charts is None:
+        return pending
+    for index, slide in slides:
+        if slide.get("chart"):
+            layout = master.layout(_layout_name(slide, index), default=CONTENT_LAYOUT)
+            frame = chart_frame(master, layout, bool(slide.get("bullets")))
+            try:
+                pending[index] = (frame, charts.submit(slide["chart"], master, frame.width, frame.height))
+            except ChartRenderError as e:
+                logger.warning(f"Skipping chart on slide {index + 1}: {e}")
+    return pending
+
+
+def build_slide(prs, master: ThemeMaster, slide: dict, index: int, pending: Dict[int, Tuple[ChartFrame, Future]]):
+    """add_slide plus the slide's chart, if one was submitted"""
+    pptx_slide = add_slide(prs, master, slide, index)
+    if index in pending:
+        frame, future = pending[index]
+        try:
+            place_chart(pptx_slide, frame, future.result())
+        except ChartRenderError as e:
+            # A bad dataset shouldn't fail the whole deck
+            logger.warning(f"Skipping chart on slide {index + 1}: {e}")
+    return pptx_slide
+
+
+def render_deck(
+    registry: TemplateRegistry,
+    slides: List[dict],
+    theme: Optional[str] = None,
+    charts: Optional[ChartRenderer] = None
+):
+    """Render a full deck onto a fresh copy of the theme template"""
+    master, prs = registry.new_presentation(theme)
+    # Submit every chart before building slides so they render in parallel meanwhile
+    pending = submit_charts(master, enumerate(slides), charts)
+    for index, slide in enumerate(slides):
+        build_slide(prs, master, slide, index, pending)
+    return prs
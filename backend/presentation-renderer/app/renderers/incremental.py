@@ -0,0 +1,214 @@
+"""
+Incremental deck re-rendering.
+
+The slide editor changes one slide at a time, but `presentations.slides`
+always holds the whole deck. IncrementalRenderer keeps the last rendered
+package of recently edited decks together with a content hash per slide.
+On an update it matches new slides to already rendered slide parts by hash,
+renders only slides without a match, drops the rest and splices everything
+into the existing package in the new order.
+"""
+from collections import OrderedDict, defaultdict, deque
+from dataclasses import dataclass, field
+from typing import Deque, Dict, List, Optional
+import hashlib
+import json
+import logging
+import threading
+import time
+
+from pptx.opc.constants import RELATIONSHIP_TYPE as RT
+from pptx.opc.packuri import PackURI
+
+from ..core.config import settings
+from ..templates.registry import ThemeMaster, TemplateRegistry
+from .charts import ChartRenderer
+from .deck import build_slide, submit_charts
+
+logger = logging.getLogger(__name__)
+
+
+def slide_hash(slide: dict, index: int) -> str:
+    """Content hash of a slide; the first slide hashes differently because it may use the title layout"""
+    payload = json.dumps([index == 0, slide], sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class RenderDiff:
+    full: bool
+    rendered: int = 0
+    reused: int = 0
+    removed: int = 0
+    seconds: float = 0.0
+
+
+@dataclass
+class RenderedDeck:
+    presentation_id: str
+    master: ThemeMaster
+    prs: object
+    hashes: List[str]
+    rIds: List[str]                 # presentation part relationship per slide, in deck order
+    version: int = 0
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+
+def _forget_target(rel):
+    # python-pptx caches a relationship's target partname and reference on first save
+    rel.__dict__.pop("target_partname", None)
+    rel.__dict__.pop("target_ref", None)
+
+
+def renumber_slide_parts(prs, rIds: List[str]):
+    """Give slides (in `rIds` order) and their notes continuous partnames, touching only misnamed parts"""
+    for number, rId in enumerate(rIds, start=1):
+        rel = prs.part.rels[rId]
+        slide_part = rel.target_part
+        partname = "/ppt/slides/slide%d.xml" % number
+        if slide_part.partname == partname:
+            continue
+        _forget_target(rel)
+        slide_part.partname = PackURI(partname)
+        for notes_rel in slide_part.rels.values():
+            if notes_rel.reltype == RT.NOTES_SLIDE and not notes_rel.is_external:
+                _forget_target(notes_rel)
+                notes_part = notes_rel.target_part
+                notes_part.partname = PackURI("/ppt/notesSlides/notesSlide%d.xml" % number)
+                for back_rel in notes_part.rels.values():
+                    if back_rel.reltype == RT.SLIDE:
+                        _forget_target(back_rel)
+
+
+class IncrementalRenderer:
+    """Renders decks, re-rendering only changed slides of recently rendered ones"""
+
+    def __init__(
+        self,
+        registry: TemplateRegistry,
+        charts: Optional[ChartRenderer] = None,
+        max_decks: Optional[int] = None
+    ):
+        self.registry = registry
+        self.charts = charts
+        self.max_decks = max_decks or settings.incremental_max_decks
+        self._decks: "OrderedDict[str, RenderedDeck]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        # Metrics
+        self.full_renders = 0
+        self.incremental_renders = 0
+        self.slides_rendered = 0
+        self.slides_reused = 0
+
+    def _deck(self, presentation_id: str) -> Optional[RenderedDeck]:
+        with self._lock:
+            deck = self._decks.get(presentation_id)
+            if deck is not None:
+                self._decks.move_to_end(presentation_id)
+            return deck
+
+    def _store(self, deck: RenderedDeck):
+        with self._lock:
+            self._decks[deck.presentation_id] = deck
+            self._decks.move_to_end(deck.presentation_id)
+            while len(self._decks) > self.max_decks:
+                self._decks.popitem(last=False)
+
+    def forget(self, presentation_id: str):
+        with self._lock:
+            self._decks.pop(presentation_id, None)
+
+    def render(self, presentation_id: str, slides: List[dict], theme: Optional[str] = None):
+        """
+        Render `slides`, reusing the previous render of this deck where possible; returns (prs, diff).
+
+        The returned Presentation stays owned by the renderer and is updated in
+        place by the next render of the same deck, so export it before then.
+        """
+        started = time.perf_counter()
+        master = self.registry.get(theme)
+        deck = self._deck(presentation_id)
+
+        # A different or reloaded theme invalidates every rendered slide
+        if deck is None or deck.master is not master:
+            prs, diff = self._render_full(presentation_id, master, slides)
+        else:
+            with deck.lock:
+                diff = self._render_changes(deck, slides)
+                prs = deck.prs
+        diff.seconds = time.perf_counter() - started
+        return prs, diff
+
+    def _render_full(self, presentation_id: str, master: ThemeMaster, slides: List[dict]):
+        prs = master.new_presentation()
+        pending = submit_charts(master, enumerate(slides), self.charts)
+        for index, slide in enumerate(slides):
+            build_slide(prs, master, slide, index, pending)
+
+        self._store(RenderedDeck(
+            presentation_id=presentation_id,
+            master=master,
+            prs=prs,
+            hashes=[slide_hash(slide, index) for index, slide in enumerate(slides)],
+            rIds=[slide_id.rId for slide_id in prs.slides._sldIdLst]
+        ))
+        self.full_renders += 1
+        self.slides_rendered += len(slides)
+        return prs, RenderDiff(full=True, rendered=len(slides))
+
+    def _render_changes(self, deck: RenderedDeck, slides: List[dict]) -> RenderDiff:
+        prs, master = deck.prs, deck.master
+        slide_ids = prs.slides._sldIdLst
+        new_hashes = [slide_hash(slide, index) for index, slide in enumerate(slides)]
+
+        # Match new positions to rendered slides with the same content, in order
+        available: Dict[str, Deque[str]] = defaultdict(deque)
+        for content_hash, rId in zip(deck.hashes, deck.rIds):
+            available[content_hash].append(rId)
+        order: List[Optional[str]] = []
+        for content_hash in new_hashes:
+            reusable = available.get(content_hash)
+            order.append(reusable.popleft() if reusable else None)
+        kept = {rId for rId in order if rId is not None}
+
+        # Drop slides nobody reuses, then render the missing ones (appended at the end)
+        by_rId = {slide_id.rId: slide_id for slide_id in slide_ids}
+        removed = 0
+        for rId in deck.rIds:
+            if rId not in kept:
+                slide_ids.remove(by_rId.pop(rId))
+                prs.part.drop_rel(rId)
+                removed += 1
+
+        changed = [index for index, rId in enumerate(order) if rId is None]
+        pending = submit_charts(master, ((index, slides[index]) for index in changed), self.charts)
+        for index in changed:
+            build_slide(prs, master, slides[index], index, pending)
+            order[index] = slide_ids[-1].rId
+            by_rId[order[index]] = slide_ids[-1]
+
+        # Splice into the new order. New slides may have been given names still held by
+        # surviving slides; renumbering settles every name before anything is saved.
+        for slide_id in list(slide_ids):
+            slide_ids.remove(slide_id)
+        for rId in order:
+            slide_ids.append(by_rId[rId])
+        renumber_slide_parts(prs, order)
+
+        deck.hashes = new_hashes
+        deck.rIds = order
+        deck.version += 1
+        self.incremental_renders += 1
+        self.slides_rendered += len(changed)
+        self.slides_reused += len(slides) - len(changed)
+        return RenderDiff(full=False, rendered=len(changed), reused=len(slides) - len(changed), removed=removed)
+
+    def stats(self) -> dict:
+        return {
+            "decks": len(self._decks),
+            "full_renders": self.full_renders,
+            "incremental_renders": self.incremental_renders,
+            "slides_rendered": self.slides_rendered,
+            "slides_reused": self.slides_reused
+        }
@@ -0,0 +1,8 @@
+from .registry import (
+    LayoutInfo,
+    PlaceholderInfo,
+    TemplateNotFound,
+    TemplateRegistry,
+    ThemeMaster,
+    parse_template
+)
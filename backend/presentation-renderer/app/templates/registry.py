@@ -0,0 +1,371 @@
+"""
+Preparsed theme template registry.
+
+Each theme .pptx is read and parsed once per process into an immutable
+ThemeMaster: the template bytes (slides stripped, re-packed uncompressed so
+opening a copy skips inflate), the layouts, placeholders, fonts and colour
+scheme the renderers need, and a prototype slide per layout with its
+placeholders already cloned. Every render gets its own Presentation opened
+from those bytes, so renders never share mutable state. Template
+files are re-checked at most every `reload_interval` seconds and reparsed
+when their mtime or size changes.
+"""
+from dataclasses import dataclass
+from io import BytesIO
+from types import MappingProxyType
+from typing import Dict, Mapping, Optional, Tuple
+import logging
+import os
+import threading
+import time
+import zipfile
+
+from lxml import etree
+import pptx
+from pptx import Presentation
+from pptx.opc.constants import CONTENT_TYPE as CT, RELATIONSHIP_TYPE as RT
+from pptx.opc.packuri import PackURI
+from pptx.oxml import parse_xml
+from pptx.parts.slide import NotesSlidePart, SlidePart
+
+from ..core.config import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TEMPLATE_PATH = os.path.join(os.path.dirname(pptx.__file__), "templates", "default.pptx")
+
+_A = "{http://schemas.openxmlformats.org/drawingml/2006/main}"
+
+
+class TemplateNotFound(Exception):
+    """Raised when no template file exists for a theme"""
+
+
+@dataclass(frozen=True)
+class PlaceholderInfo:
+    idx: int
+    type: str
+    name: str
+    left: Optional[int] = None   # EMU, inherited from the master when the layout doesn't set it
+    top: Optional[int] = None
+    width: Optional[int] = None
+    height: Optional[int] = None
+
+
+@dataclass(frozen=True)
+class LayoutInfo:
+    index: int
+    name: str
+    placeholders: Tuple[PlaceholderInfo, ...]
+
+    def placeholder_idx(self, *types: str) -> Optional[int]:
+        """idx of the first placeholder of one of the given types (e.g. "TITLE", "BODY")"""
+        for placeholder in self.placeholders:
+            if placeholder.type in types:
+                return placeholder.idx
+        return None
+
+    def placeholders_of(self, *types: str) -> Tuple[PlaceholderInfo, ...]:
+        return tuple(placeholder for placeholder in self.placeholders if placeholder.type in types)
+
+
+@dataclass(frozen=True)
+class ThemeMaster:
+    """Immutable parsed template; use `new_presentation()` to get a renderable copy"""
+    theme: str
+    path: str
+    mtime: float
+    size: int
+    data: bytes
+    layouts: Tuple[LayoutInfo, ...]
+    layouts_by_name: Mapping[str, LayoutInfo]
+    fonts: Mapping[str, str]          # "major"/"minor" -> latin typeface
+    colors: Mapping[str, str]         # "dk1", "accent1", ... -> RRGGBB
+    slide_width: int
+    slide_height: int
+    parse_seconds: float
+    # Serialized <p:sld> per layout index; None where the layout needs python-pptx's own cloning
+    slide_prototypes: Tuple[Optional[bytes], ...] = ()
+    notes_prototype: Optional[bytes] = None
+
+    def new_presentation(self):
+        return Presentation(BytesIO(self.data))
+
+    def add_slide(self, prs, layout: LayoutInfo):
+        """
+        Append a slide using `layout` to a presentation from `new_presentation()`.
+
+        Equivalent to `prs.slides.add_slide()`, but parses the layout's
+        prototype instead of cloning placeholders through XPath per slide.
+        """
+        prototype = self.slide_prototypes[layout.index] if layout.index < len(self.slide_prototypes) else None
+        slide_layout = prs.slide_layouts[layout.index]
+        if prototype is None:
+            return prs.slides.add_slide(slide_layout)
+
+        slide_ids = prs.slides._sldIdLst
+        partname = PackURI("/ppt/slides/slide%d.xml" % (len(slide_ids) + 1))
+        slide_part = SlidePart(partname, CT.PML_SLIDE, prs.part.package, parse_xml(prototype))
+        slide_part.relate_to(slide_layout.part, RT.SLIDE_LAYOUT)
+        slide_ids.add_sldId(prs.part.relate_to(slide_part, RT.SLIDE))
+        return slide_part.slide
+
+    def notes_slide(self, prs, slide):
+        """The slide's notes slide, created from the notes prototype if it has none yet"""
+        if self.notes_prototype is None or slide.has_notes_slide:
+            return slide.notes_slide
+
+        # Named after the slide, which avoids python-pptx walking every part for a free name
+        partname = PackURI(slide.part.partname.replace("/slides/slide", "/notesSlides/notesSlide"))
+        notes_part = NotesSlidePart(partname, CT.PML_NOTES_SLIDE, prs.part.package, parse_xml(self.notes_prototype))
+        notes_part.relate_to(prs.part.notes_master_part, RT.NOTES_MASTER)
+        notes_part.relate_to(slide.part, RT.SLIDE)
+        slide.part.relate_to(notes_part, RT.NOTES_SLIDE)
+        return notes_part.notes_slide
+
+    def layout(self, name: str, default: Optional[str] = None) -> LayoutInfo:
+        layout = self.layouts_by_name.get(name)
+        if layout is None and default is not None:
+            layout = self.layouts_by_name.get(default)
+        if layout is None:
+            raise KeyError(f"Theme {self.theme} has no layout {name!r}")
+        return layout
+
+
+def _strip_slides(prs):
+    """Drop any sample slides shipped in the template"""
+    slide_ids = prs.slides._sldIdLst
+    for slide_id in list(slide_ids):
+        prs.part.drop_rel(slide_id.rId)
+        slide_ids.remove(slide_id)
+
+
+def _repack_stored(data: bytes) -> bytes:
+    """Re-write the package without compression; opening a copy then skips inflate"""
+    source = zipfile.ZipFile(BytesIO(data))
+    output = BytesIO()
+    with zipfile.ZipFile(output, "w", zipfile.ZIP_STORED) as target:
+        for info in source.infolist():
+            target.writestr(info.filename, source.read(info.filename))
+    return output.getvalue()
+
+
+def _placeholder_type(value) -> str:
+    """PP_PLACEHOLDER member name, e.g. "TITLE" (python-pptx 0.6 EnumValue or 1.x Enum)"""
+    if value is None:
+        return ""
+    return getattr(value, "name", None) or getattr(value, "_member_name", str(value))
+
+
+def _prototype(element) -> Optional[bytes]:
+    xml = etree.tostring(element)
+    # Placeholders that reference images or other parts can't be copied without their rels
+    if b"r:id=" in xml or b"r:embed=" in xml or b"r:link=" in xml:
+        return None
+    return xml
+
+
+def _build_prototypes(data: bytes) -> Tuple[Tuple[Optional[bytes], ...], Optional[bytes]]:
+    scratch = Presentation(BytesIO(data))
+    slides = [scratch.slides.add_slide(layout) for layout in scratch.slide_layouts]
+    notes = _prototype(slides[0].notes_slide._element) if slides else None
+    return tuple(_prototype(slide._element) for slide in slides), notes
+
+
+def _theme_elements(prs) -> Tuple[Dict[str, str], Dict[str, str]]:
+    fonts: Dict[str, str] = {}
+    colors: Dict[str, str] = {}
+    try:
+        theme_part = prs.slide_master.part.part_related_by(RT.THEME)
+    except KeyError:
+        return fonts, colors
+
+    root = etree.fromstring(theme_part.blob)
+    scheme = root.find(f"{_A}themeElements/{_A}clrScheme")
+    if scheme is not None:
+        for slot in scheme:
+            color = slot[0] if len(slot) else None
+            if color is None:
+                continue
+            value = color.get("lastClr") if color.tag == f"{_A}sysClr" else color.get("val")
+            if value:
+                colors[etree.QName(slot).localname] = value.upper()
+    font_scheme = root.find(f"{_A}themeElements/{_A}fontScheme")
+    if font_scheme is not None:
+        for kind in ("major", "minor"):
+            latin = font_scheme.find(f"{_A}{kind}Font/{_A}latin")
+            if latin is not None and latin.get("typeface"):
+                fonts[kind] = latin.get("typeface")
+    return fonts, colors
+
+
+def parse_template(theme: str, path: str) -> ThemeMaster:
+    """Read and parse a template file into a ThemeMaster"""
+    started = time.perf_counter()
+    stat = os.stat(path)
+    with open(path, "rb") as f:
+        raw = f.read()
+
+    prs = Presentation(BytesIO(raw))
+    _strip_slides(prs)
+    layouts = tuple(
+        LayoutInfo(
+            index=index,
+            name=layout.name,
+            placeholders=tuple(
+                PlaceholderInfo(
+                    idx=placeholder.placeholder_format.idx,
+                    type=_placeholder_type(placeholder.placeholder_format.type),
+                    name=placeholder.name,
+                    left=placeholder.left,
+                    top=placeholder.top,
+                    width=placeholder.width,
+                    height=placeholder.height
+                )
+                for placeholder in layout.placeholders
+            )
+        )
+        for index, layout in enumerate(prs.slide_layouts)
+    )
+    fonts, colors = _theme_elements(prs)
+    prs.notes_master  # creates the default notes master if the template has none
+
+    buffer = BytesIO()
+    prs.save(buffer)
+    data = _repack_stored(buffer.getvalue())
+    slide_prototypes, notes_prototype = _build_prototypes(data)
+
+    return ThemeMaster(
+        theme=theme,
+        path=path,
+        mtime=stat.st_mtime,
+        size=stat.st_size,
+        data=data,
+        layouts=layouts,
+        # First layout wins when a template reuses a name
+        layouts_by_name=MappingProxyType({layout.name: layout for layout in reversed(layouts)}),
+        fonts=MappingProxyType(fonts),
+        colors=MappingProxyType(colors),
+        slide_width=prs.slide_width,
+        slide_height=prs.slide_height,
+        parse_seconds=time.perf_counter() - started,
+        slide_prototypes=slide_prototypes,
+        notes_prototype=notes_prototype
+    )
+
+
+class TemplateRegistry:
+    """
+    Process-wide cache of parsed theme masters, keyed by theme name.
+
+    Themes resolve to `<directory>/<theme>.pptx`; the default theme falls back
+    to python-pptx's built-in template when no file exists for it.
+    """
+
+    def __init__(
+        self,
+        directory: Optional[str] = None,
+        default_theme: Optional[str] = None,
+        reload_interval: Optional[float] = None
+    ):
+        self.directory = directory or settings.templates_directory
+        self.default_theme = default_theme or settings.default_theme
+        self.reload_interval = settings.template_reload_interval if reload_interval is None else reload_interval
+        self._masters: Dict[str, ThemeMaster] = {}
+        self._checked_at: Dict[str, float] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+        # Metrics
+        self.hits = 0
+        self.loads = 0
+        self.reloads = 0
+
+    def template_path(self, theme: str) -> str:
+        path = os.path.join(self.directory, f"{theme}.pptx")
+        if not os.path.isfile(path):
+            if theme == self.default_theme:
+                return DEFAULT_TEMPLATE_PATH
+            raise TemplateNotFound(f"No template for theme {theme!r} in {self.directory}")
+        return path
+
+    def _theme_lock(self, theme: str) -> threading.Lock:
+        with self._lock:
+            return self._locks.setdefault(theme, threading.Lock())
+
+    def _is_current(self, master: ThemeMaster) -> bool:
+        try:
+            stat = os.stat(master.path)
+        except OSError:
+            # Keep serving the last good master if the file is briefly missing mid-deploy
+            return True
+        return stat.st_mtime == master.mtime and stat.st_size == master.size
+
+    def get(self, theme: Optional[str] = None) -> ThemeMaster:
+        """Parsed master for a theme, parsing or reparsing it if needed"""
+        theme = theme or self.default_theme
+        master = self._masters.get(theme)
+        now = time.monotonic()
+        if master is not None and now - self._checked_at.get(theme, 0.0) < self.reload_interval:
+            self.hits += 1
+            return master
+
+        with self._theme_lock(theme):
+            master = self._masters.get(theme)
+            try:
+                path = self.template_path(theme)
+            except TemplateNotFound:
+                if master is None:
+                    raise
+                # Keep serving the last good master if the file is briefly missing mid-deploy
+                path = master.path
+            if master is not None and path == master.path and self._is_current(master):
+                self._checked_at[theme] = time.monotonic()
+                self.hits += 1
+                return master
+
+            try:
+                new_master = parse_template(theme, path)
+            except Exception as e:
+                if master is None:
+                    raise
+                # A half-written file shouldn't take rendering down; retry on the next check
+                logger.error(f"Failed to reload theme {theme} from {path}: {e}")
+                self._checked_at[theme] = time.monotonic()
+                return master
+
+            if master is None:
+                self.loads += 1
+                logger.info(f"Loaded theme {theme} from {path} in {new_master.parse_seconds * 1000:.1f}ms")
+            else:
+                self.reloads += 1
+                logger.info(f"Reloaded theme {theme} from {path}")
+            self._masters[theme] = new_master
+            self._checked_at[theme] = time.monotonic()
+            return new_master
+
+    def new_presentation(self, theme: Optional[str] = None):
+        """(master, presentation) pair; the presentation is a private copy for one render"""
+        master = self.get(theme)
+        return master, master.new_presentation()
+
+    def clear(self):
+        with self._lock:
+            self._masters.clear()
+            self._checked_at.clear()
+
+    def stats(self) -> dict:
+        return {
+            "themes": {
+                theme: {
+                    "path": master.path,
+                    "layouts": len(master.layouts),
+                    "bytes": len(master.data),
+                    "parse_ms": round(master.parse_seconds * 1000, 2)
+                }
+                for theme, master in self._masters.items()
+            },
+            "hits": self.hits,
+            "loads": self.loads,
+            "reloads": self.reloads
+        }
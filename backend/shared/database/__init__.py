@@ -0,0 +1 @@
+from .progress import TERMINAL_STATUSES, ProgressReporter
@@ -0,0 +1,272 @@
+"""
+Write-behind progress reporting for tasks.processing_tasks.
+
+Workers report progress as often as they like. The latest state of every
+task goes to Redis straight away for live reads, and to Postgres in
+batches: one multi-row UPDATE ... FROM (VALUES ...) per flush, so a
+hundred tasks moving from 41% to 42% cost one statement rather than a
+hundred, and a task that reports ten times between flushes is written once.
+Status changes wake the flusher early, and terminal states are written
+before report() returns, so a job is never acknowledged ahead of its
+final row.
+"""
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+import asyncio
+import json
+import logging
+import time
+
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = frozenset({"completed", "failed", "cancelled"})
+
+_FIELDS = ("status", "progress", "error_message", "result_data")
+
+# Column types for the VALUES list, which has no table to infer them from
+_VALUE_TYPES = (
+    ("id", "uuid"),
+    ("status", "varchar"),
+    ("progress", "integer"),
+    ("error_message", "text"),
+    ("result_data", "jsonb"),
+    ("reported_at", "timestamptz")
+)
+
+_TERMINAL_SQL = ", ".join(f"'{status}'" for status in sorted(TERMINAL_STATUSES))
+
+# Rows whose values would not change are skipped, which also spares the updated_at
+# trigger. A late non-terminal report never overwrites a finished task.
+_UPDATE_SQL = f"""
+UPDATE tasks.processing_tasks AS t SET
+    status = COALESCE(v.status, t.status),
+    progress = COALESCE(v.progress, t.progress),
+    error_message = COALESCE(v.error_message, t.error_message),
+    result_data = COALESCE(v.result_data, t.result_data),
+    started_at = CASE WHEN t.started_at IS NULL AND v.status = 'processing' THEN v.reported_at ELSE t.started_at END,
+    completed_at = CASE WHEN v.status IN ({_TERMINAL_SQL}) THEN v.reported_at ELSE t.completed_at END
+FROM (VALUES {{rows}}) AS v({", ".join(name for name, _ in _VALUE_TYPES)})
+WHERE t.id = v.id
+  AND (t.status NOT IN ({_TERMINAL_SQL}) OR v.status IN ({_TERMINAL_SQL}))
+  AND (
+    v.status IS NOT NULL AND v.status IS DISTINCT FROM t.status
+    OR v.progress IS NOT NULL AND v.progress IS DISTINCT FROM t.progress
+    OR v.error_message IS NOT NULL
+    OR v.result_data IS NOT NULL
+  )
+"""
+
+
+@lru_cache(maxsize=64)
+def update_statement(count: int):
+    """The batched UPDATE for `count` rows; parameters are `{column}_{row}`"""
+    rows = ", ".join(
+        "(" + ", ".join(f"CAST(:{name}_{row} AS {sql_type})" for name, sql_type in _VALUE_TYPES) + ")"
+        for row in range(count)
+    )
+    return text(_UPDATE_SQL.format(rows=rows))
+
+
+class ProgressReporter:
+    """
+    Coalescing write-behind buffer for task progress and status.
+
+    `engine` is a SQLAlchemy AsyncEngine and `redis` an asyncio client
+    created with decode_responses=True. Live state is kept in the hash
+    `{key_prefix}:{task_id}` for `redis_ttl` seconds after the last report.
+    With `channel` set, each report is also published there for the
+    gateway's real-time task streams.
+    """
+
+    def __init__(
+        self,
+        engine,
+        redis,
+        flush_interval: float = 1.0,
+        max_batch: int = 500,
+        key_prefix: str = "task:progress",
+        redis_ttl: int = 3600,
+        channel: Optional[str] = None
+    ):
+        self.engine = engine
+        self.redis = redis
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.key_prefix = key_prefix
+        self.redis_ttl = redis_ttl
+        self.channel = channel
+
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._statuses: Dict[str, str] = {}  # last status reported per task in flight
+        self._flush_lock = asyncio.Lock()
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+        # Metrics
+        self.reports = 0
+        self.flushes = 0
+        self.statements = 0
+        self.rows_flushed = 0
+        self.flush_errors = 0
+        self.redis_errors = 0
+        self.last_flush_ms = 0.0
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._flush_loop())
+
+    async def shutdown(self):
+        """Stop the flusher and write whatever is still buffered"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    async def report(
+        self,
+        task_id: str,
+        progress: Optional[int] = None,
+        status: Optional[str] = None,
+        error: Optional[str] = None,
+        result: Optional[dict] = None
+    ):
+        """Record a task's latest progress; returns once a terminal status is in Postgres"""
+        self.reports += 1
+        now = datetime.now(timezone.utc)
+        update = {"reported_at": now}
+        if status is not None:
+            update["status"] = status
+        if progress is not None:
+            update["progress"] = max(0, min(100, int(progress)))
+        if error is not None:
+            update["error_message"] = error
+        if result is not None:
+            update["result_data"] = result
+
+        terminal = status in TERMINAL_STATUSES
+        transition = status is not None and (terminal or self._statuses.get(task_id) != status)
+        await self._publish(task_id, update, transition)
+
+        pending = self._pending.setdefault(task_id, {})
+        pending.update(update)
+
+        if terminal:
+            self._statuses.pop(task_id, None)
+            await self.flush()
+        elif transition:
+            self._statuses[task_id] = status
+            self._wakeup.set()
+
+    async def _publish(self, task_id: str, update: Dict[str, Any], transition: bool):
+        fields = {"updated_at": update["reported_at"].isoformat()}
+        for name in _FIELDS:
+            if name in update:
+                value = update[name]
+                fields[name] = json.dumps(value) if name == "result_data" else value
+        key = f"{self.key_prefix}:{task_id}"
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                pipe.hset(key, mapping=fields)
+                pipe.expire(key, self.redis_ttl)
+                if self.channel:
+                    # Plain progress may be coalesced by slow subscribers; status changes never are
+                    event = {
+                        "event": "task_status" if transition else "task_progress",
+                        "task_id": task_id,
+                        **{name: update[name] for name in ("status", "progress", "error_message") if name in update},
+                        "timestamp": fields["updated_at"]
+                    }
+                    pipe.publish(self.channel, json.dumps(event))
+                await pipe.execute()
+        except Exception as e:
+            # Live reads go stale, but Postgres still gets the update
+            self.redis_errors += 1
+            logger.warning(f"Publishing progress for task {task_id} failed: {e}")
+
+    async def get(self, task_id: str) -> Optional[Dict[str, Any]]:
+        """Live state of a task from Redis, or None if it hasn't reported recently"""
+        fields = await self.redis.hgetall(f"{self.key_prefix}:{task_id}")
+        if not fields:
+            return None
+        if "progress" in fields:
+            fields["progress"] = int(fields["progress"])
+        if "result_data" in fields:
+            fields["result_data"] = json.loads(fields["result_data"])
+        return fields
+
+    # Flushing
+
+    async def _flush_loop(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Progress flush failed: {e}")
+
+    async def flush(self):
+        """Write every buffered update to Postgres, max_batch rows per statement"""
+        # One flush at a time, so an older batch can never land after a newer one
+        async with self._flush_lock:
+            if not self._pending:
+                return
+            batch, self._pending = self._pending, {}
+            started = time.perf_counter()
+            items = list(batch.items())
+            try:
+                async with self.engine.begin() as conn:
+                    for start in range(0, len(items), self.max_batch):
+                        chunk = items[start:start + self.max_batch]
+                        await conn.execute(update_statement(len(chunk)), self._parameters(chunk))
+                        self.statements += 1
+            except Exception:
+                self.flush_errors += 1
+                # Put the batch back under anything reported since, and retry on the next flush
+                for task_id, update in batch.items():
+                    newer = self._pending.get(task_id)
+                    self._pending[task_id] = {**update, **newer} if newer else update
+                raise
+            self.flushes += 1
+            self.rows_flushed += len(items)
+            self.last_flush_ms = (time.perf_counter() - started) * 1000
+
+    @staticmethod
+    def _parameters(chunk: List) -> Dict[str, Any]:
+        parameters = {}
+        for row, (task_id, update) in enumerate(chunk):
+            result = update.get("result_data")
+            parameters.update({
+                f"id_{row}": task_id,
+                f"status_{row}": update.get("status"),
+                f"progress_{row}": update.get("progress"),
+                f"error_message_{row}": update.get("error_message"),
+                f"result_data_{row}": json.dumps(result) if result is not None else None,
+                f"reported_at_{row}": update["reported_at"]
+            })
+        return parameters
+
+    def stats(self) -> dict:
+        return {
+            "pending": len(self._pending),
+            "reports": self.reports,
+            "flushes": self.flushes,
+            "statements": self.statements,
+            "rows_flushed": self.rows_flushed,
+            "coalescing_ratio": round(self.reports / self.rows_flushed, 2) if self.rows_flushed else None,
+            "flush_errors": self.flush_errors,
+            "redis_errors": self.redis_errors,
+            "last_flush_ms": round(self.last_flush_ms, 2)
+        }
@@ -0,0 +1,3 @@
+from .queue import Job, JobQueue, Priority, QueueFull
+from .tracing import JobTrace, JobTraceLogFilter, current_job_trace, inject_job_trace_headers
+from .worker import JobWorker
@@ -0,0 +1,326 @@
+"""
+Durable job queue on Redis Streams.
+
+Each queue is one stream per priority plus a dead-letter stream, read by a
+single consumer group. A job stays in the group's pending list from the
+moment a worker reads it until the worker acknowledges it. If the worker
+dies, another one claims the job once it has been idle for longer than the
+visibility timeout. Acknowledged entries are deleted, so a stream's length
+is its backlog plus the jobs in flight; enqueue refuses jobs beyond
+`max_length` rather than letting the backlog grow without bound.
+"""
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+import json
+import time
+import uuid
+
+from redis.exceptions import ResponseError
+
+from .tracing import job_trace_ids
+
+# Admits the job only while the backlog over all priorities is under the limit
+# KEYS: the priority streams, target stream last; ARGV: max length, then field/value pairs
+ENQUEUE_SCRIPT = """
+local backlog = 0
+for i = 1, #KEYS - 1 do
+    backlog = backlog + redis.call('XLEN', KEYS[i])
+end
+if backlog >= tonumber(ARGV[1]) then
+    return false
+end
+return redis.call('XADD', KEYS[#KEYS], '*', unpack(ARGV, 2))
+"""
+
+
+class Priority(IntEnum):
+    HIGH = 0
+    NORMAL = 1
+    LOW = 2
+
+
+class QueueFull(Exception):
+    """Raised when a queue's backlog is at max_length and a job is not admitted"""
+
+
+@dataclass
+class Job:
+    id: str
+    type: str
+    payload: Dict[str, Any]
+    priority: Priority = Priority.NORMAL
+    task_id: Optional[str] = None      # tasks.processing_tasks row the job advances
+    request_id: Optional[str] = None   # X-Request-ID of the request that enqueued it
+    traceparent: Optional[str] = None  # ...and its W3C traceparent
+    attempt: int = 0                   # failed runs so far
+    enqueued_at: float = 0.0           # epoch seconds
+    message_id: Optional[str] = field(default=None, repr=False)
+    deliveries: int = 1                # times the current entry was handed to a worker
+
+    @property
+    def attempts(self) -> int:
+        """Runs started so far, including this one and any lost with a crashed worker"""
+        return self.attempt + self.deliveries
+
+    def to_fields(self) -> Dict[str, str]:
+        fields = {
+            "id": self.id,
+            "type": self.type,
+            "payload": json.dumps(self.payload),
+            "attempt": str(self.attempt),
+            "enqueued_at": repr(self.enqueued_at)
+        }
+        if self.task_id:
+            fields["task_id"] = self.task_id
+        if self.request_id:
+            fields["request_id"] = self.request_id
+        if self.traceparent:
+            fields["traceparent"] = self.traceparent
+        return fields
+
+    @classmethod
+    def from_entry(cls, message_id: str, fields: Dict[str, str], priority: Priority, deliveries: int = 1) -> "Job":
+        return cls(
+            id=fields["id"],
+            type=fields["type"],
+            payload=json.loads(fields["payload"]),
+            priority=priority,
+            task_id=fields.get("task_id"),
+            request_id=fields.get("request_id"),
+            traceparent=fields.get("traceparent"),
+            attempt=int(fields.get("attempt", 0)),
+            enqueued_at=float(fields.get("enqueued_at", 0)),
+            message_id=message_id,
+            deliveries=deliveries
+        )
+
+
+class JobQueue:
+    """
+    Producer and low-level consumer operations for one queue.
+
+    `redis` must be an asyncio client created with decode_responses=True.
+    JobWorker drives the consumer side; producers only need enqueue().
+
+    `trace_context` returns the (request_id, traceparent) of the work in
+    progress, or None; enqueue() stamps them on jobs whose caller passes
+    neither. The default continues the trace of the job being run, so jobs
+    enqueued by a handler join it. A service enqueueing while it handles
+    requests passes its own, e.g. in the gateway:
+
+        lambda: (trace.request_id, trace.traceparent) if (trace := current_trace()) else None
+    """
+
+    def __init__(
+        self,
+        redis,
+        name: str,
+        group: str = "workers",
+        max_length: int = 10000,
+        visibility_timeout: float = 60.0,
+        max_attempts: int = 5,
+        dead_letter_max_length: int = 10000,
+        key_prefix: str = "jobs",
+        trace_context: Callable[[], Optional[Tuple[str, str]]] = job_trace_ids
+    ):
+        self.redis = redis
+        self.name = name
+        self.group = group
+        self.max_length = max_length
+        self.visibility_timeout = visibility_timeout
+        self.max_attempts = max_attempts
+        self.dead_letter_max_length = dead_letter_max_length
+        self.trace_context = trace_context
+        # The hash tag keeps a queue's streams in one cluster slot for the scripts and transactions
+        self.streams = {priority: f"{key_prefix}:{{{name}}}:{priority.name.lower()}" for priority in Priority}
+        self.dead_letter_stream = f"{key_prefix}:{{{name}}}:dead"
+        self._priorities = {stream: priority for priority, stream in self.streams.items()}
+        self._enqueue = redis.register_script(ENQUEUE_SCRIPT)
+
+    async def setup(self):
+        """Create the streams and consumer group; safe to call from every worker"""
+        for stream in self.streams.values():
+            try:
+                await self.redis.xgroup_create(stream, self.group, id="0", mkstream=True)
+            except ResponseError as e:
+                if "BUSYGROUP" not in str(e):
+                    raise
+        # Loaded up front so the first enqueue doesn't pay for a NOSCRIPT round trip
+        await self.redis.script_load(ENQUEUE_SCRIPT)
+
+    # Producer
+
+    async def enqueue(
+        self,
+        job_type: str,
+        payload: Dict[str, Any],
+        priority: Priority = Priority.NORMAL,
+        task_id: Optional[str] = None,
+        job_id: Optional[str] = None,
+        request_id: Optional[str] = None,
+        traceparent: Optional[str] = None
+    ) -> str:
+        """
+        Add a job and return its id; raises QueueFull when the backlog is at max_length.
+
+        request_id and traceparent default to those from `trace_context`, so
+        the worker's logs and calls join the trace of the enqueuing request.
+        """
+        if request_id is None and traceparent is None:
+            request_id, traceparent = self.trace_context() or (None, None)
+        job = Job(
+            id=job_id or str(uuid.uuid4()),
+            type=job_type,
+            payload=payload,
+            priority=Priority(priority),
+            task_id=task_id,
+            request_id=request_id,
+            traceparent=traceparent,
+            enqueued_at=time.time()
+        )
+        await self._add(job)
+        return job.id
+
+    async def _add(self, job: Job):
+        args = [self.max_length]
+        for key, value in job.to_fields().items():
+            args += [key, value]
+        message_id = await self._enqueue(keys=[*self.streams.values(), self.streams[job.priority]], args=args)
+        if message_id is None:
+            raise QueueFull(f"Queue {self.name} has {self.max_length} jobs waiting")
+
+    # Consumer
+
+    def _jobs(self, response, deliveries: int = 1) -> List[Job]:
+        jobs = []
+        for stream, entries in response or []:
+            for message_id, fields in entries:
+                if fields:  # entries deleted while still pending come back empty
+                    jobs.append(Job.from_entry(message_id, fields, self._priorities[stream], deliveries))
+        return jobs
+
+    async def read(self, consumer: str, count: int, block: Optional[float] = None) -> List[Job]:
+        """
+        Up to `count` new jobs, highest priority first.
+
+        Streams are read in priority order until `count` jobs are found. If
+        all are empty, one blocking read waits up to `block` seconds on every
+        priority at once; it can return one job per priority.
+        """
+        jobs: List[Job] = []
+        for stream in self.streams.values():
+            response = await self.redis.xreadgroup(self.group, consumer, {stream: ">"}, count=count - len(jobs))
+            jobs += self._jobs(response)
+            if len(jobs) >= count:
+                return jobs
+        if jobs or not block:
+            return jobs
+        response = await self.redis.xreadgroup(
+            self.group, consumer, {stream: ">" for stream in self.streams.values()},
+            count=1, block=int(block * 1000)
+        )
+        return sorted(self._jobs(response), key=lambda job: job.priority)
+
+    async def ack(self, job: Job):
+        stream = self.streams[job.priority]
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.xack(stream, self.group, job.message_id)
+            pipe.xdel(stream, job.message_id)
+            await pipe.execute()
+
+    async def retry(self, job: Job, error: str) -> bool:
+        """Requeue a failed job, or dead-letter it once out of attempts; True if requeued"""
+        if job.attempts >= self.max_attempts:
+            await self.dead_letter(job, error)
+            return False
+        retry = Job(
+            id=job.id,
+            type=job.type,
+            payload=job.payload,
+            priority=job.priority,
+            task_id=job.task_id,
+            request_id=job.request_id,
+            traceparent=job.traceparent,
+            attempt=job.attempts,
+            enqueued_at=time.time()
+        )
+        stream = self.streams[job.priority]
+        # Requeue and acknowledge together: the job is never lost or doubled.
+        # A retry bypasses max_length, which only guards admission of new work.
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.xadd(stream, retry.to_fields())
+            pipe.xack(stream, self.group, job.message_id)
+            pipe.xdel(stream, job.message_id)
+            await pipe.execute()
+        return True
+
+    async def dead_letter(self, job: Job, error: str):
+        fields = job.to_fields()
+        fields.update({
+            "priority": job.priority.name.lower(),
+            "attempts": str(job.attempts),
+            "error": error[:2000],
+            "failed_at": repr(time.time())
+        })
+        stream = self.streams[job.priority]
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.xadd(self.dead_letter_stream, fields, maxlen=self.dead_letter_max_length, approximate=True)
+            pipe.xack(stream, self.group, job.message_id)
+            pipe.xdel(stream, job.message_id)
+            await pipe.execute()
+
+    async def extend(self, consumer: str, jobs: Iterable[Job]):
+        """Reset the idle time of jobs a worker still holds so no one reclaims them"""
+        by_stream: Dict[str, List[str]] = {}
+        for job in jobs:
+            by_stream.setdefault(self.streams[job.priority], []).append(job.message_id)
+        if not by_stream:
+            return
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for stream, message_ids in by_stream.items():
+                pipe.xclaim(stream, self.group, consumer, 0, message_ids, justid=True)
+            await pipe.execute()
+
+    async def reclaim(self, consumer: str, count: int) -> List[Job]:
+        """
+        Claim up to `count` jobs whose worker has held them past the visibility timeout.
+
+        Jobs that have used up their attempts are dead-lettered instead of
+        being returned.
+        """
+        min_idle = int(self.visibility_timeout * 1000)
+        jobs: List[Job] = []
+        for stream in self.streams.values():
+            if len(jobs) >= count:
+                break
+            pending = await self.redis.xpending_range(stream, self.group, min="-", max="+", count=count * 4)
+            stale = [entry for entry in pending if entry["time_since_delivered"] >= min_idle][:count - len(jobs)]
+            if not stale:
+                continue
+            deliveries = {entry["message_id"]: entry["times_delivered"] + 1 for entry in stale}
+            # min_idle makes the claim atomic: if another worker got there first, nothing comes back
+            claimed = await self.redis.xclaim(stream, self.group, consumer, min_idle, list(deliveries))
+            for job in self._jobs([(stream, claimed)]):
+                job.deliveries = deliveries[job.message_id]
+                if job.attempts > self.max_attempts:
+                    await self.dead_letter(job, "visibility timeout expired on every attempt")
+                else:
+                    jobs.append(job)
+        return jobs
+
+    # Introspection
+
+    async def lengths(self) -> Dict[str, int]:
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for stream in self.streams.values():
+                pipe.xlen(stream)
+            pipe.xlen(self.dead_letter_stream)
+            counts = await pipe.execute()
+        names = [priority.name.lower() for priority in Priority] + ["dead"]
+        return dict(zip(names, counts))
+
+    async def dead_letters(self, count: int = 100) -> List[Dict[str, str]]:
+        """Most recent dead-lettered jobs, newest first"""
+        entries = await self.redis.xrevrange(self.dead_letter_stream, count=count)
+        return [dict(fields, message_id=message_id) for message_id, fields in entries]
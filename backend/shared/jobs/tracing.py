@@ -0,0 +1,93 @@
+"""
+Request and trace IDs of the job being run.
+
+A job carries the X-Request-ID and traceparent of the request that enqueued
+it. JobWorker makes them current around the handler, so the filter and
+httpx hook below tag the handler's logs and outgoing calls the way the
+gateway's request tracing does. Jobs enqueued from inside a handler inherit
+them.
+"""
+from contextvars import ContextVar
+from typing import Optional, Tuple
+import logging
+import os
+import re
+
+# W3C Trace Context: version-trace_id-parent_id-flags, lowercase hex
+TRACEPARENT = re.compile(r"([0-9a-f]{2})-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})")
+INVALID_TRACE_ID = "0" * 32
+
+
+class JobTrace:
+    """
+    Identifiers of the job being run.
+
+    trace_id is the enqueuing request's; span_id identifies this run of the
+    job and becomes the parent of the calls the handler makes.
+    """
+
+    __slots__ = ("request_id", "trace_id", "span_id", "flags")
+
+    def __init__(self, request_id: str, trace_id: str, span_id: str, flags: str = "01"):
+        self.request_id = request_id
+        self.trace_id = trace_id
+        self.span_id = span_id
+        self.flags = flags
+
+    @classmethod
+    def for_job(cls, request_id: Optional[str], traceparent: Optional[str]) -> Optional["JobTrace"]:
+        """A new span in the job's trace, or None for a job enqueued outside any request"""
+        match = TRACEPARENT.fullmatch(traceparent) if traceparent else None
+        if match is not None and (match[1] == "ff" or match[2] == INVALID_TRACE_ID):
+            match = None
+        if match is None and not request_id:
+            return None
+        ids = os.urandom(24).hex()
+        trace_id, span_id, flags = ids[:32], ids[32:], "01"
+        if match is not None:
+            trace_id, flags = match[2], match[4]
+        return cls(request_id or trace_id, trace_id, span_id, flags)
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-{self.flags}"
+
+
+_current: ContextVar[Optional[JobTrace]] = ContextVar("job_trace", default=None)
+
+
+def current_job_trace() -> Optional[JobTrace]:
+    """The trace of the job this task is running, or None outside a job"""
+    return _current.get()
+
+
+def set_job_trace(trace: JobTrace):
+    """Make `trace` current; returns the token to pass to reset_job_trace"""
+    return _current.set(trace)
+
+
+def reset_job_trace(token):
+    _current.reset(token)
+
+
+def job_trace_ids() -> Optional[Tuple[str, str]]:
+    """(request_id, traceparent) of the current job: JobQueue's default trace_context"""
+    trace = _current.get()
+    return (trace.request_id, trace.traceparent) if trace is not None else None
+
+
+async def inject_job_trace_headers(request):
+    """httpx request hook: carry the current job's IDs to the service being called"""
+    trace = _current.get()
+    if trace is not None:
+        request.headers["X-Request-ID"] = trace.request_id
+        request.headers["traceparent"] = trace.traceparent
+
+
+class JobTraceLogFilter(logging.Filter):
+    """Adds the current job's request ID to log records as %(request_id)s ("-" outside a job)"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        trace = _current.get()
+        record.request_id = trace.request_id if trace is not None else "-"
+        return True
@@ -0,0 +1,204 @@
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, Optional
+import asyncio
+import logging
+import os
+import socket
+import time
+
+from .queue import Job, JobQueue
+from .tracing import JobTrace, reset_job_trace, set_job_trace
+
+logger = logging.getLogger(__name__)
+
+
+class JobWorker:
+    """
+    Runs jobs from one queue with at most `concurrency` in flight.
+
+    The worker only reads as many jobs as it has free slots. Everything
+    else stays in Redis, where other workers can take it and producers see
+    QueueFull once the backlog is at its limit. While jobs run, a heartbeat
+    keeps them from being reclaimed. Stale jobs left by dead workers are
+    claimed into free slots. A handler that raises has its job requeued
+    until max_attempts, then dead-lettered.
+
+    Each handler runs with the job's trace current (see tracing), so
+    JobTraceLogFilter and inject_job_trace_headers tag its logs and calls.
+    """
+
+    def __init__(
+        self,
+        queue: JobQueue,
+        handler: Callable[[Job], Awaitable[None]],
+        concurrency: int = 4,
+        consumer: Optional[str] = None,
+        block: float = 1.0,
+        heartbeat_interval: Optional[float] = None,
+        reclaim_interval: Optional[float] = None,
+        shutdown_grace: float = 30.0,
+        latency_samples: int = 1000
+    ):
+        self.queue = queue
+        self.handler = handler
+        self.concurrency = concurrency
+        self.consumer = consumer or f"{socket.gethostname()}-{os.getpid()}"
+        self.block = block
+        self.heartbeat_interval = heartbeat_interval or queue.visibility_timeout / 3
+        self.reclaim_interval = reclaim_interval or queue.visibility_timeout / 2
+        self.shutdown_grace = shutdown_grace
+
+        self._running: Dict[asyncio.Task, Job] = {}
+        self._backlog: Deque[Job] = deque()  # read or claimed, waiting for a slot
+        self._slot_freed = asyncio.Event()
+        self._tasks = []
+        self._stopping = False
+
+        # Metrics
+        self.started = 0
+        self.completed = 0
+        self.failed = 0
+        self.retried = 0
+        self.dead_lettered = 0
+        self.reclaimed = 0
+        self._start_latencies: Deque[float] = deque(maxlen=latency_samples)
+
+    async def start(self):
+        await self.queue.setup()
+        self._stopping = False
+        self._tasks = [
+            asyncio.create_task(self._read_loop()),
+            asyncio.create_task(self._heartbeat_loop()),
+            asyncio.create_task(self._reclaim_loop())
+        ]
+
+    async def shutdown(self):
+        """Stop reading, give running jobs shutdown_grace to finish, then cancel the rest"""
+        self._stopping = True
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+        if self._running:
+            done, pending = await asyncio.wait(list(self._running), timeout=self.shutdown_grace)
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+        # Jobs not started, or cancelled above, are still pending in Redis; another worker
+        # claims them after the visibility timeout
+        self._backlog.clear()
+
+    # Loops
+
+    def _free_slots(self) -> int:
+        return self.concurrency - len(self._running)
+
+    async def _read_loop(self):
+        while not self._stopping:
+            try:
+                while self._backlog and self._free_slots() > 0:
+                    self._start(self._backlog.popleft())
+                if self._free_slots() <= 0:
+                    self._slot_freed.clear()
+                    await self._slot_freed.wait()
+                    continue
+                jobs = await self.queue.read(self.consumer, self._free_slots(), block=self.block)
+                self._backlog.extend(jobs)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Reading queue {self.queue.name} failed: {e}")
+                await asyncio.sleep(1.0)
+
+    async def _heartbeat_loop(self):
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            try:
+                await self.queue.extend(self.consumer, [*self._running.values(), *self._backlog])
+            except Exception as e:
+                logger.error(f"Extending jobs on queue {self.queue.name} failed: {e}")
+
+    async def _reclaim_loop(self):
+        while True:
+            await asyncio.sleep(self.reclaim_interval)
+            free = self._free_slots() - len(self._backlog)
+            if free <= 0:
+                continue
+            try:
+                jobs = await self.queue.reclaim(self.consumer, free)
+            except Exception as e:
+                logger.error(f"Reclaiming jobs on queue {self.queue.name} failed: {e}")
+                continue
+            if jobs:
+                logger.warning(f"Reclaimed {len(jobs)} stale jobs on queue {self.queue.name}")
+                self.reclaimed += len(jobs)
+                self._backlog.extend(jobs)
+                self._slot_freed.set()
+
+    # Jobs
+
+    def _start(self, job: Job):
+        self.started += 1
+        if job.attempt == 0 and job.deliveries == 1:
+            self._start_latencies.append(time.time() - job.enqueued_at)
+        task = asyncio.create_task(self._run(job))
+        self._running[task] = job
+        task.add_done_callback(self._finished)
+
+    def _finished(self, task: asyncio.Task):
+        self._running.pop(task, None)
+        self._slot_freed.set()
+
+    async def _run(self, job: Job):
+        trace = JobTrace.for_job(job.request_id, job.traceparent)
+        token = set_job_trace(trace) if trace is not None else None
+        try:
+            await self._run_traced(job)
+        finally:
+            if token is not None:
+                reset_job_trace(token)
+
+    async def _run_traced(self, job: Job):
+        try:
+            await self.handler(job)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.failed += 1
+            request = f", request {job.request_id}" if job.request_id else ""
+            logger.warning(f"Job {job.id} ({job.type}{request}) failed on attempt {job.attempts}: {e}")
+            try:
+                if await self.queue.retry(job, f"{e.__class__.__name__}: {e}"):
+                    self.retried += 1
+                else:
+                    self.dead_lettered += 1
+                    logger.error(f"Job {job.id} ({job.type}) dead-lettered after {job.attempts} attempts")
+            except Exception as redis_error:
+                logger.error(f"Requeueing job {job.id} failed, it will be reclaimed: {redis_error}")
+            return
+
+        try:
+            await self.queue.ack(job)
+            self.completed += 1
+        except Exception as e:
+            # Not acknowledged: the job will run again after the visibility timeout
+            logger.error(f"Acknowledging job {job.id} failed: {e}")
+
+    def stats(self) -> dict:
+        latencies = sorted(self._start_latencies)
+        return {
+            "queue": self.queue.name,
+            "consumer": self.consumer,
+            "concurrency": self.concurrency,
+            "running": len(self._running),
+            "backlog": len(self._backlog),
+            "started": self.started,
+            "completed": self.completed,
+            "failed": self.failed,
+            "retried": self.retried,
+            "dead_lettered": self.dead_lettered,
+            "reclaimed": self.reclaimed,
+            "start_latency_p50_ms": round(latencies[len(latencies) // 2] * 1000, 2) if latencies else None,
+            "start_latency_p99_ms": round(latencies[int(len(latencies) * 0.99)] * 1000, 2) if latencies else None
+        }
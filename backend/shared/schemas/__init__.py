@@ -0,0 +1 @@
+from .serialization import Envelope, SerializationError, Serializer, dumps_json, loads_json
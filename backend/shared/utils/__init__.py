@@ -0,0 +1 @@
+from .chunking import Chunk, TokenChunker, chunk_pages, estimate_tokens
@@ -0,0 +1,24 @@
+-- Indexes for the gateway's presentation listing and search (/api/presentations).
+--
+-- Runs after 01 on a fresh database. Every statement is idempotent and
+-- builds CONCURRENTLY, so an existing database can be migrated in place
+-- without blocking writes:
+--
+--   psql -d ppt_generator -f infrastructure/postgres/init/02-presentation-listing-indexes.sql
+
+-- "My presentations", newest first: keyset pagination on (user_id, created_at, id)
+-- reads the next page straight off this index
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_presentations_user_created
+    ON presentations.presentations (user_id, created_at DESC, id DESC);
+
+-- Covered by the index above (same leading column, including for ON DELETE CASCADE from users)
+DROP INDEX CONCURRENTLY IF EXISTS presentations.idx_presentations_user_id;
+
+-- Title/description substring search within one user's decks. btree_gin puts user_id
+-- in the same GIN index as the trigrams, so the search never looks at other users' rows.
+-- The expression must match the one in the gateway's search query exactly.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_presentations_search_trgm
+    ON presentations.presentations
+    USING gin (user_id, (COALESCE(title, '') || ' ' || COALESCE(description, '')) gin_trgm_ops);
+
+ANALYZE presentations.presentations;
@@ -0,0 +1,244 @@
+"""
+Batch generation benchmark: the DAG scheduler with and without merging shared stages.
+
+Runs BatchScheduler with the gateway's real proxies and registry against
+document-processor, ai-generator and presentation-renderer stand-ins served
+by uvicorn on loopback ports in this event loop. Redis is fakeredis and
+tasks are kept in memory instead of Postgres.
+
+A batch of --documents files x --themes themes is planned twice:
+
+  merged    as POST /api/batches plans it: each document is processed and
+            summarized once and rendered in every theme, and documents
+            uploaded more than once (--duplicate-uploads) share everything
+            but the output
+  separate  every output runs its own processing -> generation -> rendering
+            chain, as generating the presentations one by one would
+
+Both run with the same per-stage concurrency. The script reports tasks run
+and service calls per stage and wall time, checks that no document content
+was processed or summarized more than once when merged, and prints the
+stage-bound lower limit (the busiest stage's work divided by its slots)
+to show how much of the remaining time is pipelining overhead.
+
+    python scripts/bench-batch.py
+    python scripts/bench-batch.py --documents 50 --themes 3 --generate-ms 400
+"""
+import argparse
+import asyncio
+import logging
+import os
+import socket
+import sys
+import tempfile
+import time
+import uuid
+from collections import Counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend", "gateway"))
+
+import fakeredis
+import httpx
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+from app.services.batch import STAGES, STAGE_SERVICES, BatchScheduler, TaskStore, plan_batch
+from app.services.proxy import ServiceConfig, ServiceProxies
+from app.services.registry import ServiceRegistry
+
+
+class MemoryTaskStore(TaskStore):
+    """Keeps task rows in a dict instead of tasks.processing_tasks"""
+
+    def __init__(self):
+        self.rows = {}
+
+    async def create(self, batch):
+        for node in batch.plan.nodes.values():
+            self.rows[node.task_id] = {"task_type": node.stage, "status": "pending"}
+
+    async def started(self, node):
+        self.rows[node.task_id]["status"] = "processing"
+
+    async def finished(self, node):
+        self.rows[node.task_id]["status"] = node.status
+
+    async def cancel(self, nodes):
+        for node in nodes:
+            self.rows[node.task_id]["status"] = "cancelled"
+
+
+def service_app(args, calls: Counter) -> Starlette:
+    """One downstream service; `calls` counts stage requests by (stage, content)"""
+    pptx_chunk = os.urandom(64 * 1024)
+
+    async def health(request: Request):
+        return JSONResponse({"status": "healthy"})
+
+    async def process(request: Request):
+        document = await request.json()
+        calls["document_processing", document["file_hash"]] += 1
+        await asyncio.sleep(args.process_ms / 1000)
+        return JSONResponse({"file_hash": document["file_hash"], "pages": 12, "text": "Extracted document text. " * 400})
+
+    async def generate(request: Request):
+        job = await request.json()
+        calls["ai_generation", job["document"]["file_hash"]] += 1
+        await asyncio.sleep(args.generate_ms / 1000)
+        slides = [{"title": f"Slide {index}", "bullets": ["Point"] * 5} for index in range(job["slide_count"])]
+        return JSONResponse({"file_hash": job["document"]["file_hash"], "slides": slides})
+
+    async def render(request: Request):
+        job = await request.json()
+        calls["presentation_rendering", (job["deck"]["file_hash"], job["theme"])] += 1
+        await asyncio.sleep(args.render_ms / 1000)
+
+        async def body():
+            for _ in range(max(1, len(job["deck"]["slides"]) * args.slide_kb // 64)):
+                yield pptx_chunk
+
+        return StreamingResponse(body(), media_type="application/vnd.openxmlformats-officedocument.presentationml.presentation")
+
+    return Starlette(routes=[
+        Route("/health", health),
+        Route("/process", process, methods=["POST"]),
+        Route("/generate", generate, methods=["POST"]),
+        Route("/render", render, methods=["POST"])
+    ])
+
+
+class StandInServer(uvicorn.Server):
+    def install_signal_handlers(self):
+        # Runs inside the benchmark's event loop, which keeps Ctrl-C
+        pass
+
+
+async def serve(app) -> StandInServer:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    # Accepted connections inherit it; without it small responses stall on delayed ACKs (~40 ms)
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    sock.bind(("127.0.0.1", 0))
+    server = StandInServer(uvicorn.Config(app, lifespan="off", log_level="warning", access_log=False))
+    server.url = f"http://127.0.0.1:{sock.getsockname()[1]}"
+    server.task = asyncio.create_task(server.serve(sockets=[sock]))
+    while not server.started:
+        await asyncio.sleep(0.01)
+    return server
+
+
+def documents(args) -> list:
+    """--documents uploads, the last --duplicate-uploads of them repeating earlier content"""
+    unique = args.documents - args.duplicate_uploads
+    return [
+        {
+            "file_id": str(uuid.uuid4()),
+            "file_hash": f"{index % unique:064x}",
+            "file_path": f"/uploads/{index % unique:064x}.pdf",
+            "mime_type": "application/pdf"
+        }
+        for index in range(args.documents)
+    ]
+
+
+async def run_batch(args, scheduler: BatchScheduler, plan, calls: Counter) -> dict:
+    calls.clear()
+    started = time.perf_counter()
+    batch = await scheduler.submit("00000000-0000-0000-0000-000000000001", plan)
+    await batch.supervisor
+    elapsed = time.perf_counter() - started
+    if batch.status != "completed":
+        failed = [node.error for node in plan.nodes.values() if node.error]
+        raise RuntimeError(f"batch {batch.status}: {failed[:3]}")
+
+    per_stage = {stage: sum(count for (call_stage, _), count in calls.items() if call_stage == stage) for stage in STAGES}
+    busiest = {stage: max((count for (call_stage, _), count in calls.items() if call_stage == stage), default=0) for stage in STAGES}
+    stage_ms = {"document_processing": args.process_ms, "ai_generation": args.generate_ms, "presentation_rendering": args.render_ms}
+    bound = max(per_stage[stage] * stage_ms[stage] / 1000 / scheduler.concurrency[stage] for stage in STAGES)
+    return {"tasks": len(plan.nodes), "calls": per_stage, "most_per_content": busiest, "seconds": elapsed, "bound": bound}
+
+
+async def run(args):
+    calls = Counter()
+    servers = {name: await serve(service_app(args, calls)) for name in STAGE_SERVICES.values()}
+    client = httpx.AsyncClient(timeout=httpx.Timeout(5.0))
+    registry = ServiceRegistry({name: [server.url] for name, server in servers.items()}, client)
+    registry.start()
+    proxies = ServiceProxies(
+        (ServiceConfig(name=name, max_connections=args.max_connections) for name in servers),
+        registry
+    )
+    redis_client = fakeredis.FakeAsyncRedis(decode_responses=True)
+
+    with tempfile.TemporaryDirectory() as output_directory:
+        scheduler = BatchScheduler(
+            proxies,
+            redis_client,
+            MemoryTaskStore(),
+            concurrency={
+                "document_processing": args.process_concurrency,
+                "ai_generation": args.generate_concurrency,
+                "presentation_rendering": args.render_concurrency
+            },
+            output_directory=output_directory
+        )
+        docs = documents(args)
+        themes = [f"theme-{index}" for index in range(args.themes)]
+        print(
+            f"{args.documents} documents ({args.duplicate_uploads} repeated uploads) x {args.themes} themes, "
+            f"stages {args.process_ms}/{args.generate_ms}/{args.render_ms} ms with "
+            f"{args.process_concurrency}/{args.generate_concurrency}/{args.render_concurrency} slots\n"
+        )
+        print(f"  {'plan':<10} {'tasks':>6} {'process':>8} {'generate':>9} {'render':>7} {'seconds':>8} {'bound s':>8}")
+        results = {}
+        try:
+            for label, merge in (("separate", False), ("merged", True)):
+                plan = plan_batch(docs, themes, args.slide_count, "Keep it short", merge=merge)
+                result = results[label] = await run_batch(args, scheduler, plan, calls)
+                calls_per_stage = result["calls"]
+                print(
+                    f"  {label:<10} {result['tasks']:>6} {calls_per_stage['document_processing']:>8} "
+                    f"{calls_per_stage['ai_generation']:>9} {calls_per_stage['presentation_rendering']:>7} "
+                    f"{result['seconds']:>8.2f} {result['bound']:>8.2f}"
+                )
+        finally:
+            for server in servers.values():
+                server.should_exit = True
+            await asyncio.gather(*(server.task for server in servers.values()))
+            await registry.stop()
+            await proxies.aclose()
+            await client.aclose()
+
+    merged = results["merged"]
+    print(f"\n  speedup from merging: {results['separate']['seconds'] / merged['seconds']:.2f}x")
+    repeated = {stage: count for stage, count in merged["most_per_content"].items() if count > 1}
+    print(f"  content processed or generated more than once when merged: {repeated or 'none'}")
+    if repeated:
+        sys.exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the batch scheduler with and without merged stages")
+    parser.add_argument("--documents", type=int, default=50)
+    parser.add_argument("--duplicate-uploads", type=int, default=5, help="documents whose content repeats an earlier one")
+    parser.add_argument("--themes", type=int, default=3)
+    parser.add_argument("--slide-count", type=int, default=10)
+    parser.add_argument("--slide-kb", type=int, default=64, help="rendered size per slide")
+    parser.add_argument("--process-ms", type=float, default=50)
+    parser.add_argument("--generate-ms", type=float, default=200)
+    parser.add_argument("--render-ms", type=float, default=100)
+    parser.add_argument("--process-concurrency", type=int, default=4)
+    parser.add_argument("--generate-concurrency", type=int, default=4)
+    parser.add_argument("--render-concurrency", type=int, default=8)
+    parser.add_argument("--max-connections", type=int, default=20, help="proxy pool size per service")
+    args = parser.parse_args()
+    if not 0 <= args.duplicate_uploads < args.documents:
+        parser.error("--duplicate-uploads must be below --documents")
+    logging.basicConfig(level=logging.WARNING)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
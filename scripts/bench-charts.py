@@ -0,0 +1,94 @@
+"""
+Chart rendering benchmark for the presentation renderer.
+
+Renders a deck's charts three ways: serially in-process with no cache,
+on the ChartRenderer worker pool from a cold cache, and again from the
+memoized outputs (a regenerated deck). Some charts repeat their dataset,
+as generated decks often do.
+
+    python scripts/bench-charts.py --charts 24 --points 5000 --format native
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend", "presentation-renderer"))
+
+from app.renderers.charts import ChartRenderer, chart_key, render_chart
+from app.templates.registry import TemplateRegistry
+
+TYPES = ("line", "bar", "area", "scatter", "pie")
+
+
+def make_charts(count, points, duplicate_every=4, seed=3):
+    rng = np.random.default_rng(seed)
+    charts = []
+    for n in range(count):
+        source = n - 1 if n % duplicate_every == duplicate_every - 1 else n
+        if source != n:
+            charts.append(charts[source])
+            continue
+        chart_type = TYPES[n % len(TYPES)]
+        walk = np.cumsum(rng.normal(size=(2, points)), axis=1).round(3)
+        if chart_type == "scatter":
+            chart = {"type": chart_type, "series": [{"name": "Sample", "x": walk[0].tolist(), "y": walk[1].tolist()}]}
+        else:
+            chart = {
+                "type": chart_type,
+                "title": f"Chart {n + 1}",
+                "labels": [f"P{i}" for i in range(points if chart_type != "pie" else 20)],
+                "series": [
+                    {"name": name, "values": values[:points if chart_type != "pie" else 20].tolist()}
+                    for name, values in zip(("Actual", "Forecast"), np.abs(walk))
+                ][:1 if chart_type == "pie" else 2]
+            }
+        charts.append(chart)
+    return charts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the chart worker pool and memoization")
+    parser.add_argument("--charts", type=int, default=24)
+    parser.add_argument("--points", type=int, default=5000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--format", choices=("native", "png"), default="native")
+    args = parser.parse_args()
+
+    master = TemplateRegistry(directory=os.path.dirname(__file__)).get("professional")
+    charts = make_charts(args.charts, args.points)
+    width, height = 8 * 914400, 4 * 914400
+    colors, fonts = dict(master.colors), dict(master.fonts)
+    print(f"{args.charts} {args.format} charts, {args.points} points per series, {args.workers} workers")
+
+    started = time.perf_counter()
+    for chart in charts:
+        key = chart_key(chart, colors, fonts, width, height, args.format)
+        render_chart(key, chart, args.format, width, height, colors, fonts.get("minor"), 2000)
+    serial = time.perf_counter() - started
+    print(f"serial, no cache  {serial * 1000:9.1f} ms")
+
+    with ChartRenderer(max_workers=args.workers, fmt=args.format) as renderer:
+        # Warm the workers so process start-up isn't billed to the first deck
+        renderer.render_many([({"type": "bar", "data": [i]}, width, height) for i in range(args.workers * 2)], master)
+
+        started = time.perf_counter()
+        outputs = renderer.render_many([(chart, width, height) for chart in charts], master)
+        pooled = time.perf_counter() - started
+        print(f"pool, cold cache  {pooled * 1000:9.1f} ms  ({serial / pooled:.1f}x)")
+
+        started = time.perf_counter()
+        renderer.render_many([(chart, width, height) for chart in charts], master)
+        cached = time.perf_counter() - started
+        print(f"pool, memoized    {cached * 1000:9.1f} ms  ({serial / cached:.0f}x)")
+
+        points = sum(output.points for output in outputs) / len(outputs)
+        source = sum(output.source_points for output in outputs) / len(outputs)
+        print(f"\nAvg points per chart: {source:.0f} -> {points:.0f} after downsampling")
+        print(f"Stats: {renderer.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Throughput benchmark for the shared token chunker.
+
+Streams synthetic document pages through TokenChunker and reports MB/s
+and peak RSS growth, so chunking can be checked against generation latency.
+
+    python scripts/bench-chunker.py --megabytes 300 --max-tokens 2048
+"""
+import argparse
+import os
+import random
+import resource
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from backend.shared.utils.chunking import TokenChunker
+
+WORDS = (
+    "revenue growth margin strategy market customer product quarter forecast "
+    "analysis operations risk compliance team roadmap investment platform data"
+).split()
+
+
+def generate_pages(total_bytes, page_bytes, seed=7):
+    """Yield synthetic pages lazily so the input never sits in memory"""
+    rng = random.Random(seed)
+    paragraphs = [
+        " ".join(rng.choice(WORDS) for _ in range(rng.randint(20, 160))) + "."
+        for _ in range(256)
+    ]
+    produced = 0
+    page = 0
+    while produced < total_bytes:
+        parts = []
+        size = 0
+        if page % 12 == 0:
+            parts.append(f"# Section {page // 12 + 1}")
+        while size < page_bytes:
+            paragraph = paragraphs[rng.randrange(len(paragraphs))]
+            parts.append(paragraph)
+            size += len(paragraph) + 2
+        text = "\n\n".join(parts)
+        produced += len(text)
+        page += 1
+        yield text
+
+
+def peak_rss_mb():
+    # ru_maxrss is KB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Token chunker throughput benchmark")
+    parser.add_argument("--megabytes", type=int, default=100)
+    parser.add_argument("--page-kb", type=int, default=4)
+    parser.add_argument("--max-tokens", type=int, default=2048)
+    parser.add_argument("--overlap-tokens", type=int, default=128)
+    args = parser.parse_args()
+
+    total_bytes = args.megabytes * 1024 * 1024
+    chunker = TokenChunker(max_tokens=args.max_tokens, overlap_tokens=args.overlap_tokens)
+
+    rss_before = peak_rss_mb()
+    chunks = 0
+    tokens = 0
+    started = time.perf_counter()
+    for chunk in chunker.chunk(generate_pages(total_bytes, args.page_kb * 1024)):
+        chunks += 1
+        tokens += chunk.token_estimate
+    elapsed = time.perf_counter() - started
+
+    print(f"✂️  Chunked {args.megabytes}MB into {chunks} chunks "
+          f"(budget {args.max_tokens} tokens, overlap {args.overlap_tokens})")
+    print(f"   Throughput: {args.megabytes / elapsed:.1f} MB/s ({elapsed:.2f}s)")
+    print(f"   Estimated tokens: {tokens:,} (avg {tokens / max(chunks, 1):.0f} per chunk)")
+    print(f"   Peak RSS growth: {peak_rss_mb() - rss_before:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Gateway database layer benchmark.
+
+Runs the get_current_user lookup (auth.USER_BY_ID) `--queries` times from
+`--concurrency` tasks through the gateway's own engine. It does this once
+with asyncpg's prepared statement cache disabled and once with
+db_statement_cache_size, then prints throughput and the per-statement and
+pool wait histograms that QueryMetrics records. Concurrency above
+db_pool_size shows up as pool wait.
+
+Needs a Postgres to read from. The script creates users.users if it is
+missing and deletes its own rows afterwards.
+
+    DATABASE_URL=postgresql://postgres@localhost:5432/ppt_generator python scripts/bench-db.py
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend", "gateway"))
+
+from sqlalchemy import text
+
+from app.core import database
+from app.core.config import settings
+from app.core.metrics import LatencyHistogram
+from app.routers.auth import USER_BY_ID
+
+SCHEMA = [
+    "CREATE SCHEMA IF NOT EXISTS users",
+    """
+    CREATE TABLE IF NOT EXISTS users.users (
+        id UUID PRIMARY KEY,
+        email VARCHAR(255) UNIQUE NOT NULL,
+        username VARCHAR(100) UNIQUE NOT NULL,
+        password_hash VARCHAR(255) NOT NULL,
+        first_name VARCHAR(100),
+        last_name VARCHAR(100),
+        is_active BOOLEAN DEFAULT true,
+        created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+    )
+    """
+]
+
+
+async def setup(users: int):
+    ids = [str(uuid.uuid4()) for _ in range(users)]
+    async with database.get_async_engine().begin() as conn:
+        for statement in SCHEMA:
+            await conn.execute(text(statement))
+        await conn.execute(
+            text(
+                "INSERT INTO users.users (id, email, username, password_hash) "
+                "VALUES (CAST(:id AS uuid), :email, :username, 'x')"
+            ),
+            [{"id": user_id, "email": f"{user_id}@bench", "username": f"bench-{user_id}"} for user_id in ids]
+        )
+    return ids
+
+
+async def cleanup():
+    async with database.get_async_engine().begin() as conn:
+        await conn.execute(text("DELETE FROM users.users WHERE email LIKE '%@bench'"))
+
+
+async def run(ids, args, cache_size: int):
+    settings.db_statement_cache_size = cache_size
+    await database.close_db()
+    database.get_async_engine()
+    metrics = database.query_metrics
+    metrics.statements.clear()
+    metrics.queries = 0
+    metrics.pool_wait = LatencyHistogram()
+
+    per_task = args.queries // args.concurrency
+
+    async def lookups(worker: int):
+        for index in range(per_task):
+            # A session per lookup, as get_db gives each request
+            async with database.AsyncSessionLocal() as db:
+                result = await db.execute(USER_BY_ID, {"user_id": ids[(worker * per_task + index) % len(ids)]})
+                assert result.fetchone() is not None
+
+    started = time.perf_counter()
+    await asyncio.gather(*(lookups(worker) for worker in range(args.concurrency)))
+    elapsed = time.perf_counter() - started
+
+    query = metrics.statements[metrics.statement_key(str(USER_BY_ID.compile(dialect=database.async_engine.dialect)))]
+    pool_wait = metrics.pool_wait.stats()
+    label = f"statement cache {cache_size:<4d}"
+    print(
+        f"{label}  {elapsed:5.2f}s  {per_task * args.concurrency / elapsed:6.0f} lookups/s  "
+        f"query p50 {query.stats()['p50_ms']} ms p99 {query.stats()['p99_ms']} ms  "
+        f"pool wait p50 {pool_wait['p50_ms']} ms p99 {pool_wait['p99_ms']} ms"
+    )
+
+
+async def main_async(args):
+    settings.database_url = args.database_url
+    settings.db_pool_size = args.pool_size
+    ids = await setup(args.users)
+    print(
+        f"{args.queries} user lookups from {args.concurrency} tasks over {args.pool_size} pooled connections "
+        f"(+{settings.db_max_overflow} overflow), {args.users} users"
+    )
+    try:
+        await run(ids, args, cache_size=0)
+        await run(ids, args, cache_size=args.statement_cache_size)
+        print(f"\n{database.query_metrics.stats(top=3)}")
+    finally:
+        await cleanup()
+        await database.close_db()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the gateway database layer")
+    parser.add_argument("--database-url", default=os.environ.get("DATABASE_URL"), required="DATABASE_URL" not in os.environ)
+    parser.add_argument("--queries", type=int, default=20000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--pool-size", type=int, default=settings.db_pool_size)
+    parser.add_argument("--statement-cache-size", type=int, default=settings.db_statement_cache_size)
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""
+Export benchmark for the presentation renderer.
+
+Builds an image-heavy deck and exports it concurrently two ways, each in a
+fresh process so peak RSS is comparable:
+
+  bytesio  python-pptx pictures, prs.save() into a BytesIO per request,
+           the response body sent from buf.getvalue()
+  stream   file-backed pictures, ExportPool.stream_pptx() chunks
+
+    python scripts/bench-export.py --slides 200 --exports 20 --images 40
+"""
+import argparse
+import asyncio
+import io
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import zipfile
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend", "presentation-renderer"))
+
+from app.exporters import ExportPool, add_picture
+from app.renderers.deck import render_deck
+from app.templates.registry import TemplateRegistry
+
+EMU_PER_INCH = 914400
+
+
+def peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def make_images(directory, count, side=640, seed=5):
+    # Noise doesn't compress, so each JPEG keeps roughly its raw size
+    rng = np.random.default_rng(seed)
+    paths = []
+    for n in range(count):
+        path = os.path.join(directory, f"image{n}.jpg")
+        pixels = rng.integers(0, 256, size=(side, side, 3), dtype=np.uint8)
+        Image.fromarray(pixels).save(path, quality=95)
+        paths.append(path)
+    return paths
+
+
+def build_deck(slide_count, images, by_reference):
+    slides = [
+        {"title": f"Slide {n + 1}", "bullets": [f"Point {k + 1} of slide {n + 1}" for k in range(4)], "notes": f"Notes {n}"}
+        for n in range(slide_count)
+    ]
+    registry = TemplateRegistry(directory=os.path.dirname(__file__))
+    prs = render_deck(registry, slides, "professional")
+    for n, slide in enumerate(prs.slides):
+        left, top, width = 6 * EMU_PER_INCH, 2 * EMU_PER_INCH, 3 * EMU_PER_INCH
+        if by_reference:
+            add_picture(slide, images[n % len(images)], left, top, width)
+        else:
+            slide.shapes.add_picture(images[n % len(images)], left, top, width)
+    return prs
+
+
+async def export_bytesio(prs, exports, chunk_size):
+    loop = asyncio.get_running_loop()
+
+    def save():
+        buf = io.BytesIO()
+        prs.save(buf)
+        return buf.getvalue()
+
+    async def one():
+        body = await loop.run_in_executor(None, save)
+        # What a Response(content=...) sends; keep the body alive while it goes out
+        for offset in range(0, len(body), chunk_size):
+            await asyncio.sleep(0)
+        return len(body), body[:4]
+
+    results = await asyncio.gather(*(one() for _ in range(exports)))
+    return [size for size, _ in results], None
+
+
+async def export_stream(prs, exports, workers, chunk_size):
+    with ExportPool(max_workers=workers, max_pending=exports, chunk_size=chunk_size) as pool:
+        async def one():
+            size = 0
+            head = b""
+            async for chunk in pool.stream_pptx(prs):
+                head = head or chunk[:4]
+                size += len(chunk)
+                await asyncio.sleep(0)
+            return size, head
+
+        results = await asyncio.gather(*(one() for _ in range(exports)))
+        return [size for size, _ in results], pool.stats()
+
+
+def run_mode(args):
+    with tempfile.TemporaryDirectory() as directory:
+        images = make_images(directory, args.images)
+        prs = build_deck(args.slides, images, by_reference=args.mode == "stream")
+        deck_rss = peak_rss_mb()
+
+        started = time.perf_counter()
+        if args.mode == "stream":
+            sizes, stats = asyncio.run(export_stream(prs, args.exports, args.workers, args.chunk_size))
+        else:
+            sizes, stats = asyncio.run(export_bytesio(prs, args.exports, args.chunk_size))
+        elapsed = time.perf_counter() - started
+
+        # The streamed package must open like a saved one
+        check = os.path.join(directory, "check.pptx")
+        if args.mode == "stream":
+            async def save():
+                with ExportPool(max_workers=1) as pool:
+                    await pool.export_pptx(prs, check)
+            asyncio.run(save())
+        else:
+            prs.save(check)
+        with zipfile.ZipFile(check) as zf:
+            bad = zf.testzip()
+        from pptx import Presentation
+        reopened = len(Presentation(check).slides)
+
+    print(json.dumps({
+        "mode": args.mode,
+        "deck_rss_mb": round(deck_rss, 1),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "seconds": round(elapsed, 3),
+        "export_mb": round(sizes[0] / 1e6, 2),
+        "exports_per_s": round(len(sizes) / elapsed, 2),
+        "mb_per_s": round(sum(sizes) / 1e6 / elapsed, 1),
+        "valid": bad is None and reopened == args.slides,
+        "stats": stats
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark streaming PPTX export against BytesIO saves")
+    parser.add_argument("--slides", type=int, default=200)
+    parser.add_argument("--exports", type=int, default=20)
+    parser.add_argument("--images", type=int, default=40)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--chunk-size", type=int, default=256 * 1024)
+    parser.add_argument("--mode", choices=("bytesio", "stream"))
+    args = parser.parse_args()
+
+    if args.mode:
+        return run_mode(args)
+
+    print(f"{args.exports} concurrent exports of a {args.slides}-slide deck with {args.images} distinct images")
+    results = {}
+    for mode in ("bytesio", "stream"):
+        output = subprocess.run(
+            [sys.executable, __file__, "--mode", mode] + sys.argv[1:],
+            check=True, capture_output=True, text=True
+        ).stdout
+        results[mode] = result = json.loads(output.strip().splitlines()[-1])
+        print(
+            f"{mode:8} deck {result['deck_rss_mb']:7.1f} MB  peak {result['peak_rss_mb']:7.1f} MB  "
+            f"{result['exports_per_s']:6.2f} exports/s  {result['mb_per_s']:6.1f} MB/s  "
+            f"({result['export_mb']} MB each, valid={result['valid']})"
+        )
+
+    base, stream = results["bytesio"], results["stream"]
+    print(
+        f"\nPeak RSS over deck: {base['peak_rss_mb'] - base['deck_rss_mb']:.1f} MB -> "
+        f"{stream['peak_rss_mb'] - stream['deck_rss_mb']:.1f} MB"
+    )
+    print(f"Stats: {stream['stats']}")
+
+
+if __name__ == "__main__":
+    main()
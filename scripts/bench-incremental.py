@@ -0,0 +1,104 @@
+"""
+Incremental re-render benchmark for the presentation renderer.
+
+Renders a 100-slide deck, then applies slide-editor style updates (edit one
+slide, insert, delete, move) through IncrementalRenderer and compares each
+update's cost with a full render and with the average cost of one slide.
+Every incremental result is checked against a from-scratch render of the
+same slides.
+
+    python scripts/bench-incremental.py --slides 100 --edits 20
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from io import BytesIO
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend", "presentation-renderer"))
+
+from pptx import Presentation
+
+from app.renderers.deck import render_deck
+from app.renderers.incremental import IncrementalRenderer
+from app.templates.registry import TemplateRegistry
+
+
+def make_deck(count):
+    slides = [{"title": "Annual Strategy Review", "subtitle": "Generated deck"}]
+    for n in range(1, count):
+        slides.append({
+            "title": f"Slide {n + 1}",
+            "bullets": [f"Point {n}.{i}: revenue, margin and roadmap detail" for i in range(5)],
+            "notes": f"Speaker notes for slide {n + 1}"
+        })
+    return slides
+
+
+def deck_content(prs):
+    """Slide text and notes after a save/load round trip, to compare renders"""
+    buffer = BytesIO()
+    prs.save(buffer)
+    buffer.seek(0)
+    return [
+        [shape.text_frame.text for shape in slide.placeholders if shape.has_text_frame]
+        + [slide.notes_slide.notes_text_frame.text if slide.has_notes_slide else ""]
+        for slide in Presentation(buffer).slides
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark incremental slide re-rendering")
+    parser.add_argument("--slides", type=int, default=100)
+    parser.add_argument("--edits", type=int, default=20)
+    args = parser.parse_args()
+
+    registry = TemplateRegistry(directory=os.path.dirname(__file__))
+    renderer = IncrementalRenderer(registry)
+    slides = make_deck(args.slides)
+    rng = random.Random(5)
+
+    render_deck(registry, slides)  # warm up
+    started = time.perf_counter()
+    prs, diff = renderer.render("deck-1", slides)
+    full = time.perf_counter() - started
+    per_slide = full / args.slides
+    print(f"Full render, {args.slides} slides: {full * 1000:8.1f} ms ({per_slide * 1000:.2f} ms/slide)")
+
+    timings = []
+    for edit in range(args.edits):
+        slides = [dict(slide) for slide in slides]
+        index = rng.randrange(1, len(slides))
+        slides[index]["bullets"] = slides[index]["bullets"][:-1] + [f"Edited point {edit}"]
+        prs, diff = renderer.render("deck-1", slides)
+        timings.append(diff.seconds)
+        assert diff.rendered == 1 and not diff.full, diff
+    timings.sort()
+    median = timings[len(timings) // 2]
+    print(f"Edit one slide (median of {args.edits}): {median * 1000:8.1f} ms "
+          f"({median / per_slide:.1f}x one slide, {full / median:.0f}x faster than full)")
+
+    ok = deck_content(prs) == deck_content(render_deck(registry, slides))
+
+    operations = {
+        "insert": lambda s: s[:10] + [{"title": "Inserted", "bullets": ["New"]}] + s[10:],
+        "delete": lambda s: s[:20] + s[21:],
+        "move": lambda s: s[:5] + s[30:31] + s[5:30] + s[31:],
+        "retitle first": lambda s: [{"title": "New title", "subtitle": "Generated deck"}] + s[1:]
+    }
+    for name, operation in operations.items():
+        slides = operation(slides)
+        prs, diff = renderer.render("deck-1", slides)
+        matches = deck_content(prs) == deck_content(render_deck(registry, slides))
+        ok &= matches
+        print(f"{name:<14} rendered={diff.rendered} reused={diff.reused} removed={diff.removed} "
+              f"{diff.seconds * 1000:6.1f} ms  {'ok' if matches else 'MISMATCH'}")
+
+    print(f"\nStats: {renderer.stats()}")
+    print("Incremental output matches full render" if ok else "Incremental output differs from full render")
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,236 @@
+"""
+Job queue benchmark.
+
+1. throughput: a producer enqueues `--jobs` jobs while `--workers` workers
+   (each with `--concurrency` slots) run a handler that takes `--work-ms`;
+   reports enqueue and completion rates and enqueue-to-start latency
+2. durability: messages sent while no consumer is connected, through
+   pub/sub (the current presentation.events path) and through the queue
+3. recovery: a worker dies holding jobs, a second worker reclaims them after
+   the visibility timeout; a handler that always fails ends in the dead-letter
+   stream; high-priority jobs overtake a low-priority backlog
+
+Pass --redis-url for a real Redis. Without it, every client is an
+in-process fakeredis client on one shared fake server: no network round
+trips, but commands run in Python on the benchmark's own event loop.
+
+    python scripts/bench-jobs.py --jobs 2000 --workers 2 --concurrency 8
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+import redis.asyncio as redis
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from backend.shared.jobs import JobQueue, JobWorker, Priority
+
+
+FAKE_SERVER = None
+
+
+def client(redis_url):
+    if redis_url is None:
+        import fakeredis
+
+        global FAKE_SERVER
+        FAKE_SERVER = FAKE_SERVER or fakeredis.FakeServer()
+        return fakeredis.FakeAsyncRedis(server=FAKE_SERVER, decode_responses=True)
+    return redis.from_url(redis_url, decode_responses=True)
+
+
+async def wait_for(predicate, timeout=60.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise TimeoutError
+        await asyncio.sleep(0.01)
+
+
+async def throughput(redis_url, args):
+    producer = client(redis_url)
+    await producer.flushdb()
+    queue = JobQueue(producer, "bench", max_length=args.jobs + 1)
+    await queue.setup()
+
+    latencies = []
+
+    async def handler(job):
+        latencies.append(time.time() - job.enqueued_at)
+        await asyncio.sleep(args.work_ms / 1000)
+
+    workers = []
+    for index in range(args.workers):
+        worker_queue = JobQueue(client(redis_url), "bench")
+        worker = JobWorker(worker_queue, handler, concurrency=args.concurrency, consumer=f"worker-{index}", block=0.5)
+        await worker.start()
+        workers.append(worker)
+
+    started = time.perf_counter()
+    for index in range(args.jobs):
+        await queue.enqueue("presentation_rendering", {"presentation_id": index})
+    enqueue_seconds = time.perf_counter() - started
+    await wait_for(lambda: sum(worker.completed for worker in workers) >= args.jobs)
+    total_seconds = time.perf_counter() - started
+
+    latencies.sort()
+    print(
+        f"{args.jobs} jobs, {args.workers} workers x {args.concurrency} slots, {args.work_ms:.0f} ms each: "
+        f"enqueue {args.jobs / enqueue_seconds:.0f} jobs/s, completed {args.jobs / total_seconds:.0f} jobs/s "
+        f"(ceiling {args.workers * args.concurrency * 1000 / args.work_ms:.0f})"
+    )
+    print(
+        f"enqueue-to-start p50 {statistics.median(latencies) * 1000:.1f} ms  "
+        f"p99 {latencies[int(len(latencies) * 0.99) - 1] * 1000:.1f} ms  "
+        f"max {latencies[-1] * 1000:.1f} ms; split {[worker.completed for worker in workers]}"
+    )
+    for worker in workers:
+        await worker.shutdown()
+        await worker.queue.redis.aclose()
+    await producer.aclose()
+
+
+async def durability(redis_url):
+    producer = client(redis_url)
+    await producer.flushdb()
+
+    # Pub/sub: published while the consumer is restarting
+    for index in range(100):
+        await producer.publish("presentation.events", f"file_uploaded {index}")
+    subscriber = client(redis_url)
+    pubsub = subscriber.pubsub()
+    await pubsub.subscribe("presentation.events")
+    received = 0
+    deadline = time.monotonic() + 1.0
+    while time.monotonic() < deadline:
+        message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=0.1)
+        if message:
+            received += 1
+    await pubsub.aclose()
+    await subscriber.aclose()
+
+    # Queue: enqueued while no worker runs
+    queue = JobQueue(producer, "durable")
+    await queue.setup()
+    for index in range(100):
+        await queue.enqueue("document_processing", {"file_id": index})
+    done = []
+
+    async def handler(job):
+        done.append(job.payload["file_id"])
+
+    worker = JobWorker(JobQueue(client(redis_url), "durable"), handler, concurrency=8, block=0.2)
+    await worker.start()
+    await wait_for(lambda: len(done) >= 100, timeout=10)
+    await worker.shutdown()
+    await worker.queue.redis.aclose()
+    print(f"\nsent with no consumer connected: pub/sub delivered {received}/100, queue delivered {len(set(done))}/100")
+    await producer.aclose()
+
+
+async def recovery(redis_url):
+    producer = client(redis_url)
+    await producer.flushdb()
+
+    # A worker that dies mid-job: cancelled without acknowledging
+    visibility = 1.0
+    queue = JobQueue(producer, "recover", visibility_timeout=visibility)
+    await queue.setup()
+    for index in range(10):
+        await queue.enqueue("ai_generation", {"index": index})
+
+    async def hang(job):
+        await asyncio.sleep(3600)
+
+    doomed = JobWorker(JobQueue(client(redis_url), "recover", visibility_timeout=visibility), hang,
+                       concurrency=10, consumer="doomed", shutdown_grace=0)
+    await doomed.start()
+    await wait_for(lambda: doomed.started >= 10)
+    await doomed.shutdown()
+    await doomed.queue.redis.aclose()
+    crashed_at = time.monotonic()
+
+    recovered = []
+
+    async def handler(job):
+        recovered.append((time.monotonic() - crashed_at, job.attempts))
+
+    rescuer = JobWorker(JobQueue(client(redis_url), "recover", visibility_timeout=visibility), handler,
+                        concurrency=10, consumer="rescuer", reclaim_interval=0.2)
+    await rescuer.start()
+    await wait_for(lambda: len(recovered) >= 10, timeout=10)
+    await rescuer.shutdown()
+    await rescuer.queue.redis.aclose()
+    print(
+        f"\nworker died holding 10 jobs: reclaimed {rescuer.reclaimed} after "
+        f"{min(seconds for seconds, _ in recovered):.2f}-{max(seconds for seconds, _ in recovered):.2f}s "
+        f"(visibility {visibility:.0f}s), attempts {sorted(set(attempts for _, attempts in recovered))}"
+    )
+
+    # A poison job
+    queue = JobQueue(producer, "poison", max_attempts=3)
+    await queue.setup()
+    await queue.enqueue("presentation_rendering", {"broken": True})
+
+    async def fail(job):
+        raise ValueError("template missing")
+
+    worker = JobWorker(JobQueue(client(redis_url), "poison", max_attempts=3), fail, concurrency=2, block=0.2)
+    await worker.start()
+    await wait_for(lambda: worker.dead_lettered >= 1, timeout=10)
+    await worker.shutdown()
+    await worker.queue.redis.aclose()
+    dead = await queue.dead_letters()
+    print(
+        f"failing job: {worker.failed} runs, {worker.retried} retries, dead-lettered with "
+        f"attempts={dead[0]['attempts']} error={dead[0]['error']!r}; lengths {await queue.lengths()}"
+    )
+
+    # Priority: a low backlog, then urgent jobs
+    queue = JobQueue(producer, "priority")
+    await queue.setup()
+    for index in range(200):
+        await queue.enqueue("ai_generation", {"index": index}, priority=Priority.LOW)
+    for index in range(10):
+        await queue.enqueue("ai_generation", {"index": index}, priority=Priority.HIGH)
+    order = []
+
+    async def record(job):
+        order.append(job.priority)
+        await asyncio.sleep(0.001)
+
+    worker = JobWorker(JobQueue(client(redis_url), "priority"), record, concurrency=4, block=0.2)
+    await worker.start()
+    await wait_for(lambda: len(order) >= 210, timeout=30)
+    await worker.shutdown()
+    await worker.queue.redis.aclose()
+    positions = [index for index, priority in enumerate(order) if priority == Priority.HIGH]
+    print(f"10 high-priority jobs behind 200 low: started at positions {positions}")
+    await producer.aclose()
+
+
+async def main_async(args):
+    redis_url = args.redis_url
+    print(f"Redis: {redis_url or 'in-process fakeredis'}")
+    await throughput(redis_url, args)
+    await durability(redis_url)
+    await recovery(redis_url)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Redis Streams job queue")
+    parser.add_argument("--redis-url")
+    parser.add_argument("--jobs", type=int, default=2000)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--work-ms", type=float, default=5.0)
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""
+Login burst benchmark for the API Gateway.
+
+Runs the gateway app in-process (no Docker needed) with an in-memory user
+store and measures /health latency while N concurrent logins are in flight.
+
+    python scripts/bench-login.py --logins 200 --workers 4
+    python scripts/bench-login.py --inline   # old behaviour: bcrypt on the event loop
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend", "gateway"))
+
+import httpx
+from passlib.context import CryptContext
+
+from app.main import app
+from app.core.database import get_db
+from app.services.password_hasher import PasswordHasher
+
+EMAIL = "bench@pptgen.com"
+PASSWORD = "benchpassword123"
+
+
+class FakeResult:
+    def __init__(self, row):
+        self._row = row
+
+    def fetchone(self):
+        return self._row
+
+
+class FakeSession:
+    def __init__(self, user):
+        self.user = user
+
+    async def execute(self, statement, params=None):
+        return FakeResult(self.user if "SELECT" in str(statement) else None)
+
+    async def commit(self):
+        pass
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def setex(self, key, ttl, value):
+        self.data[key] = value
+
+    async def delete(self, key):
+        self.data.pop(key, None)
+
+    async def publish(self, channel, message):
+        return 0
+
+
+class InlineHasher(PasswordHasher):
+    """Verifies on the event loop, like the gateway did before the hashing pool"""
+
+    async def _submit(self, fn, *args):
+        return fn(*args)
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))] * 1000
+
+
+async def probe_health(client, stop_event, interval, due_at):
+    # Latency is measured from when the probe was *due*, so time spent waiting
+    # for a blocked event loop is counted rather than silently omitted.
+    latencies = []
+    while True:
+        response = await client.get("/health")
+        assert response.status_code == 200
+        latencies.append(time.perf_counter() - due_at)
+        if stop_event.is_set():
+            break
+        due_at = time.perf_counter() + interval
+        await asyncio.sleep(interval)
+    return latencies
+
+
+async def run(args):
+    user = SimpleNamespace(
+        id="00000000-0000-0000-0000-000000000001",
+        email=EMAIL,
+        username="bench",
+        password_hash=CryptContext(schemes=["bcrypt"], bcrypt__rounds=args.rounds).hash(PASSWORD),
+        first_name="Bench",
+        last_name="User",
+        is_active=True
+    )
+
+    async def fake_get_db():
+        yield FakeSession(user)
+
+    hasher_cls = InlineHasher if args.inline else PasswordHasher
+    app.dependency_overrides[get_db] = fake_get_db
+    app.redis = FakeRedis()
+    app.password_hasher = hasher_cls(
+        rounds=args.rounds,
+        executor=args.executor,
+        max_workers=args.workers,
+        max_pending=max(args.logins, 1)
+    )
+    app.password_hasher.start()
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://gateway") as client:
+        # Idle baseline
+        stop = asyncio.Event()
+        probe = asyncio.create_task(probe_health(client, stop, args.interval, time.perf_counter()))
+        await asyncio.sleep(1.0)
+        stop.set()
+        idle = await probe
+
+        # Under login burst
+        stop = asyncio.Event()
+        probe = asyncio.create_task(probe_health(client, stop, args.interval, time.perf_counter()))
+        started = time.perf_counter()
+        responses = await asyncio.gather(*[
+            client.post("/api/auth/login", json={"email": EMAIL, "password": PASSWORD})
+            for _ in range(args.logins)
+        ])
+        elapsed = time.perf_counter() - started
+        stop.set()
+        loaded = await probe
+
+    app.password_hasher.shutdown()
+
+    ok = sum(1 for r in responses if r.status_code == 200)
+    mode = "inline (event loop)" if args.inline else f"{args.executor} pool x{args.workers}"
+    print(f"🔐 Login burst: {args.logins} logins, bcrypt rounds={args.rounds}, {mode}")
+    print(f"   Logins OK: {ok}/{args.logins} in {elapsed:.2f}s ({args.logins / elapsed:.1f}/s)")
+    print(f"   /health idle    p50={percentile(idle, 50):.2f}ms  p99={percentile(idle, 99):.2f}ms  (n={len(idle)})")
+    print(f"   /health loaded  p50={percentile(loaded, 50):.2f}ms  p99={percentile(loaded, 99):.2f}ms  "
+          f"max={max(loaded) * 1000:.2f}ms  (n={len(loaded)})")
+    print(f"   Hasher stats: {app.password_hasher.stats()}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gateway login burst benchmark")
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--rounds", type=int, default=12)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--executor", choices=["thread", "process"], default="thread")
+    parser.add_argument("--interval", type=float, default=0.005, help="seconds between /health probes")
+    parser.add_argument("--inline", action="store_true", help="verify on the event loop (pre-pool behaviour)")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+OCR cache benchmark for the document processor.
+
+Builds a corpus of scanned (image-only) PDFs that share letterhead and
+boilerplate pages, runs them through the extraction engine with OCR
+enabled and a fresh cache, and reports how many OCR seconds the
+page-image cache saved. Requires the tesseract and poppler binaries.
+
+    python scripts/bench-ocr.py --documents 10 --unique-pages 3 --boilerplate-pages 4
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend", "document-processor"))
+
+from PIL import Image, ImageDraw
+
+from app.processors import ExtractionEngine, OcrStage
+
+PAGE_SIZE = (1240, 1754)  # A4 at 150 dpi
+
+
+def render_page(lines):
+    image = Image.new("RGB", PAGE_SIZE, "white")
+    draw = ImageDraw.Draw(image)
+    for number, line in enumerate(lines):
+        draw.text((100, 120 + number * 40), line, fill="black")
+    return image
+
+
+def build_corpus(directory, documents, unique_pages, boilerplate_pages):
+    letterhead = render_page(["ACME CORPORATION", "Quarterly Business Review", "Confidential"])
+    boilerplate = [
+        render_page([f"Appendix {chr(65 + n)}", "Standard terms and conditions apply."] +
+                    [f"Clause {n}.{i}: lorem ipsum dolor sit amet" for i in range(20)])
+        for n in range(boilerplate_pages)
+    ]
+
+    paths = []
+    for doc in range(documents):
+        pages = [letterhead]
+        pages += [
+            render_page([f"Report {doc} section {page}"] + [f"Finding {doc}.{page}.{i}" for i in range(20)])
+            for page in range(unique_pages)
+        ]
+        pages += boilerplate
+        path = os.path.join(directory, f"scan-{doc:03d}.pdf")
+        pages[0].save(path, save_all=True, append_images=pages[1:], resolution=150)
+        paths.append(path)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OCR page-cache benchmark")
+    parser.add_argument("--documents", type=int, default=10)
+    parser.add_argument("--unique-pages", type=int, default=3)
+    parser.add_argument("--boilerplate-pages", type=int, default=4)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--dpi", type=int, default=150)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        paths = build_corpus(directory, args.documents, args.unique_pages, args.boilerplate_pages)
+        stage = OcrStage(cache_path=os.path.join(directory, "ocr.sqlite3"), dpi=args.dpi)
+
+        totals = {"pages": 0, "ocr_pages": 0, "hits": 0, "ocr_seconds": 0.0, "saved": 0.0}
+        started = time.perf_counter()
+        with ExtractionEngine(max_workers=args.workers, pages_per_task=2, ocr=stage) as engine:
+            for path in paths:
+                job = engine.extract(path)
+                for _ in job:
+                    pass
+                totals["pages"] += job.stats.pages_yielded
+                totals["ocr_pages"] += job.stats.ocr_pages
+                totals["hits"] += job.stats.ocr_cache_hits
+                totals["ocr_seconds"] += job.stats.ocr_seconds
+                totals["saved"] += job.stats.ocr_seconds_saved
+        elapsed = time.perf_counter() - started
+
+    print(f"🔎 OCR corpus: {args.documents} documents, {totals['pages']} pages "
+          f"({1 + args.boilerplate_pages} repeated per document)")
+    print(f"   OCRed pages: {totals['ocr_pages']}, cache hits: {totals['hits']} "
+          f"({totals['hits'] / max(totals['ocr_pages'], 1):.0%})")
+    print(f"   OCR seconds spent: {totals['ocr_seconds']:.2f}s")
+    print(f"   OCR seconds saved by cache: {totals['saved']:.2f}s")
+    print(f"   Wall time: {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
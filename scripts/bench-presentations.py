@@ -0,0 +1,280 @@
+"""
+Presentation listing and search benchmark.
+
+Creates one user with `--decks` presentations, each carrying `--content-kb`
+of content and slides JSONB, among other users' decks. It then times the
+queries a "my presentations" page would run:
+
+  - before infrastructure/postgres/init/02-presentation-listing-indexes.sql:
+    SELECT * with OFFSET pagination, and ILIKE search without an index
+  - after it: the gateway router's projected keyset pages and trigram search
+  - through the router itself (in-process, fakeredis): the first page cold,
+    from the Redis cache, and as a 304 for a matching If-None-Match
+
+Needs a Postgres it may create the presentations schema in; the script drops
+its own users (and their decks) afterwards. The first run also builds the
+02 indexes, which stay.
+
+    DATABASE_URL=postgresql://postgres@localhost:5432/ppt_generator python scripts/bench-presentations.py
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend", "gateway"))
+
+import httpx
+from sqlalchemy import text
+
+from app.core import database
+from app.core.config import settings
+from app.routers import presentations
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+MIGRATION = os.path.join(ROOT, "infrastructure", "postgres", "init", "02-presentation-listing-indexes.sql")
+
+SCHEMA = [
+    'CREATE EXTENSION IF NOT EXISTS "pg_trgm"',
+    'CREATE EXTENSION IF NOT EXISTS "btree_gin"',
+    "CREATE SCHEMA IF NOT EXISTS users",
+    "CREATE SCHEMA IF NOT EXISTS presentations",
+    """
+    CREATE TABLE IF NOT EXISTS users.users (
+        id UUID PRIMARY KEY,
+        email VARCHAR(255) UNIQUE NOT NULL,
+        username VARCHAR(100) UNIQUE NOT NULL,
+        password_hash VARCHAR(255) NOT NULL,
+        first_name VARCHAR(100),
+        last_name VARCHAR(100),
+        is_active BOOLEAN DEFAULT true,
+        created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS presentations.presentations (
+        id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+        title VARCHAR(500) NOT NULL,
+        description TEXT,
+        content JSONB,
+        slides JSONB,
+        theme VARCHAR(50) DEFAULT 'professional',
+        slide_count INTEGER DEFAULT 0,
+        status VARCHAR(50) DEFAULT 'draft',
+        user_id UUID REFERENCES users.users(id) ON DELETE CASCADE,
+        original_file_path VARCHAR(1000),
+        export_formats JSONB DEFAULT '[]',
+        metadata JSONB DEFAULT '{}',
+        created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+        updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+    )
+    """,
+    # The indexes 01-init-database.sql creates
+    "CREATE INDEX IF NOT EXISTS idx_presentations_user_id ON presentations.presentations(user_id)",
+    "CREATE INDEX IF NOT EXISTS idx_presentations_status ON presentations.presentations(status)",
+    "CREATE INDEX IF NOT EXISTS idx_presentations_created_at ON presentations.presentations(created_at)"
+]
+
+# Titles from a small vocabulary, so some searches match a few decks and some match many
+INSERT_DECKS = text("""
+    INSERT INTO presentations.presentations (title, description, content, slides, slide_count, status, user_id, created_at)
+    SELECT
+        (ARRAY['Quarterly', 'Annual', 'Weekly', 'Board', 'Team', 'Product', 'Sales', 'Hiring'])[1 + i % 8]
+            || ' ' || (ARRAY['review', 'roadmap', 'update', 'kickoff', 'strategy', 'retrospective'])[1 + i % 6]
+            || ' ' || i,
+        'Deck ' || i || ' about ' || md5(i::text),
+        jsonb_build_object('outline', (SELECT string_agg(md5(i::text || n::text), ' ') FROM generate_series(1, :chunks) n)),
+        jsonb_build_object('slides', (SELECT string_agg(md5(n::text || i::text), ' ') FROM generate_series(1, :chunks) n)),
+        12, 'completed', CAST(:user_id AS uuid),
+        NOW() - i * INTERVAL '1 minute'
+    FROM generate_series(1, :count) i
+""")
+
+NAIVE_PAGE = text("""
+    SELECT * FROM presentations.presentations
+    WHERE user_id = CAST(:user_id AS uuid)
+    ORDER BY created_at DESC, id DESC
+    LIMIT :limit OFFSET :offset
+""")
+NAIVE_SEARCH = text("""
+    SELECT * FROM presentations.presentations
+    WHERE user_id = CAST(:user_id AS uuid) AND (title ILIKE :pattern OR description ILIKE :pattern)
+    ORDER BY created_at DESC, id DESC
+    LIMIT :limit
+""")
+
+
+async def timed(conn, statement, params, repeat):
+    """Median milliseconds over `repeat` runs, and the rows of the last"""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        rows = (await conn.execute(statement, params)).fetchall()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples), rows
+
+
+async def plan(conn, statement, params) -> str:
+    lines = (await conn.execute(text(f"EXPLAIN {statement.text}"), params)).scalars().all()
+    nodes = [line.strip().lstrip("-> ").split("  ")[0] for line in lines if "Scan" in line]
+    return "; ".join(nodes)
+
+
+async def setup(args):
+    engine = database.get_async_engine()
+    async with engine.begin() as conn:
+        for statement in SCHEMA:
+            await conn.execute(text(statement))
+    users = [str(uuid.uuid4()) for _ in range(args.other_users + 1)]
+    async with engine.begin() as conn:
+        await conn.execute(
+            text("INSERT INTO users.users (id, email, username, password_hash) VALUES (CAST(:id AS uuid), :email, :username, 'x')"),
+            [{"id": user_id, "email": f"{user_id}@bench", "username": f"bench-{user_id}"} for user_id in users]
+        )
+    chunks = max(1, args.content_kb * 1024 // 2 // 33)
+    started = time.perf_counter()
+    async with engine.begin() as conn:
+        await conn.execute(INSERT_DECKS, {"user_id": users[0], "count": args.decks, "chunks": chunks})
+        for user_id in users[1:]:
+            await conn.execute(INSERT_DECKS, {"user_id": user_id, "count": args.other_decks, "chunks": chunks})
+    async with engine.connect() as conn:
+        await conn.execute(text("ANALYZE presentations.presentations"))
+        size = (await conn.execute(text("SELECT pg_size_pretty(pg_total_relation_size('presentations.presentations'))"))).scalar()
+    print(
+        f"{args.decks} decks for one user, {args.other_users} x {args.other_decks} for others, "
+        f"~{args.content_kb} KB of content + slides each; table {size}, loaded in {time.perf_counter() - started:.0f}s"
+    )
+    return users
+
+
+async def migrate():
+    # CREATE INDEX CONCURRENTLY can't run inside a transaction
+    engine = database.get_async_engine()
+    with open(MIGRATION) as f:
+        statements = [
+            statement.strip() for statement in f.read().split(";")
+            if statement.strip() and not all(line.startswith("--") for line in statement.strip().splitlines())
+        ]
+    started = time.perf_counter()
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        for statement in statements:
+            await conn.execute(text(statement))
+    print(f"\napplied {os.path.basename(MIGRATION)} in {time.perf_counter() - started:.1f}s")
+
+
+async def restore_old_indexes():
+    async with database.get_async_engine().begin() as conn:
+        await conn.execute(text("DROP INDEX IF EXISTS presentations.idx_presentations_user_created"))
+        await conn.execute(text("DROP INDEX IF EXISTS presentations.idx_presentations_search_trgm"))
+        await conn.execute(text("CREATE INDEX IF NOT EXISTS idx_presentations_user_id ON presentations.presentations(user_id)"))
+
+
+async def router_timings(user_id, args):
+    import fakeredis
+    from fastapi import FastAPI
+
+    app = FastAPI()
+    app.include_router(presentations.router, prefix="/api/presentations")
+    app.dependency_overrides[presentations.get_current_user] = lambda: {"id": user_id}
+    app.redis = fakeredis.FakeAsyncRedis(decode_responses=True)
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        async def median(headers=None, expect=200):
+            samples = []
+            for _ in range(args.repeat):
+                started = time.perf_counter()
+                response = await client.get("/api/presentations", headers=headers or {})
+                samples.append((time.perf_counter() - started) * 1000)
+                assert response.status_code == expect, response.status_code
+            return statistics.median(samples)
+
+        started = time.perf_counter()
+        first = await client.get("/api/presentations")
+        cold = (time.perf_counter() - started) * 1000
+        cached = await median()
+        not_modified = await median({"If-None-Match": first.headers["etag"]}, expect=304)
+
+        # Walk every page with the cursor, as an infinite scroll would
+        pages, cursor, walk_started = 0, None, time.perf_counter()
+        while True:
+            response = await client.get("/api/presentations", params={"limit": 100, **({"cursor": cursor} if cursor else {})})
+            pages += 1
+            cursor = response.json()["next_cursor"]
+            if not cursor:
+                break
+        walked = time.perf_counter() - walk_started
+
+    print(
+        f"router first page: {cold:.1f} ms cold, {cached:.2f} ms from Redis, {not_modified:.2f} ms as 304 "
+        f"({len(first.content)} byte body)\n"
+        f"router walked all {pages} pages of 100 by cursor in {walked * 1000:.0f} ms ({walked * 1000 / pages:.1f} ms/page)"
+    )
+
+
+async def main_async(args):
+    settings.database_url = args.database_url
+    users = await setup(args)
+    user_id = users[0]
+    engine = database.get_async_engine()
+    deep = args.decks // 2
+    try:
+        await restore_old_indexes()
+        async with engine.connect() as conn:
+            print("\nbefore (01 indexes only, SELECT *, OFFSET):")
+            for label, offset in (("first page", 0), (f"page at row {deep}", deep)):
+                params = {"user_id": user_id, "limit": 20, "offset": offset}
+                ms, _ = await timed(conn, NAIVE_PAGE, params, args.repeat)
+                print(f"  {label:<22} {ms:8.2f} ms   {await plan(conn, NAIVE_PAGE, params)}")
+            for query in args.search:
+                params = {"user_id": user_id, "limit": 20, "pattern": f"%{query}%"}
+                ms, _ = await timed(conn, NAIVE_SEARCH, params, args.repeat)
+                print(f"  search {query!r:<15} {ms:8.2f} ms   {await plan(conn, NAIVE_SEARCH, params)}")
+
+        await migrate()
+        async with engine.connect() as conn:
+            print("after (projected columns, keyset, trigram index):")
+            params = {"user_id": user_id, "limit": 21}
+            ms, _ = await timed(conn, presentations.FIRST_PAGE, params, args.repeat)
+            print(f"  {'first page':<22} {ms:8.2f} ms   {await plan(conn, presentations.FIRST_PAGE, params)}")
+            anchor = (await conn.execute(
+                text("SELECT created_at, id FROM presentations.presentations WHERE user_id = CAST(:user_id AS uuid) "
+                     "ORDER BY created_at DESC, id DESC OFFSET :offset LIMIT 1"),
+                {"user_id": user_id, "offset": deep - 1}
+            )).fetchone()
+            params = {"user_id": user_id, "limit": 21, "created_at": anchor.created_at, "id": str(anchor.id)}
+            ms, _ = await timed(conn, presentations.NEXT_PAGE, params, args.repeat)
+            print(f"  {f'page at row {deep}':<22} {ms:8.2f} ms   {await plan(conn, presentations.NEXT_PAGE, params)}")
+            for query in args.search:
+                params = {"user_id": user_id, "limit": 21, "pattern": f"%{query}%"}
+                ms, _ = await timed(conn, presentations.SEARCH_FIRST_PAGE, params, args.repeat)
+                print(
+                    f"  search {query!r:<15} {ms:8.2f} ms   "
+                    f"{await plan(conn, presentations.SEARCH_FIRST_PAGE, params)}"
+                )
+        print()
+        await router_timings(user_id, args)
+    finally:
+        async with engine.begin() as conn:
+            await conn.execute(text("DELETE FROM users.users WHERE email LIKE '%@bench'"))
+        await database.close_db()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark presentation listing and search")
+    parser.add_argument("--database-url", default=os.environ.get("DATABASE_URL"), required="DATABASE_URL" not in os.environ)
+    parser.add_argument("--decks", type=int, default=10000)
+    parser.add_argument("--other-users", type=int, default=20)
+    parser.add_argument("--other-decks", type=int, default=500)
+    parser.add_argument("--content-kb", type=int, default=32)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--search", nargs="*", default=["roadmap 12", "retro", "4a7b"])
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+"""
+Task progress write benchmark.
+
+`--tasks` tasks run at once, each reporting progress `--steps` times with
+`--step-ms` of work between reports, then completing. They report either
+with one UPDATE per report (what every worker would do on its own) or
+through ProgressReporter's write-behind buffer. The script counts
+statements, rows rewritten and time spent in transactions.
+
+Needs a Postgres to write to. The script creates tasks.processing_tasks
+(with its updated_at trigger) if it is missing, and deletes its own rows
+afterwards. Redis is used for live reads when --redis-url is given,
+otherwise an in-process fakeredis.
+
+    python scripts/bench-progress.py --database-url postgresql://postgres@localhost:5432/ppt_generator
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+import uuid
+
+import redis.asyncio as redis
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from backend.shared.database import ProgressReporter
+
+SCHEMA = [
+    "CREATE SCHEMA IF NOT EXISTS tasks",
+    """
+    CREATE TABLE IF NOT EXISTS tasks.processing_tasks (
+        id UUID PRIMARY KEY,
+        task_type VARCHAR(100) NOT NULL,
+        status VARCHAR(50) DEFAULT 'pending',
+        progress INTEGER DEFAULT 0 CHECK (progress >= 0 AND progress <= 100),
+        input_data JSONB NOT NULL,
+        result_data JSONB,
+        error_message TEXT,
+        started_at TIMESTAMP WITH TIME ZONE,
+        completed_at TIMESTAMP WITH TIME ZONE,
+        created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+        updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+    )
+    """,
+    """
+    CREATE OR REPLACE FUNCTION update_updated_at_column()
+    RETURNS TRIGGER AS $$
+    BEGIN
+        NEW.updated_at = NOW();
+        RETURN NEW;
+    END;
+    $$ language 'plpgsql'
+    """,
+    """
+    DO $$ BEGIN
+        CREATE TRIGGER update_tasks_updated_at BEFORE UPDATE ON tasks.processing_tasks
+        FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
+    EXCEPTION WHEN duplicate_object THEN NULL;
+    END $$
+    """
+]
+
+DIRECT_UPDATE = text("""
+    UPDATE tasks.processing_tasks
+    SET status = CAST(:status AS varchar), progress = :progress,
+        started_at = COALESCE(started_at, NOW()),
+        completed_at = CASE WHEN CAST(:status AS varchar) = 'completed' THEN NOW() ELSE completed_at END
+    WHERE id = CAST(:id AS uuid)
+""")
+
+
+class TimedEngine:
+    """Counts statements and rows, and times them, for whichever writer is benchmarked"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.statements = 0
+        self.rows = 0
+        self.seconds = 0.0
+
+    def begin(self):
+        return _TimedTransaction(self)
+
+
+class _TimedTransaction:
+    def __init__(self, timed):
+        self.timed = timed
+
+    async def __aenter__(self):
+        self.started = time.perf_counter()
+        self.context = self.timed.engine.begin()
+        self.conn = await self.context.__aenter__()
+        return self
+
+    async def execute(self, statement, parameters=None):
+        result = await self.conn.execute(statement, parameters)
+        self.timed.statements += 1
+        self.timed.rows += result.rowcount
+        return result
+
+    async def __aexit__(self, *exc):
+        try:
+            return await self.context.__aexit__(*exc)
+        finally:
+            self.timed.seconds += time.perf_counter() - self.started
+
+
+async def create_tasks(engine, count):
+    ids = [str(uuid.uuid4()) for _ in range(count)]
+    async with engine.begin() as conn:
+        await conn.execute(
+            text("INSERT INTO tasks.processing_tasks (id, task_type, input_data) VALUES (CAST(:id AS uuid), 'bench', '{}')"),
+            [{"id": task_id} for task_id in ids]
+        )
+    return ids
+
+
+async def run(engine, redis_client, args, buffered):
+    ids = await create_tasks(engine, args.tasks)
+    timed = TimedEngine(engine)
+    reporter = ProgressReporter(timed, redis_client, flush_interval=args.flush_interval) if buffered else None
+    if reporter:
+        reporter.start()
+
+    async def direct(task_id, progress, status):
+        async with timed.begin() as conn:
+            await conn.execute(DIRECT_UPDATE, {"id": task_id, "progress": progress, "status": status})
+
+    async def task(task_id):
+        for step in range(args.steps):
+            await asyncio.sleep(args.step_ms / 1000)
+            progress = int(100 * step / args.steps)
+            if reporter:
+                await reporter.report(task_id, progress=progress, status="processing")
+            else:
+                await direct(task_id, progress, "processing")
+        if reporter:
+            await reporter.report(task_id, progress=100, status="completed", result={"slides": 12})
+        else:
+            await direct(task_id, 100, "completed")
+
+    started = time.perf_counter()
+    await asyncio.gather(*(task(task_id) for task_id in ids))
+    if reporter:
+        await reporter.shutdown()
+    elapsed = time.perf_counter() - started
+
+    async with engine.connect() as conn:
+        completed = (await conn.execute(
+            text("SELECT count(*) FROM tasks.processing_tasks WHERE id = ANY(CAST(:ids AS uuid[])) "
+                 "AND status = 'completed' AND progress = 100"),
+            {"ids": ids}
+        )).scalar()
+    async with engine.begin() as conn:
+        await conn.execute(text("DELETE FROM tasks.processing_tasks WHERE task_type = 'bench'"))
+
+    reports = args.tasks * (args.steps + 1)
+    label = "write-behind" if buffered else "per report  "
+    print(
+        f"{label}  {elapsed:5.2f}s  {reports / elapsed:7.0f} reports/s  "
+        f"{timed.statements:6d} statements ({timed.statements / elapsed:6.0f}/s)  "
+        f"{timed.rows:6d} rows rewritten  {timed.seconds:7.2f}s in transactions (summed)  "
+        f"completed {completed}/{args.tasks}"
+    )
+    if reporter:
+        print(f"              {reporter.stats()}")
+
+
+async def main_async(args):
+    engine = create_async_engine(
+        args.database_url.replace("postgresql://", "postgresql+asyncpg://"),
+        pool_size=args.pool_size
+    )
+    async with engine.begin() as conn:
+        for statement in SCHEMA:
+            await conn.execute(text(statement))
+
+    if args.redis_url:
+        redis_client = redis.from_url(args.redis_url, decode_responses=True)
+    else:
+        import fakeredis
+        redis_client = fakeredis.FakeAsyncRedis(decode_responses=True)
+
+    print(
+        f"{args.tasks} tasks x {args.steps} progress reports every {args.step_ms:.0f} ms, "
+        f"flush interval {args.flush_interval}s, {args.pool_size} connections"
+    )
+    await run(engine, redis_client, args, buffered=False)
+    await run(engine, redis_client, args, buffered=True)
+    await redis_client.aclose()
+    await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark write-behind task progress")
+    parser.add_argument("--database-url", default=os.environ.get("DATABASE_URL"), required="DATABASE_URL" not in os.environ)
+    parser.add_argument("--redis-url")
+    parser.add_argument("--tasks", type=int, default=200)
+    parser.add_argument("--steps", type=int, default=50)
+    parser.add_argument("--step-ms", type=float, default=20.0)
+    parser.add_argument("--flush-interval", type=float, default=0.5)
+    parser.add_argument("--pool-size", type=int, default=10)
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
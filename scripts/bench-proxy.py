@@ -0,0 +1,294 @@
+"""
+Gateway proxy benchmark.
+
+Starts stand-in services and a gateway app on local ports, then:
+
+  1. isolation: while `--slow` requests hang on a slow ai-generator, time
+     calls to a fast renderer, first through one shared client with 100
+     connections (the old app.http_client), then through per-service
+     proxies (app.routers.proxy)
+  2. streaming: push a `--upload-mb` upload and pull an equally large
+     download through the proxy, recording process RSS growth
+  3. identity headers: a client's own X-User-ID and X-Forwarded-* must be
+     replaced by the gateway's, never sent alongside them; exits with
+     status 1 if one reaches the service
+  4. circuit breaker: stop the renderer and count how quickly calls are
+     shed instead of each waiting on a connection attempt
+
+    python scripts/bench-proxy.py --slow 150 --fast 200
+"""
+import argparse
+import asyncio
+import os
+import socket
+import statistics
+import sys
+import threading
+import time
+
+import httpx
+import uvicorn
+from fastapi import FastAPI, Request
+from starlette.responses import StreamingResponse
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend", "gateway"))
+
+from app.routers import proxy as proxy_router
+from app.routers.auth import get_current_user
+from app.services.proxy import ServiceConfig, ServiceProxies
+from app.services.registry import ServiceRegistry
+
+CHUNK = 64 * 1024
+FAST_WORKERS = 10
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def current_rss_mb() -> float:
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024
+
+
+class Server:
+    """uvicorn on a background thread"""
+
+    def __init__(self, app):
+        self.port = free_port()
+        self.server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=self.port, log_level="error"))
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def start(self):
+        self.thread.start()
+        while not self.server.started:
+            time.sleep(0.01)
+        return self
+
+    def stop(self):
+        self.server.should_exit = True
+        self.thread.join()
+
+
+def service_app(delay: float, health_delay: float = 0.0) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/health")
+    async def health():
+        await asyncio.sleep(health_delay)
+        return {"status": "healthy"}
+
+    @app.get("/work")
+    async def work():
+        await asyncio.sleep(delay)
+        return {"ok": True}
+
+    @app.post("/upload")
+    async def upload(request: Request):
+        size = 0
+        async for chunk in request.stream():
+            size += len(chunk)
+        return {"size": size}
+
+    @app.get("/headers")
+    async def headers(request: Request):
+        return [[key.decode("latin-1"), value.decode("latin-1")] for key, value in request.scope["headers"]]
+
+    @app.get("/download/{size}")
+    async def download(size: int):
+        async def body():
+            chunk = b"x" * CHUNK
+            for _ in range(size // CHUNK):
+                yield chunk
+        return StreamingResponse(body(), media_type="application/octet-stream")
+
+    return app
+
+
+def gateway_app(urls: dict, pool_timeout: float) -> FastAPI:
+    app = FastAPI()
+    app.dependency_overrides[get_current_user] = lambda: {"id": "bench-user"}
+    app.include_router(proxy_router.router, prefix="/api/services")
+    # The previous setup: one client shared by every service
+    app.shared_client = httpx.AsyncClient(
+        timeout=httpx.Timeout(30.0),
+        limits=httpx.Limits(max_keepalive_connections=20, max_connections=100)
+    )
+    app.registry = ServiceRegistry(
+        {name: [url] for name, (url, _) in urls.items()}, app.shared_client,
+        failure_threshold=5, open_seconds=30.0
+    )
+    app.proxies = ServiceProxies(
+        (
+            ServiceConfig(name=name, max_connections=connections, pool_timeout=pool_timeout)
+            for name, (_, connections) in urls.items()
+        ),
+        app.registry
+    )
+    app.urls = urls
+
+    @app.get("/shared/{service}/{path:path}")
+    async def shared(service: str, path: str):
+        response = await app.shared_client.get(f"{app.urls[service][0]}/{path}")
+        return response.json()
+
+    return app
+
+
+async def isolation(client, gateway, prefix, slow, fast):
+    async def slow_call():
+        try:
+            response = await client.get(f"{gateway}{prefix}/ai_generator/work")
+            return response.status_code
+        except httpx.HTTPError:
+            return 0
+
+    slow_tasks = [asyncio.create_task(slow_call()) for _ in range(slow)]
+    await asyncio.sleep(0.3)
+
+    latencies = []
+    remaining = [fast]
+
+    async def fast_worker():
+        while remaining[0] > 0:
+            remaining[0] -= 1
+            started = time.perf_counter()
+            response = await client.get(f"{gateway}{prefix}/presentation_renderer/work")
+            response.raise_for_status()
+            latencies.append(time.perf_counter() - started)
+
+    await asyncio.gather(*(fast_worker() for _ in range(FAST_WORKERS)))
+    statuses = await asyncio.gather(*slow_tasks)
+    latencies.sort()
+    return {
+        "fast_p50_ms": statistics.median(latencies) * 1000,
+        "fast_p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+        "slow_ok": statuses.count(200),
+        "slow_shed": statuses.count(503)
+    }
+
+
+async def main_async(args):
+    slow = Server(service_app(args.slow_seconds)).start()
+    fast = Server(service_app(0.0)).start()
+    app = gateway_app({
+        "ai_generator": (slow.url, args.ai_connections),
+        "presentation_renderer": (fast.url, 40)
+    }, args.pool_timeout)
+    gateway = Server(app).start()
+
+    limits = httpx.Limits(max_connections=1000, max_keepalive_connections=1000)
+    async with httpx.AsyncClient(timeout=60.0, limits=limits) as client:
+        print(
+            f"{args.slow} requests to a {args.slow_seconds}s ai-generator, "
+            f"{args.fast} to a fast renderer meanwhile from {FAST_WORKERS} workers"
+        )
+        runs = (("no slow load   ", "/api/services", 0), ("shared client  ", "/shared", args.slow),
+                ("per-service    ", "/api/services", args.slow))
+        for label, prefix, slow_count in runs:
+            result = await isolation(client, gateway.url, prefix, slow_count, args.fast)
+            print(
+                f"{label} fast p50 {result['fast_p50_ms']:7.1f} ms  p99 {result['fast_p99_ms']:7.1f} ms  "
+                f"slow ok {result['slow_ok']}  shed 503 {result['slow_shed']}"
+            )
+
+        size = args.upload_mb * 1024 * 1024
+        rss_before = current_rss_mb()
+        peak = [rss_before]
+
+        async def sample():
+            while True:
+                peak[0] = max(peak[0], current_rss_mb())
+                await asyncio.sleep(0.01)
+
+        sampler = asyncio.create_task(sample())
+
+        async def upload_body():
+            chunk = b"u" * CHUNK
+            for _ in range(size // CHUNK):
+                yield chunk
+
+        started = time.perf_counter()
+        response = await client.post(
+            f"{gateway.url}/api/services/presentation_renderer/upload",
+            content=upload_body(), headers={"Content-Length": str(size)}
+        )
+        uploaded = response.json()["size"]
+        upload_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        downloaded = 0
+        async with client.stream("GET", f"{gateway.url}/api/services/presentation_renderer/download/{size}") as response:
+            async for chunk in response.aiter_raw():
+                downloaded += len(chunk)
+        download_seconds = time.perf_counter() - started
+        sampler.cancel()
+        print(
+            f"\n{args.upload_mb} MB upload {uploaded == size} in {upload_seconds:.2f}s, "
+            f"download {downloaded == size} in {download_seconds:.2f}s; "
+            f"process RSS +{peak[0] - rss_before:.1f} MB (client, gateway and services share the process)"
+        )
+
+        response = await client.get(
+            f"{gateway.url}/api/services/presentation_renderer/headers",
+            headers={
+                "X-User-ID": "victim", "x-forwarded-for": "10.6.6.6",
+                "X-Forwarded-Host": "evil.example", "X-Forwarded-Proto": "https"
+            }
+        )
+        received = {}
+        for key, value in response.json():
+            received.setdefault(key.lower(), []).append(value)
+        # Each exactly once; uvicorn trusts X-Forwarded-For/Proto from loopback, so only
+        # the values the gateway takes from nowhere else are compared
+        identity_ok = (
+            all(len(received.get(name, ())) == 1 for name in proxy_router.GATEWAY_HEADERS)
+            and received["x-user-id"] == ["bench-user"]
+            and received["x-forwarded-host"] == [gateway.url.split("//")[1]]
+        )
+        print(
+            f"\nForged identity headers: {'replaced' if identity_ok else 'LEAKED'} "
+            f"(service saw X-User-ID {received.get('x-user-id')}, X-Forwarded-Host {received.get('x-forwarded-host')})"
+        )
+
+        fast.stop()
+        started = time.perf_counter()
+        statuses = []
+        for _ in range(50):
+            response = await client.get(f"{gateway.url}/api/services/presentation_renderer/work")
+            statuses.append(response.status_code)
+        elapsed = time.perf_counter() - started
+        print(
+            f"\nRenderer down: 50 calls in {elapsed * 1000:.0f} ms, "
+            f"502 {statuses.count(502)}  503 (circuit open) {statuses.count(503)}"
+        )
+        print(f"Circuit: {app.registry.replicas('presentation_renderer')[0].breaker.stats()}")
+
+    await app.proxies.aclose()
+    await app.shared_client.aclose()
+    gateway.stop()
+    slow.stop()
+    return identity_ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the gateway's per-service proxy")
+    parser.add_argument("--slow", type=int, default=150)
+    parser.add_argument("--fast", type=int, default=200)
+    parser.add_argument("--slow-seconds", type=float, default=3.0)
+    parser.add_argument("--ai-connections", type=int, default=20)
+    parser.add_argument("--pool-timeout", type=float, default=1.0)
+    parser.add_argument("--upload-mb", type=int, default=50)
+    args = parser.parse_args()
+    if not asyncio.run(main_async(args)):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""
+Rate limiter benchmark.
+
+1. overhead: per-request latency of a trivial ASGI app with and without
+   RateLimitMiddleware, for admitted requests (one Redis round trip) and
+   for clients already over their limit (rejected by the local pre-filter)
+2. correctness: several worker processes, each with its own limiter and
+   Redis connection, hammer one user's key. Admissions must match the
+   limit however the requests are spread over the workers.
+
+Pass --redis-url for a real Redis. Without it, the script starts fakeredis'
+TCP server, which runs the same Lua script but is far slower than Redis,
+so its round-trip numbers are an upper bound.
+
+    python scripts/bench-ratelimit.py --requests 5000 --workers 4
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import socket
+import statistics
+import sys
+import threading
+import time
+
+import redis.asyncio as redis
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend", "gateway"))
+
+from app.middleware.rate_limit import GCRA_SCRIPT, RateLimit, RateLimiter, RateLimitMiddleware
+
+
+def start_fake_redis() -> str:
+    from fakeredis import TcpFakeServer
+
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    server = TcpFakeServer(("127.0.0.1", port), server_type="redis")
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"redis://127.0.0.1:{port}"
+
+
+class App:
+    """Stand-in for the gateway app: holds .redis like the real one"""
+
+    def __init__(self, redis_client):
+        self.redis = redis_client
+
+    async def __call__(self, scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"ok"})
+
+
+def scope_for(app, client_ip):
+    return {
+        "type": "http", "path": "/api/presentations", "method": "GET", "app": app,
+        "headers": [(b"host", b"gateway")], "client": (client_ip, 40000)
+    }
+
+
+async def timed(asgi, scope, count):
+    statuses = []
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            statuses.append(message["status"])
+
+    latencies = []
+    for _ in range(count):
+        started = time.perf_counter()
+        await asgi(scope, receive, send)
+        latencies.append(time.perf_counter() - started)
+    latencies.sort()
+    return latencies, statuses
+
+
+def summary(latencies):
+    return (
+        f"p50 {statistics.median(latencies) * 1e6:7.1f} us  "
+        f"p99 {latencies[int(len(latencies) * 0.99) - 1] * 1e6:7.1f} us"
+    )
+
+
+async def overhead(redis_url, requests):
+    client = redis.from_url(redis_url, decode_responses=True)
+    await client.flushdb()
+    # fakeredis' TCP server drops the connection on the NOSCRIPT reply that makes redis-py fall back to EVAL
+    await client.script_load(GCRA_SCRIPT)
+    app = App(client)
+    limiter = RateLimiter({"default": RateLimit(10 ** 9, 60.0)}, RateLimit(10 ** 9, 60.0))
+    middleware = RateLimitMiddleware(app, limiter=limiter)
+
+    await timed(middleware, scope_for(app, "10.0.0.1"), 100)  # warm up the connection and script cache
+    base, _ = await timed(app, scope_for(app, "10.0.0.1"), requests)
+    admitted, statuses = await timed(middleware, scope_for(app, "10.0.0.2"), requests)
+    assert set(statuses) == {200}
+
+    # A client far over a small limit: after the first denial Redis is never asked
+    tight = RateLimitMiddleware(app, limiter=RateLimiter({"default": RateLimit(5, 60.0)}, RateLimit(5, 60.0)))
+    rejected, statuses = await timed(tight, scope_for(app, "10.0.0.3"), requests)
+    print(f"no middleware          {summary(base)}")
+    print(f"admitted (Redis)       {summary(admitted)}")
+    print(f"over limit (local)     {summary(rejected)}  "
+          f"({statuses.count(429)} x 429, Redis calls {tight.limiter.redis_calls})")
+    await client.aclose()
+
+
+def hammer(redis_url, limit, duration, barrier, results):
+    async def run():
+        client = redis.from_url(redis_url, decode_responses=True)
+        limiter = RateLimiter({"default": limit}, RateLimit(10 ** 9, 60.0))
+        keys = limiter.keys_for("default", "shared-user", "10.0.0.9")
+        await client.ping()
+        barrier.wait()
+        allowed = rejected = 0
+        deadline = time.monotonic() + duration
+        while time.monotonic() < deadline:
+            decision = await limiter.check(client, keys)
+            if decision.allowed:
+                allowed += 1
+            else:
+                rejected += 1
+                await asyncio.sleep(0.001)
+        await client.aclose()
+        results.put((allowed, rejected, limiter.redis_calls))
+
+    asyncio.run(run())
+
+
+def correctness(redis_url, workers, limit, duration):
+    context = multiprocessing.get_context("spawn")
+    barrier = context.Barrier(workers + 1)
+    results = context.Queue()
+    processes = [
+        context.Process(target=hammer, args=(redis_url, limit, duration, barrier, results))
+        for _ in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    barrier.wait()
+    started = time.monotonic()
+    outcomes = [results.get() for _ in processes]
+    elapsed = time.monotonic() - started
+    for process in processes:
+        process.join()
+
+    allowed = sum(outcome[0] for outcome in outcomes)
+    calls = sum(outcome[2] for outcome in outcomes)
+    attempts = allowed + sum(outcome[1] for outcome in outcomes)
+    # Burst of `count`, then one admission per interval
+    expected = limit.count + int(elapsed / limit.interval)
+    print(
+        f"\n{workers} workers, limit {limit.count}/{int(limit.period)}s, {elapsed:.1f}s: "
+        f"{attempts} attempts, {allowed} admitted (at most {expected}), "
+        f"per worker {[outcome[0] for outcome in outcomes]}, {calls} Redis calls"
+    )
+    print("correct" if limit.count <= allowed <= expected else "WRONG")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the gateway rate limiter")
+    parser.add_argument("--redis-url")
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--limit", default="200/minute")
+    parser.add_argument("--duration", type=float, default=3.0)
+    args = parser.parse_args()
+
+    redis_url = args.redis_url or start_fake_redis()
+    print(f"Redis: {redis_url}{'' if args.redis_url else ' (fakeredis)'}")
+    asyncio.run(overhead(redis_url, args.requests))
+    correctness(redis_url, args.workers, RateLimit.parse(args.limit), args.duration)
+
+
+if __name__ == "__main__":
+    main()
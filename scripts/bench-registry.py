@@ -0,0 +1,139 @@
+"""
+Service registry benchmark.
+
+Runs several ai-generator stand-ins with different latencies (plus one that
+is down) and sends load through ServiceProxy using random choice,
+least-outstanding and EWMA balancing. It then times /health/detailed-style
+answers from the registry against the old sequential on-demand probing.
+
+    python scripts/bench-registry.py --requests 600 --concurrency 30
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+import httpx
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend", "gateway"))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from app.services.proxy import ServiceConfig, ServiceProxy, ServiceUnavailable
+from app.services.registry import ServiceRegistry
+
+bench_proxy = __import__("bench-proxy")
+
+
+class RandomRegistry(ServiceRegistry):
+    """Baseline: every candidate scores the same, so power of two choices is a random pick"""
+
+    def _score(self, replica):
+        return 0
+
+
+async def drive(registry, proxy, requests, concurrency):
+    latencies, errors = [], 0
+    remaining = [requests]
+
+    async def worker():
+        nonlocal errors
+        while remaining[0] > 0:
+            remaining[0] -= 1
+            started = time.perf_counter()
+            try:
+                response = await proxy.send("GET", "/work")
+                await response.aread()
+                await response.aclose()
+                if response.status_code != 200:
+                    errors += 1
+                    continue
+            except ServiceUnavailable:
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "mean_ms": statistics.fmean(latencies) * 1000,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+        "rps": len(latencies) / elapsed,
+        "errors": errors,
+        "split": [replica.requests for replica in registry.replicas("ai_generator")]
+    }
+
+
+async def main_async(args):
+    delays = [float(delay) for delay in args.delays.split(",")]
+    servers = [bench_proxy.Server(bench_proxy.service_app(delay)).start() for delay in delays]
+    dead = f"http://127.0.0.1:{bench_proxy.free_port()}"
+    urls = [server.url for server in servers] + [dead]
+    print(f"ai-generator replicas: {', '.join(f'{d * 1000:.0f}ms' for d in delays)} and one down; "
+          f"{args.requests} requests, {args.concurrency} concurrent")
+
+    async with httpx.AsyncClient() as probe_client:
+        for label, registry_class, balancer in (
+            ("random           ", RandomRegistry, "least_outstanding"),
+            ("least outstanding", ServiceRegistry, "least_outstanding"),
+            ("ewma             ", ServiceRegistry, "ewma"),
+        ):
+            registry = registry_class({"ai_generator": urls}, probe_client, balancer=balancer, probe_interval=0.5)
+            await registry.probe_all()
+            await registry.probe_all()  # two failed probes take the dead replica out
+            registry.start()
+            proxy = ServiceProxy(ServiceConfig(name="ai_generator", max_connections=200), registry)
+            result = await drive(registry, proxy, args.requests, args.concurrency)
+            await registry.stop()
+            await proxy.aclose()
+            print(
+                f"{label}  mean {result['mean_ms']:6.1f} ms  p50 {result['p50_ms']:6.1f} ms  p99 {result['p99_ms']:6.1f} ms  "
+                f"{result['rps']:6.1f} req/s  errors {result['errors']}  split {result['split']}"
+            )
+
+        # Health: cached registry state against on-demand sequential probes
+        hang = bench_proxy.Server(bench_proxy.service_app(0.0, health_delay=30.0)).start()
+
+        async def sequential_health():
+            for url in urls + [hang.url]:
+                try:
+                    await probe_client.get(f"{url}/health", timeout=5.0)
+                except httpx.HTTPError:
+                    pass
+
+        started = time.perf_counter()
+        await sequential_health()
+        sequential = time.perf_counter() - started
+
+        registry = ServiceRegistry({"ai_generator": urls, "hanging": [hang.url]}, probe_client, probe_timeout=2.0)
+        await registry.probe_all()
+        await registry.probe_all()
+        started = time.perf_counter()
+        for _ in range(1000):
+            health = registry.health()
+        cached = (time.perf_counter() - started) / 1000
+        print(
+            f"\nhealth with a hanging replica: sequential probes {sequential * 1000:.0f} ms, "
+            f"registry snapshot {cached * 1e6:.1f} us "
+            f"(ai_generator {health['ai_generator']['status']}, hanging {health['hanging']['status']})"
+        )
+
+    for server in servers:
+        server.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark replica load balancing and cached health")
+    parser.add_argument("--requests", type=int, default=600)
+    parser.add_argument("--concurrency", type=int, default=30)
+    parser.add_argument("--delays", default="0.02,0.02,0.2", help="comma-separated replica latencies in seconds")
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Batching benchmark for the AI generator's model scheduler.
+
+Submits a mix of interactive and batch requests to a fake batching backend
+(fixed cost per call plus a small cost per prompt) and compares throughput
+and latency with batching against one backend call per request.
+
+    python scripts/bench-scheduler.py --requests 1000 --concurrency 4
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend", "ai-generator"))
+
+from app.models.backends import FakeModelBackend
+from app.services.scheduler import BatchScheduler, ModelLimits, Priority
+
+PARAMS = [{"temperature": 0, "max_tokens": 128}, {"temperature": 0, "max_tokens": 512}]
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))] * 1000 if values else 0.0
+
+
+async def run(args, batched):
+    backend = FakeModelBackend(
+        lambda prompt: f"response to {prompt}",
+        max_batch_size=args.batch_size,
+        call_latency=args.call_latency,
+        per_item_latency=args.per_item_latency
+    )
+    limits = ModelLimits(
+        max_concurrency=args.concurrency,
+        max_batch_size=args.batch_size if batched else 1,
+        batch_window=args.window if batched else 0.0
+    )
+    scheduler = BatchScheduler({"qwen2.5": backend}, {"qwen2.5": limits})
+    scheduler.start()
+
+    rng = random.Random(3)
+    latencies = {Priority.INTERACTIVE: [], Priority.BATCH: []}
+
+    async def one(n):
+        priority = Priority.INTERACTIVE if rng.random() < args.interactive_share else Priority.BATCH
+        params = PARAMS[n % len(PARAMS)]
+        # Requests trickle in rather than arriving all at once
+        await asyncio.sleep(rng.random() * args.arrival_spread)
+        started = time.perf_counter()
+        await scheduler.submit("qwen2.5", f"slide bullets #{n}", params, priority)
+        latencies[priority].append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*[one(n) for n in range(args.requests)])
+    elapsed = time.perf_counter() - started
+    stats = scheduler.stats()["qwen2.5"]
+    await scheduler.stop()
+
+    label = "batched" if batched else "one call per request"
+    print(f"⚙️  {label}: {args.requests} requests in {elapsed:.2f}s ({args.requests / elapsed:.0f} req/s), "
+          f"{backend.batch_calls} backend calls, avg batch {stats['avg_batch_size']}")
+    for priority, values in latencies.items():
+        print(f"   {priority.name.lower():<12} p50={percentile(values, 50):.0f}ms  p99={percentile(values, 99):.0f}ms  (n={len(values)})")
+    return args.requests / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Model scheduler batching benchmark")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--window", type=float, default=0.01)
+    parser.add_argument("--call-latency", type=float, default=0.05)
+    parser.add_argument("--per-item-latency", type=float, default=0.004)
+    parser.add_argument("--interactive-share", type=float, default=0.2)
+    parser.add_argument("--arrival-spread", type=float, default=1.0, help="seconds over which requests arrive")
+    args = parser.parse_args()
+
+    unbatched = asyncio.run(run(args, batched=False))
+    batched = asyncio.run(run(args, batched=True))
+    print(f"\n🎯 Batching throughput gain: {batched / unbatched:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
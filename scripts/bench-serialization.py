@@ -0,0 +1,141 @@
+"""
+Serialization benchmark: size and encode/decode time per codec.
+
+Fixtures are slide decks in the shape the presentation renderer consumes
+(title slide, bulleted slides with speaker notes, charts with categories and
+series, explicit layouts), generated from a business vocabulary so the text
+compresses like real decks rather than like repeated strings. Smaller
+fixtures are a gateway user cache entry and a queued generation job.
+
+Each is encoded with stdlib json (what the services do today), json + zlib
+(the AI response cache), orjson, and shared Serializer envelopes.
+
+    python scripts/bench-serialization.py
+    python scripts/bench-serialization.py --slides 12 40 150 --seconds 0.5
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import uuid
+import zlib
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from backend.shared.schemas import Serializer, dumps_json, loads_json
+
+WORDS = (
+    "revenue margin growth customer pipeline roadmap quarter forecast churn retention market segment "
+    "enterprise pricing launch milestone hiring budget operating cost efficiency platform integration "
+    "partner channel region adoption engagement conversion funnel product feature release risk "
+    "compliance security infrastructure migration latency reliability team strategy investment "
+    "target baseline improvement analysis trend benchmark review initiative objective outcome"
+).split()
+LAYOUTS = ["title_and_content", "two_content", "title_only", "section_header"]
+
+
+def sentence(rng, words):
+    text = " ".join(rng.choice(WORDS) for _ in range(words))
+    return text[0].upper() + text[1:]
+
+
+def make_deck(slide_count, seed=7):
+    rng = random.Random(seed)
+    slides = [{"title": sentence(rng, 4), "subtitle": sentence(rng, 8), "layout": "title"}]
+    for index in range(1, slide_count):
+        slide = {
+            "title": sentence(rng, rng.randint(3, 7)),
+            "bullets": [sentence(rng, rng.randint(6, 16)) for _ in range(rng.randint(3, 6))],
+            "notes": " ".join(sentence(rng, rng.randint(10, 20)) + "." for _ in range(rng.randint(2, 5))),
+            "layout": rng.choice(LAYOUTS)
+        }
+        if index % 4 == 0:
+            categories = [f"Q{q} {2023 + year}" for year in range(2) for q in range(1, 5)]
+            slide["chart"] = {
+                "type": rng.choice(["bar", "line", "pie"]),
+                "title": sentence(rng, 4),
+                "categories": categories,
+                "series": [
+                    {"name": rng.choice(WORDS).title(), "values": [round(rng.uniform(10, 1000), 2) for _ in categories]}
+                    for _ in range(rng.randint(1, 3))
+                ]
+            }
+        slides.append(slide)
+    return {
+        "id": str(uuid.UUID(int=rng.getrandbits(128))),
+        "title": slides[0]["title"],
+        "theme": "professional",
+        "slide_count": slide_count,
+        "metadata": {"model": "generator-v2", "prompt_tokens": 1834, "generated_at": "2024-05-01T10:00:00+00:00"},
+        "slides": slides
+    }
+
+
+FIXTURES = {
+    "user cache entry": {
+        "id": str(uuid.uuid4()), "email": "ada@example.com", "username": "ada",
+        "first_name": "Ada", "last_name": "Lovelace", "is_active": True,
+        "created_at": datetime(2024, 1, 1, tzinfo=timezone.utc).isoformat()
+    },
+    "generation job": {
+        "id": str(uuid.uuid4()), "type": "ai_generation", "task_id": str(uuid.uuid4()), "attempt": 0,
+        "payload": {"prompt": sentence(random.Random(3), 60), "slide_count": 12, "theme": "professional",
+                    "chunk_hashes": [uuid.uuid4().hex * 2 for _ in range(8)]}
+    }
+}
+
+
+def codecs():
+    envelopes = [
+        ("json", "none"), ("json", "zstd"),
+        ("msgpack", "none"), ("msgpack", "zlib"), ("msgpack", "zstd")
+    ]
+    yield "stdlib json", lambda v: json.dumps(v).encode(), lambda b: json.loads(b)
+    yield "stdlib json + zlib", lambda v: zlib.compress(json.dumps(v).encode(), 6), lambda b: json.loads(zlib.decompress(b))
+    yield "orjson", dumps_json, loads_json
+    for codec, compression in envelopes:
+        serializer = Serializer(codec=codec, compression=compression)
+        yield f"envelope {codec} + {compression}", serializer.dumps, serializer.loads
+
+
+def per_call_us(function, argument, seconds):
+    calls, started = 0, time.perf_counter()
+    batch = 1
+    while True:
+        for _ in range(batch):
+            function(argument)
+        calls += batch
+        elapsed = time.perf_counter() - started
+        if elapsed >= seconds:
+            return elapsed / calls * 1e6
+        batch = min(batch * 2, 1000)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark shared serialization codecs")
+    parser.add_argument("--slides", type=int, nargs="*", default=[12, 40, 150])
+    parser.add_argument("--seconds", type=float, default=0.3, help="time spent per measurement")
+    args = parser.parse_args()
+
+    fixtures = dict(FIXTURES)
+    for count in args.slides:
+        fixtures[f"deck, {count} slides"] = make_deck(count)
+
+    for name, value in fixtures.items():
+        baseline = len(json.dumps(value).encode())
+        print(f"\n{name} ({baseline / 1024:.1f} KB as JSON)")
+        print(f"  {'codec':<26} {'bytes':>8} {'vs json':>8} {'encode us':>10} {'decode us':>10}")
+        for label, encode, decode in codecs():
+            data = encode(value)
+            assert decode(data) == value, label
+            print(
+                f"  {label:<26} {len(data):8d} {len(data) / baseline:7.0%} "
+                f"{per_call_us(encode, value, args.seconds):10.1f} {per_call_us(decode, data, args.seconds):10.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,580 @@
+"""
+Offline benchmark suite for the gateway's hot paths, compared against a baseline.
+
+Runs the real gateway app, lifespan included, in this process with
+stand-ins for everything it talks to:
+
+  Postgres     an in-memory store answering the statements the gateway
+               runs; any other statement fails loudly, so a new query on a
+               hot path is noticed here
+  Redis        fakeredis, with optional latency on every command
+  services     document-processor, ai-generator and presentation-renderer
+               stand-ins served by uvicorn on loopback ports in the same
+               event loop, so the gateway's proxy pools and sockets are real
+
+Latency can be injected into each stand-in. Scenarios:
+
+  login          POST /api/auth/login, bcrypt included
+  authenticated  GET /api/presentations (dashboard first page): auth, rate
+                 limit, user cache and the page cache
+  proxy          GET through /api/services/ai-generator against the same
+                 call made directly to the stand-in
+  upload         streamed POST /api/upload of --upload-mb files
+  generation     upload, process, generate and render through the gateway,
+                 as the frontend drives it
+
+Latencies are measured one request at a time and throughput with
+concurrent clients. Each metric is the median over --repeat runs. Metrics
+ending in _ms are better lower, the others (per second) better higher;
+proxy.direct_p50_ms times the stand-in alone and is never gated.
+
+Results go to --output as JSON and are compared with the baseline
+(scripts/bench-baseline.json). The script exits with status 1 when a metric
+is worse than the baseline by more than --tolerance (and, for _ms
+metrics, by more than --min-delta-ms). Baselines only compare on the same
+machine and settings; after an intended change, or on a new machine,
+record a new one:
+
+    python scripts/bench-suite.py
+    python scripts/bench-suite.py --scenarios proxy upload --output results.json
+    python scripts/bench-suite.py --update-baseline
+    python scripts/bench-suite.py --db-latency-ms 1 --redis-latency-ms 0.3 --baseline none
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import socket
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend", "gateway"))
+
+# Limits sized for real users would reject the benchmark's traffic; the limiter
+# itself stays in the request path
+for limit in ("RATE_LIMIT_DEFAULT", "RATE_LIMIT_GENERATE", "RATE_LIMIT_UPLOAD", "RATE_LIMIT_IP"):
+    os.environ[limit] = "1000000/second"
+
+import fakeredis
+import httpx
+import uvicorn
+from passlib.context import CryptContext
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+from app import main as gateway_main
+from app.core.config import settings
+from app.core.database import get_db
+from app.routers import auth, presentations
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench-baseline.json")
+SCENARIOS = ["login", "authenticated", "proxy", "upload", "generation"]
+EMAIL = "bench@pptgen.com"
+PASSWORD = "benchpassword123"
+USER_ID = "00000000-0000-0000-0000-000000000001"
+
+
+# Postgres stand-in
+
+class Row(SimpleNamespace):
+    @property
+    def _mapping(self):
+        return vars(self)
+
+
+class Result:
+    def __init__(self, rows):
+        self._rows = rows
+
+    def fetchone(self):
+        return self._rows[0] if self._rows else None
+
+    def fetchall(self):
+        return list(self._rows)
+
+
+class MemoryDatabase:
+    """The rows the benchmarked routes read and write, answered by statement"""
+
+    def __init__(self, password_hash: str, latency: float, decks: int = 60):
+        self.latency = latency
+        self.users = {
+            USER_ID: dict(
+                id=USER_ID, email=EMAIL, username="bench", password_hash=password_hash,
+                first_name="Bench", last_name="User", is_active=True
+            )
+        }
+        self.files = {}
+        now = datetime.now(timezone.utc)
+        self.presentations = [
+            Row(
+                id=str(uuid.UUID(int=index + 1)), title=f"Quarterly review {index}",
+                description="Revenue, pipeline and hiring against plan", theme="professional",
+                slide_count=12, status="completed", created_at=now - timedelta(hours=index),
+                updated_at=now - timedelta(hours=index)
+            )
+            for index in range(decks)
+        ]
+        self.statements = 0
+
+    def _user(self, **match):
+        for user in self.users.values():
+            if all(user[key] == value for key, value in match.items()):
+                return user
+        return None
+
+    def run(self, statement, params: dict) -> Result:
+        self.statements += 1
+        if statement is auth.USER_BY_ID:
+            user = self.users.get(params["user_id"])
+            return Result([Row(**{k: v for k, v in user.items() if k != "password_hash"})] if user else [])
+        if statement is auth.USER_BY_EMAIL:
+            user = self._user(email=params["email"])
+            return Result([Row(**user)] if user else [])
+        if statement is auth.UPDATE_PASSWORD_HASH:
+            self.users[str(params["user_id"])]["password_hash"] = params["password_hash"]
+            return Result([])
+        if statement is presentations.FIRST_PAGE:
+            return Result(self.presentations[:params["limit"]])
+
+        sql = " ".join(str(statement).split())
+        if "files.uploaded_files" in sql:
+            if sql.startswith("SELECT"):
+                stored = self.files.get(params["file_hash"])
+                return Result([stored] if stored else [])
+            if sql.startswith("INSERT"):
+                stored = Row(id=str(uuid.uuid4()), user_id=params["user_id"], upload_status=params["upload_status"])
+                self.files[params["file_hash"]] = stored
+                return Result([stored])
+        raise NotImplementedError(f"The stand-in database has no answer for: {sql[:120]}")
+
+
+class MemorySession:
+    def __init__(self, database: MemoryDatabase):
+        self.database = database
+
+    async def execute(self, statement, params=None):
+        if self.database.latency:
+            await asyncio.sleep(self.database.latency)
+        return self.database.run(statement, params or {})
+
+    async def commit(self):
+        pass
+
+    async def rollback(self):
+        pass
+
+
+# Redis stand-in
+
+class SlowFakeRedis(fakeredis.FakeAsyncRedis):
+    """fakeredis with a fixed delay on each command and script call (pipelines are not delayed)"""
+
+    latency = 0.0
+
+    async def execute_command(self, *args, **options):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return await super().execute_command(*args, **options)
+
+
+# Downstream service stand-ins
+
+def make_deck(slide_count: int) -> dict:
+    slides = [
+        {
+            "title": f"Slide {index}: pipeline and revenue against plan",
+            "bullets": [f"Point {point}: retention improved across the enterprise segment" for point in range(5)],
+            "notes": "Walk through the quarter, then the forecast and the hiring plan. " * 3,
+            "layout": "title_and_content"
+        }
+        for index in range(slide_count)
+    ]
+    return {"id": str(uuid.uuid4()), "title": slides[0]["title"], "theme": "professional", "slides": slides}
+
+
+def service_app(args) -> Starlette:
+    """One downstream service: health, an echo for proxy overhead and a pipeline stage"""
+    pptx_chunk = os.urandom(64 * 1024)
+
+    async def health(request: Request):
+        return JSONResponse({"status": "healthy"})
+
+    async def echo(request: Request):
+        return Response(b"x" * int(request.query_params.get("size", "1024")), media_type="application/octet-stream")
+
+    async def process(request: Request):
+        document = await request.json()
+        await asyncio.sleep(args.process_ms / 1000)
+        return JSONResponse({"file_id": document["file_id"], "pages": 12, "text": "Extracted document text. " * 400})
+
+    async def generate(request: Request):
+        prompt = await request.json()
+        await asyncio.sleep(args.generate_ms / 1000)
+        return JSONResponse(make_deck(prompt["slide_count"]))
+
+    async def render(request: Request):
+        deck = await request.json()
+        await asyncio.sleep(args.render_ms / 1000)
+        chunks = max(1, len(deck["slides"]) * args.slide_kb // 64)
+
+        async def body():
+            for _ in range(chunks):
+                yield pptx_chunk
+
+        return StreamingResponse(
+            body(), media_type="application/vnd.openxmlformats-officedocument.presentationml.presentation"
+        )
+
+    return Starlette(routes=[
+        Route("/health", health),
+        Route("/echo", echo),
+        Route("/process", process, methods=["POST"]),
+        Route("/generate", generate, methods=["POST"]),
+        Route("/render", render, methods=["POST"])
+    ])
+
+
+class StandInServer(uvicorn.Server):
+    def install_signal_handlers(self):
+        # Runs inside the benchmark's event loop, which keeps Ctrl-C
+        pass
+
+
+async def serve(app) -> StandInServer:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    # Accepted connections inherit it; without it small responses stall on delayed ACKs (~40 ms)
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    sock.bind(("127.0.0.1", 0))
+    server = StandInServer(uvicorn.Config(app, lifespan="off", log_level="warning", access_log=False))
+    server.url = f"http://127.0.0.1:{sock.getsockname()[1]}"
+    server.task = asyncio.create_task(server.serve(sockets=[sock]))
+    while not server.started:
+        await asyncio.sleep(0.01)
+    return server
+
+
+# Measurement
+
+def percentile_ms(values, pct: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))] * 1000
+
+
+def expect(response: httpx.Response, status_code: int = 200) -> httpx.Response:
+    if response.status_code != status_code:
+        raise RuntimeError(f"{response.request.method} {response.request.url.path}: {response.status_code} {response.text[:200]}")
+    return response
+
+
+async def drive(call, total: int, concurrency: int):
+    """Run `call` `total` times from `concurrency` clients; returns (latencies, elapsed seconds)"""
+    latencies = []
+    remaining = total
+
+    async def client():
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            started = time.perf_counter()
+            await call()
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(min(concurrency, total))))
+    return latencies, time.perf_counter() - started
+
+
+class Suite:
+    def __init__(self, args, gateway: httpx.AsyncClient, services: dict):
+        self.args = args
+        self.gateway = gateway
+        self.services = services
+        self.headers = {}
+
+    async def log_in(self):
+        response = expect(await self.gateway.post("/api/auth/login", json={"email": EMAIL, "password": PASSWORD}))
+        self.headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    async def login(self) -> dict:
+        async def call():
+            expect(await self.gateway.post("/api/auth/login", json={"email": EMAIL, "password": PASSWORD}))
+
+        sequential, _ = await drive(call, max(4, self.args.logins // 4), 1)
+        _, elapsed = await drive(call, self.args.logins, self.args.concurrency)
+        return {
+            "logins_per_s": self.args.logins / elapsed,
+            "p50_ms": percentile_ms(sequential, 50),
+            "p99_ms": percentile_ms(sequential, 99)
+        }
+
+    async def authenticated(self) -> dict:
+        async def call():
+            expect(await self.gateway.get("/api/presentations", headers=self.headers))
+
+        await drive(call, 20, 1)
+        sequential, _ = await drive(call, self.args.requests, 1)
+        _, elapsed = await drive(call, self.args.requests, self.args.concurrency)
+        return {
+            "requests_per_s": self.args.requests / elapsed,
+            "p50_ms": percentile_ms(sequential, 50),
+            "p99_ms": percentile_ms(sequential, 99)
+        }
+
+    async def proxy(self) -> dict:
+        path = f"/echo?size={self.args.echo_bytes}"
+        async with httpx.AsyncClient(base_url=self.services["ai_generator"].url) as direct_client:
+            async def direct():
+                expect(await direct_client.get(path))
+
+            async def proxied():
+                expect(await self.gateway.get("/api/services/ai-generator" + path, headers=self.headers))
+
+            await drive(direct, 20, 1)
+            await drive(proxied, 20, 1)
+            direct_latencies, _ = await drive(direct, self.args.requests, 1)
+            proxied_latencies, _ = await drive(proxied, self.args.requests, 1)
+            _, elapsed = await drive(proxied, self.args.requests, self.args.concurrency)
+        return {
+            "proxied_per_s": self.args.requests / elapsed,
+            "direct_p50_ms": percentile_ms(direct_latencies, 50),
+            "proxied_p50_ms": percentile_ms(proxied_latencies, 50),
+            "proxied_p99_ms": percentile_ms(proxied_latencies, 99),
+            "overhead_p50_ms": percentile_ms(proxied_latencies, 50) - percentile_ms(direct_latencies, 50)
+        }
+
+    async def _upload(self, megabytes: float) -> str:
+        # A fresh file each time, so every upload is stored rather than deduplicated
+        chunk = os.urandom(64 * 1024)
+        chunks = max(1, int(megabytes * 16))
+        marker = uuid.uuid4().bytes
+
+        async def body():
+            yield marker
+            for _ in range(chunks):
+                yield chunk
+
+        response = expect(await self.gateway.post(
+            "/api/upload/", params={"filename": "quarterly-report.pdf"}, content=body(),
+            headers={**self.headers, "Content-Type": "application/pdf"}
+        ))
+        return response.json()["file_id"]
+
+    async def upload(self) -> dict:
+        await self._upload(1)
+        latencies, elapsed = await drive(lambda: self._upload(self.args.upload_mb), self.args.uploads, 1)
+        return {
+            "mb_per_s": self.args.uploads * self.args.upload_mb / elapsed,
+            "p50_ms": percentile_ms(latencies, 50)
+        }
+
+    async def _generate(self):
+        file_id = await self._upload(1)
+        expect(await self.gateway.post(
+            "/api/services/document-processor/process", json={"file_id": file_id}, headers=self.headers
+        ))
+        deck = expect(await self.gateway.post(
+            "/api/services/ai-generator/generate",
+            json={"prompt": "Quarterly business review", "slide_count": self.args.slides}, headers=self.headers
+        )).json()
+        async with self.gateway.stream(
+            "POST", "/api/services/presentation-renderer/render", json=deck, headers=self.headers
+        ) as response:
+            expect(response)
+            async for _ in response.aiter_raw():
+                pass
+
+    async def generation(self) -> dict:
+        await self._generate()
+        sequential, _ = await drive(self._generate, max(3, self.args.generations // 4), 1)
+        _, elapsed = await drive(self._generate, self.args.generations, self.args.concurrency)
+        injected_ms = self.args.process_ms + self.args.generate_ms + self.args.render_ms
+        return {
+            "generations_per_s": self.args.generations / elapsed,
+            "p50_ms": percentile_ms(sequential, 50),
+            "p99_ms": percentile_ms(sequential, 99),
+            "overhead_p50_ms": percentile_ms(sequential, 50) - injected_ms
+        }
+
+
+async def run_suite(args) -> dict:
+    password_hash = CryptContext(schemes=["bcrypt"], bcrypt__rounds=args.bcrypt_rounds).hash(PASSWORD)
+    database = MemoryDatabase(password_hash, args.db_latency_ms / 1000)
+
+    async def memory_db():
+        yield MemorySession(database)
+
+    def fake_redis(url, **options):
+        client = SlowFakeRedis(**options)
+        client.latency = args.redis_latency_ms / 1000
+        return client
+
+    async def no_database():
+        pass
+
+    services = {
+        name: await serve(service_app(args))
+        for name in ("document_processor", "ai_generator", "presentation_renderer")
+    }
+    upload_directory = tempfile.TemporaryDirectory(prefix="bench-uploads-")
+    settings.document_processor_url = services["document_processor"].url
+    settings.ai_generator_url = services["ai_generator"].url
+    settings.presentation_renderer_url = services["presentation_renderer"].url
+    settings.upload_directory = upload_directory.name
+    settings.bcrypt_rounds = args.bcrypt_rounds
+    gateway_main.init_db = gateway_main.close_db = no_database
+    gateway_main.redis = SimpleNamespace(from_url=fake_redis)
+    app = gateway_main.app
+    app.dependency_overrides[get_db] = memory_db
+
+    results = {}
+    try:
+        async with app.router.lifespan_context(app):
+            transport = httpx.ASGITransport(app=app, client=("127.0.0.1", 50000))
+            async with httpx.AsyncClient(transport=transport, base_url="http://gateway", timeout=60) as gateway:
+                suite = Suite(args, gateway, services)
+                await suite.log_in()
+                for scenario in args.scenarios:
+                    runs = []
+                    for _ in range(args.repeat):
+                        runs.append(await getattr(suite, scenario)())
+                    results[scenario] = {
+                        metric: round(statistics.median(run[metric] for run in runs), 3) for metric in runs[0]
+                    }
+                    print(f"  {scenario:<14} " + "  ".join(f"{k}={v}" for k, v in results[scenario].items()))
+    finally:
+        for server in services.values():
+            server.should_exit = True
+        await asyncio.gather(*(server.task for server in services.values()))
+        upload_directory.cleanup()
+    return results
+
+
+# Baseline comparison
+
+# Reported for context but not gated: they time the stand-ins, not the gateway
+REFERENCE_METRICS = {("proxy", "direct_p50_ms")}
+
+CONFIG_KEYS = [
+    "logins", "requests", "concurrency", "uploads", "upload_mb", "generations", "slides", "slide_kb",
+    "echo_bytes", "bcrypt_rounds", "db_latency_ms", "redis_latency_ms", "process_ms", "generate_ms", "render_ms"
+]
+
+
+def compare(baseline: dict, current: dict, tolerance: float, min_delta_ms: float) -> list:
+    """Print current against baseline results; returns the regressed (scenario, metric) pairs"""
+    differing = [
+        key for key in CONFIG_KEYS
+        if baseline["meta"]["config"].get(key) != current["meta"]["config"].get(key)
+    ]
+    if differing:
+        print(f"\n⚠️  Settings differ from the baseline ({', '.join(differing)}); the comparison is only indicative")
+    if baseline["meta"].get("machine") != current["meta"]["machine"]:
+        print("⚠️  The baseline was recorded on another machine; record a local one with --update-baseline")
+
+    regressions = []
+    print(f"\n  {'scenario':<14} {'metric':<20} {'baseline':>10} {'current':>10} {'change':>8}")
+    for scenario, metrics in current["results"].items():
+        for metric, value in metrics.items():
+            base = baseline["results"].get(scenario, {}).get(metric)
+            if base is None:
+                print(f"  {scenario:<14} {metric:<20} {'-':>10} {value:10.3f}")
+                continue
+            change = (value - base) / abs(base) if base else 0.0
+            if (scenario, metric) in REFERENCE_METRICS:
+                worse = False
+            elif metric.endswith("_ms"):
+                worse = value - base > max(min_delta_ms, tolerance * abs(base))
+            else:
+                worse = change < -tolerance
+            if worse:
+                regressions.append((scenario, metric))
+            flag = "  REGRESSION" if worse else ""
+            print(f"  {scenario:<14} {metric:<20} {base:10.3f} {value:10.3f} {change:+7.1%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline gateway benchmark suite")
+    parser.add_argument("--scenarios", nargs="*", choices=SCENARIOS, default=SCENARIOS)
+    parser.add_argument("--repeat", type=int, default=3, help="runs per scenario; metrics are medians")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline JSON, or 'none' to skip comparing")
+    parser.add_argument("--update-baseline", action="store_true", help="store these results as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.3, help="relative change counted as a regression")
+    parser.add_argument("--min-delta-ms", type=float, default=0.25, help="smallest latency increase counted")
+
+    load = parser.add_argument_group("load")
+    load.add_argument("--logins", type=int, default=24)
+    load.add_argument("--requests", type=int, default=400, help="requests per latency or throughput run")
+    load.add_argument("--concurrency", type=int, default=8)
+    load.add_argument("--uploads", type=int, default=4)
+    load.add_argument("--upload-mb", type=float, default=16)
+    load.add_argument("--generations", type=int, default=12)
+    load.add_argument("--slides", type=int, default=20)
+    load.add_argument("--slide-kb", type=int, default=64, help="rendered size per slide")
+    load.add_argument("--echo-bytes", type=int, default=2048)
+    load.add_argument("--bcrypt-rounds", type=int, default=10)
+
+    latency = parser.add_argument_group("injected latency")
+    latency.add_argument("--db-latency-ms", type=float, default=0.0, help="per statement")
+    latency.add_argument("--redis-latency-ms", type=float, default=0.0, help="per command")
+    latency.add_argument("--process-ms", type=float, default=50.0, help="document-processor /process")
+    latency.add_argument("--generate-ms", type=float, default=200.0, help="ai-generator /generate")
+    latency.add_argument("--render-ms", type=float, default=100.0, help="presentation-renderer /render")
+    args = parser.parse_args()
+
+    # A log line per proxied request would be measured along with the gateway
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    print(f"🏁 Gateway benchmark suite: {', '.join(args.scenarios)} (median of {args.repeat})")
+    results = asyncio.run(run_suite(args))
+    current = {
+        "meta": {
+            "recorded_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "machine": {
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "processor": platform.machine(),
+                "cpus": os.cpu_count()
+            },
+            "config": {key: getattr(args, key) for key in CONFIG_KEYS}
+        },
+        "results": results
+    }
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(current, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+    if args.update_baseline and args.baseline != "none":
+        with open(args.baseline, "w") as f:
+            json.dump(current, f, indent=2)
+            f.write("\n")
+        print(f"Baseline updated: {args.baseline}")
+        return
+
+    if args.baseline == "none" or not os.path.exists(args.baseline):
+        if args.baseline != "none":
+            print(f"\nNo baseline at {args.baseline}; record one with --update-baseline")
+        return
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare(baseline, current, args.tolerance, args.min_delta_ms)
+    if regressions:
+        print(f"\n❌ {len(regressions)} regression(s): " + ", ".join(f"{s}.{m}" for s, m in regressions))
+        sys.exit(1)
+    print("\n✅ No regressions against the baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+"""
+Real-time task event load test.
+
+Starts the gateway's task event router in a separate server process (with
+in-process fakeredis as the pub/sub backend) and then, from this process:
+
+  1. opens `--idle` WebSockets that follow tasks which never report, and
+     records the server's memory per connection
+  2. opens `--active` WebSockets spread over `--tasks` tasks, publishes
+     `--rate` events per second to task.updates for `--duration` seconds,
+     and measures publish-to-receive latency on the clients
+  3. has `--slow` of the active clients follow up to 100 tasks each but stop
+     reading for the whole run, so once their socket buffers are full their
+     progress events are coalesced or dropped instead of queueing without bound
+
+The server keeps one Redis subscription however many clients connect.
+
+    python scripts/bench-task-events.py --idle 10000 --active 1000 --rate 500
+"""
+import argparse
+import asyncio
+import base64
+from contextlib import asynccontextmanager
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import uuid
+
+import httpx
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend", "gateway"))
+
+
+def current_rss_mb() -> float:
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024
+
+
+def serve(port: int):
+    """Server process: the tasks router on a hub fed by fakeredis, plus bench-only endpoints"""
+    import fakeredis
+    import uvicorn
+    from fastapi import FastAPI
+
+    from app.routers import tasks as tasks_router
+    from app.services.task_events import TaskEventHub
+    from app.services.user_cache import UserCache
+
+    async def owned_tasks(user_id, task_ids):
+        return task_ids
+
+    tasks_router.owned_tasks = owned_tasks  # no database here: every task belongs to its requester
+
+    @asynccontextmanager
+    async def lifespan(app):
+        app.task_events.start()
+        yield
+        await app.task_events.stop()
+
+    app = FastAPI(lifespan=lifespan)
+    app.include_router(tasks_router.router, prefix="/api/tasks")
+    redis_client = fakeredis.FakeAsyncRedis(decode_responses=True)
+    app.user_cache = UserCache(redis_client, channel="cache.invalidation")
+    app.task_events = TaskEventHub(redis_client, ["task.updates", "user.notifications"], max_clients=50000)
+
+    @app.get("/bench/stats")
+    async def stats():
+        return {"rss_mb": current_rss_mb(), **app.task_events.stats()}
+
+    @app.post("/bench/publish")
+    async def publish(spec: dict):
+        """Publish `rate` events/s for `duration` seconds over `task_ids`; one in ten is a status change"""
+        interval = 1.0 / spec["rate"]
+        deadline = time.monotonic() + spec["duration"]
+        next_at = time.monotonic()
+        sent = 0
+        while time.monotonic() < deadline:
+            task_id = random.choice(spec["task_ids"])
+            event = "task_status" if sent % 10 == 0 else "task_progress"
+            await redis_client.publish("task.updates", json.dumps({
+                "event": event, "task_id": task_id, "progress": sent % 100, "sent": time.time(),
+                # Random, so permessage-deflate can't shrink it away
+                "pad": base64.b64encode(os.urandom(spec["payload_bytes"] * 3 // 4)).decode()
+            }))
+            sent += 1
+            next_at += interval
+            await asyncio.sleep(max(0.0, next_at - time.monotonic()))
+        return {"sent": sent}
+
+    uvicorn.run(app, host="127.0.0.1", port=port, log_level="error", ws_max_queue=32, backlog=4096)
+
+
+class Client:
+    def __init__(self, connection, slow: bool = False):
+        self.connection = connection
+        self.slow = slow
+        self.latencies = []
+        self.received = 0
+        self.task = None
+
+    async def read(self):
+        try:
+            async for message in self.connection:
+                event = json.loads(message)
+                if "sent" in event:
+                    self.latencies.append(time.time() - event["sent"])
+                self.received += 1
+        except Exception:
+            pass
+
+
+async def open_clients(url, token, task_ids, concurrency, slow_count=0):
+    from websockets.asyncio.client import connect
+
+    semaphore = asyncio.Semaphore(concurrency)
+    clients = []
+
+    async def open_one(index, task_id):
+        async with semaphore:
+            sock = None
+            if index < slow_count:
+                # A small receive window, so the server's buffers fill as they would for a stalled browser
+                sock = socket.socket()
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+                sock.setblocking(False)
+                await asyncio.get_running_loop().sock_connect(sock, ("127.0.0.1", int(url.split(":")[2].split("/")[0])))
+            connection = await connect(
+                f"{url}?token={token(index)}&task_id={task_id}",
+                max_queue=1, ping_interval=None, open_timeout=60, sock=sock
+            )
+            clients.append(Client(connection, slow=index < slow_count))
+
+    await asyncio.gather(*(open_one(index, task_id) for index, task_id in enumerate(task_ids)))
+    return clients
+
+
+async def main_async(args):
+    from jose import jwt
+    from app.core.config import settings
+
+    port = args.port
+    server = subprocess.Popen([sys.executable, __file__, "--serve", str(port)], cwd=os.getcwd())
+    base = f"http://127.0.0.1:{port}"
+    ws_url = f"ws://127.0.0.1:{port}/api/tasks/ws"
+    tokens = {}
+
+    def token(index):
+        if index not in tokens:
+            tokens[index] = jwt.encode(
+                {"sub": str(uuid.uuid4()), "exp": time.time() + 3600},
+                settings.jwt_secret_key, algorithm=settings.jwt_algorithm
+            )
+        return tokens[index]
+
+    try:
+        async with httpx.AsyncClient(base_url=base, timeout=600) as http:
+            for _ in range(100):
+                try:
+                    baseline = (await http.get("/bench/stats")).json()
+                    break
+                except httpx.HTTPError:
+                    await asyncio.sleep(0.2)
+
+            started = time.perf_counter()
+            idle = await open_clients(ws_url, lambda i: token(i), [str(uuid.uuid4()) for _ in range(args.idle)], 200)
+            opened = time.perf_counter() - started
+            idle_stats = (await http.get("/bench/stats")).json()
+            per_connection_kb = (idle_stats["rss_mb"] - baseline["rss_mb"]) * 1024 / max(1, args.idle)
+            print(
+                f"{args.idle} idle WebSockets opened in {opened:.1f}s; server RSS "
+                f"{baseline['rss_mb']:.0f} -> {idle_stats['rss_mb']:.0f} MB ({per_connection_kb:.1f} KB per connection)"
+            )
+
+            task_ids = [str(uuid.uuid4()) for _ in range(args.tasks)]
+            active = await open_clients(
+                ws_url, lambda i: token(args.idle + i),
+                [task_ids[index % args.tasks] for index in range(args.active)], 200, slow_count=args.slow
+            )
+            for client in active:
+                if client.slow:
+                    await client.connection.send(json.dumps({"subscribe": task_ids[:100]}))
+                else:
+                    client.task = asyncio.create_task(client.read())
+            await asyncio.sleep(0.5)
+
+            result = (await http.post("/bench/publish", json={
+                "rate": args.rate, "duration": args.duration, "task_ids": task_ids,
+                "payload_bytes": args.payload_bytes
+            })).json()
+            await asyncio.sleep(1.0)
+            stats = (await http.get("/bench/stats")).json()
+
+            readers = [client for client in active if not client.slow]
+            latencies = sorted(latency for client in readers for latency in client.latencies)
+            slow_tasks = min(100, args.tasks)
+            expected = result["sent"] * ((args.active - args.slow) + args.slow * (1 + slow_tasks)) // args.tasks
+            print(
+                f"\n{args.active} active clients on {args.tasks} tasks, {result['sent']} events in {args.duration:.0f}s "
+                f"({result['sent'] / args.duration:.0f}/s), {stats['deliveries']} deliveries (~{expected} expected)"
+            )
+            if latencies:
+                print(
+                    f"publish-to-receive p50 {statistics.median(latencies) * 1000:.1f} ms  "
+                    f"p99 {latencies[int(len(latencies) * 0.99) - 1] * 1000:.1f} ms  "
+                    f"max {latencies[-1] * 1000:.1f} ms over {len(latencies)} messages"
+                )
+            print(
+                f"{args.slow} clients not reading: {stats['coalesced']} progress events coalesced, "
+                f"{stats['dropped']} dropped, {stats['slow_disconnects']} slow-consumer disconnects; "
+                f"{stats['queued']} events queued server-side in total"
+            )
+            print(f"server RSS {stats['rss_mb']:.0f} MB with {stats['clients']} clients and 1 Redis subscription")
+
+            for client in idle + active:
+                if client.task:
+                    client.task.cancel()
+            await asyncio.gather(*(client.connection.close() for client in idle + active), return_exceptions=True)
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the task event WebSocket fan-out")
+    parser.add_argument("--serve", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, default=18765)
+    parser.add_argument("--idle", type=int, default=10000)
+    parser.add_argument("--active", type=int, default=1000)
+    parser.add_argument("--tasks", type=int, default=200)
+    parser.add_argument("--slow", type=int, default=50)
+    parser.add_argument("--rate", type=float, default=200.0)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--payload-bytes", type=int, default=1024)
+    args = parser.parse_args()
+    if args.serve:
+        serve(args.serve)
+    else:
+        asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
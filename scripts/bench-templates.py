@@ -0,0 +1,151 @@
+"""
+Render throughput benchmark for the theme template registry.
+
+Renders a 50-slide deck repeatedly, once re-reading and re-parsing the theme
+.pptx for every render (the old behaviour) and once through TemplateRegistry,
+and reports renders/sec for each. The synthetic theme ships sample slides
+with pictures, like most corporate templates, unless --template is given.
+
+    python scripts/bench-templates.py --slides 50 --renders 40
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from io import BytesIO
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend", "presentation-renderer"))
+
+from pptx import Presentation
+from pptx.util import Inches
+
+from app.renderers.deck import _layout_name, add_slide
+from app.templates.registry import DEFAULT_TEMPLATE_PATH, TemplateRegistry, _strip_slides
+
+
+def build_theme(path, sample_slides=8, image_bytes=400_000):
+    """A theme file with sample slides carrying incompressible images"""
+    prs = Presentation(DEFAULT_TEMPLATE_PATH)
+    rng = random.Random(11)
+    try:
+        from PIL import Image
+        side = int((image_bytes / 3) ** 0.5)
+        image = Image.frombytes("RGB", (side, side), bytes(rng.getrandbits(8) for _ in range(side * side * 3)))
+    except ImportError:
+        image = None
+
+    for n in range(sample_slides):
+        slide = prs.slides.add_slide(prs.slide_layouts[n % 2])
+        slide.shapes.title.text = f"Sample {n + 1}"
+        if image is not None:
+            buffer = BytesIO()
+            image.save(buffer, "PNG")
+            buffer.seek(0)
+            slide.shapes.add_picture(buffer, Inches(1), Inches(2), width=Inches(3))
+    prs.save(path)
+
+
+def make_deck(count):
+    slides = [{"title": "Quarterly Business Review", "subtitle": "Generated deck"}]
+    for n in range(1, count):
+        slides.append({
+            "title": f"Slide {n + 1}",
+            "bullets": [f"Point {n}.{i}: revenue, margin and roadmap detail" for i in range(5)],
+            "notes": f"Speaker notes for slide {n + 1}"
+        })
+    return slides
+
+
+def render_uncached(path, slides):
+    """Open and walk the theme file for every render, then build slides with plain python-pptx"""
+    prs = Presentation(path)
+    _strip_slides(prs)
+    layouts = {layout.name: layout for layout in reversed(list(prs.slide_layouts))}
+    for index, slide in enumerate(slides):
+        layout = layouts[_layout_name(slide, index)]
+        pptx_slide = prs.slides.add_slide(layout)
+        pptx_slide.shapes.title.text = slide["title"]
+        body = [shape for shape in pptx_slide.placeholders if shape.placeholder_format.idx == 1]
+        bullets = slide.get("bullets") or [slide["subtitle"]]
+        if body:
+            body[0].text_frame.text = bullets[0]
+            for bullet in bullets[1:]:
+                body[0].text_frame.add_paragraph().text = bullet
+        if slide.get("notes"):
+            pptx_slide.notes_slide.notes_text_frame.text = slide["notes"]
+    return prs
+
+
+def render_cached(registry, theme, slides):
+    master, prs = registry.new_presentation(theme)
+    for index, slide in enumerate(slides):
+        add_slide(prs, master, slide, index)
+    return prs
+
+
+def _saved(prs):
+    buffer = BytesIO()
+    prs.save(buffer)
+    buffer.seek(0)
+    return buffer
+
+
+def run(label, render, renders, save):
+    render()  # warm up imports and lazy initialisation
+    started = time.perf_counter()
+    for _ in range(renders):
+        prs = render()
+        if save:
+            _saved(prs)
+    elapsed = time.perf_counter() - started
+    print(f"{label:<10} {renders / elapsed:8.1f} renders/s  {elapsed / renders * 1000:8.1f} ms/render")
+    return renders / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark template registry render throughput")
+    parser.add_argument("--slides", type=int, default=50)
+    parser.add_argument("--renders", type=int, default=40)
+    parser.add_argument("--template", help="Theme .pptx to use instead of the synthetic one")
+    parser.add_argument("--save", action="store_true", help="Include saving each deck in the timing")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        theme = "bench"
+        path = os.path.join(directory, f"{theme}.pptx")
+        if args.template:
+            with open(args.template, "rb") as src, open(path, "wb") as dst:
+                dst.write(src.read())
+        else:
+            build_theme(path)
+        slides = make_deck(args.slides)
+        registry = TemplateRegistry(directory=directory, default_theme=theme)
+
+        print(f"Theme: {os.path.getsize(path) / 1024:.0f} KiB, deck: {args.slides} slides, {args.renders} renders")
+        uncached = run("uncached", lambda: render_uncached(path, slides), args.renders, args.save)
+        cached = run("cached", lambda: render_cached(registry, theme, slides), args.renders, args.save)
+        print(f"\nSpeedup: {cached / uncached:.2f}x")
+
+        # Both paths must produce the same deck text
+        def deck_text(prs):
+            return [
+                [shape.text_frame.text for shape in slide.placeholders if shape.has_text_frame]
+                + [slide.notes_slide.notes_text_frame.text if slide.has_notes_slide else ""]
+                for slide in Presentation(_saved(prs)).slides
+            ]
+        same = deck_text(render_uncached(path, slides)) == deck_text(render_cached(registry, theme, slides))
+        print(f"Output matches: {'ok' if same else 'FAILED'}")
+
+        # Hot reload: touching the file must produce a new master on the next check
+        before = registry.get(theme)
+        build_theme(path, sample_slides=2)
+        os.utime(path, (time.time() + 5, time.time() + 5))
+        registry._checked_at.clear()
+        after = registry.get(theme)
+        print(f"Hot reload: {'ok' if after is not before else 'FAILED'} (reloads={registry.reloads})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+import asyncio
+import logging
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import fakeredis
+import httpx
+
+from backend.shared.jobs import JobQueue, JobTraceLogFilter, JobWorker, current_job_trace, inject_job_trace_headers
+
+REQUEST_ID = "req-42"
+TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+TRACEPARENT = f"00-{TRACE_ID}-00f067aa0ba902b7-01"
+
+
+def check(name, condition, detail=""):
+    print(f"{'✅' if condition else '❌'} {name}" + (f" ({detail})" if detail else ""))
+    return condition
+
+
+class Records(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.addFilter(JobTraceLogFilter())
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+async def run_jobs(queue, handler, count):
+    done = asyncio.Event()
+    seen = []
+
+    async def counting(job):
+        try:
+            await handler(job)
+        finally:
+            seen.append(job)
+            if len(seen) == count:
+                done.set()
+
+    worker = JobWorker(queue, counting, block=0.05)
+    await worker.start()
+    try:
+        await asyncio.wait_for(done.wait(), 5)
+    finally:
+        await worker.shutdown()
+    return seen
+
+
+async def main():
+    print("🧪 Testing request and trace IDs through the job queue...")
+    redis = fakeredis.FakeAsyncRedis(decode_responses=True)
+    queue = JobQueue(redis, "tracing", trace_context=lambda: (REQUEST_ID, TRACEPARENT))
+    await queue.setup()
+
+    logger = logging.getLogger("job-handler")
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    records = Records()
+    logger.addHandler(records)
+
+    upstream = []
+
+    def answer(request):
+        upstream.append(request.headers)
+        return httpx.Response(200)
+
+    client = httpx.AsyncClient(
+        transport=httpx.MockTransport(answer),
+        event_hooks={"request": [inject_job_trace_headers]}
+    )
+
+    async def handler(job):
+        logger.info(f"Running {job.type}")
+        await client.get("http://document-processor/health")
+        if job.type == "first":
+            await queue.enqueue("chained", {})
+
+    await queue.enqueue("first", {})
+    await queue.enqueue("untraced", {}, request_id="", traceparent="")
+    seen = await run_jobs(queue, handler, 3)
+    await client.aclose()
+
+    by_type = {job.type: job for job in seen}
+    first = by_type["first"]
+    ok = check(
+        "enqueue takes the IDs from trace_context",
+        first.request_id == REQUEST_ID and first.traceparent == TRACEPARENT,
+        f"{first.request_id}, {first.traceparent}"
+    )
+
+    logged = {record.getMessage(): record.request_id for record in records.records}
+    ok &= check("Handler logs carry the request ID", logged.get("Running first") == REQUEST_ID, str(logged))
+
+    traced = [headers for headers in upstream if headers.get("x-request-id") == REQUEST_ID]
+    parents = [headers["traceparent"].split("-") for headers in traced]
+    ok &= check(
+        "Handler calls carry the request ID and a span in the job's trace",
+        len(traced) == 2 and all(parent[1] == TRACE_ID and parent[2] != "00f067aa0ba902b7" for parent in parents),
+        f"{len(traced)} traced calls"
+    )
+
+    chained = by_type["chained"]
+    ok &= check(
+        "Jobs enqueued by a handler continue its trace",
+        chained.request_id == REQUEST_ID and chained.traceparent.split("-")[1] == TRACE_ID
+        and logged.get("Running chained") == REQUEST_ID
+    )
+    ok &= check(
+        "Jobs without IDs run without a trace",
+        logged.get("Running untraced") == "-" and len(upstream) - len(traced) == 1
+    )
+    ok &= check("No trace left current after the jobs", current_job_trace() is None)
+
+    print("\n🎯 All job tracing tests passed!" if ok else "\n❌ Some job tracing tests failed")
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if asyncio.run(main()) else 1)
@@ -0,0 +1,165 @@
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend", "ai-generator"))
+
+import fakeredis
+
+from app.models.backends import FakeModelBackend, ModelBackendError
+from app.services.response_cache import ResponseCache, is_deterministic
+from app.services.scheduler import BatchScheduler, ModelLimits
+
+GREEDY = {"temperature": 0, "max_tokens": 256}
+
+
+class BrokenRedis:
+    """Fails every command, like a Redis that is down"""
+
+    def __getattr__(self, name):
+        async def fail(*args, **kwargs):
+            raise ConnectionError("Redis unavailable")
+        return fail
+
+
+def check(name, condition, detail=""):
+    print(f"{'✅' if condition else '❌'} {name}" + (f" ({detail})" if detail else ""))
+    return condition
+
+
+def new_redis(server=None):
+    # Values are compressed bytes, so no decode_responses
+    return fakeredis.FakeAsyncRedis(server=server or fakeredis.FakeServer())
+
+
+def counting(response="Outline", delay=0.0, fail=False):
+    calls = []
+
+    async def generate():
+        calls.append(1)
+        if delay:
+            await asyncio.sleep(delay)
+        if fail:
+            raise ModelBackendError("model failed")
+        return response
+
+    return generate, calls
+
+
+def test_determinism():
+    ok = check("Explicit temperature 0 is cached", is_deterministic({"temperature": 0}))
+    ok &= check("A seed is cached", is_deterministic({"temperature": 0.7, "seed": 42}))
+    ok &= check("Missing temperature is not cached", not is_deterministic({}))
+    ok &= check("Sampling temperature is not cached", not is_deterministic({"temperature": 0.8}))
+    return ok
+
+
+async def test_hits_and_misses():
+    cache = ResponseCache(new_redis())
+    generate, calls = counting()
+    first = await cache.get_or_generate("qwen2.5", "Outline  the deck\r\n", generate, GREEDY)
+    second = await cache.get_or_generate("qwen2.5", "Outline the deck", generate, GREEDY)
+    other = await cache.get_or_generate("qwen2.5", "Outline the deck", generate, {**GREEDY, "max_tokens": 512})
+    stats = cache.stats()
+    ok = check("Miss then hit for a whitespace variant", first == second == "Outline" and len(calls) == 2, f"{len(calls)} model calls")
+    ok &= check("Different sampling parameters miss", other == "Outline" and stats["misses"] == 2)
+    ok &= check("Hit rate counted", stats["hits"] == 1 and stats["hit_rate"] == round(1 / 3, 4), str(stats["hit_rate"]))
+
+    generate, calls = counting()
+    await cache.get_or_generate("qwen2.5", "Outline the deck", generate, {})
+    await cache.get_or_generate("qwen2.5", "Outline the deck", generate, {})
+    ok &= check("Calls without temperature bypass the cache", len(calls) == 2 and cache.stats()["bypassed"] == 2)
+    await cache.get_or_generate("qwen2.5", "Sampled", generate, {"temperature": 0.8}, cache=True)
+    await cache.get_or_generate("qwen2.5", "Sampled", generate, {"temperature": 0.8}, cache=True)
+    ok &= check("cache=True caches sampled output", len(calls) == 3)
+    return ok
+
+
+async def test_coalescing():
+    cache = ResponseCache(new_redis())
+    generate, calls = counting(delay=0.05)
+    results = await asyncio.gather(*[
+        cache.get_or_generate("qwen2.5", "Same prompt", generate, GREEDY) for _ in range(10)
+    ])
+    ok = check("Identical concurrent calls share one model call", len(calls) == 1, f"{len(calls)} model calls")
+    ok &= check("Every caller gets the response", results == ["Outline"] * 10)
+    ok &= check("Coalesced callers counted", cache.stats()["coalesced"] == 9, str(cache.stats()["coalesced"]))
+    return ok
+
+
+async def test_cross_worker_lock():
+    server = fakeredis.FakeServer()
+    workers = [ResponseCache(new_redis(server), poll_interval=0.01) for _ in range(3)]
+    generate, calls = counting(delay=0.1)
+    results = await asyncio.gather(*[
+        worker.get_or_generate("qwen2.5", "Same prompt", generate, GREEDY) for worker in workers
+    ])
+    ok = check("Workers sharing Redis make one model call", len(calls) == 1, f"{len(calls)} model calls")
+    ok &= check("Waiting workers read the stored response", results == ["Outline"] * 3)
+    ok &= check(
+        "Waiting workers counted",
+        sum(worker.stats()["remote_waits"] for worker in workers) == 2
+        and sum(worker.stats()["hits"] for worker in workers) == 2
+    )
+    ok &= check("Lock released", not await new_redis(server).keys("*:lock"))
+    return ok
+
+
+async def test_errors():
+    redis = new_redis()
+    cache = ResponseCache(redis)
+    failing, calls = counting(delay=0.05, fail=True)
+    results = await asyncio.gather(*[
+        cache.get_or_generate("qwen2.5", "Fails", failing, GREEDY) for _ in range(3)
+    ], return_exceptions=True)
+    ok = check(
+        "A failed call fails every coalesced caller",
+        len(calls) == 1 and all(isinstance(result, ModelBackendError) for result in results)
+    )
+    ok &= check("Failures are not stored and the lock is released", not await redis.keys("*"))
+    generate, calls = counting()
+    ok &= check("The next call runs the model again", await cache.get_or_generate("qwen2.5", "Fails", generate, GREEDY) == "Outline")
+
+    cache = ResponseCache(BrokenRedis())
+    generate, calls = counting()
+    results = [await cache.get_or_generate("qwen2.5", "Redis down", generate, GREEDY) for _ in range(2)]
+    ok &= check(
+        "Redis down: calls still answered by the model",
+        results == ["Outline"] * 2 and len(calls) == 2 and cache.stats()["errors"] > 0,
+        f"{cache.stats()['errors']} errors"
+    )
+    return ok
+
+
+async def test_scheduler():
+    backend = FakeModelBackend(lambda prompt: f"Answer to {prompt}", call_latency=0.02)
+    scheduler = BatchScheduler({"qwen2.5": backend}, {"qwen2.5": ModelLimits()}, response_cache=ResponseCache(new_redis()))
+    try:
+        prompts = ["Slide 1", "Slide 2"] * 5
+        results = await asyncio.gather(*[scheduler.submit("qwen2.5", prompt, GREEDY) for prompt in prompts])
+        again = await scheduler.submit("qwen2.5", "Slide 1", GREEDY)
+        queued = scheduler.stats()["qwen2.5"]["submitted"]
+        ok = check("Scheduler: answers match prompts", results == [f"Answer to {prompt}" for prompt in prompts])
+        ok &= check("Scheduler: only distinct prompts reach the queue", queued == 2, f"{queued} queued")
+        ok &= check("Scheduler: repeated prompt served from cache", again == "Answer to Slide 1" and scheduler.stats()["qwen2.5"]["submitted"] == 2)
+        return ok
+    finally:
+        await scheduler.stop()
+
+
+async def main():
+    print("🧪 Testing the model response cache...")
+    results = [
+        test_determinism(),
+        await test_hits_and_misses(),
+        await test_coalescing(),
+        await test_cross_worker_lock(),
+        await test_errors(),
+        await test_scheduler()
+    ]
+    print("\n🎯 All response cache tests passed!" if all(results) else "\n❌ Some response cache tests failed")
+    return all(results)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if asyncio.run(main()) else 1)
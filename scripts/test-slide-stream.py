@@ -0,0 +1,120 @@
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend", "ai-generator"))
+
+from app.generators.slide_stream import SlideStreamGenerator
+from app.models.backends import FakeModelBackend, ModelBackendError
+from app.utils.json_stream import IncrementalSlideParser
+
+SLIDES = [
+    {"title": f"Slide {n}", "bullets": [f"Point {n}.{i} with \"quotes\" and {{braces}}" for i in range(4)],
+     "chart": {"type": "bar", "data": [n, n + 1, n + 2]} if n % 3 == 0 else None}
+    for n in range(1, 11)
+]
+DECK = json.dumps({"title": "Quarterly Review", "slides": SLIDES}, indent=2)
+
+
+class RecordingRedis:
+    """Collects published events instead of sending them to Redis"""
+
+    def __init__(self):
+        self.events = []
+
+    async def publish(self, channel, message):
+        self.events.append((channel, json.loads(message), time.perf_counter()))
+        return 1
+
+
+def check(name, condition, detail=""):
+    print(f"{'✅' if condition else '❌'} {name}" + (f" ({detail})" if detail else ""))
+    return condition
+
+
+def feed_all(text, chunk_size):
+    parser = IncrementalSlideParser()
+    slides = []
+    for start in range(0, len(text), chunk_size):
+        slides += parser.feed(text[start:start + chunk_size])
+    return slides, parser.close()
+
+
+async def test_stream_publishes_slides_early():
+    redis = RecordingRedis()
+    backend = FakeModelBackend(DECK, chunk_size=16, delay=0.002)
+    generator = SlideStreamGenerator(backend, redis, channels=["task.updates"])
+
+    started = time.perf_counter()
+    state = await generator.generate("Quarterly review", task_id="task-1")
+    total = time.perf_counter() - started
+
+    slide_events = [event for _, event, _ in redis.events if event["event"] == "slide_generated"]
+    first_slide_at = next(at for _, event, at in redis.events if event["event"] == "slide_generated") - started
+    ok = check("Full deck streamed", [e["slide"] for e in slide_events] == SLIDES, f"{len(slide_events)} slides")
+    ok &= check("Completion event published", redis.events[-1][1]["event"] == "slides_completed")
+    ok &= check("Time to first slide well under total",
+                first_slide_at < total / 5, f"first={first_slide_at * 1000:.0f}ms total={total * 1000:.0f}ms")
+    return ok and state.complete
+
+
+def test_fragment_sizes():
+    results = [feed_all(DECK, size)[0] for size in (1, 7, 64, len(DECK))]
+    return check("Same slides for any fragment size", all(r == SLIDES for r in results))
+
+
+def test_truncated_output():
+    cut = DECK.index('"Slide 5"') + 20
+    slides, state = feed_all(DECK[:cut], 13)
+    ok = check("Truncated: completed slides kept", slides == SLIDES[:4], f"{len(slides)} slides")
+    ok &= check("Truncated: flagged", state.truncated and not state.complete)
+    ok &= check("Truncated: partial slide reported", [e.message for e in state.errors] == ["Truncated slide object"])
+    return ok
+
+
+def test_malformed_output():
+    text = (
+        '<think>Plan: {"slides": [not json]}</think>\n```json\n'
+        '{"slides": [{"title": "A"}, {"title": "B", "bullets": [1, 2,],}, '
+        '{"title": C unquoted}, {"title": "D"}]}\n```'
+    )
+    slides, state = feed_all(text, 5)
+    ok = check("Malformed: think block and fences skipped", slides[0] == {"title": "A"})
+    ok &= check("Malformed: trailing commas repaired", {"title": "B", "bullets": [1, 2]} in slides)
+    ok &= check("Malformed: bad slide skipped, later slides kept",
+                [s["title"] for s in slides] == ["A", "B", "D"])
+    ok &= check("Malformed: error reported", len(state.errors) == 1 and state.errors[0].index == 2)
+    return ok
+
+
+async def test_backend_failure():
+    redis = RecordingRedis()
+    backend = FakeModelBackend(DECK, chunk_size=32, fail_after=DECK.index('"Slide 3"'))
+    generator = SlideStreamGenerator(backend, redis, channels=["task.updates"])
+    try:
+        await generator.generate("Quarterly review", task_id="task-2")
+        return check("Backend failure raised", False)
+    except ModelBackendError:
+        pass
+    events = [event["event"] for _, event, _ in redis.events]
+    return check("Backend failure: slides before failure published, then slides_failed",
+                 events == ["slide_generated", "slide_generated", "slides_failed"], str(events))
+
+
+async def main():
+    print("🧪 Testing streamed slide generation...")
+    results = [
+        await test_stream_publishes_slides_early(),
+        test_fragment_sizes(),
+        test_truncated_output(),
+        test_malformed_output(),
+        await test_backend_failure()
+    ]
+    print("\n🎯 All slide stream tests passed!" if all(results) else "\n❌ Some slide stream tests failed")
+    return all(results)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if asyncio.run(main()) else 1)